@@ -0,0 +1,241 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Timing, history and regression detection for benchmarks.
+
+Each benchmark is run a number of times, and its median and 95th percentile run times are recorded, along with the hit
+rate of any memoized methods it calls (see build_profiler). The results of each run are appended to a json history
+file, and compared against a stored baseline to detect regressions.
+
+This doesn't depend on fusion, so that it can be tested outside of fusion. See benchmarks/benchmarks.py for the actual
+benchmarks, which need to be run from within fusion.
+"""
+
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import build_profiler
+
+history_version = 1
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """Returns the given percentile of the values, interpolating linearly between the closest ranks.
+
+    :param values: The values. There must be at least 1.
+    :param fraction: The percentile, from 0 to 1.
+    """
+    values = sorted(values)
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class Benchmark(object):
+    """A single benchmark.
+
+    :param name: The name of the benchmark.
+    :param func: The function to time. It's called with the result of setup, if specified.
+    :param setup: An optional function that's called before each run of func, and isn't included in the time.
+    """
+
+    def __init__(self, name: str, func: Callable[..., Any], setup: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.func = func
+        self.setup = setup
+
+
+class BenchmarkResult(object):
+    """The results of running a single benchmark.
+
+    :param name: The name of the benchmark.
+    :param samples: The run time of each run, in seconds.
+    :param memo_hits: The number of memoized calls that were served from the memo, across all runs.
+    :param memo_calls: The total number of memoized calls, across all runs.
+    """
+
+    def __init__(self, name: str, samples: Sequence[float], memo_hits: int = 0, memo_calls: int = 0):
+        self.name = name
+        self.samples = list(samples)
+        self.memo_hits = memo_hits
+        self.memo_calls = memo_calls
+
+    @property
+    def median(self) -> float:
+        return percentile(self.samples, .5)
+
+    @property
+    def p95(self) -> float:
+        return percentile(self.samples, .95)
+
+    @property
+    def memo_hit_rate(self) -> Optional[float]:
+        if not self.memo_calls:
+            return None
+        return self.memo_hits / self.memo_calls
+
+    def to_dict(self) -> dict:
+        return {
+            "samples": self.samples,
+            "median": self.median,
+            "p95": self.p95,
+            "memo_hits": self.memo_hits,
+            "memo_calls": self.memo_calls,
+            "memo_hit_rate": self.memo_hit_rate
+        }
+
+    @staticmethod
+    def from_dict(name: str, data: dict) -> "BenchmarkResult":
+        return BenchmarkResult(name, data["samples"], data.get("memo_hits", 0), data.get("memo_calls", 0))
+
+
+class Regression(object):
+    def __init__(self, name: str, baseline: float, current: float):
+        self.name = name
+        self.baseline = baseline
+        self.current = current
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline else float("inf")
+
+    def __str__(self):
+        return "%s: median %.4fs -> %.4fs (%.0f%% slower)" % (
+            self.name, self.baseline, self.current, (self.ratio - 1) * 100)
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int = 5, warmup: int = 1,
+                  profiler_setup: Optional[Callable[[build_profiler.BuildProfiler], None]] = None) -> BenchmarkResult:
+    """Runs the given benchmark.
+
+    :param benchmark: The benchmark to run.
+    :param repeat: The number of timed runs.
+    :param warmup: The number of untimed runs before the timed runs.
+    :param profiler_setup: A function that sets up what the given BuildProfiler profiles. Each timed run is run under a
+    new profiler, which is used to count the memo hits.
+    """
+    for _ in range(warmup):
+        benchmark.func(*_setup_args(benchmark))
+
+    samples = []
+    memo_hits = 0
+    memo_calls = 0
+    for _ in range(repeat):
+        args = _setup_args(benchmark)
+        profiler = build_profiler.BuildProfiler()
+        if profiler_setup:
+            profiler_setup(profiler)
+        with profiler:
+            start = time.perf_counter()
+            benchmark.func(*args)
+            samples.append(time.perf_counter() - start)
+        hits, calls = profiler.memo_stats()
+        memo_hits += hits
+        memo_calls += calls
+    return BenchmarkResult(benchmark.name, samples, memo_hits, memo_calls)
+
+
+def _setup_args(benchmark: Benchmark) -> tuple:
+    if benchmark.setup is None:
+        return ()
+    return (benchmark.setup(),)
+
+
+class BenchmarkHistory(object):
+    """A json file with the results of every benchmark run, and the baseline results to compare new runs against.
+
+    :param path: The path of the history file. It will be created when saved, if it doesn't exist.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self.runs: List[dict] = []
+        self.baseline: Dict[str, BenchmarkResult] = {}
+
+        if os.path.exists(path):
+            with open(path, "r") as history_file:
+                history = json.load(history_file)
+            if history.get("version") == history_version:
+                self.runs = history["runs"]
+                self.baseline = {
+                    name: BenchmarkResult.from_dict(name, data) for name, data in history["baseline"].items()}
+
+    def add_run(self, results: Sequence[BenchmarkResult], label: Optional[str] = None):
+        self.runs.append({
+            "time": time.time(),
+            "label": label,
+            "results": {result.name: result.to_dict() for result in results}
+        })
+
+    def set_baseline(self, results: Sequence[BenchmarkResult]):
+        """Sets the baseline for the given benchmarks. Any other benchmarks in the baseline are left as is."""
+        for result in results:
+            self.baseline[result.name] = result
+
+    def regressions(self, results: Sequence[BenchmarkResult], threshold: float = .2,
+                    min_difference: float = .001) -> List[Regression]:
+        """Returns the benchmarks whose median run time is worse than the baseline.
+
+        :param results: The results to check.
+        :param threshold: The fraction by which the median must have increased over the baseline, to count as a
+        regression.
+        :param min_difference: The minimum increase in seconds to count as a regression, so that noise in very fast
+        benchmarks isn't flagged.
+        """
+        regressions = []
+        for result in results:
+            baseline = self.baseline.get(result.name)
+            if baseline is None:
+                continue
+            if (result.median > baseline.median * (1 + threshold) and
+                    result.median - baseline.median > min_difference):
+                regressions.append(Regression(result.name, baseline.median, result.median))
+        return regressions
+
+    def save(self):
+        directory = os.path.dirname(self._path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = "%s.%d.tmp" % (self._path, os.getpid())
+        with open(temp_path, "w") as history_file:
+            json.dump({
+                "version": history_version,
+                "baseline": {name: result.to_dict() for name, result in self.baseline.items()},
+                "runs": self.runs
+            }, history_file, indent=2)
+        os.replace(temp_path, self._path)
+
+
+def report(results: Sequence[BenchmarkResult], history: Optional[BenchmarkHistory] = None) -> str:
+    """Returns a human-readable table of the given results, compared against the baseline if a history is given."""
+    name_width = max([len("Benchmark")] + [len(result.name) for result in results])
+    lines = ["%-*s  %10s  %10s  %9s  %9s" % (name_width, "Benchmark", "Median (s)", "p95 (s)", "Memo hits", "Baseline")]
+    for result in results:
+        hit_rate = result.memo_hit_rate
+        baseline = history.baseline.get(result.name) if history else None
+        lines.append("%-*s  %10.4f  %10.4f  %9s  %9s" % (
+            name_width, result.name, result.median, result.p95,
+            "-" if hit_rate is None else "%.0f%%" % (hit_rate * 100),
+            _baseline_change(result, baseline)))
+    return "\n".join(lines)
+
+
+def _baseline_change(result: BenchmarkResult, baseline: Optional[BenchmarkResult]) -> str:
+    if baseline is None or not baseline.median:
+        return "-"
+    return "%+.0f%%" % ((result.median / baseline.median - 1) * 100)
@@ -0,0 +1,313 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks for each of the finger and thumb cluster placement modes.
+
+Each benchmark times placing and building a positioned cluster assembly, using the same placements as
+finger_cluster_placement_test and thumb_cluster_placement_test. There are also benchmarks for the screw support
+parameters, which are needed once per support, for building a four cluster assembly and the name lookups it makes, and
+for checking an assembly-sized set of meshes for interferences.
+The results are appended to history.json in this directory, and compared against the baseline stored there. Set
+update_baseline to store the results of a run as the new baseline.
+"""
+
+import os
+
+from fscad.fscad import *
+relative_import("../lalboard.py")
+relative_import("../benchmark.py")
+relative_import("../geometry.py")
+relative_import("../mesh.py")
+relative_import("../thread_mesh.py")
+import benchmark
+import geometry
+import lalboard
+import mesh
+import thread_mesh
+
+# The names of the benchmarks to run. An empty list will run all benchmarks.
+benchmarks_to_run = []
+
+repeat = 5
+
+warmup = 1
+
+# Store the results of this run as the new baseline
+update_baseline = False
+
+# How much slower than the baseline a benchmark must be to be flagged as a regression
+regression_threshold = .2
+
+history_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "history.json")
+
+
+def finger_benchmarks(context: lalboard.Lalboard):
+    def previous_cluster():
+        return context.positioned_cluster_assembly(
+            lalboard.AbsoluteFingerClusterPlacement(context)
+                .set_cylindrical(116.53, 4.15, 31.09)
+                .set_rotation_by_euler_angles(13.45, -.16, 1.46))
+
+    def relative_cartesian(left_hand, gap):
+        def place(previous):
+            context.positioned_cluster_assembly(
+                lalboard.RelativeFingerClusterPlacement(context)
+                    .set_cartesian(120.09, 30.46, gap=gap)
+                    .set_rotation_by_euler_angles(13.12, -2.05, 14.03)
+                    .resolve(previous, left_hand=left_hand))
+        return place
+
+    def relative_cylindrical(left_hand, gap):
+        def place(previous):
+            context.positioned_cluster_assembly(
+                lalboard.RelativeFingerClusterPlacement(context)
+                    .set_cylindrical(121.40, 30.46, gap=gap)
+                    .set_rotation_by_euler_angles(13.12, -2.05, 14.03)
+                    .resolve(previous, left_hand=left_hand))
+        return place
+
+    benchmarks = [
+        benchmark.Benchmark(
+            "finger_absolute_cartesian",
+            lambda: context.positioned_cluster_assembly(
+                lalboard.AbsoluteFingerClusterPlacement(context)
+                    .set_cartesian(8.43, 116.23, 31.09)
+                    .set_rotation_by_euler_angles(13.45, -.16, 1.46))),
+        benchmark.Benchmark(
+            "finger_absolute_cylindrical",
+            lambda: context.positioned_cluster_assembly(
+                lalboard.AbsoluteFingerClusterPlacement(context)
+                    .set_cylindrical(116.53, 4.15, 31.09)
+                    .set_rotation_by_euler_angles(13.45, -.16, 1.46))),
+        benchmark.Benchmark(
+            "finger_support_lengths",
+            lambda: context.positioned_cluster_assembly(
+                lalboard.AbsoluteFingerClusterPlacement(context)
+                    .set_cylindrical(116.53, 4.15, 31.09)
+                    .set_rotation_by_support_lengths(23.36, 28.55, 28.60, 1.46))),
+    ]
+
+    for left_hand in (True, False):
+        hand = "left" if left_hand else "right"
+        for gap in (0.0, 1.25):
+            suffix = hand + ("_with_gap" if gap else "")
+            benchmarks.append(benchmark.Benchmark(
+                "finger_relative_cartesian_" + suffix, relative_cartesian(left_hand, gap), previous_cluster))
+            benchmarks.append(benchmark.Benchmark(
+                "finger_relative_cylindrical_" + suffix, relative_cylindrical(left_hand, gap), previous_cluster))
+    return benchmarks
+
+
+def thumb_benchmarks(context: lalboard.Lalboard):
+    def absolute_cartesian(left_hand):
+        return lambda: context.positioned_thumb_assembly(
+            lalboard.AbsoluteThumbClusterPlacement(context)
+                .set_cartesian(47.98, 81.74, 35.11)
+                .set_rotation_by_euler_angles(9.19, -2.67, 14.28),
+            left_hand=left_hand)
+
+    def support_lengths(left_hand):
+        return lambda: context.positioned_thumb_assembly(
+            lalboard.AbsoluteThumbClusterPlacement(context)
+                .set_cartesian(47.98, 81.74, 35.11)
+                .set_rotation_by_support_lengths(20.03, 23.97, 26.89, rz=14.28, left_hand=left_hand),
+            left_hand=left_hand)
+
+    def relative(left_hand, gap):
+        def place(handrest):
+            context.positioned_thumb_assembly(
+                lalboard.RelativeThumbClusterPlacement(context)
+                    .set_cartesian(81.74, 35.11, gap=gap)
+                    .set_rotation_by_euler_angles(9.19, -2.67, 14.28)
+                    .resolve(handrest, left_hand=left_hand),
+                left_hand=left_hand)
+        return place
+
+    def relative_solve(left_hand):
+        # Only the headless solve, without building the positioned assembly
+        return lambda handrest_cloud: lalboard.RelativeThumbClusterPlacement(context) \
+            .set_cartesian(81.74, 35.11) \
+            .set_rotation_by_euler_angles(9.19, -2.67, 14.28) \
+            .solve(handrest_cloud, left_hand=left_hand)
+
+    def handrest_cloud(left_hand):
+        return lambda: lalboard.placement_solver.PointCloud(context.surface_points(
+            context.handrest_design(left_hand=left_hand),
+            lalboard.RelativeThumbClusterPlacement._solver_sample_spacing))
+
+    benchmarks = []
+    for left_hand in (True, False):
+        hand = "left" if left_hand else "right"
+        benchmarks.append(benchmark.Benchmark("thumb_absolute_cartesian_" + hand, absolute_cartesian(left_hand)))
+        benchmarks.append(benchmark.Benchmark("thumb_support_lengths_" + hand, support_lengths(left_hand)))
+        for gap in (0.0, 5.55):
+            suffix = hand + ("_with_gap" if gap else "")
+            benchmarks.append(benchmark.Benchmark(
+                "thumb_relative_" + suffix, relative(left_hand, gap),
+                lambda left_hand=left_hand: context.handrest_design(left_hand=left_hand)))
+        benchmarks.append(benchmark.Benchmark(
+            "thumb_relative_solve_" + hand, relative_solve(left_hand), handrest_cloud(left_hand)))
+    return benchmarks
+
+
+def screw_benchmarks(context: lalboard.Lalboard):
+    def threaded_base_min_radius():
+        # The throwaway threads that screw_base_parameters used to build for every call, for measuring the time that
+        # the analytic calculation saves.
+        return Threads(Cylinder(10, 3.1), *context.screw_thread_profile()).size().x/2 + .8
+
+    return [
+        benchmark.Benchmark("screw_base_parameters", context.screw_base_parameters),
+        benchmark.Benchmark("screw_base_parameters_threads", threaded_base_min_radius),
+    ]
+
+
+def assembly_benchmarks(context: lalboard.Lalboard):
+    # The lookups made by positioned_cluster_assembly, add_standoffs and static_cluster_support for each cluster
+    lookup_paths = [
+        "front_magnet", "back_left_magnet", "back_right_magnet", "south_base", "east_base", "west_base", "north_base",
+        "central_magnet_cutout", "cluster_back/magnet_cutout", "cluster_front/magnet_cutout", "cluster_back/screw_hole",
+        "pcb/pcb_back_box"]
+
+    def four_clusters():
+        return [
+            context.positioned_cluster_assembly(
+                lalboard.AbsoluteFingerClusterPlacement(context)
+                    .set_cylindrical(116.53, angle, 31.09)
+                    .set_rotation_by_euler_angles(13.45, -.16, 1.46))
+            for angle in (-30.0, -10.0, 10.0, 30.0)]
+
+    def four_cluster_assembly():
+        for cluster in four_clusters():
+            context.add_standoffs(cluster)
+
+    def find_children_lookups(clusters):
+        for cluster in clusters:
+            for path in lookup_paths:
+                matches = [cluster]
+                for name in path.split("/"):
+                    matches = [match for parent in matches for match in parent.find_children(name)]
+
+    def name_index_lookups(clusters):
+        for cluster in clusters:
+            # A new index each time, so that building the index is included in the time
+            index = lalboard.name_index.NameIndex(cluster)
+            for path in lookup_paths:
+                index.find_path(path)
+
+    return [
+        benchmark.Benchmark("four_cluster_assembly", four_cluster_assembly),
+        benchmark.Benchmark("four_cluster_lookups_find_children", find_children_lookups, four_clusters),
+        benchmark.Benchmark("four_cluster_lookups_name_index", name_index_lookups, four_clusters),
+    ]
+
+
+def _grid_box_mesh(size, divisions: int) -> mesh.Mesh:
+    """Returns the mesh of a box with a corner at the origin, with each face split into a grid of divisions^2 quads."""
+    result = mesh.Mesh()
+    for axis in range(3):
+        u_axis, v_axis = (axis + 1) % 3, (axis + 2) % 3
+        for side in (0, 1):
+            first = len(result.vertices)
+            for i in range(divisions + 1):
+                for j in range(divisions + 1):
+                    point = [0.0, 0.0, 0.0]
+                    point[axis] = size[axis] * side
+                    point[u_axis] = size[u_axis] * i / divisions
+                    point[v_axis] = size[v_axis] * j / divisions
+                    result.add_vertex(point)
+            for i in range(divisions):
+                for j in range(divisions):
+                    corners = [first + i * (divisions + 1) + j, first + (i + 1) * (divisions + 1) + j,
+                               first + (i + 1) * (divisions + 1) + j + 1, first + i * (divisions + 1) + j + 1]
+                    # u x v points along +axis, so the far side is already counter-clockwise from outside
+                    result.add_quad(*(corners if side else reversed(corners)))
+    return result
+
+
+def interference_benchmarks(_):
+    """The interference check of an assembly about the size of a full assembly.
+
+    This doesn't mesh a real assembly, so that it doesn't depend on fusion's mesh calculator. Instead, it uses coarser
+    versions of the generated meshes of the screw supports, and boxes with finely divided faces for the cluster bodies
+    and the steel sheet, which comes to about 340k triangles over 51 bodies. There are 5 clusters, each on 3 standoffs
+    that stand on the sheet, and the second finger cluster overlaps the first by 1mm. So most of the pairs of bodies
+    are only touching, as in a real assembly.
+    """
+    cross_section, pitch = lalboard.thread_geometry.thread_profile()
+    part_meshes = {
+        name: thread_mesh.screw_support_mesh(name, cross_section, pitch, segments=48, samples_per_pitch=12)
+        for name in ("screw_base_8", "screw_11", "screw_nut")}
+    screw_top = max(vertex[2] for vertex in part_meshes["screw_11"].vertices)
+    cluster_size = (28, 28, 15)
+    cluster_mesh = _grid_box_mesh(cluster_size, 25)
+    sheet_size = (160, 110, 1)
+
+    def flatten(part_mesh: mesh.Mesh, offset):
+        return ([coordinate for vertex in part_mesh.vertices for coordinate in geometry.add(vertex, offset)],
+                [index for triangle in part_mesh.triangles for index in triangle])
+
+    def assembly():
+        """Returns the (name, node coordinates, node indices, group) of each body."""
+        bodies = [("steel_sheet", *flatten(_grid_box_mesh(sheet_size, 25), (-30, -70, -1)), "steel_sheet")]
+        for index, center in enumerate(((0, 0), (27, 0), (60, 0), (90, 0), (45, -45))):
+            cluster = "cluster_%d" % index
+            bodies.append((cluster, *flatten(
+                cluster_mesh, (center[0] - cluster_size[0] / 2, center[1] - cluster_size[1] / 2, screw_top)), cluster))
+            for standoff_index, offset in enumerate(((-7, -6), (7, -6), (0, 9))):
+                standoff = (center[0] + offset[0], center[1] + offset[1], 0)
+                for name, part_mesh in part_meshes.items():
+                    position = standoff if name != "screw_nut" else geometry.add(standoff, (0, 0, 8))
+                    bodies.append(("%s/%s_%d" % (cluster, name, standoff_index), *flatten(part_mesh, position),
+                                   cluster + "_standoffs"))
+        return bodies
+
+    def find_interferences(bodies):
+        return lalboard.interference.find_interferences(
+            [lalboard.interference.MeshBody(*body) for body in bodies])
+
+    return [benchmark.Benchmark("interference_assembly", find_interferences, assembly)]
+
+
+def run_benchmarks(context: lalboard.Lalboard):
+    def profiler_setup(profiler):
+        profiler.wrap_class(lalboard.Lalboard)
+
+    results = []
+    benchmarks = (finger_benchmarks(context) + thumb_benchmarks(context) + screw_benchmarks(context) +
+                  assembly_benchmarks(context) + interference_benchmarks(context))
+    for bench in benchmarks:
+        if benchmarks_to_run and bench.name not in benchmarks_to_run:
+            continue
+        print("Running " + bench.name)
+        results.append(benchmark.run_benchmark(bench, repeat, warmup, profiler_setup))
+
+    history = benchmark.BenchmarkHistory(history_path)
+    regressions = history.regressions(results, threshold=regression_threshold)
+    print(benchmark.report(results, history))
+
+    history.add_run(results)
+    if update_baseline:
+        history.set_baseline(results)
+    history.save()
+
+    if regressions:
+        message = "Regressions:\n" + "\n".join(str(regression) for regression in regressions)
+        print(message)
+        app().userInterface.messageBox(message)
+
+
+def run(_):
+    lalboard.run_design(run_benchmarks, message_box_on_error=True, document_name="benchmarks")
@@ -0,0 +1,277 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+An opt-in profiler for seeing where the time goes when building a design.
+
+The profiler wraps the methods of a class (e.g. Lalboard) and any of a set of functions in a module's namespace (e.g.
+the fscad primitives imported into lalboard), and records the wall time and call count for each call path, along with
+how many calls of a memoized method were served from the memo instead of being computed.
+
+The results can be written as a speedscope file (https://www.speedscope.app), which shows them as a flame graph, or
+printed as a table.
+
+This doesn't depend on fusion, so that it can be tested outside of fusion.
+"""
+
+import functools
+import inspect
+import json
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# The fscad operations that are usually the most expensive.
+fscad_primitives = ("Difference", "Union", "Intersection", "Fillet", "Chamfer", "Threads", "Silhouette", "Loft",
+                    "ExtrudeTo", "Extrude", "Revolve", "Sweep", "SplitFace")
+
+# The currently active profiler, if any.
+_active_profiler: Optional["BuildProfiler"] = None
+
+
+class CallNode(object):
+    """The statistics for a single call path."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.seconds = 0.0
+        self.memo_hits = 0
+        self.memoized = False
+        self.children: Dict[str, "CallNode"] = {}
+
+    @property
+    def self_seconds(self) -> float:
+        """The time spent in this call path, excluding the time spent in any profiled calls it made."""
+        return max(0.0, self.seconds - sum(child.seconds for child in self.children.values()))
+
+    def child(self, name: str) -> "CallNode":
+        node = self.children.get(name)
+        if node is None:
+            node = CallNode(name)
+            self.children[name] = node
+        return node
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "count": self.count,
+            "seconds": self.seconds,
+            "self_seconds": self.self_seconds,
+            "memo_hits": self.memo_hits,
+            "children": [child.to_dict() for child in
+                         sorted(self.children.values(), key=lambda node: -node.seconds)]
+        }
+
+
+class _Frame(object):
+    def __init__(self, node: CallNode, memoized: bool):
+        self.node = node
+        self.memoized = memoized
+        self.computed = False
+
+
+class BuildProfiler(object):
+    """Records the time spent in each call path of the profiled functions.
+
+    Typical usage:
+
+        profiler = BuildProfiler()
+        profiler.wrap_class(Lalboard)
+        profiler.wrap_namespace(lalboard.__dict__, build_profiler.fscad_primitives)
+        with profiler:
+            part.run(context)
+        profiler.write_speedscope("part.speedscope.json", "part")
+
+    Wrappers are only installed while the profiler is active, and are removed again when it exits.
+    """
+
+    def __init__(self):
+        self.root = CallNode("root")
+        self._stack: List[_Frame] = []
+        self._targets = []
+        self._installed = []
+        self._start = None
+
+    def wrap_class(self, cls: type, memoized: Callable[[Callable], bool] = None):
+        """Profiles all the methods defined directly on the given class.
+
+        :param cls: The class whose methods should be profiled.
+        :param memoized: A function that returns whether the given method is memoized, so that memo hits can be
+        counted. By default, a method is considered memoized if it was wrapped by memoize_component, which marks the
+        wrapper with a `memoized` attribute.
+        """
+        memoized = memoized or (lambda func: getattr(func, "memoized", False))
+        for name, value in list(vars(cls).items()):
+            if name.startswith("__") or not inspect.isfunction(value):
+                continue
+            self._targets.append((cls, name, value, "%s.%s" % (cls.__name__, name), memoized(value)))
+
+    def wrap_namespace(self, namespace: dict, names: Iterable[str]):
+        """Profiles the given functions or classes in the given namespace, e.g. a module's __dict__.
+
+        Names that aren't in the namespace are ignored.
+        """
+        for name in names:
+            if name in namespace:
+                self._targets.append((namespace, name, namespace[name], name, False))
+
+    def _wrap(self, func: Callable, label: str, memoized: bool) -> Callable:
+        profiler = self
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return profiler.call(label, memoized, func, *args, **kwargs)
+        return wrapper
+
+    def call(self, label: str, memoized: bool, func: Callable, *args, **kwargs):
+        """Calls func with the given arguments, and records it under the given label."""
+        parent = self._stack[-1].node if self._stack else self.root
+        frame = _Frame(parent.child(label), memoized)
+        frame.node.memoized = frame.node.memoized or memoized
+        self._stack.append(frame)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            frame.node.seconds += time.perf_counter() - start
+            frame.node.count += 1
+            if frame.memoized and not frame.computed:
+                frame.node.memo_hits += 1
+            self._stack.pop()
+
+    def record_computed(self):
+        """Records that the innermost memoized call actually computed its result, rather than using a memoized one."""
+        for frame in reversed(self._stack):
+            if frame.memoized:
+                frame.computed = True
+                return
+
+    def __enter__(self):
+        global _active_profiler
+        if _active_profiler is not None:
+            raise ValueError("Another profiler is already active")
+        _active_profiler = self
+
+        for target, name, value, label, memoized in self._targets:
+            wrapper = self._wrap(value, label, memoized)
+            if isinstance(target, dict):
+                target[name] = wrapper
+            else:
+                setattr(target, name, wrapper)
+            self._installed.append((target, name, value))
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        global _active_profiler
+        self.root.seconds += time.perf_counter() - self._start
+        self.root.count += 1
+        for target, name, value in reversed(self._installed):
+            if isinstance(target, dict):
+                target[name] = value
+            else:
+                setattr(target, name, value)
+        self._installed = []
+        _active_profiler = None
+
+    def memo_stats(self) -> Tuple[int, int]:
+        """Returns the total (hits, calls) of all the memoized calls."""
+        hits = 0
+        calls = 0
+        nodes = [self.root]
+        while nodes:
+            node = nodes.pop()
+            if node.memoized:
+                hits += node.memo_hits
+                calls += node.count
+            nodes.extend(node.children.values())
+        return hits, calls
+
+    def speedscope(self, name: str) -> dict:
+        """Returns the profile in speedscope's file format.
+
+        Each call path is represented as a single "sample", weighted by the time spent in it, so this shows the
+        aggregate time of each call path rather than a timeline.
+        """
+        frames = []
+        frame_indexes = {}
+        samples = []
+        weights = []
+
+        def visit(node: CallNode, stack: List[int]):
+            if node.name not in frame_indexes:
+                frame_indexes[node.name] = len(frames)
+                frames.append({"name": node.name})
+            stack = stack + [frame_indexes[node.name]]
+            samples.append(stack)
+            weights.append(node.self_seconds)
+            for child in node.children.values():
+                visit(child, stack)
+
+        for child in self.root.children.values():
+            visit(child, [])
+        if self.root.self_seconds:
+            frame_indexes["(other)"] = len(frames)
+            frames.append({"name": "(other)"})
+            samples.append([frame_indexes["(other)"]])
+            weights.append(self.root.self_seconds)
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "lalboard build_profiler",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights
+            }]
+        }
+
+    def write_speedscope(self, path: str, name: str):
+        with open(path, "w") as profile_file:
+            json.dump(self.speedscope(name), profile_file)
+
+    def write_json(self, path: str):
+        """Writes the full call tree, including the call counts and memo hits."""
+        with open(path, "w") as profile_file:
+            json.dump(self.root.to_dict(), profile_file, indent=2)
+
+    def summary(self, limit: int = 20) -> str:
+        """Returns a table of the call paths with the highest total time."""
+        rows = []
+
+        def visit(node: CallNode, path: str):
+            for child in node.children.values():
+                child_path = path + " > " + child.name if path else child.name
+                rows.append((child_path, child))
+                visit(child, child_path)
+        visit(self.root, "")
+
+        rows.sort(key=lambda row: -row[1].seconds)
+        lines = ["%9s  %9s  %6s  %6s  %s" % ("Total (s)", "Self (s)", "Calls", "Hits", "Call path")]
+        for path, node in rows[:limit]:
+            lines.append("%9.2f  %9.2f  %6d  %6d  %s" % (node.seconds, node.self_seconds, node.count, node.memo_hits,
+                                                         path))
+        return "\n".join(lines)
+
+
+def record_computed():
+    """Called by memoized methods when they actually compute their result. This is a no-op if no profiler is active."""
+    if _active_profiler is not None:
+        _active_profiler.record_computed()
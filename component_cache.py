@@ -0,0 +1,189 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A persistent, on-disk cache of fscad components.
+
+A cached component is stored as a single SMT file containing the bodies of every component in its tree, along with a
+JSON file describing the tree itself: the names of each component, which bodies belong to it, and its named points,
+faces and edges.
+
+When loaded, each component in the tree is reconstructed as a Group containing a BRepComponent with its own bodies and
+its visible children, plus its other children as hidden children. So find_children, named points/faces/edges, and the
+bodies/bounding box of every component in the tree all work as before. However, any primitive-specific properties (e.g.
+the `top` face of a Box, or the axis of a Cylinder) are not preserved. So this should only be used for components whose
+consumers don't depend on those.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+from typing import Optional
+
+import adsk.core
+import adsk.fusion
+from adsk.core import Point3D
+
+from fscad.fscad import *
+from fscad.fscad import Component
+
+import disk_cache
+
+default_cache_directory = os.path.join(os.path.dirname(os.path.realpath(__file__)), ".cache", "components")
+
+
+class ComponentCache(object):
+    """A persistent cache of components, keyed by the method that created them and its arguments.
+
+    :param directory: The directory to store the cache in.
+    :param max_size: The maximum total size of the cache, in bytes. None for no limit.
+    :param max_age: The maximum time since an entry was last used, in seconds. None for no limit.
+    """
+
+    _tree_file = "tree.json"
+    _bodies_file = "bodies.smt"
+
+    def __init__(self, directory: str = default_cache_directory, max_size: Optional[int] = 2 * 1024 ** 3,
+                 max_age: Optional[float] = 30 * 24 * 60 * 60):
+        self._cache = disk_cache.DiskCache(directory, max_size=max_size, max_age=max_age)
+
+        # Changes in fscad itself could change the resulting geometry, so include it in every key.
+        self._fscad_hash = fscad_hash()
+
+    @property
+    def stats(self) -> disk_cache.CacheStats:
+        return self._cache.stats
+
+    def key(self, method_name: str, args, kwargs, source_hash: str) -> Optional[str]:
+        """Returns the cache key for a call to the given method, or None if the call can't be cached.
+
+        :param method_name: The name of the method.
+        :param args: The positional arguments the method was called with.
+        :param kwargs: The keyword arguments the method was called with.
+        :param source_hash: A hash of the source code of the method, and everything it depends on.
+        """
+        return self._cache.make_key(method_name, list(args), dict(kwargs), source_hash, self._fscad_hash)
+
+    def load(self, key: str) -> Optional[Component]:
+        """Loads the cached component with the given key, or returns None if it's not in the cache."""
+        path = self._cache.lookup(key)
+        if path is None:
+            return None
+
+        with open(os.path.join(path, self._tree_file), "r") as tree_file:
+            tree = json.load(tree_file)
+
+        bodies = []
+        if tree["body_count"]:
+            bodies = list(adsk.fusion.TemporaryBRepManager.get().importFromFile(
+                os.path.join(path, self._bodies_file)))
+
+        return _deserialize_component(tree["root"], bodies)
+
+    def store(self, key: str, component: Component):
+        """Stores the given component in the cache."""
+        bodies = []
+        tree = {"root": _serialize_component(component, bodies)}
+        tree["body_count"] = len(bodies)
+
+        def write(path):
+            with open(os.path.join(path, self._tree_file), "w") as tree_file:
+                json.dump(tree, tree_file)
+            if bodies:
+                adsk.fusion.TemporaryBRepManager.get().exportToFile(
+                    bodies, os.path.join(path, self._bodies_file))
+
+        self._cache.store(key, write)
+
+    def clear(self):
+        self._cache.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def fscad_hash() -> str:
+    """Returns a hash of the source of fscad."""
+    with open(inspect.getsourcefile(Component), "rb") as fscad_file:
+        return hashlib.sha256(fscad_file.read()).hexdigest()
+
+
+def _entity_indexes(component: Component, entities, entities_of_body):
+    """Finds the (body index, entity index) of each of the given faces or edges, within the given component."""
+    result = []
+    for entity in entities:
+        for body_index, body in enumerate(component.bodies):
+            entity_index = next(
+                (index for index, candidate in enumerate(entities_of_body(body)) if candidate.brep == entity.brep),
+                None)
+            if entity_index is not None:
+                result.append((body_index, entity_index))
+                break
+        else:
+            raise ValueError("Couldn't find named entity in the bodies of %s" % component.name)
+    return result
+
+
+def _serialize_component(component: Component, bodies: list) -> dict:
+    first_body = len(bodies)
+    # The bodies of a component include the bodies of its visible children, which are stored along with the child.
+    bodies.extend(body.brep for body in component.bodies if body.component is component)
+    body_components = {id(body.component) for body in component.bodies}
+
+    children = []
+    for child in component.children():
+        node = _serialize_component(child, bodies)
+        node["visible"] = any(id(body.component) in body_components for body in child.bodies)
+        children.append(node)
+
+    # noinspection PyProtectedMember
+    return {
+        "name": component.name,
+        "first_body": first_body,
+        "body_count": len(bodies) - first_body,
+        "named_points": {
+            name: component.named_point(name).point.asArray() for name in component._named_points},
+        "named_faces": {
+            name: _entity_indexes(component, component.named_faces(name), lambda body: body.faces)
+            for name in component._named_faces},
+        "named_edges": {
+            name: _entity_indexes(component, component.named_edges(name), lambda body: body.edges)
+            for name in component._named_edges},
+        "children": children
+    }
+
+
+def _deserialize_component(node: dict, bodies: list) -> Component:
+    node_bodies = bodies[node["first_body"]:node["first_body"] + node["body_count"]]
+    children = [(child["visible"], _deserialize_component(child, bodies)) for child in node["children"]]
+
+    if children:
+        visible = []
+        if node_bodies:
+            visible.append(BRepComponent(*node_bodies, name=node["name"] + "_bodies"))
+        visible.extend(child for is_visible, child in children if is_visible)
+        component = Group(visible, [child for is_visible, child in children if not is_visible], name=node["name"])
+    else:
+        component = BRepComponent(*node_bodies, name=node["name"])
+
+    for name, point in node["named_points"].items():
+        component.add_named_point(name, Point3D.create(*point))
+    for name, indexes in node["named_faces"].items():
+        component.add_named_faces(
+            name, *[component.bodies[body_index].faces[face_index] for body_index, face_index in indexes])
+    for name, indexes in node["named_edges"].items():
+        component.add_named_edges(
+            name, *[component.bodies[body_index].edges[edge_index] for body_index, edge_index in indexes])
+
+    return component
@@ -0,0 +1,176 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A simple content-addressed cache of files on disk.
+
+Each entry is a directory of arbitrary files, identified by a key that's a hash of whatever inputs the entry's content
+was derived from. Entries are written to a temporary directory and then moved into place, so a partially written entry
+is never visible. The cache can be limited by total size and by age, with the least recently used entries being evicted
+first.
+
+This doesn't depend on fusion, so that the bookkeeping logic can be tested outside of fusion.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, Optional
+
+
+class CacheStats(object):
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def __str__(self):
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0
+        return "%d hits, %d misses (%.0f%% hit rate), %d stored, %d evicted" % (
+            self.hits, self.misses, hit_rate, self.stores, self.evictions)
+
+
+class DiskCache(object):
+    """A cache of directories of files, stored under the given directory.
+
+    :param directory: The directory to store the cache in. This will be created if needed.
+    :param max_size: The maximum total size of the cache, in bytes. The least recently used entries are evicted when
+    the cache is larger than this. None for no limit.
+    :param max_age: The maximum time since an entry was last used, in seconds. None for no limit.
+    """
+
+    _marker_file = ".complete"
+
+    def __init__(self, directory: str, max_size: Optional[int] = None, max_age: Optional[float] = None):
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+        self.stats = CacheStats()
+
+    @staticmethod
+    def make_key(*parts) -> Optional[str]:
+        """Returns a key for a cache entry derived from the given parts.
+
+        The parts must be made up of strings, numbers, booleans, None, and lists, tuples and dicts of those. If any
+        part isn't, there's no reliable way to tell whether 2 values are equivalent, so None is returned instead.
+        """
+        if not all(_is_key_value(part) for part in parts):
+            return None
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Looks up the entry with the given key.
+
+        :return: The path of the entry's directory, or None if there is no such entry.
+        """
+        path = self._entry_path(key)
+        marker = os.path.join(path, self._marker_file)
+        if not os.path.exists(marker):
+            self.stats.misses += 1
+            return None
+
+        # The marker's modification time is used as the last access time, for eviction.
+        os.utime(marker)
+        self.stats.hits += 1
+        return path
+
+    def store(self, key: str, write_func: Callable[[str], None]) -> str:
+        """Stores a new entry with the given key.
+
+        :param key: The key of the entry.
+        :param write_func: A function that writes the entry's files into the directory it's given.
+        :return: The path of the new entry's directory.
+        """
+        path = self._entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        temp_path = tempfile.mkdtemp(dir=os.path.dirname(path), prefix=".tmp_")
+        try:
+            write_func(temp_path)
+            with open(os.path.join(temp_path, self._marker_file), "w"):
+                pass
+            if os.path.exists(path):
+                shutil.rmtree(path)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                shutil.rmtree(temp_path)
+
+        self.stats.stores += 1
+        self.evict()
+        return path
+
+    def evict(self):
+        """Removes any entries that are older than max_age, and then the least recently used entries until the total
+        size is within max_size."""
+        if self.max_size is None and self.max_age is None:
+            return
+        if not os.path.isdir(self.directory):
+            return
+
+        entries = []
+        for prefix in os.listdir(self.directory):
+            prefix_path = os.path.join(self.directory, prefix)
+            if not os.path.isdir(prefix_path):
+                continue
+            for name in os.listdir(prefix_path):
+                path = os.path.join(prefix_path, name)
+                marker = os.path.join(path, self._marker_file)
+                if name.startswith(".") or not os.path.exists(marker):
+                    continue
+                entries.append((os.path.getmtime(marker), _directory_size(path), path))
+
+        # least recently used first
+        entries.sort()
+
+        now = time.time()
+        total_size = sum(size for _, size, _ in entries)
+        for last_used, size, path in entries:
+            too_old = self.max_age is not None and now - last_used > self.max_age
+            too_large = self.max_size is not None and total_size > self.max_size
+            if not too_old and not too_large:
+                continue
+            shutil.rmtree(path)
+            total_size -= size
+            self.stats.evictions += 1
+
+    def clear(self):
+        if os.path.isdir(self.directory):
+            shutil.rmtree(self.directory)
+
+
+def _is_key_value(value) -> bool:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_key_value(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and _is_key_value(item) for key, item in value.items())
+    return False
+
+
+def _directory_size(path: str) -> int:
+    size = 0
+    for directory, _, files in os.walk(path):
+        for file in files:
+            size += os.path.getsize(os.path.join(directory, file))
+    return size
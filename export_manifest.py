@@ -0,0 +1,175 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Tracks the inputs of each exported part, so that parts whose inputs haven't changed don't need to be exported again.
+
+The inputs of a part are:
+ - The part script itself
+ - The source of the Lalboard methods the part script calls, along with everything they transitively call (see
+   source_hash)
+ - Any data files referenced by those methods, e.g. left_handrest.f3d
+ - The helper modules that lalboard.py loads with relative_import, e.g. geometry.py
+ - The version of fscad, if given
+ - The entire lalboard.py module, if the part script uses anything else from it, like the placement classes.
+
+The manifest is a json file stored alongside the exported files. This doesn't depend on fusion, so that it can be
+tested outside of fusion.
+"""
+
+import ast
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Optional, Set
+
+import source_hash
+
+manifest_version = 1
+
+# The names in lalboard that a part script can use without depending on the entire module
+_lalboard_entry_points = {"Lalboard", "run_design"}
+
+file_hash = source_hash.file_hash
+
+
+class PartInputs(object):
+    """Calculates the input hashes for part scripts.
+
+    :param lalboard_path: The path to lalboard.py
+    :param options: Any other options that affect the exported output for all parts.
+    :param fscad_hash: A hash of fscad, as per component_cache.fscad_hash. fscad can't be imported outside of fusion, so
+    this is passed in by the caller.
+    """
+
+    def __init__(self, lalboard_path: str, options: Optional[dict] = None, fscad_hash: Optional[str] = None):
+        self._lalboard_path = lalboard_path
+        self._lalboard_hash = file_hash(lalboard_path)
+        self._hasher = source_hash.SourceHasher.for_file(lalboard_path, "Lalboard")
+        self._method_names = self._hasher.method_names()
+        self._module_hashes = self._hasher.module_hashes(os.path.dirname(lalboard_path))
+        self._options = options or {}
+        self._fscad_hash = fscad_hash
+
+    def inputs(self, script_path: str) -> dict:
+        """Returns a dict describing all the inputs of the given part script."""
+        with open(script_path, "r", encoding="utf-8") as script_file:
+            script_source = script_file.read()
+
+        called_methods = set()
+        uses_other_lalboard_names = False
+        for node in ast.walk(ast.parse(script_source)):
+            if not isinstance(node, ast.Attribute):
+                continue
+            if isinstance(node.value, ast.Name) and node.value.id == "lalboard":
+                if node.attr not in _lalboard_entry_points:
+                    uses_other_lalboard_names = True
+            elif node.attr in self._method_names:
+                called_methods.add(node.attr)
+
+        lalboard_dir = os.path.dirname(self._lalboard_path)
+        result = {
+            "script": hashlib.sha256(script_source.encode("utf-8")).hexdigest(),
+            "methods": {name: self._hasher.method_hash(name) for name in sorted(called_methods)},
+            "files": {
+                name: file_hash(os.path.join(lalboard_dir, name))
+                for name in sorted(self._hasher.data_files(called_methods, lalboard_dir))},
+            "modules": self._module_hashes,
+            "options": self._options,
+        }
+        if self._fscad_hash is not None:
+            result["fscad"] = self._fscad_hash
+        if uses_other_lalboard_names:
+            result["lalboard"] = self._lalboard_hash
+        return result
+
+
+class ExportManifest(object):
+    """The record of the inputs and outputs of each exported part.
+
+    :param path: The path of the manifest file. It will be created when saved, if it doesn't exist.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        self._parts = self._load()
+        self._changed: Set[str] = set()
+
+    def _load(self) -> Dict[str, dict]:
+        if not os.path.exists(self._path):
+            return {}
+        try:
+            with open(self._path, "r") as manifest_file:
+                manifest = json.load(manifest_file)
+            if manifest.get("version") == manifest_version:
+                return manifest["parts"]
+        except (ValueError, KeyError):
+            # A corrupt manifest just means everything will be re-exported
+            pass
+        return {}
+
+    def is_stale(self, part_name: str, inputs: dict) -> bool:
+        """Returns whether the given part needs to be exported again.
+
+        A part is stale if it has never been exported, if any of its inputs have changed, or if any of its previously
+        exported files are missing.
+        """
+        entry = self._parts.get(part_name)
+        if entry is None or entry["inputs"] != inputs:
+            return True
+        output_dir = os.path.dirname(self._path)
+        return not all(os.path.exists(os.path.join(output_dir, output)) for output in entry["outputs"])
+
+    def seconds(self, part_name: str) -> Optional[float]:
+        """Returns how long the last export of the given part took, or None if it's not known."""
+        entry = self._parts.get(part_name)
+        if entry is None:
+            return None
+        return entry.get("seconds")
+
+    def update(self, part_name: str, inputs: dict, outputs: Iterable[str], seconds: Optional[float] = None):
+        """Records that the given part has been exported.
+
+        :param part_name: The name of the part.
+        :param inputs: The inputs the part was exported with, as per PartInputs.inputs.
+        :param outputs: The names of the exported files, relative to the manifest's directory.
+        :param seconds: How long the export took.
+        """
+        self._parts[part_name] = {
+            "inputs": inputs,
+            "outputs": sorted(outputs),
+            "seconds": seconds
+        }
+        self._changed.add(part_name)
+
+    def remove(self, part_name: str):
+        self._parts.pop(part_name, None)
+        self._changed.add(part_name)
+
+    def save(self):
+        # Several export processes may be sharing the same manifest (see export_scheduler.shard_jobs), so merge our
+        # changes into the latest version on disk, rather than overwriting any changes from the other processes.
+        parts = self._load()
+        for part_name in self._changed:
+            if part_name in self._parts:
+                parts[part_name] = self._parts[part_name]
+            else:
+                parts.pop(part_name, None)
+        self._parts = parts
+
+        # write to a temp file first, so that the manifest isn't corrupted if the export is interrupted
+        temp_path = "%s.%d.tmp" % (self._path, os.getpid())
+        with open(temp_path, "w") as manifest_file:
+            json.dump({"version": manifest_version, "parts": self._parts}, manifest_file, indent=2, sort_keys=True)
+        os.replace(temp_path, self._path)
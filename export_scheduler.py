@@ -0,0 +1,289 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Scheduling and bookkeeping for exporting many parts across multiple workers.
+
+Parts are distributed across workers with the "longest processing time first" heuristic, using the export times from
+the previous run as the estimates. Each part is exported independently, so a failure in one part is recorded and
+reported without affecting the others.
+
+The fusion API can only be used from the main thread of a single fusion process, so within fusion, the workers are
+separate fusion instances that each run export_parts with a different shard index (see shard_jobs). The actual
+process pool support in run_in_processes is for exporters that don't need fusion, and for testing the scheduling logic
+against LocalExportManager, a stand-in for fusion's ExportManager.
+
+This doesn't depend on fusion, so that it can be tested outside of fusion.
+"""
+
+import concurrent.futures
+import contextlib
+import heapq
+import json
+import os
+import time
+import traceback
+from typing import Callable, Iterable, List, Optional, Sequence
+
+# The estimated export time for a part that has never been exported before.
+default_estimate = 60.0
+
+
+class ExportJob(object):
+    """A single part to export.
+
+    :param name: The name of the part.
+    :param estimate: The estimated time to export the part, in seconds.
+    """
+    def __init__(self, name: str, estimate: Optional[float] = None):
+        self.name = name
+        self.estimate = default_estimate if estimate is None else estimate
+
+    def __repr__(self):
+        return "ExportJob(%r, %r)" % (self.name, self.estimate)
+
+
+class ExportResult(object):
+    """The result of exporting a single part.
+
+    :param name: The name of the part.
+    :param worker: The index of the worker that exported the part.
+    :param seconds: The time it took to export the part.
+    :param outputs: The names of the files that were exported.
+    :param error: The formatted traceback, if the export failed.
+    """
+    def __init__(self, name: str, worker: int, seconds: float, outputs: Sequence[str] = (),
+                 error: Optional[str] = None):
+        self.name = name
+        self.worker = worker
+        self.seconds = seconds
+        self.outputs = list(outputs)
+        self.error = error
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+def schedule(jobs: Iterable[ExportJob], worker_count: int) -> List[List[ExportJob]]:
+    """Distributes the jobs across the given number of workers, so that they all finish at about the same time.
+
+    This uses the "longest processing time first" heuristic: the jobs are assigned in order of decreasing estimate,
+    each to the worker with the least total work so far.
+
+    :return: A list of the jobs for each worker, in the order they should be run.
+    """
+    if worker_count < 1:
+        raise ValueError("worker_count must be at least 1")
+
+    assignments = [[] for _ in range(worker_count)]
+    loads = [(0.0, worker) for worker in range(worker_count)]
+    for job in sorted(jobs, key=lambda job: (-job.estimate, job.name)):
+        load, worker = heapq.heappop(loads)
+        assignments[worker].append(job)
+        heapq.heappush(loads, (load + job.estimate, worker))
+    return assignments
+
+
+def is_part_directory(name: str) -> bool:
+    """Returns whether export_parts treats the given directory within parts/ as a part to export.
+
+    The pcb parts are skipped, since they're built from the sketches that are exported alongside them.
+    """
+    return not (name.startswith("_") or name == "__pycache__" or name == "scene" or name.endswith("pcb"))
+
+
+@contextlib.contextmanager
+def _file_lock(path: str, timeout: float = 60.0, poll_interval: float = .05):
+    """Holds an exclusive lock on path, for the duration of the context, by creating a lock file next to it.
+
+    A lock file that's older than timeout was most likely left behind by a process that crashed, so it's removed.
+    """
+    lock_path = path + ".lock"
+    while True:
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > timeout:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(poll_interval)
+    try:
+        yield
+    finally:
+        os.remove(lock_path)
+
+
+def shard_jobs(jobs: Sequence[ExportJob], shard_index: int, shard_count: int,
+               plan_path: Optional[str] = None, run_id: Optional[str] = None) -> List[ExportJob]:
+    """Returns the jobs assigned to the given shard, for running the export across several independent processes.
+
+    Every process must be given the same set of jobs, in order for the shards to be consistent. The estimates can
+    change as the processes finish exporting parts, so the first process of each run saves the assignments to
+    plan_path, along with the run id, and the other processes of the same run reuse them. So a shard that's rerun,
+    e.g. after it crashed, still gets the same parts. A new run id gets a new plan, from the current estimates.
+
+    :param plan_path: The path to save the plan to. If not given, the plan is made from the given estimates.
+    :param run_id: Identifies the export run that the processes are all a part of. Required with plan_path.
+    """
+    if not 0 <= shard_index < shard_count:
+        raise ValueError("Invalid shard index %d for %d shards" % (shard_index, shard_count))
+
+    names = sorted(job.name for job in jobs)
+    if not plan_path:
+        plan = {"shards": [[job.name for job in worker_jobs] for worker_jobs in schedule(jobs, shard_count)]}
+    else:
+        if not run_id:
+            raise ValueError("A run id is needed to share a plan between processes")
+        with _file_lock(plan_path):
+            plan = None
+            if os.path.exists(plan_path):
+                try:
+                    with open(plan_path, "r") as plan_file:
+                        plan = json.load(plan_file)
+                except ValueError:
+                    plan = None
+            if plan is not None and plan.get("run_id") == run_id:
+                if plan.get("names") != names or len(plan.get("shards", ())) != shard_count:
+                    raise ValueError(
+                        "The plan for run %s was made for a different set of parts or shard count" % run_id)
+            else:
+                plan = {
+                    "run_id": run_id,
+                    "names": names,
+                    "shards": [[job.name for job in worker_jobs] for worker_jobs in schedule(jobs, shard_count)]
+                }
+                temp_path = "%s.%d.tmp" % (plan_path, os.getpid())
+                with open(temp_path, "w") as plan_file:
+                    json.dump(plan, plan_file, indent=2)
+                os.replace(temp_path, plan_path)
+
+    jobs_by_name = {job.name: job for job in jobs}
+    return [jobs_by_name[name] for name in plan["shards"][shard_index]]
+
+
+def _run_job(job: ExportJob, worker: int, export_func: Callable[[str], Iterable[str]]) -> ExportResult:
+    start = time.time()
+    try:
+        outputs = export_func(job.name)
+        return ExportResult(job.name, worker, time.time() - start, outputs=outputs or ())
+    except Exception:
+        return ExportResult(job.name, worker, time.time() - start, error=traceback.format_exc())
+
+
+def run_in_process(
+        jobs: Iterable[ExportJob], export_func: Callable[[str], Iterable[str]],
+        result_callback: Optional[Callable[[ExportResult], None]] = None, worker: int = 0) -> List[ExportResult]:
+    """Runs the given jobs one at a time in the current process.
+
+    :param jobs: The jobs to run, in order.
+    :param export_func: A function that exports the part with the given name, and returns the names of the exported
+    files.
+    :param result_callback: If specified, this is called with the result of each job as soon as it's done.
+    :param worker: The worker index to record in the results.
+    """
+    results = []
+    for job in jobs:
+        result = _run_job(job, worker, export_func)
+        if result_callback:
+            result_callback(result)
+        results.append(result)
+    return results
+
+
+def _run_worker(worker: int, jobs: Sequence[ExportJob], export_func) -> List[ExportResult]:
+    return run_in_process(jobs, export_func, worker=worker)
+
+
+def run_in_processes(
+        jobs: Iterable[ExportJob], export_func: Callable[[str], Iterable[str]], worker_count: int,
+        result_callback: Optional[Callable[[ExportResult], None]] = None) -> List[ExportResult]:
+    """Runs the given jobs across a pool of worker processes.
+
+    The jobs are assigned to workers up front, via schedule(). export_func must be picklable, i.e. a module-level
+    function, and must not use fusion.
+
+    :param jobs: The jobs to run.
+    :param export_func: A function that exports the part with the given name, and returns the names of the exported
+    files.
+    :param worker_count: The number of worker processes to use.
+    :param result_callback: If specified, this is called with the results of each worker's jobs, as each worker
+    finishes.
+    """
+    assignments = [worker_jobs for worker_jobs in schedule(jobs, worker_count) if worker_jobs]
+    if not assignments:
+        return []
+
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=len(assignments)) as executor:
+        futures = [executor.submit(_run_worker, worker, worker_jobs, export_func)
+                   for worker, worker_jobs in enumerate(assignments)]
+        for future in concurrent.futures.as_completed(futures):
+            worker_results = future.result()
+            if result_callback:
+                for result in worker_results:
+                    result_callback(result)
+            results.extend(worker_results)
+    return results
+
+
+def summary_table(results: Sequence[ExportResult]) -> str:
+    """Returns a human-readable table of the given results, slowest first."""
+    if not results:
+        return "No parts were exported"
+
+    name_width = max(len("Part"), *(len(result.name) for result in results))
+    lines = ["%-*s  %6s  %9s  %s" % (name_width, "Part", "Worker", "Time (s)", "Status")]
+    for result in sorted(results, key=lambda result: -result.seconds):
+        status = "ok" if result.succeeded else "FAILED: " + result.error.strip().splitlines()[-1]
+        lines.append("%-*s  %6d  %9.2f  %s" % (name_width, result.name, result.worker, result.seconds, status))
+
+    failures = sum(1 for result in results if not result.succeeded)
+    lines.append("%d parts exported, %d failed, %.2fs total export time" % (
+        len(results) - failures, failures, sum(result.seconds for result in results)))
+    return "\n".join(lines)
+
+
+class LocalExportOptions(object):
+    def __init__(self, geometry, filename: str):
+        self.geometry = geometry
+        self.filename = filename
+        self.meshRefinement = None
+        self.sendToPrintUtility = False
+
+
+class LocalExportManager(object):
+    """A stand-in for fusion's ExportManager, which writes a text description of the "geometry" to each file.
+
+    This supports the subset of the ExportManager API that export_parts uses.
+    """
+
+    def createSTLExportOptions(self, geometry, filename: str) -> LocalExportOptions:
+        return LocalExportOptions(geometry, filename)
+
+    def createC3MFExportOptions(self, geometry, filename: str) -> LocalExportOptions:
+        return LocalExportOptions(geometry, filename)
+
+    def createFusionArchiveExportOptions(self, filename: str, geometry) -> LocalExportOptions:
+        return LocalExportOptions(geometry, filename)
+
+    def execute(self, options: LocalExportOptions) -> bool:
+        os.makedirs(os.path.dirname(options.filename) or ".", exist_ok=True)
+        with open(options.filename, "w") as file:
+            file.write(str(options.geometry))
+        return True
@@ -0,0 +1,165 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A spatial index of the faces of a component's bodies, for selecting faces by position.
+
+Many of the builders select faces by making a "finder" box from the component's bounding box, placing it against one
+side of the component, and passing it to find_faces. e.g. to get the bottom faces of a cluster, or the top face of a
+key. find_faces then checks every face of the component against every face of the finder. But what the finders are
+really asking for is the faces that lie in a given axis-aligned plane, which can be answered from the bounding boxes of
+the faces alone: a face lies in the plane z = c exactly when its bounding box is flat in z, at c.
+
+A FaceIndex holds an AABB tree of the face bounding boxes of each body, so a query only has to look at the few faces
+near the plane. See Lalboard.faces_in_plane and Lalboard.extreme_faces.
+
+This doesn't depend on fusion, so that it can be tested outside of fusion.
+"""
+
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import boolean_batching
+
+Bounds = boolean_batching.Bounds
+
+# The distance within which a face is considered to lie in a plane
+default_tolerance = 1e-4
+
+# The maximum number of faces in a leaf of the tree
+_leaf_size = 4
+
+
+def union_bounds(bounds: Sequence[Bounds]) -> Bounds:
+    return (tuple(min(item[0][axis] for item in bounds) for axis in range(3)),
+            tuple(max(item[1][axis] for item in bounds) for axis in range(3)))
+
+
+def plane_bounds(axis: int, value: float, tolerance: float = default_tolerance) -> Bounds:
+    """Returns bounds that contain the axis-aligned plane at the given value of the given axis."""
+    bounds_min = [-float("inf")] * 3
+    bounds_max = [float("inf")] * 3
+    bounds_min[axis] = value - tolerance
+    bounds_max[axis] = value + tolerance
+    return tuple(bounds_min), tuple(bounds_max)
+
+
+class AABBTree(object):
+    """A bounding volume hierarchy over a set of items, each with an axis-aligned bounding box.
+
+    The tree is built top down, by splitting the items at the median of their centers along the longest axis of the
+    node's bounds.
+
+    :param items: The (bounds, item) pairs to index.
+    """
+
+    def __init__(self, items: Sequence[Tuple[Bounds, Any]]):
+        self._items = list(items)
+        self.bounds: Optional[Bounds] = None
+        # Each node is (bounds, first child node, second child node, item indices), with item indices only for leaves
+        self._nodes: List[Tuple[Bounds, int, int, Sequence[int]]] = []
+        if self._items:
+            self.bounds = self._build(list(range(len(self._items))))
+
+    def _build(self, indices: List[int]) -> Bounds:
+        bounds = union_bounds([self._items[index][0] for index in indices])
+        node = len(self._nodes)
+        if len(indices) <= _leaf_size:
+            self._nodes.append((bounds, -1, -1, indices))
+            return bounds
+
+        axis = max(range(3), key=lambda axis: bounds[1][axis] - bounds[0][axis])
+        indices.sort(key=lambda index: self._items[index][0][0][axis] + self._items[index][0][1][axis])
+        middle = len(indices) // 2
+
+        self._nodes.append((bounds, -1, -1, ()))
+        first = len(self._nodes)
+        self._build(indices[:middle])
+        second = len(self._nodes)
+        self._build(indices[middle:])
+        self._nodes[node] = (bounds, first, second, ())
+        return bounds
+
+    def query(self, bounds: Bounds, predicate: Optional[Callable[[Bounds], bool]] = None) -> List[Any]:
+        """Returns the items whose bounds overlap the given bounds, in the order they were given.
+
+        :param bounds: The bounds to search.
+        :param predicate: An optional additional test for the bounds of each overlapping item.
+        """
+        if not self._nodes:
+            return []
+        overlap = boolean_batching.bounds_overlap
+        found = []
+        stack = [0]
+        while stack:
+            node_bounds, first, second, indices = self._nodes[stack.pop()]
+            if not overlap(node_bounds, bounds):
+                continue
+            if first < 0:
+                found.extend(index for index in indices if overlap(self._items[index][0], bounds) and
+                             (predicate is None or predicate(self._items[index][0])))
+            else:
+                stack.extend((second, first))
+        return [self._items[index][1] for index in sorted(found)]
+
+
+class FaceIndex(object):
+    """A spatial index of the faces of a set of bodies.
+
+    The tree for each body is only built the first time a query reaches that body's bounds.
+
+    :param bodies: The (bounds, face loader) of each body, where the face loader returns the (bounds, face) pairs of all
+        the faces of the body.
+    """
+
+    def __init__(self, bodies: Sequence[Tuple[Bounds, Callable[[], Sequence[Tuple[Bounds, Any]]]]]):
+        self._bodies = list(bodies)
+        self._trees: List[Optional[AABBTree]] = [None] * len(self._bodies)
+        self.bounds: Optional[Bounds] = union_bounds([body[0] for body in self._bodies]) if self._bodies else None
+
+    def _tree(self, body_index: int) -> AABBTree:
+        tree = self._trees[body_index]
+        if tree is None:
+            tree = AABBTree(self._bodies[body_index][1]())
+            self._trees[body_index] = tree
+        return tree
+
+    def query(self, bounds: Bounds, predicate: Optional[Callable[[Bounds], bool]] = None) -> List[Any]:
+        """Returns the faces whose bounds overlap the given bounds, in body order."""
+        faces = []
+        for body_index, (body_bounds, _) in enumerate(self._bodies):
+            if boolean_batching.bounds_overlap(body_bounds, bounds):
+                faces.extend(self._tree(body_index).query(bounds, predicate))
+        return faces
+
+    def faces_in_plane(self, axis: int, value: float, tolerance: float = default_tolerance) -> List[Any]:
+        """Returns the faces that lie in the axis-aligned plane at the given value of the given axis.
+
+        These are the faces that find_faces would return for a finder whose face lies in the plane, and covers the
+        whole component.
+        """
+        def flat(face_bounds: Bounds) -> bool:
+            return face_bounds[1][axis] - face_bounds[0][axis] <= 2 * tolerance
+
+        return self.query(plane_bounds(axis, value, tolerance), flat)
+
+    def extreme_faces(self, axis: int, maximum: bool = False, tolerance: float = default_tolerance) -> List[Any]:
+        """Returns the faces that lie in the plane at the minimum or maximum extent of the bodies along an axis.
+
+        e.g. extreme_faces(2) returns the bottom-most faces, and extreme_faces(2, maximum=True) the top-most faces.
+
+        The extent is taken from the bounds the index was built with, so this is only exact if those bounds are tight.
+        """
+        if self.bounds is None:
+            return []
+        return self.faces_in_plane(axis, self.bounds[1 if maximum else 0][axis], tolerance)
@@ -0,0 +1,352 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A minimal stand-in for the adsk.core geometry classes, for running lalboard's placement logic outside of fusion.
+
+This implements the subset of the Point3D, Vector3D, Matrix3D, Plane and InfiniteLine3D APIs that lalboard uses, with
+the same semantics as fusion's versions (e.g. Matrix3D.transformBy(m) pre-multiplies by m). install() registers these as
+the adsk.core and adsk.fusion modules, if the real ones aren't available. See fake_fscad for the rest of the headless
+environment.
+"""
+
+import math
+import sys
+import types
+from typing import List, Optional, Sequence
+
+import geometry
+
+# The tolerance used for equality and intersection tests, in cm.
+_tolerance = 1e-8
+
+
+class Point3D(object):
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    @staticmethod
+    def create(x: float = 0.0, y: float = 0.0, z: float = 0.0) -> "Point3D":
+        return Point3D(x, y, z)
+
+    def asArray(self) -> List[float]:
+        return [self.x, self.y, self.z]
+
+    def setWithArray(self, coordinates: Sequence[float]) -> bool:
+        self.x, self.y, self.z = (float(value) for value in coordinates)
+        return True
+
+    def copy(self) -> "Point3D":
+        return Point3D(self.x, self.y, self.z)
+
+    def asVector(self) -> "Vector3D":
+        return Vector3D(self.x, self.y, self.z)
+
+    def distanceTo(self, point: "Point3D") -> float:
+        return geometry.length(geometry.subtract(point.asArray(), self.asArray()))
+
+    def vectorTo(self, point: "Point3D") -> "Vector3D":
+        return Vector3D(*geometry.subtract(point.asArray(), self.asArray()))
+
+    def translateBy(self, vector: "Vector3D") -> bool:
+        self.setWithArray(geometry.add(self.asArray(), vector.asArray()))
+        return True
+
+    def transformBy(self, matrix: "Matrix3D") -> bool:
+        self.setWithArray(geometry.transform_point(matrix.asArray(), self.asArray()))
+        return True
+
+    def isEqualTo(self, point: "Point3D") -> bool:
+        return self.distanceTo(point) < _tolerance
+
+    def __repr__(self):
+        return "Point3D(%r, %r, %r)" % (self.x, self.y, self.z)
+
+
+class Vector3D(object):
+    def __init__(self, x: float = 0.0, y: float = 0.0, z: float = 0.0):
+        self.x = float(x)
+        self.y = float(y)
+        self.z = float(z)
+
+    @staticmethod
+    def create(x: float = 0.0, y: float = 0.0, z: float = 0.0) -> "Vector3D":
+        return Vector3D(x, y, z)
+
+    def asArray(self) -> List[float]:
+        return [self.x, self.y, self.z]
+
+    def setWithArray(self, coordinates: Sequence[float]) -> bool:
+        self.x, self.y, self.z = (float(value) for value in coordinates)
+        return True
+
+    def copy(self) -> "Vector3D":
+        return Vector3D(self.x, self.y, self.z)
+
+    def asPoint(self) -> Point3D:
+        return Point3D(self.x, self.y, self.z)
+
+    @property
+    def length(self) -> float:
+        return geometry.length(self.asArray())
+
+    def normalize(self) -> bool:
+        if self.length < _tolerance:
+            return False
+        self.setWithArray(geometry.normalize(self.asArray()))
+        return True
+
+    def scaleBy(self, scale: float) -> bool:
+        self.setWithArray(geometry.scale(self.asArray(), scale))
+        return True
+
+    def add(self, vector: "Vector3D") -> bool:
+        self.setWithArray(geometry.add(self.asArray(), vector.asArray()))
+        return True
+
+    def subtract(self, vector: "Vector3D") -> bool:
+        self.setWithArray(geometry.subtract(self.asArray(), vector.asArray()))
+        return True
+
+    def dotProduct(self, vector: "Vector3D") -> float:
+        return geometry.dot(self.asArray(), vector.asArray())
+
+    def crossProduct(self, vector: "Vector3D") -> "Vector3D":
+        return Vector3D(*geometry.cross(self.asArray(), vector.asArray()))
+
+    def angleTo(self, vector: "Vector3D") -> float:
+        cos_angle = self.dotProduct(vector) / (self.length * vector.length)
+        return math.acos(max(-1.0, min(1.0, cos_angle)))
+
+    def isParallelTo(self, vector: "Vector3D") -> bool:
+        return self.crossProduct(vector).length < _tolerance * max(1.0, self.length * vector.length)
+
+    def isPerpendicularTo(self, vector: "Vector3D") -> bool:
+        return abs(self.dotProduct(vector)) < _tolerance * max(1.0, self.length * vector.length)
+
+    def transformBy(self, matrix: "Matrix3D") -> bool:
+        self.setWithArray(geometry.transform_vector(matrix.asArray(), self.asArray()))
+        return True
+
+    def isEqualTo(self, vector: "Vector3D") -> bool:
+        return geometry.length(geometry.subtract(self.asArray(), vector.asArray())) < _tolerance
+
+    def __repr__(self):
+        return "Vector3D(%r, %r, %r)" % (self.x, self.y, self.z)
+
+
+class Matrix3D(object):
+    """A 4x4 transformation matrix, stored in row-major order like fusion's Matrix3D.asArray()."""
+
+    def __init__(self, array: Optional[Sequence[float]] = None):
+        self._array = list(array) if array is not None else geometry.identity_matrix()
+
+    @staticmethod
+    def create() -> "Matrix3D":
+        return Matrix3D()
+
+    def asArray(self) -> List[float]:
+        return list(self._array)
+
+    def setWithArray(self, array: Sequence[float]) -> bool:
+        if len(array) != 16:
+            return False
+        self._array = [float(value) for value in array]
+        return True
+
+    def copy(self) -> "Matrix3D":
+        return Matrix3D(self._array)
+
+    def getCell(self, row: int, column: int) -> float:
+        return self._array[row * 4 + column]
+
+    def setCell(self, row: int, column: int, value: float) -> bool:
+        self._array[row * 4 + column] = float(value)
+        return True
+
+    def setToIdentity(self) -> bool:
+        self._array = geometry.identity_matrix()
+        return True
+
+    def transformBy(self, matrix: "Matrix3D") -> bool:
+        """Applies the given transform after this one, i.e. this = matrix * this."""
+        self._array = geometry.multiply(matrix.asArray(), self._array)
+        return True
+
+    def setToRotation(self, angle: float, axis: Vector3D, origin: Point3D) -> bool:
+        self._array = geometry.rotation_matrix(angle, axis.asArray(), origin.asArray())
+        return True
+
+    @property
+    def translation(self) -> Vector3D:
+        return Vector3D(self._array[3], self._array[7], self._array[11])
+
+    @translation.setter
+    def translation(self, vector: Vector3D):
+        self._array[3], self._array[7], self._array[11] = vector.asArray()
+
+    def getAsCoordinateSystem(self):
+        """Returns the (origin, x axis, y axis, z axis) of the coordinate system this matrix transforms to."""
+        a = self._array
+        return (Point3D(a[3], a[7], a[11]),
+                Vector3D(a[0], a[4], a[8]),
+                Vector3D(a[1], a[5], a[9]),
+                Vector3D(a[2], a[6], a[10]))
+
+    def setWithCoordinateSystem(self, origin: Point3D, x_axis: Vector3D, y_axis: Vector3D, z_axis: Vector3D) -> bool:
+        self._array = [
+            x_axis.x, y_axis.x, z_axis.x, origin.x,
+            x_axis.y, y_axis.y, z_axis.y, origin.y,
+            x_axis.z, y_axis.z, z_axis.z, origin.z,
+            0.0, 0.0, 0.0, 1.0]
+        return True
+
+    def setToAlignCoordinateSystems(
+            self, from_origin: Point3D, from_x: Vector3D, from_y: Vector3D, from_z: Vector3D,
+            to_origin: Point3D, to_x: Vector3D, to_y: Vector3D, to_z: Vector3D) -> bool:
+        from_matrix = Matrix3D()
+        from_matrix.setWithCoordinateSystem(from_origin, from_x, from_y, from_z)
+        from_matrix.invert()
+        to_matrix = Matrix3D()
+        to_matrix.setWithCoordinateSystem(to_origin, to_x, to_y, to_z)
+        self._array = geometry.multiply(to_matrix.asArray(), from_matrix.asArray())
+        return True
+
+    def invert(self) -> bool:
+        # Gauss-Jordan elimination with partial pivoting
+        rows = [self._array[row * 4:row * 4 + 4] + [1.0 if column == row else 0.0 for column in range(4)]
+                for row in range(4)]
+        for column in range(4):
+            pivot = max(range(column, 4), key=lambda row: abs(rows[row][column]))
+            if abs(rows[pivot][column]) < _tolerance:
+                return False
+            rows[column], rows[pivot] = rows[pivot], rows[column]
+            pivot_value = rows[column][column]
+            rows[column] = [value / pivot_value for value in rows[column]]
+            for row in range(4):
+                if row != column:
+                    factor = rows[row][column]
+                    rows[row] = [value - factor * pivot_row_value
+                                 for value, pivot_row_value in zip(rows[row], rows[column])]
+        self._array = [value for row in rows for value in row[4:]]
+        return True
+
+    def isEqualTo(self, matrix: "Matrix3D") -> bool:
+        return all(abs(a - b) < _tolerance for a, b in zip(self._array, matrix.asArray()))
+
+    def __repr__(self):
+        return "Matrix3D(%r)" % self._array
+
+
+class Plane(object):
+    def __init__(self, origin: Point3D, normal: Vector3D):
+        self.origin = origin.copy()
+        self.normal = normal.copy()
+        self.normal.normalize()
+
+    @staticmethod
+    def create(origin: Point3D, normal: Vector3D) -> "Plane":
+        return Plane(origin, normal)
+
+    def copy(self) -> "Plane":
+        return Plane(self.origin, self.normal)
+
+    def isParallelToLine(self, line: "InfiniteLine3D") -> bool:
+        return self.normal.isPerpendicularTo(line.direction)
+
+    def intersectWithLine(self, line: "InfiniteLine3D") -> Optional[Point3D]:
+        if self.isParallelToLine(line):
+            return None
+        distance = line.origin.vectorTo(self.origin).dotProduct(self.normal) / line.direction.dotProduct(self.normal)
+        return Point3D(*geometry.add(line.origin.asArray(), geometry.scale(line.direction.asArray(), distance)))
+
+    def transformBy(self, matrix: Matrix3D) -> bool:
+        self.origin.transformBy(matrix)
+        self.normal.transformBy(matrix)
+        self.normal.normalize()
+        return True
+
+
+class InfiniteLine3D(object):
+    def __init__(self, origin: Point3D, direction: Vector3D):
+        self.origin = origin.copy()
+        self.direction = direction.copy()
+
+    @staticmethod
+    def create(origin: Point3D, direction: Vector3D) -> "InfiniteLine3D":
+        return InfiniteLine3D(origin, direction)
+
+    def copy(self) -> "InfiniteLine3D":
+        return InfiniteLine3D(self.origin, self.direction)
+
+    def intersectWithCurve(self, curve: "InfiniteLine3D") -> List[Point3D]:
+        """Returns the intersection of this line with another line, as a list of 0 or 1 points."""
+        d1 = self.direction.asArray()
+        d2 = curve.direction.asArray()
+        normal = geometry.cross(d1, d2)
+        normal_length_squared = geometry.dot(normal, normal)
+        if normal_length_squared < _tolerance:
+            return []
+
+        offset = geometry.subtract(curve.origin.asArray(), self.origin.asArray())
+        if abs(geometry.dot(offset, normal)) > _tolerance * math.sqrt(normal_length_squared):
+            # skew lines
+            return []
+        distance = geometry.dot(geometry.cross(offset, d2), normal) / normal_length_squared
+        return [Point3D(*geometry.add(self.origin.asArray(), geometry.scale(d1, distance)))]
+
+
+class _Placeholder(object):
+    """Stands in for any adsk class that the headless environment doesn't implement."""
+
+    def __init__(self, *args, **kwargs):
+        raise NotImplementedError("%s isn't available outside of fusion" % type(self).__name__)
+
+
+def _placeholder_class(name: str) -> type:
+    if name.startswith("__"):
+        raise AttributeError(name)
+    return type(name, (_Placeholder,), {})
+
+
+def install() -> bool:
+    """Registers the headless versions of adsk, adsk.core and adsk.fusion, unless the real ones are available.
+
+    :return: True if the headless versions were installed.
+    """
+    if "adsk" in sys.modules:
+        return False
+    try:
+        import adsk.core
+        return False
+    except ImportError:
+        pass
+
+    adsk = types.ModuleType("adsk")
+    core = types.ModuleType("adsk.core")
+    fusion = types.ModuleType("adsk.fusion")
+    for cls in (Point3D, Vector3D, Matrix3D, Plane, InfiniteLine3D):
+        setattr(core, cls.__name__, cls)
+    # Any other classes are only usable in type annotations
+    core.__getattr__ = _placeholder_class
+    fusion.__getattr__ = _placeholder_class
+
+    adsk.core = core
+    adsk.fusion = fusion
+    sys.modules["adsk"] = adsk
+    sys.modules["adsk.core"] = core
+    sys.modules["adsk.fusion"] = fusion
+    return True
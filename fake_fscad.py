@@ -0,0 +1,753 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A bounding-box-only stand-in for fscad, for running lalboard's placement logic outside of fusion.
+
+Each component is modelled as a set of points whose bounding box approximates the real component's bounding box. The
+primitives (Box, Cylinder, etc.) have exact bounding boxes, and the transforms, placement, find_children, named points
+and faces all work the same as in fscad. But the operations only approximate the bounding box of their result. e.g. a
+Difference has the bounding box of its first component, and a rotated cylinder has the bounding box of its rotated
+bounding box. So this is suitable for logic that depends on the positions and rough sizes of components, like the
+placement classes or standoff_by_ball_center, but not for anything that depends on the actual geometry.
+
+Usage:
+
+    import fake_fscad
+    fake_fscad.install()
+    import lalboard
+"""
+
+import copy
+import importlib.util
+import inspect
+import itertools
+import math
+import os
+import sys
+import types
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import fake_adsk
+import geometry
+from fake_adsk import Matrix3D, Plane, Point3D, Vector3D
+
+
+def _coordinates(value) -> Tuple[float, float, float]:
+    if isinstance(value, (Point3D, Vector3D)):
+        return value.x, value.y, value.z
+    return tuple(float(coordinate) for coordinate in value)
+
+
+def _box_points(bounds_min: Sequence[float], bounds_max: Sequence[float]) -> List[Tuple[float, float, float]]:
+    return [tuple(corner) for corner in itertools.product(*zip(bounds_min, bounds_max))]
+
+
+def _bounds_points(points: Sequence[Sequence[float]]) -> List[Tuple[float, float, float]]:
+    if not points:
+        return []
+    return _box_points(*geometry.bounds(points))
+
+
+class _Anchor(object):
+    """One of the min (-), mid (~) or max (+) anchors of a bounded entity, for use with Component.place."""
+
+    def __init__(self, entity: "_BoundedEntity", kind: str):
+        self._entity = entity
+        self._kind = kind
+
+    def value(self, axis: int) -> float:
+        bounds_min, bounds_max = self._entity.bounds()
+        if self._kind == "min":
+            return bounds_min[axis]
+        if self._kind == "max":
+            return bounds_max[axis]
+        return (bounds_min[axis] + bounds_max[axis]) / 2
+
+    def __eq__(self, other) -> "_Placement":
+        return _Placement(self, other, 0.0)
+
+    __hash__ = None
+
+
+class _Placement(object):
+    def __init__(self, anchor: _Anchor, target, offset: float):
+        self._anchor = anchor
+        self._target = target
+        self._offset = offset
+
+    def __add__(self, offset: float) -> "_Placement":
+        return _Placement(self._anchor, self._target, self._offset + offset)
+
+    def __sub__(self, offset: float) -> "_Placement":
+        return _Placement(self._anchor, self._target, self._offset - offset)
+
+    def delta(self, axis: int) -> float:
+        if isinstance(self._target, _Anchor):
+            target = self._target.value(axis)
+        elif isinstance(self._target, (Point3D, Vector3D, tuple, list)):
+            target = _coordinates(self._target)[axis]
+        else:
+            target = float(self._target)
+        return target + self._offset - self._anchor.value(axis)
+
+
+class _BoundedEntity(object):
+    def bounds(self) -> Tuple[Sequence[float], Sequence[float]]:
+        raise NotImplementedError()
+
+    def min(self) -> Point3D:
+        return Point3D(*self.bounds()[0])
+
+    def max(self) -> Point3D:
+        return Point3D(*self.bounds()[1])
+
+    def mid(self) -> Point3D:
+        bounds_min, bounds_max = self.bounds()
+        return Point3D(*geometry.scale(geometry.add(bounds_min, bounds_max), .5))
+
+    def size(self) -> Vector3D:
+        bounds_min, bounds_max = self.bounds()
+        return Vector3D(*geometry.subtract(bounds_max, bounds_min))
+
+    def __neg__(self) -> _Anchor:
+        return _Anchor(self, "min")
+
+    def __pos__(self) -> _Anchor:
+        return _Anchor(self, "max")
+
+    def __invert__(self) -> _Anchor:
+        return _Anchor(self, "mid")
+
+
+class BoundingBox(_BoundedEntity):
+    def __init__(self, bounds_min: Sequence[float], bounds_max: Sequence[float]):
+        self._bounds = (tuple(bounds_min), tuple(bounds_max))
+
+    def bounds(self):
+        return self._bounds
+
+    def make_box(self, name: Optional[str] = None) -> "Box":
+        size = self.size()
+        box = Box(size.x, size.y, size.z, name=name)
+        box.translate(*self._bounds[0])
+        return box
+
+
+class _BoundingBox3D(object):
+    """The bounding box of a BRep entity, as returned by boundingBox."""
+
+    def __init__(self, bounds: Tuple[Sequence[float], Sequence[float]]):
+        self.minPoint = Point3D(*bounds[0])
+        self.maxPoint = Point3D(*bounds[1])
+
+
+class Face(_BoundedEntity):
+    """A planar face of a component, modelled by its corner points and its normal."""
+
+    def __init__(self, component: "Component", points: Sequence[Sequence[float]], normal: Sequence[float]):
+        self.component = component
+        self._points = [tuple(point) for point in points]
+        self._normal = tuple(normal)
+        self.brep = self
+
+    def bounds(self):
+        return geometry.bounds(self._points)
+
+    @property
+    def boundingBox(self) -> _BoundingBox3D:
+        return _BoundingBox3D(self.bounds())
+
+    def _transform(self, matrix: Sequence[float]):
+        self._points = geometry.transform_points(matrix, self._points)
+        self._normal = tuple(geometry.normalize(geometry.transform_vector(matrix, self._normal)))
+
+    def get_plane(self) -> Plane:
+        return Plane(self.mid(), Vector3D(*self._normal))
+
+    def make_component(self, name: Optional[str] = None) -> "Component":
+        return Component._leaf(self._points, name=name or "face", normal=self._normal)
+
+    @property
+    def edges(self) -> List["Edge"]:
+        return [Edge(self.component, self)]
+
+    @property
+    def centroid(self) -> Point3D:
+        return self.mid()
+
+
+class Body(object):
+    """The bodies of a component. A component only has a single body, which holds all of its own faces."""
+
+    def __init__(self, component: "Component"):
+        self.component = component
+        self.brep = self
+
+    @property
+    def boundingBox(self) -> _BoundingBox3D:
+        return _BoundingBox3D(self.component.bounds())
+
+    @property
+    def faces(self) -> List[Face]:
+        return self.component.faces
+
+    @property
+    def edges(self) -> List["Edge"]:
+        return self.component.edges
+
+
+class Edge(object):
+    def __init__(self, component: "Component", face: Optional[Face] = None):
+        self.component = component
+        self.face = face
+        self.brep = self
+
+
+class _NamedPoint(object):
+    def __init__(self, component: "Component", point: Sequence[float]):
+        self.component = component
+        self._point = tuple(point)
+
+    @property
+    def point(self) -> Point3D:
+        return Point3D(*self._point)
+
+
+class Component(_BoundedEntity):
+    """A component, modelled by a set of points that approximate its bounding box."""
+
+    def __init__(self, name: Optional[str] = None):
+        self.name = name
+        self._points: List[Tuple[float, float, float]] = []
+        self._normal: Optional[Tuple[float, float, float]] = None
+        self._faces: List[Face] = []
+        self._visible_children: List["Component"] = []
+        self._hidden_children: List["Component"] = []
+        self._named_points = {}
+        self._named_faces = {}
+        self._named_edges = {}
+        self._matrix = geometry.identity_matrix()
+        self._parent: Optional["Component"] = None
+
+    @staticmethod
+    def _leaf(points, name=None, normal=None) -> "Component":
+        component = Component(name=name)
+        component._points = [tuple(point) for point in points]
+        component._normal = tuple(normal) if normal else None
+        return component
+
+    def _add_children(self, visible: Iterable["Component"] = (), hidden: Iterable["Component"] = ()):
+        for child in visible:
+            self._visible_children.append(child)
+            child._parent = self
+        for child in hidden:
+            self._hidden_children.append(child)
+            child._parent = self
+
+    def _all_points(self) -> List[Tuple[float, float, float]]:
+        points = list(self._points)
+        for child in self._visible_children:
+            points.extend(child._all_points())
+        return points
+
+    def bounds(self):
+        points = self._all_points()
+        if not points:
+            return (0.0, 0.0, 0.0), (0.0, 0.0, 0.0)
+        return geometry.bounds(points)
+
+    @property
+    def bounding_box(self) -> BoundingBox:
+        return BoundingBox(*self.bounds())
+
+    @property
+    def bodies(self) -> List[Body]:
+        if self._points:
+            return [Body(self)]
+        return [body for child in self._visible_children for body in child.bodies]
+
+    @property
+    def faces(self) -> List[Face]:
+        return list(self._faces)
+
+    @property
+    def edges(self) -> List[Edge]:
+        return [edge for face in self._faces for edge in face.edges]
+
+    def children(self) -> List["Component"]:
+        return self._visible_children + self._hidden_children
+
+    @property
+    def parent(self) -> Optional["Component"]:
+        return self._parent
+
+    def find_children(self, name: str, recursive: bool = True) -> List["Component"]:
+        result = []
+        for child in self.children():
+            if child.name == name:
+                result.append(child)
+            if recursive:
+                result.extend(child.find_children(name, recursive))
+        return result
+
+    def _subtree(self) -> Iterable["Component"]:
+        yield self
+        for child in self.children():
+            yield from child._subtree()
+
+    def transform(self, matrix: Matrix3D) -> "Component":
+        array = matrix.asArray()
+        # Faces can be shared between a component and its parents, so make sure each one is only transformed once
+        faces = {}
+        for component in self._subtree():
+            component._points = [tuple(point) for point in geometry.transform_points(array, component._points)]
+            if component._normal:
+                component._normal = tuple(geometry.normalize(geometry.transform_vector(array, component._normal)))
+            for face in itertools.chain(component._faces, *component._named_faces.values()):
+                faces[id(face)] = face
+            for named_point in component._named_points.values():
+                named_point._point = tuple(geometry.transform_point(array, named_point._point))
+            component._matrix = geometry.multiply(array, component._matrix)
+        for face in faces.values():
+            face._transform(array)
+        return self
+
+    def _transform_array(self, array: Sequence[float]) -> "Component":
+        return self.transform(Matrix3D(array))
+
+    def world_transform(self) -> Matrix3D:
+        return Matrix3D(self._matrix)
+
+    def translate(self, tx: float = 0, ty: float = 0, tz: float = 0) -> "Component":
+        return self._transform_array(geometry.translation_matrix((tx, ty, tz)))
+
+    def tx(self, tx: float) -> "Component":
+        return self.translate(tx, 0, 0)
+
+    def ty(self, ty: float) -> "Component":
+        return self.translate(0, ty, 0)
+
+    def tz(self, tz: float) -> "Component":
+        return self.translate(0, 0, tz)
+
+    def _rotate(self, angle: float, axis: Sequence[float], center) -> "Component":
+        center = _coordinates(center) if center is not None else (0.0, 0.0, 0.0)
+        return self._transform_array(geometry.rotation_matrix(math.radians(angle), axis, center))
+
+    def rx(self, angle: float, center=None) -> "Component":
+        return self._rotate(angle, (1, 0, 0), center)
+
+    def ry(self, angle: float, center=None) -> "Component":
+        return self._rotate(angle, (0, 1, 0), center)
+
+    def rz(self, angle: float, center=None) -> "Component":
+        return self._rotate(angle, (0, 0, 1), center)
+
+    def rotate(self, rx: float = 0, ry: float = 0, rz: float = 0, center=None) -> "Component":
+        return self.rx(rx, center).ry(ry, center).rz(rz, center)
+
+    def scale(self, sx: float = 1, sy: Optional[float] = None, sz: Optional[float] = None,
+              center=None) -> "Component":
+        sy = sx if sy is None else sy
+        sz = sx if sz is None else sz
+        cx, cy, cz = _coordinates(center) if center is not None else (0.0, 0.0, 0.0)
+        return self._transform_array([
+            sx, 0, 0, cx - cx * sx,
+            0, sy, 0, cy - cy * sy,
+            0, 0, sz, cz - cz * sz,
+            0, 0, 0, 1])
+
+    def place(self, x=None, y=None, z=None) -> "Component":
+        deltas = [placement.delta(axis) if placement is not None else 0.0
+                  for axis, placement in enumerate((x, y, z))]
+        return self.translate(*deltas)
+
+    def copy(self, copy_children: bool = True, name: Optional[str] = None) -> "Component":
+        if copy_children:
+            parent = self._parent
+            self._parent = None
+            try:
+                result = copy.deepcopy(self)
+            finally:
+                self._parent = parent
+        else:
+            result = Component._leaf(self._all_points(), normal=self._normal)
+            result.name = self.name
+            result._matrix = list(self._matrix)
+        if name is not None:
+            result.name = name
+        return result
+
+    def add_named_point(self, name: str, point) -> "Component":
+        self._named_points[name] = _NamedPoint(self, _coordinates(point))
+        return self
+
+    def named_point(self, name: str) -> Optional[_NamedPoint]:
+        return self._named_points.get(name)
+
+    def add_named_faces(self, name: str, *faces: Face) -> "Component":
+        self._named_faces.setdefault(name, []).extend(faces)
+        return self
+
+    def named_faces(self, name: str) -> Optional[List[Face]]:
+        return self._named_faces.get(name)
+
+    def add_named_edges(self, name: str, *edges: Edge) -> "Component":
+        self._named_edges.setdefault(name, []).extend(edges)
+        return self
+
+    def named_edges(self, name: str) -> Optional[List[Edge]]:
+        return self._named_edges.get(name)
+
+    def find_faces(self, faces, *_, **__) -> List[Face]:
+        if isinstance(faces, Face):
+            return [faces]
+        if isinstance(faces, Component):
+            return faces.faces
+        return [face for item in faces for face in self.find_faces(item)]
+
+    def find_edges(self, edges) -> List[Edge]:
+        if isinstance(edges, Edge):
+            return [edges]
+        return list(edges)
+
+    def shared_edges(self, faces1, faces2) -> List[Edge]:
+        # The actual edges aren't modelled, but an edge only needs to know its component, for Fillet and Chamfer
+        return [Edge(self, face) for face in self.find_faces(faces1)]
+
+    def get_plane(self) -> Plane:
+        return Plane(self.mid(), Vector3D(*(self._plane_normal() or (0, 0, 1))))
+
+    def _plane_normal(self) -> Optional[Tuple[float, float, float]]:
+        if self._normal:
+            return self._normal
+        for child in self.children():
+            normal = child._plane_normal()
+            if normal:
+                return normal
+        return None
+
+    def create_occurrence(self, *_, **__):
+        return None
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.name)
+
+
+def _root(component: Component) -> Component:
+    # noinspection PyProtectedMember
+    while component._parent is not None:
+        component = component._parent
+    return component
+
+
+class Box(Component):
+    def __init__(self, x: float, y: float, z: float, name: Optional[str] = None):
+        super().__init__(name)
+        self._points = _box_points((0, 0, 0), (x, y, z))
+        self._faces = [
+            Face(self, [point for point in self._points if point[axis] == value], normal)
+            for axis, value, normal in (
+                (0, 0, (-1, 0, 0)), (0, x, (1, 0, 0)),
+                (1, 0, (0, -1, 0)), (1, y, (0, 1, 0)),
+                (2, 0, (0, 0, -1)), (2, z, (0, 0, 1)))]
+        self.left, self.right, self.front, self.back, self.bottom, self.top = self._faces
+
+
+class Cylinder(Component):
+    def __init__(self, height: float, radius: float, top_radius: Optional[float] = None,
+                 name: Optional[str] = None):
+        super().__init__(name)
+        self.height = height
+        self.radius = radius
+        self.top_radius = radius if top_radius is None else top_radius
+        max_radius = max(self.radius, self.top_radius)
+        self._points = _box_points((-max_radius, -max_radius, 0), (max_radius, max_radius, height))
+        self.bottom = Face(self, _box_points((-radius, -radius, 0), (radius, radius, 0)), (0, 0, -1))
+        self.top = Face(
+            self, _box_points((-self.top_radius, -self.top_radius, height), (self.top_radius, self.top_radius, height)),
+            (0, 0, 1))
+        self.side = Face(self, self._points, (1, 0, 0))
+        self._faces = [self.bottom, self.side, self.top]
+
+
+class Sphere(Component):
+    def __init__(self, radius: float, name: Optional[str] = None):
+        super().__init__(name)
+        self.radius = radius
+        self._points = _box_points((-radius,) * 3, (radius,) * 3)
+        self.surface = Face(self, self._points, (0, 0, 1))
+        self._faces = [self.surface]
+
+
+class _Planar(Component):
+    def __init__(self, points: Sequence[Sequence[float]], name: Optional[str]):
+        super().__init__(name)
+        self._points = _bounds_points([(x, y, 0.0) for x, y, *_ in points])
+        self._normal = (0.0, 0.0, 1.0)
+        self.face = Face(self, self._points, self._normal)
+        self._faces = [self.face]
+
+
+class Rect(_Planar):
+    def __init__(self, x: float, y: float, name: Optional[str] = None):
+        super().__init__([(0, 0), (x, y)], name)
+
+
+class Circle(_Planar):
+    def __init__(self, radius: float, name: Optional[str] = None):
+        super().__init__([(-radius, -radius), (radius, radius)], name)
+        self.radius = radius
+
+
+class RegularPolygon(_Planar):
+    def __init__(self, sides: int, radius: float, is_outer_radius: bool = True, name: Optional[str] = None):
+        if not is_outer_radius:
+            radius = radius / math.cos(math.pi / sides)
+        angles = [2 * math.pi * index / sides for index in range(sides)]
+        super().__init__(
+            [(radius * math.cos(angle), radius * math.sin(angle)) for angle in angles], name)
+
+
+class Polygon(_Planar):
+    def __init__(self, *points, name: Optional[str] = None):
+        super().__init__([_coordinates(point) for point in points], name)
+
+
+def _combine(name: Optional[str], visible: Sequence[Component], hidden: Sequence[Component] = (),
+             points: Sequence[Sequence[float]] = (), normal=None) -> Component:
+    component = Component(name)
+    component._points = [tuple(point) for point in points]
+    component._normal = normal
+    component._add_children(visible, hidden)
+    component._faces = [face for child in visible for face in child._faces]
+    return component
+
+
+def _flatten(components) -> List[Component]:
+    result = []
+    for component in components:
+        if isinstance(component, (list, tuple)):
+            result.extend(_flatten(component))
+        else:
+            result.append(component)
+    return result
+
+
+def Union(*components: Component, name: Optional[str] = None) -> Component:
+    return _combine(name, _flatten(components))
+
+
+def Difference(*components: Component, name: Optional[str] = None) -> Component:
+    components = _flatten(components)
+    return _combine(name, components[:1], components[1:])
+
+
+def Intersection(*components: Component, name: Optional[str] = None) -> Component:
+    components = _flatten(components)
+    bounds_min, bounds_max = components[0].bounds()
+    for component in components[1:]:
+        other_min, other_max = component.bounds()
+        bounds_min = [max(a, b) for a, b in zip(bounds_min, other_min)]
+        bounds_max = [max(lower, min(a, b)) for lower, a, b in zip(bounds_min, bounds_max, other_max)]
+    return _combine(name, [], components, _box_points(bounds_min, bounds_max))
+
+
+def Group(visible_children: Sequence[Component], hidden_children: Sequence[Component] = (),
+          name: Optional[str] = None) -> Component:
+    return _combine(name, list(visible_children), list(hidden_children))
+
+
+def BRepComponent(*_breps, name: Optional[str] = None) -> Component:
+    # The actual geometry of a brep isn't available
+    return Component(name)
+
+
+def Hull(component: Component, name: Optional[str] = None) -> Component:
+    return _combine(name, [], [component], _bounds_points(component._all_points()), component._plane_normal())
+
+
+def Extrude(entity, height: float, angle: float = 0, name: Optional[str] = None) -> Component:
+    if isinstance(entity, Component):
+        sources = [entity]
+        points = entity._all_points()
+        normal = entity._plane_normal() or (0, 0, 1)
+    else:
+        faces = [entity] if isinstance(entity, Face) else list(entity)
+        sources = []
+        points = [point for face in faces for point in face._points]
+        normal = faces[0]._normal
+    end_points = geometry.translate_points(points, geometry.scale(normal, height))
+    result = _combine(name, [], sources, _bounds_points(points + end_points))
+    result.start_faces = [Face(result, _bounds_points(points), geometry.scale(normal, -1))]
+    result.end_faces = [Face(result, _bounds_points(end_points), normal)]
+    result.side_faces = []
+    result._faces = result.start_faces + result.end_faces
+    return result
+
+
+def ExtrudeTo(entity, target, name: Optional[str] = None) -> Component:
+    faces = [entity] if isinstance(entity, Face) else list(entity)
+    owner = _root(faces[0].component)
+    targets = _flatten([target])
+    points = owner._all_points() + [point for component in targets for point in component._all_points()]
+    return _combine(name, [], [owner], _bounds_points(points))
+
+
+def Loft(*sections, name: Optional[str] = None) -> Component:
+    components = [section if isinstance(section, Component) else section.make_component() for section in sections]
+    points = [point for component in components for point in component._all_points()]
+    return _combine(name, [], components, _bounds_points(points))
+
+
+def Silhouette(entity, plane: Plane, named_edges=None, name: Optional[str] = None) -> Component:
+    entities = _flatten([entity])
+    points = []
+    for item in entities:
+        points.extend(item._all_points() if isinstance(item, Component) else item._points)
+    origin = plane.origin.asArray()
+    normal = plane.normal.asArray()
+    projected = [
+        geometry.subtract(point, geometry.scale(normal, geometry.dot(geometry.subtract(point, origin), normal)))
+        for point in points]
+    return _combine(name, [], [], _bounds_points(projected), tuple(normal))
+
+
+def Threads(component: Component, cross_section: Sequence[Sequence[float]], pitch: float,
+            reverse_axis: bool = False, name: Optional[str] = None) -> Component:
+    depth = max(point[0] for point in cross_section)
+    bounds_min, bounds_max = component.bounds()
+    return _combine(name, [], [component], _box_points(
+        (bounds_min[0] - depth, bounds_min[1] - depth, bounds_min[2]),
+        (bounds_max[0] + depth, bounds_max[1] + depth, bounds_max[2])))
+
+
+def _edge_operation(edges, name: Optional[str]) -> Component:
+    edges = list(edges)
+    owner = _root(edges[0].component)
+    return _combine(name, [], [owner], _bounds_points(owner._all_points()))
+
+
+def Fillet(edges, radius: float, blend_corners: bool = False, name: Optional[str] = None) -> Component:
+    return _edge_operation(edges, name)
+
+
+def Chamfer(edges, distance: float, distance2: Optional[float] = None, name: Optional[str] = None) -> Component:
+    return _edge_operation(edges, name)
+
+
+def SplitFace(component: Component, splitting_tool, name: Optional[str] = None) -> Component:
+    return _combine(name, [component])
+
+
+def Scale(component: Component, sx: float = 1, sy: Optional[float] = None, sz: Optional[float] = None, center=None,
+          name: Optional[str] = None) -> Component:
+    return component.copy(name=name).scale(sx, sy, sz, center)
+
+
+def Thicken(entity, thickness: float, name: Optional[str] = None) -> Component:
+    faces = _flatten([entity])
+    points = [point for face in faces for point in face._points]
+    points += geometry.translate_points(points, geometry.scale(faces[0]._normal, thickness))
+    return _combine(name, [], [], _bounds_points(points))
+
+
+def OffsetEdges(*_, **__) -> Component:
+    raise NotImplementedError("OffsetEdges isn't supported outside of fusion")
+
+
+class Builder2D(object):
+    def __init__(self, *_, **__):
+        raise NotImplementedError("Builder2D isn't supported outside of fusion")
+
+
+def import_fusion_archive(*_, **__):
+    raise NotImplementedError("Importing fusion archives isn't supported outside of fusion")
+
+
+def app():
+    raise NotImplementedError("There's no fusion application outside of fusion")
+
+
+class MemoizableDesign(object):
+    def __init__(self):
+        self._memo = {}
+
+    @staticmethod
+    def MemoizeComponent(func):
+        def memoized(self, *args, **kwargs):
+            key = (func.__name__, repr(args), repr(sorted(kwargs.items())))
+            if key not in self._memo:
+                self._memo[key] = func(self, *args, **kwargs)
+            return self._memo[key].copy()
+        memoized.__name__ = func.__name__
+        memoized.__qualname__ = func.__qualname__
+        memoized.__doc__ = func.__doc__
+        return memoized
+
+
+def run_design(design_func, message_box_on_error=True, print_runtime=True, document_name=None, design_args=None,
+               design_kwargs=None):
+    """Runs the design directly, since there's no fusion document to create."""
+    design_func(*(design_args or []), **(design_kwargs or {}))
+
+
+def relative_import(path: str) -> types.ModuleType:
+    """Imports the module at the given path, relative to the calling module."""
+    caller_file = inspect.stack()[1].frame.f_globals["__file__"]
+    path = os.path.realpath(os.path.join(os.path.dirname(caller_file), path))
+    module_name = os.path.splitext(os.path.basename(path))[0]
+
+    module = sys.modules.get(module_name)
+    if module is not None and os.path.realpath(getattr(module, "__file__", "") or "") == path:
+        return module
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+_exported_names = [
+    "BoundingBox", "Box", "BRepComponent", "Builder2D", "Chamfer", "Circle", "Component", "Cylinder", "Difference",
+    "Edge", "Extrude", "ExtrudeTo", "Face", "Fillet", "Group", "Hull", "Intersection", "Loft", "MemoizableDesign",
+    "OffsetEdges", "Polygon", "Rect", "RegularPolygon", "Scale", "Silhouette", "Sphere", "SplitFace", "Thicken",
+    "Threads", "Union", "app", "import_fusion_archive", "relative_import", "run_design"]
+
+
+def install() -> bool:
+    """Registers this as the fscad.fscad module, along with the headless adsk modules, unless fscad is available.
+
+    :return: True if the headless versions were installed.
+    """
+    fake_adsk.install()
+    if "fscad" in sys.modules:
+        return False
+    try:
+        import fscad.fscad
+        return False
+    except ImportError:
+        pass
+
+    fscad_package = types.ModuleType("fscad")
+    fscad_module = types.ModuleType("fscad.fscad")
+    for name in _exported_names:
+        setattr(fscad_module, name, globals()[name])
+    fscad_module.__all__ = list(_exported_names)
+    fscad_package.fscad = fscad_module
+    sys.modules["fscad"] = fscad_package
+    sys.modules["fscad.fscad"] = fscad_module
+    return True
@@ -0,0 +1,70 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fits cluster placements to the measurements of a hand.
+
+The measurements are read from a json file, with the position and direction of each fingertip and the thumb tip. See
+configs/hand_measurements.json for an example. The fitted placements are printed in the format of a hand's section of
+configs/layout.json, along with the fit errors, and the fitted clusters are built so they can be checked visually.
+"""
+
+import json
+import os
+
+from fscad.fscad import *
+relative_import("../lalboard.py")
+import lalboard
+
+measurements_path = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)), "..", "configs", "hand_measurements.json")
+
+# Output support lengths instead of euler angles for the rotation of each cluster.
+use_support_lengths = True
+
+# The spacing of the points sampled from the cluster surfaces. This is also the clearance left between the clusters.
+spacing = 3.0
+
+# Build the clusters with draft detail, which is much faster and has the same placement-relevant dimensions. Use "full"
+# to see the fitted clusters in full detail. See Lalboard.__init__.
+detail = "draft"
+
+
+def design(context: lalboard.Lalboard):
+    with open(measurements_path, "r") as measurements_file:
+        measurements = json.load(measurements_file)
+    left_hand = measurements.get("left_hand", False)
+    fingers, thumb = lalboard.fitting.load_measurements(measurements)
+
+    hand_fit = context.fit_hand(fingers, thumb, left_hand=left_hand, spacing=spacing)
+    print(hand_fit)
+    print(json.dumps(hand_fit.layout(use_support_lengths), indent=2))
+
+    clusters = []
+    for finger_fit in hand_fit.fingers:
+        clusters.append(context.positioned_cluster_assembly(
+            lalboard.AbsoluteFingerClusterPlacement(context)
+                .set_cartesian(*finger_fit.position)
+                .set_rotation_by_euler_angles(*finger_fit.euler_angles)))
+    clusters.append(context.positioned_thumb_assembly(
+        lalboard.AbsoluteThumbClusterPlacement(context)
+            .set_cartesian(*hand_fit.thumb.position)
+            .set_rotation_by_euler_angles(*hand_fit.thumb.euler_angles),
+        left_hand=left_hand))
+
+    Group(clusters).create_occurrence(scale=.1)
+
+
+def run(context):
+    lalboard.run_design(design, context=context, detail=detail)
@@ -0,0 +1,366 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Fitting cluster placements to the measurements of a hand.
+
+Each finger (and the thumb) is measured as the position where its tip rests, and the direction it points in. The
+fitted placement for the finger's cluster puts the top of the down key at the tip position, with the cluster's forward
+(+y) direction pointing along the finger, and its left-right axis kept level.
+
+Each cluster's pose (position and euler angles) is found by minimizing the error against its measurement via
+Nelder-Mead, with a penalty for coming closer than a given clearance to any of the clusters that have already been
+placed. The clusters are fitted one at a time, in order, starting from the pose that exactly matches the measurement.
+So in the common case where the measured poses don't overlap, each fit converges almost immediately.
+
+The cluster geometry is represented by points sampled from its surfaces, relative to the placement's reference point,
+so this doesn't depend on fusion, and can be tested outside of fusion. See Lalboard.fit_hand for fitting against the
+actual cluster geometry.
+"""
+
+import math
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import geometry
+
+Point = Tuple[float, float, float]
+
+
+class Measurement(object):
+    """The measured position and direction of a finger or thumb tip.
+
+    :param position: The position of the tip, i.e. where the top of the down key should be.
+    :param direction: The direction the finger points in, from the last knuckle towards the tip.
+    """
+
+    def __init__(self, position: Sequence[float], direction: Sequence[float]):
+        self.position = tuple(float(value) for value in position)
+        self.direction = geometry.normalize(direction)
+
+    @staticmethod
+    def from_dict(data: dict) -> "Measurement":
+        return Measurement(data["position"], data["direction"])
+
+
+class ClusterShape(object):
+    """The geometry of a cluster, as needed for fitting.
+
+    :param points: Points sampled from the surfaces of the cluster, relative to the placement's reference point, in the
+    cluster's default orientation.
+    :param support_points: The centers of the ball magnets that attach to the bottom of the cluster, relative to the
+    reference point, in the same order as the support lengths of the cluster's placement.
+    """
+
+    def __init__(self, points: Sequence[Sequence[float]], support_points: Sequence[Sequence[float]]):
+        self.points = [(point[0], point[1], point[2]) for point in points]
+        self.support_points = [(point[0], point[1], point[2]) for point in support_points]
+        self.radius = max(geometry.length(point) for point in self.points) if self.points else 0.0
+
+    def mirrored(self) -> "ClusterShape":
+        """Returns this shape mirrored in x, e.g. for a left hand thumb cluster."""
+        return ClusterShape(
+            [(-x, y, z) for x, y, z in self.points],
+            [(-x, y, z) for x, y, z in self.support_points])
+
+
+class ClusterFit(object):
+    """The fitted placement for a single cluster.
+
+    :param position: The position of the reference point.
+    :param euler_angles: The (rx, ry, rz) rotation.
+    :param support_lengths: The lengths of the supports needed to hold the cluster at this pose.
+    :param position_error: The distance between the fitted position and the measured position.
+    :param direction_error: The angle in degrees between the cluster's forward direction and the measured direction.
+    """
+
+    def __init__(self, position: Sequence[float], euler_angles: Sequence[float], support_lengths: Sequence[float],
+                 position_error: float, direction_error: float):
+        self.position = tuple(position)
+        self.euler_angles = tuple(euler_angles)
+        self.support_lengths = tuple(support_lengths)
+        self.position_error = position_error
+        self.direction_error = direction_error
+
+    @property
+    def cylindrical(self) -> Point:
+        """The (r, theta, z) cylindrical coordinates of the position."""
+        return (math.hypot(self.position[0], self.position[1]),
+                geometry.cylindrical_theta(self.position),
+                self.position[2])
+
+    def layout_entry(self, use_support_lengths=False) -> dict:
+        """Returns an entry for this cluster in the format of the layout file. See layout."""
+        entry = {"cartesian": [round(value, 2) for value in self.position]}
+        if use_support_lengths:
+            entry["support_lengths"] = [round(value, 2) for value in self.support_lengths]
+            entry["rz"] = round(self.euler_angles[2], 2)
+        else:
+            entry["euler_angles"] = [round(value, 2) for value in self.euler_angles]
+        return entry
+
+    def __str__(self):
+        return ("position (%.2f, %.2f, %.2f), cylindrical (%.2f, %.2f, %.2f), euler angles (%.2f, %.2f, %.2f), "
+                "support lengths (%.2f, %.2f, %.2f), position error %.2f, direction error %.2f" % (
+                    *self.position, *self.cylindrical, *self.euler_angles, *self.support_lengths,
+                    self.position_error, self.direction_error))
+
+
+class HandFit(object):
+    """The fitted placements for all the clusters of a hand."""
+
+    def __init__(self, fingers: Sequence[ClusterFit], thumb: ClusterFit):
+        self.fingers = list(fingers)
+        self.thumb = thumb
+
+    def layout(self, use_support_lengths=False) -> dict:
+        """Returns the placements of this hand in the format of the layout file, with absolute placements for every
+        cluster. See layout."""
+        return {
+            "fingers": [finger.layout_entry(use_support_lengths) for finger in self.fingers],
+            "thumb": self.thumb.layout_entry(use_support_lengths)
+        }
+
+    def __str__(self):
+        return "\n".join(["finger %d: %s" % (index + 1, finger) for index, finger in enumerate(self.fingers)] +
+                         ["thumb: %s" % self.thumb])
+
+
+def nelder_mead(func: Callable[[Sequence[float]], float], start: Sequence[float], steps: Sequence[float],
+                tolerance: float = 1e-6, max_iterations: int = 2000) -> Tuple[List[float], float]:
+    """Minimizes the given function via the Nelder-Mead simplex method.
+
+    :param func: The function to minimize.
+    :param start: The starting point.
+    :param steps: The size of the initial simplex along each dimension.
+    :param tolerance: The search stops once the function values at all the vertices of the simplex are within this
+    much of each other.
+    :param max_iterations: The maximum number of iterations.
+    :return: A tuple of (best point, value at the best point)
+    """
+    dimensions = len(start)
+    simplex = [list(start)]
+    for dimension in range(dimensions):
+        vertex = list(start)
+        vertex[dimension] += steps[dimension]
+        simplex.append(vertex)
+    values = [func(vertex) for vertex in simplex]
+
+    for _ in range(max_iterations):
+        order = sorted(range(dimensions + 1), key=lambda index: values[index])
+        simplex = [simplex[index] for index in order]
+        values = [values[index] for index in order]
+        if values[-1] - values[0] <= tolerance:
+            break
+
+        centroid = [sum(vertex[dimension] for vertex in simplex[:-1]) / dimensions
+                    for dimension in range(dimensions)]
+
+        def towards(factor):
+            return [centroid[dimension] + factor * (simplex[-1][dimension] - centroid[dimension])
+                    for dimension in range(dimensions)]
+
+        reflected = towards(-1)
+        reflected_value = func(reflected)
+        if reflected_value < values[0]:
+            expanded = towards(-2)
+            expanded_value = func(expanded)
+            if expanded_value < reflected_value:
+                simplex[-1], values[-1] = expanded, expanded_value
+            else:
+                simplex[-1], values[-1] = reflected, reflected_value
+        elif reflected_value < values[-2]:
+            simplex[-1], values[-1] = reflected, reflected_value
+        else:
+            contracted = towards(-.5 if reflected_value < values[-1] else .5)
+            contracted_value = func(contracted)
+            if contracted_value < min(values[-1], reflected_value):
+                simplex[-1], values[-1] = contracted, contracted_value
+            else:
+                # shrink towards the best vertex
+                for index in range(1, dimensions + 1):
+                    simplex[index] = [simplex[0][dimension] + .5 * (simplex[index][dimension] - simplex[0][dimension])
+                                      for dimension in range(dimensions)]
+                    values[index] = func(simplex[index])
+
+    best = min(range(dimensions + 1), key=lambda index: values[index])
+    return simplex[best], values[best]
+
+
+def pose_matrix(position: Sequence[float], euler_angles: Sequence[float]) -> List[float]:
+    """Returns the matrix that transforms points relative to the reference point into the given pose."""
+    matrix = geometry.euler_angles_matrix(*euler_angles)
+    matrix[3], matrix[7], matrix[11] = position
+    return matrix
+
+
+def measured_euler_angles(measurement: Measurement) -> Point:
+    """Returns the euler angles that point the cluster's forward direction along the measured direction, while keeping
+    its left-right axis level."""
+    dx, dy, dz = measurement.direction
+    return (math.degrees(math.asin(max(-1.0, min(1.0, dz)))),
+            0.0,
+            math.degrees(math.atan2(-dx, dy)))
+
+
+def fit_cluster(measurement: Measurement, shape: ClusterShape, obstacles: Sequence[Sequence[Sequence[float]]] = (),
+                clearance: float = 1.0, direction_weight: float = .25, roll_weight: float = .25,
+                overlap_weight: float = 100.0) -> ClusterFit:
+    """Fits the pose of a single cluster to the given measurement.
+
+    :param measurement: The measurement to fit to.
+    :param shape: The geometry of the cluster.
+    :param obstacles: The points of any clusters that have already been placed, which this cluster must keep clear of.
+    :param clearance: The minimum distance to keep between this cluster and the obstacles. This should be at least the
+    spacing of the sampled points, otherwise the points of 2 overlapping clusters can slip between each other.
+    :param direction_weight: The cost of each squared degree of error in the forward direction, relative to each
+    squared mm of error in the position.
+    :param roll_weight: The cost of each squared degree of roll away from level, relative to each squared mm of error in
+    the position.
+    :param overlap_weight: The cost of each squared mm that the cluster would need to be pushed away from an obstacle
+    to clear it.
+    """
+    obstacles = [_Obstacle(points, measurement.position, clearance) for points in obstacles if points]
+
+    def overlap(matrix):
+        position = (matrix[3], matrix[7], matrix[11])
+        points = None
+        total = 0.0
+        for obstacle in obstacles:
+            if obstacle.box_distance(position) > shape.radius + clearance:
+                continue
+            if points is None:
+                points = geometry.transform_points(matrix, shape.points)
+            total += obstacle.penetration(points) ** 2
+        return total
+
+    def errors(parameters):
+        position = parameters[:3]
+        matrix = pose_matrix(position, parameters[3:])
+        forward = geometry.transform_vector(matrix, (0, 1, 0))
+        direction_error = math.degrees(math.acos(max(-1.0, min(1.0, geometry.dot(forward, measurement.direction)))))
+        return matrix, geometry.length(geometry.subtract(position, measurement.position)), direction_error
+
+    def cost(parameters):
+        matrix, position_error, direction_error = errors(parameters)
+        roll = math.degrees(math.asin(max(-1.0, min(1.0, geometry.transform_vector(matrix, (1, 0, 0))[2]))))
+        return (position_error ** 2 +
+                direction_weight * direction_error ** 2 +
+                roll_weight * roll ** 2 +
+                overlap_weight * overlap(matrix))
+
+    best = list(measurement.position) + list(measured_euler_angles(measurement))
+    # The measured pose has no error at all, so it can only be improved on if it overlaps one of the obstacles.
+    if overlap(pose_matrix(best[:3], best[3:])):
+        best, _ = nelder_mead(cost, best, [5, 5, 5, 5, 5, 5], tolerance=1e-4)
+        # restart from the best point, in case the simplex collapsed prematurely
+        best, _ = nelder_mead(cost, best, [1, 1, 1, 1, 1, 1], tolerance=1e-4)
+
+    matrix, position_error, direction_error = errors(best)
+    return ClusterFit(
+        best[:3], geometry.matrix_euler_angles(matrix),
+        [geometry.transform_point(matrix, point)[2] for point in shape.support_points],
+        position_error, direction_error)
+
+
+def fit_hand(fingers: Sequence[Measurement], thumb: Measurement, finger_shape: ClusterShape,
+             thumb_shape: ClusterShape, clearance: float = 1.0) -> HandFit:
+    """Fits the placements of all the clusters of a hand.
+
+    The fingers are fitted in order, each keeping clear of the fingers before it, and then the thumb is fitted, keeping
+    clear of all the fingers.
+
+    :param fingers: The measurements of the fingers, in order.
+    :param thumb: The measurement of the thumb.
+    :param finger_shape: The geometry of a finger cluster.
+    :param thumb_shape: The geometry of the thumb cluster, already mirrored for the left hand, if needed.
+    :param clearance: The minimum distance to leave between clusters. This should be at least the spacing of the
+    sampled points. See fit_cluster.
+    """
+    obstacles = []
+    finger_fits = []
+    for measurement in fingers:
+        finger_fit = fit_cluster(measurement, finger_shape, obstacles, clearance)
+        finger_fits.append(finger_fit)
+        obstacles.append(geometry.transform_points(
+            pose_matrix(finger_fit.position, finger_fit.euler_angles), finger_shape.points))
+    return HandFit(finger_fits, fit_cluster(thumb, thumb_shape, obstacles, clearance))
+
+
+def load_measurements(data: dict) -> Tuple[List[Measurement], Measurement]:
+    """Returns the (finger measurements, thumb measurement) from a json measurement file's contents.
+
+    The file contains a "fingers" list and a "thumb", each with a "position" and "direction".
+    """
+    return [Measurement.from_dict(finger) for finger in data["fingers"]], Measurement.from_dict(data["thumb"])
+
+
+class _Obstacle(object):
+    """The points of an obstacle, for measuring how far a cluster would need to be pushed away to clear it.
+
+    The cluster is pushed horizontally, away from the center of the obstacle and towards the target, which is usually
+    the measured position. The obstacle's points are binned into columns along that direction, each the size of the
+    clearance, and each column records how far the obstacle extends along the direction. This is the same position
+    that placement_solver.solve_translation would find when moving the cluster back towards the obstacle from far
+    away, to within about the clearance. But this only takes a single pass over the cluster's points, without
+    building any trees, so it's fast enough to evaluate for every pose that the search tries.
+
+    Unlike the distance between the points, this keeps increasing the deeper the cluster is inside the obstacle, so it
+    can guide the search out of an overlapping pose.
+    """
+
+    def __init__(self, points: Sequence[Sequence[float]], target: Sequence[float], clearance: float):
+        self._bounds = geometry.bounds(points)
+        min_point, max_point = self._bounds
+        away = geometry.subtract(target, geometry.scale(geometry.add(min_point, max_point), .5))
+        if math.hypot(away[0], away[1]) < 1e-9:
+            away = (1, 0, 0)
+        self._away = geometry.normalize((away[0], away[1], 0))
+        self._side = (-self._away[1], self._away[0], 0)
+        self._clearance = clearance
+
+        columns = {}
+        for point in points:
+            key = self._column(point)
+            extent = geometry.dot(point, self._away)
+            if extent > columns.get(key, -math.inf):
+                columns[key] = extent
+
+        # Spread each column into its neighbors, so that points in adjacent columns count as being within the
+        # clearance.
+        self._columns = {}
+        for (side, height), extent in columns.items():
+            for side_offset in (-1, 0, 1):
+                for height_offset in (-1, 0, 1):
+                    key = (side + side_offset, height + height_offset)
+                    if extent > self._columns.get(key, -math.inf):
+                        self._columns[key] = extent
+
+    def _column(self, point: Sequence[float]) -> Tuple[int, int]:
+        return (math.floor(geometry.dot(point, self._side) / self._clearance),
+                math.floor(point[2] / self._clearance))
+
+    def box_distance(self, point: Sequence[float]) -> float:
+        """Returns the distance from the given point to the obstacle's bounding box."""
+        min_point, max_point = self._bounds
+        return geometry.length([max(0.0, min_point[axis] - point[axis], point[axis] - max_point[axis])
+                                for axis in range(3)])
+
+    def penetration(self, points: Sequence[Sequence[float]]) -> float:
+        """Returns how far the given points would need to be pushed away from the obstacle to clear it."""
+        depth = 0.0
+        for point in points:
+            extent = self._columns.get(self._column(point))
+            if extent is not None:
+                depth = max(depth, extent + self._clearance - geometry.dot(point, self._away))
+        return depth
@@ -0,0 +1,339 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Plain python vector and matrix math, for the parts of the design logic that don't need any actual BRep geometry.
+
+This doesn't depend on fusion, so it can be used (and tested) outside of fusion. Points and vectors are (x, y, z)
+tuples, and matrices are 4x4 row-major sequences of 16 floats, in the same layout as Matrix3D.asArray() and
+Matrix3D.setWithArray().
+"""
+
+import math
+from typing import Iterable, List, Sequence, Tuple
+
+Vector = Tuple[float, float, float]
+Matrix = Sequence[float]
+
+
+def add(v1: Sequence[float], v2: Sequence[float]) -> Vector:
+    return v1[0] + v2[0], v1[1] + v2[1], v1[2] + v2[2]
+
+
+def subtract(v1: Sequence[float], v2: Sequence[float]) -> Vector:
+    return v1[0] - v2[0], v1[1] - v2[1], v1[2] - v2[2]
+
+
+def scale(v: Sequence[float], factor: float) -> Vector:
+    return v[0] * factor, v[1] * factor, v[2] * factor
+
+
+def dot(v1: Sequence[float], v2: Sequence[float]) -> float:
+    return v1[0] * v2[0] + v1[1] * v2[1] + v1[2] * v2[2]
+
+
+def cross(v1: Sequence[float], v2: Sequence[float]) -> Vector:
+    return (v1[1] * v2[2] - v1[2] * v2[1],
+            v1[2] * v2[0] - v1[0] * v2[2],
+            v1[0] * v2[1] - v1[1] * v2[0])
+
+
+def length(v: Sequence[float]) -> float:
+    return math.sqrt(dot(v, v))
+
+
+def normalize(v: Sequence[float]) -> Vector:
+    vector_length = length(v)
+    if vector_length == 0:
+        raise ValueError("Can't normalize a zero-length vector")
+    return scale(v, 1 / vector_length)
+
+
+def identity_matrix() -> List[float]:
+    return [1.0, 0.0, 0.0, 0.0,
+            0.0, 1.0, 0.0, 0.0,
+            0.0, 0.0, 1.0, 0.0,
+            0.0, 0.0, 0.0, 1.0]
+
+
+def multiply(m1: Matrix, m2: Matrix) -> List[float]:
+    """Returns the matrix product m1 * m2.
+
+    Note that this is the reverse of Matrix3D.transformBy. m1.transformBy(m2) results in m2 * m1.
+    """
+    result = [0.0] * 16
+    for row in range(4):
+        for column in range(4):
+            result[row * 4 + column] = (
+                m1[row * 4] * m2[column] +
+                m1[row * 4 + 1] * m2[4 + column] +
+                m1[row * 4 + 2] * m2[8 + column] +
+                m1[row * 4 + 3] * m2[12 + column])
+    return result
+
+
+def invert(matrix: Matrix) -> List[float]:
+    """Returns the inverse of an affine matrix, i.e. one whose last row is (0, 0, 0, 1).
+
+    :raises ValueError: If the matrix isn't invertible.
+    """
+    a, b, c, tx, d, e, f, ty, g, h, i, tz = matrix[0:12]
+    cofactors = (e * i - f * h, c * h - b * i, b * f - c * e,
+                 f * g - d * i, a * i - c * g, c * d - a * f,
+                 d * h - e * g, b * g - a * h, a * e - b * d)
+    determinant = a * cofactors[0] + b * cofactors[3] + c * cofactors[6]
+    if abs(determinant) < 1e-12:
+        raise ValueError("The matrix isn't invertible")
+    rows = [[cofactor / determinant for cofactor in cofactors[row * 3:row * 3 + 3]] for row in range(3)]
+    result = identity_matrix()
+    for row in range(3):
+        result[row * 4:row * 4 + 3] = rows[row]
+        result[row * 4 + 3] = -(rows[row][0] * tx + rows[row][1] * ty + rows[row][2] * tz)
+    return result
+
+
+def translation_matrix(vector: Sequence[float]) -> List[float]:
+    matrix = identity_matrix()
+    matrix[3] = vector[0]
+    matrix[7] = vector[1]
+    matrix[11] = vector[2]
+    return matrix
+
+
+def rotation_matrix(angle: float, axis: Sequence[float], origin: Sequence[float] = (0, 0, 0)) -> List[float]:
+    """Returns a matrix for a right-handed rotation around the given axis, via Rodrigues' rotation formula.
+
+    This is equivalent to Matrix3D.setToRotation.
+
+    :param angle: The rotation angle, in radians.
+    :param axis: The axis to rotate around. This doesn't need to be normalized.
+    :param origin: A point on the rotation axis.
+    """
+    x, y, z = normalize(axis)
+    cos = math.cos(angle)
+    sin = math.sin(angle)
+    one_minus_cos = 1 - cos
+
+    rotation = [
+        cos + x * x * one_minus_cos, x * y * one_minus_cos - z * sin, x * z * one_minus_cos + y * sin, 0.0,
+        y * x * one_minus_cos + z * sin, cos + y * y * one_minus_cos, y * z * one_minus_cos - x * sin, 0.0,
+        z * x * one_minus_cos - y * sin, z * y * one_minus_cos + x * sin, cos + z * z * one_minus_cos, 0.0,
+        0.0, 0.0, 0.0, 1.0]
+
+    if not any(origin):
+        return rotation
+    return multiply(translation_matrix(origin), multiply(rotation, translation_matrix(scale(origin, -1))))
+
+
+def transform_point(matrix: Matrix, point: Sequence[float]) -> Vector:
+    x, y, z = point[0], point[1], point[2]
+    return (matrix[0] * x + matrix[1] * y + matrix[2] * z + matrix[3],
+            matrix[4] * x + matrix[5] * y + matrix[6] * z + matrix[7],
+            matrix[8] * x + matrix[9] * y + matrix[10] * z + matrix[11])
+
+
+def transform_vector(matrix: Matrix, vector: Sequence[float]) -> Vector:
+    """Transforms a direction vector, ignoring the translation part of the matrix."""
+    x, y, z = vector[0], vector[1], vector[2]
+    return (matrix[0] * x + matrix[1] * y + matrix[2] * z,
+            matrix[4] * x + matrix[5] * y + matrix[6] * z,
+            matrix[8] * x + matrix[9] * y + matrix[10] * z)
+
+
+def transform_points(matrix: Matrix, points: Iterable[Sequence[float]]) -> List[Vector]:
+    m0, m1, m2, m3, m4, m5, m6, m7, m8, m9, m10, m11 = matrix[0:12]
+    return [(m0 * x + m1 * y + m2 * z + m3,
+             m4 * x + m5 * y + m6 * z + m7,
+             m8 * x + m9 * y + m10 * z + m11) for x, y, z in points]
+
+
+def translate_points(points: Iterable[Sequence[float]], vector: Sequence[float]) -> List[Vector]:
+    dx, dy, dz = vector
+    return [(x + dx, y + dy, z + dz) for x, y, z in points]
+
+
+def bounds(points: Iterable[Sequence[float]]) -> Tuple[Vector, Vector]:
+    """Returns the (min, max) corners of the axis-aligned bounding box of the given points."""
+    iterator = iter(points)
+    first = next(iterator)
+    min_x, min_y, min_z = first[0], first[1], first[2]
+    max_x, max_y, max_z = min_x, min_y, min_z
+    for x, y, z in iterator:
+        if x < min_x:
+            min_x = x
+        elif x > max_x:
+            max_x = x
+        if y < min_y:
+            min_y = y
+        elif y > max_y:
+            max_y = y
+        if z < min_z:
+            min_z = z
+        elif z > max_z:
+            max_z = z
+    return (min_x, min_y, min_z), (max_x, max_y, max_z)
+
+
+def bounds_intersect(bounds1: Tuple[Sequence[float], Sequence[float]],
+                     bounds2: Tuple[Sequence[float], Sequence[float]]) -> bool:
+    for axis in range(3):
+        if bounds1[0][axis] > bounds2[1][axis] or bounds2[0][axis] > bounds1[1][axis]:
+            return False
+    return True
+
+
+def cylindrical_to_cartesian(r: float, theta: float, z: float) -> Vector:
+    """Converts cylindrical coordinates to cartesian, using the same convention as the placement classes.
+
+    A theta of 0 is "straight ahead", along the +y axis, and positive angles are towards +x.
+
+    :param theta: The theta coordinate, in degrees.
+    """
+    return r * math.sin(math.radians(theta)), r * math.cos(math.radians(theta)), z
+
+
+def cylindrical_theta(point: Sequence[float]) -> float:
+    """Returns the theta coordinate (in degrees) of the given point, as per cylindrical_to_cartesian."""
+    return math.degrees(math.atan2(point[0], point[1]))
+
+
+def rotate_to_height_matrix(
+        axis_point: Sequence[float], axis_vector: Sequence[float], target_point: Sequence[float],
+        height: float) -> List[float]:
+    """Returns a matrix that rotates target_point around the given axis, such that its final height is `height`.
+
+    The target point travels along a circle around the axis, and the rotation angle is found by intersecting that
+    circle with the horizontal plane at the given height. There are 2 such intersections, so the smaller rotation is
+    used.
+
+    :param axis_point: A point on the rotation axis.
+    :param axis_vector: The direction of the rotation axis. This must not be vertical.
+    :param target_point: The point to rotate. This must not be on the axis.
+    :param height: The z coordinate that the target point should be rotated to.
+    :return: The rotation matrix, as a row-major sequence of 16 floats.
+    """
+    axis = normalize(axis_vector)
+    center = add(axis_point, scale(axis, dot(subtract(target_point, axis_point), axis)))
+
+    radial_vector = subtract(target_point, center)
+    radius = length(radial_vector)
+    if radius == 0:
+        raise ValueError("The target point is on the rotation axis")
+    first_basis = scale(radial_vector, 1 / radius)
+    second_basis = cross(axis, first_basis)
+
+    # The height of the target point after rotating by angle a is
+    # center.z + radius * (cos(a) * first_basis.z + sin(a) * second_basis.z)
+    # which we rewrite as center.z + amplitude * cos(a - phase)
+    cos_coefficient = radius * first_basis[2]
+    sin_coefficient = radius * second_basis[2]
+    amplitude = math.hypot(cos_coefficient, sin_coefficient)
+    if amplitude == 0:
+        raise ValueError("The rotation axis is vertical")
+    ratio = (height - center[2]) / amplitude
+    if abs(ratio) > 1:
+        raise ValueError("The target point can't be rotated to a height of %f" % height)
+
+    phase = math.atan2(sin_coefficient, cos_coefficient)
+    offset = math.acos(ratio)
+    angle = min((phase + offset, phase - offset), key=lambda candidate: abs(_wrap_angle(candidate)))
+
+    return rotation_matrix(_wrap_angle(angle), axis, center)
+
+
+def _wrap_angle(angle: float) -> float:
+    """Wraps an angle in radians to the range [-pi, pi)."""
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+def euler_angles_matrix(rx: float, ry: float, rz: float) -> List[float]:
+    """Returns the rotation matrix for the given euler angles, applied in rx->ry->rz order.
+
+    This matches ClusterRotation.set_rotation_by_euler_angles.
+
+    :param rx: The rotation about the x axis, in degrees.
+    :param ry: The rotation about the y axis, in degrees.
+    :param rz: The rotation about the z axis, in degrees.
+    """
+    return multiply(
+        rotation_matrix(math.radians(rz), (0, 0, 1)),
+        multiply(
+            rotation_matrix(math.radians(ry), (0, 1, 0)),
+            rotation_matrix(math.radians(rx), (1, 0, 0))))
+
+
+def matrix_euler_angles(matrix: Matrix) -> Vector:
+    """Returns the (rx, ry, rz) euler angles of the rotation part of the given matrix, in degrees.
+
+    This is the inverse of euler_angles_matrix. The matrix is decomposed as Rz * Ry * Rx, with ry in [-90, 90].
+    """
+    ry = math.asin(max(-1.0, min(1.0, -matrix[8])))
+    if abs(matrix[8]) < 1 - 1e-12:
+        rx = math.atan2(matrix[9], matrix[10])
+        rz = math.atan2(matrix[4], matrix[0])
+    else:
+        # gimbal lock. rx and rz rotate about the same axis, so put all of the rotation in rz.
+        rx = 0.0
+        rz = math.atan2(-matrix[1], matrix[5])
+    return math.degrees(rx), math.degrees(ry), math.degrees(rz)
+
+
+def support_lengths_matrix(
+        lengths: Sequence[float], support_points: Sequence[Sequence[float]], rz: float) -> List[float]:
+    """Returns the rotation matrix for a cluster, given the lengths of its 3 supports and a z-axis rotation.
+
+    This matches ClusterRotation._set_rotation_by_support_lengths. The resulting matrix also includes a translation
+    component, due to the rotations being around axes through the support points, rather than the origin.
+
+    :param lengths: The lengths of the 3 supports.
+    :param support_points: The centers of the ball magnets that attach to the bottom of the cluster, when it's in an
+    unrotated state.
+    :param rz: The rotation around the z-axis, in degrees.
+    """
+    # first, translate the points up, so that the first point is at the correct height
+    height_offset = (0, 0, lengths[0] - support_points[0][2])
+    point1, point2, point3 = (add(point, height_offset) for point in support_points)
+
+    # next, rotate about an axis that runs through the first and third points, so that the second point is at the
+    # correct height. This assumes that the second point is not colinear with the first and third points.
+    first_rotation = rotate_to_height_matrix(point1, subtract(point3, point1), point2, lengths[1])
+    point2 = transform_point(first_rotation, point2)
+    point3 = transform_point(first_rotation, point3)
+
+    # finally, rotate about an axis that runs through the first and second points, so that the third point is at the
+    # correct height
+    second_rotation = rotate_to_height_matrix(point1, subtract(point2, point1), point3, lengths[2])
+
+    matrix = multiply(second_rotation, first_rotation)
+
+    existing_rz = math.degrees(math.atan2(matrix[4], matrix[0]))
+    return multiply(rotation_matrix(math.radians(rz - existing_rz), (0, 0, 1)), matrix)
+
+
+def matrix_support_lengths(
+        matrix: Matrix, support_points: Sequence[Sequence[float]], first_length: float) -> Vector:
+    """Returns the lengths of the 3 supports for the rotation part of the given matrix.
+
+    The rotation alone only determines the differences between the support lengths, so the length of the first support
+    must be given. This is the inverse of support_lengths_matrix, for the same first length.
+
+    :param matrix: The rotation matrix.
+    :param support_points: The centers of the ball magnets that attach to the bottom of the cluster, when it's in an
+    unrotated state.
+    :param first_length: The length of the first support.
+    """
+    heights = [transform_vector(matrix, point)[2] for point in support_points]
+    return (first_length,
+            first_length + heights[1] - heights[0],
+            first_length + heights[2] - heights[0])
@@ -0,0 +1,123 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Bookkeeping for creating repeated parts as instances of a single fusion component.
+
+Every copy of a memoized component has exactly the same geometry as the memoized original, other than the transforms
+that have been applied to the copy since. So rather than copying the bodies of each copy into a new fusion component,
+all the copies can share a single component, each with its own occurrence, whose transform is the copy's transform
+relative to the original. See Lalboard.create_instanced_occurrence.
+
+A fusion occurrence can only be moved and rotated, so copies that have been mirrored or scaled relative to the original
+still get their own component.
+
+This doesn't depend on fusion, so that it can be tested outside of fusion.
+"""
+
+from typing import Any, Dict, Optional, Sequence
+
+import disk_cache
+import geometry
+
+_instance_attribute = "_lalboard_instance"
+
+
+class InstanceInfo(object):
+    """Identifies a component as a copy of a memoized original.
+
+    :param key: A key that is the same for all originals with identical geometry.
+    :param source: The memoized original.
+    :param name: The name to give the shared component. The copies can have different names, so this is the name of the
+    memoized method, rather than the name of any one of the copies.
+    """
+
+    def __init__(self, key: str, source: Any, name: str):
+        self.key = key
+        self.source = source
+        self.name = name
+
+
+def instance_key(method_name: str, args: Sequence, kwargs: Dict[str, Any], method_hash: str) -> Optional[str]:
+    """Returns a key that identifies the geometry of the component returned by a memoized method.
+
+    The name argument is ignored, since it only affects the name of the component, and not its geometry. So e.g. the
+    differently named copies of cluster_key_short in a cluster assembly can all share a single component.
+
+    :return: The key, or None if the arguments can't be serialized into a key.
+    """
+    return disk_cache.DiskCache.make_key(
+        method_name, list(args), {name: value for name, value in kwargs.items() if name != "name"}, method_hash)
+
+
+def mark(component, key: str, source, name: str):
+    """Marks the given component as a copy of the given memoized original, returned by the memoized method name."""
+    setattr(component, _instance_attribute, InstanceInfo(key, source, name))
+
+
+def instance_info(component) -> Optional[InstanceInfo]:
+    """Returns the instance info that the component was marked with, or None if it isn't a copy of an original."""
+    return getattr(component, _instance_attribute, None)
+
+
+def relative_transform(world_transform: Sequence[float], source_world_transform: Sequence[float]) -> Sequence[float]:
+    """Returns the transform from a memoized original to a copy of it, given both of their world transforms."""
+    return geometry.multiply(world_transform, geometry.invert(source_world_transform))
+
+
+def is_rigid(matrix: Sequence[float], tolerance: float = 1e-6) -> bool:
+    """Returns whether the given matrix only rotates and translates, without any scaling or mirroring."""
+    columns = [(matrix[column], matrix[4 + column], matrix[8 + column]) for column in range(3)]
+    for first in range(3):
+        for second in range(3):
+            expected = 1.0 if first == second else 0.0
+            if abs(geometry.dot(columns[first], columns[second]) - expected) > tolerance:
+                return False
+    return geometry.dot(geometry.cross(columns[0], columns[1]), columns[2]) > 0
+
+
+def scaled_transform(matrix: Sequence[float], scale: float) -> Sequence[float]:
+    """Returns the equivalent of a rigid transform, for components that have been uniformly scaled about the origin.
+
+    i.e. scale * matrix * (1 / scale), which only scales the translation.
+    """
+    result = list(matrix)
+    for index in (3, 7, 11):
+        result[index] *= scale
+    return result
+
+
+class InstanceRegistry(object):
+    """Keeps track of the components that have been created for each instance key, during a single build."""
+
+    def __init__(self):
+        self._components: Dict[str, Any] = {}
+        self.occurrence_count = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._components.get(key)
+
+    def add(self, key: str, component):
+        self._components[key] = component
+
+    def record_occurrence(self):
+        self.occurrence_count += 1
+
+    @property
+    def unique_count(self) -> int:
+        return len(self._components)
+
+    def summary(self) -> str:
+        return "%d instanced occurrences of %d unique components" % (self.occurrence_count, self.unique_count)
+
@@ -0,0 +1,616 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Interference checking between the bodies of an assembly.
+
+Each body is represented by a triangle mesh, with a bounding volume hierarchy (a tree of axis-aligned bounding boxes)
+over its triangles. 2 bodies interfere if any of their triangles cross each other by more than a small tolerance, or if
+one body is entirely inside the other, e.g. a magnet left inside a solid wall. Faces that are merely touching, like a
+magnet sitting in its cutout, aren't reported. The meshes are expected to be
+closed, with consistently outward-facing triangles, as produced by fusion's mesh calculator.
+
+The penetration depth of an interference is estimated as the furthest that any mesh vertex of either body lies inside
+the other body. This is only an estimate, and can be 0 if the bodies cross without either containing a vertex of the
+other, e.g. for 2 long bars crossing each other.
+
+This doesn't depend on fusion, so that it can be tested outside of fusion.
+"""
+
+import math
+import operator
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import geometry
+
+Point = Tuple[float, float, float]
+Triangle = Tuple[Point, Point, Point]
+
+# An arbitrary direction for the inside/outside ray casts, chosen to be unlikely to hit an edge or vertex exactly.
+_ray_direction = geometry.normalize((1, .1234, .0567))
+
+# The distance within which triangles are considered to touch, when splitting a surface into regions that are entirely
+# inside or outside another body. This only needs to allow for rounding errors.
+_touch_tolerance = 1e-9
+
+
+class MeshBody(object):
+    """A body's triangle mesh, along with a bounding volume hierarchy over its triangles.
+
+    Each node of the tree is a tuple of (min, max, left, right, triangles), where min and max are the corners of the
+    bounding box of the node's triangles. Leaf nodes have a list of triangle indices and no children, while internal
+    nodes have 2 children and no triangles.
+
+    :param name: The name of the body, for reporting.
+    :param node_coordinates: The flattened coordinates of the nodes of the mesh, as per TriangleMesh.
+    nodeCoordinatesAsDouble
+    :param node_indices: The flattened node indices of the triangles, as per TriangleMesh.nodeIndices
+    :param group: Bodies in the same group aren't checked against each other. Defaults to the name of the body.
+    """
+
+    _leaf_size = 8
+
+    def __init__(self, name: str, node_coordinates: Sequence[float], node_indices: Sequence[int],
+                 group: Optional[str] = None):
+        self.name = name
+        self.group = group if group is not None else name
+
+        if not node_indices:
+            raise ValueError("A mesh body must contain at least 1 triangle")
+        # An assembly can have hundreds of thousands of triangles, so these avoid python loops where possible. zip-ing
+        # an iterator with itself groups its items.
+        nodes = list(zip(*[iter(node_coordinates)] * 3))
+        # A mesh can repeat the nodes along the edges between its faces, so identical nodes are merged, so that the
+        # triangles on either side of an edge are connected. See penetration_depth.
+        self._vertices: List[Point] = list(dict.fromkeys(nodes))
+        vertex_indices: Dict[Point, int] = {vertex: index for index, vertex in enumerate(self._vertices)}
+        node_vertices = list(map(vertex_indices.__getitem__, nodes))
+        # The flattened vertex indices of the triangles, as per node_indices. This is kept flat rather than as a tuple
+        # per triangle, since there can be hundreds of thousands of triangles.
+        self._triangle_vertices: List[int] = list(map(node_vertices.__getitem__, node_indices))
+        self._triangle_count = len(self._triangle_vertices) // 3
+        # The x, y and z coordinates of the vertices, for _subtree
+        self._columns = list(zip(*self._vertices))
+        self._bounds = (tuple(map(min, self._columns)), tuple(map(max, self._columns)))
+
+        # The triangles and their bounds are only filled in for the triangles that are needed. See _prepare.
+        self._triangles: List[Optional[Triangle]] = [None] * self._triangle_count
+        # The normals are only needed for the triangles that are checked against another body's triangles. See
+        # _normal_of.
+        self._normals: Dict[int, Optional[Point]] = {}
+        self._triangle_bounds: List[Optional[Tuple[Point, Point]]] = [None] * self._triangle_count
+        # The centers of the triangles' bounds, scaled by 2
+        self._centers: List[Optional[Point]] = [None] * self._triangle_count
+        self._root = None
+
+    @property
+    def bounds(self) -> Tuple[Point, Point]:
+        return self._bounds
+
+    @property
+    def vertices(self) -> Sequence[Point]:
+        return self._vertices
+
+    def _tree(self):
+        """Returns the root of the bounding volume hierarchy, building it the first time it's needed.
+
+        This is only needed to check whether points are inside the body, or how far they are from its surface. Checking
+        for crossing triangles only needs the triangles near the other body. See _subtree.
+        """
+        if self._root is None:
+            triangles = list(range(self._triangle_count))
+            self._prepare(triangles)
+            self._root = self._build(triangles)
+        return self._root
+
+    def _subtree(self, min_point: Sequence[float], max_point: Sequence[float]):
+        """Returns a bounding volume hierarchy over the triangles whose bounds overlap the given box, or None if there
+        aren't any.
+
+        Bodies in an assembly mostly just touch each other, so the overlap of their bounds is typically a thin slab,
+        that only a few of their triangles reach into. A triangle's bounds overlap the box along an axis unless all of
+        its vertices are past the same side of it, so the triangles are filtered one axis at a time, starting with the
+        axis that the box covers the least of. If most of the triangles overlap the box, the whole tree is built
+        instead, since it's kept for later.
+        """
+        if self._root is not None:
+            return self._root
+
+        triangle_vertices = self._triangle_vertices
+        triangles = None
+        for axis in sorted(range(3), key=lambda axis: (max_point[axis] - min_point[axis]) /
+                           max(self._bounds[1][axis] - self._bounds[0][axis], 1e-9)):
+            low, high = min_point[axis], max_point[axis]
+            if low <= self._bounds[0][axis] and high >= self._bounds[1][axis]:
+                continue
+            # 1 if the vertex is below the box, 2 if it's above it
+            sides = [(value < low) | (value > high) << 1 for value in self._columns[axis]]
+            if triangles is None:
+                triangles = [index for index, (first, second, third) in
+                             enumerate(zip(*[map(sides.__getitem__, triangle_vertices)] * 3))
+                             if not first & second & third]
+            else:
+                triangles = [index for index in triangles if not (sides[triangle_vertices[index * 3]] &
+                                                                  sides[triangle_vertices[index * 3 + 1]] &
+                                                                  sides[triangle_vertices[index * 3 + 2]])]
+        if triangles is None or len(triangles) > self._triangle_count // 2:
+            return self._tree()
+        if not triangles:
+            return None
+        self._prepare(triangles)
+        return self._build(triangles)
+
+    def _prepare(self, triangles: Sequence[int]):
+        """Fills in the points, bounds and center of each of the given triangles, if they haven't been already."""
+        vertices = self._vertices
+        for index in triangles:
+            if self._triangles[index] is None:
+                first, second, third = self._triangle_vertices[index * 3:index * 3 + 3]
+                first, second, third = self._triangles[index] = vertices[first], vertices[second], vertices[third]
+                min_point = tuple(map(min, first, second, third))
+                max_point = tuple(map(max, first, second, third))
+                self._triangle_bounds[index] = min_point, max_point
+                self._centers[index] = tuple(map(operator.add, min_point, max_point))
+
+    def _normal_of(self, index: int) -> Optional[Point]:
+        if index not in self._normals:
+            self._normals[index] = _normal(self._triangles[index])
+        return self._normals[index]
+
+    def _build(self, triangles: List[int]):
+        if len(triangles) <= self._leaf_size:
+            min_points, max_points = zip(*[self._triangle_bounds[index] for index in triangles])
+            return tuple(map(min, *min_points)), tuple(map(max, *max_points)), None, None, triangles
+
+        # Split along the axis where the triangles' centers are most spread out
+        centers = max(zip(*[self._centers[index] for index in triangles]), key=lambda axis: max(axis) - min(axis))
+        order = sorted(range(len(triangles)), key=centers.__getitem__)
+        middle = len(triangles) // 2
+        left = self._build([triangles[index] for index in order[:middle]])
+        right = self._build([triangles[index] for index in order[middle:]])
+        return (tuple(map(min, left[0], right[0])), tuple(map(max, left[1], right[1])), left, right, None)
+
+    def crossing_triangles(self, other: "MeshBody", tolerance: float = 0.0,
+                           touching=False) -> Iterator[Tuple[int, int]]:
+        """Yields the index of each triangle of this body that crosses a triangle of the other body by more than
+        tolerance, along with the index of the other triangle.
+
+        Only the triangles within the overlap of the bodies' bounds can cross each other, so only those are checked.
+
+        :param touching: If true, the triangles that touch each other to within tolerance are included as well. See
+        triangles_touch.
+        """
+        # Crossing triangles meet within both bodies' bounds, while touching triangles can be up to tolerance apart
+        margin = tolerance if touching else 0.0
+        min_point = tuple(max(first, second) - margin for first, second in zip(self._bounds[0], other._bounds[0]))
+        max_point = tuple(min(first, second) + margin for first, second in zip(self._bounds[1], other._bounds[1]))
+        if any(low > high for low, high in zip(min_point, max_point)):
+            return
+        root = self._subtree(min_point, max_point)
+        other_root = other._subtree(min_point, max_point) if root is not None else None
+        if other_root is None:
+            return
+
+        stack = [(root, other_root)]
+        while stack:
+            node, other_node = stack.pop()
+            if not geometry.bounds_intersect((node[0], node[1]), (other_node[0], other_node[1])):
+                continue
+
+            if node[4] is not None and other_node[4] is not None:
+                for index in node[4]:
+                    triangle = self._triangles[index]
+                    (min_x, min_y, min_z), (max_x, max_y, max_z) = self._triangle_bounds[index]
+                    for other_index in other_node[4]:
+                        # This is geometry.bounds_intersect, inlined since it's called for every pair of triangles
+                        other_min, other_max = other._triangle_bounds[other_index]
+                        if other_min[0] <= max_x and min_x <= other_max[0] and other_min[1] <= max_y and \
+                                min_y <= other_max[1] and other_min[2] <= max_z and min_z <= other_max[2] and \
+                                _triangles_meet(triangle, self._normal_of(index), other._triangles[other_index],
+                                                other._normal_of(other_index), tolerance, touching):
+                            yield index, other_index
+                continue
+
+            # split whichever node is larger
+            if other_node[4] is not None or (
+                    node[4] is None and
+                    max(geometry.subtract(node[1], node[0])) >=
+                    max(geometry.subtract(other_node[1], other_node[0]))):
+                stack.append((node[2], other_node))
+                stack.append((node[3], other_node))
+            else:
+                stack.append((node, other_node[2]))
+                stack.append((node, other_node[3]))
+
+    def intersects(self, other: "MeshBody", tolerance: float = 0.0) -> bool:
+        """Returns whether any triangle of this body crosses a triangle of the other body by more than tolerance."""
+        return next(self.crossing_triangles(other, tolerance), None) is not None
+
+    def contains(self, point: Sequence[float]) -> bool:
+        """Returns whether the given point is inside this body.
+
+        This casts a ray from the point and counts the number of times it crosses the surface, so the mesh must be
+        closed.
+        """
+        if not _point_in_bounds(point, self._bounds[0], self._bounds[1]):
+            return False
+
+        crossings = 0
+        stack = [self._tree()]
+        while stack:
+            node = stack.pop()
+            if not _ray_hits_box(point, _ray_direction, node[0], node[1]):
+                continue
+            if node[4] is not None:
+                for index in node[4]:
+                    if _ray_hits_triangle(point, _ray_direction, self._triangles[index]):
+                        crossings += 1
+            else:
+                stack.append(node[2])
+                stack.append(node[3])
+        return crossings % 2 == 1
+
+    def surface_distance(self, point: Sequence[float], threshold: float = 0.0) -> float:
+        """Returns the distance from the given point to the nearest point on the surface of this body.
+
+        The nodes nearest to the point are searched first, and the search stops as soon as the distance is known to be
+        at most threshold. In that case, the returned distance is only an upper bound, that's at most threshold.
+        """
+        threshold_squared = threshold * threshold
+        best = math.inf
+        stack = [(0.0, self._tree())]
+        while stack:
+            distance, node = stack.pop()
+            if distance >= best:
+                continue
+            if node[4] is not None:
+                for index in node[4]:
+                    if _box_distance_squared(point, *self._triangle_bounds[index]) >= best:
+                        continue
+                    closest = closest_point_on_triangle(point, self._triangles[index])
+                    delta = geometry.subtract(point, closest)
+                    best = min(best, geometry.dot(delta, delta))
+                if best <= threshold_squared:
+                    break
+            else:
+                left = (_box_distance_squared(point, node[2][0], node[2][1]), node[2])
+                right = (_box_distance_squared(point, node[3][0], node[3][1]), node[3])
+                # push the nearer child last, so that it's searched first
+                if left[0] < right[0]:
+                    stack.append(right)
+                    stack.append(left)
+                else:
+                    stack.append(left)
+                    stack.append(right)
+        return math.sqrt(best)
+
+    def penetration_depth(self, other: "MeshBody", tolerance: float = 0.0) -> float:
+        """Returns the furthest that any vertex of the other body lies inside this body, or 0 if none do.
+
+        :param tolerance: Vertices within this distance of this body's surface may be treated as outside of it.
+        """
+        crossing = {other_index for _, other_index in self.crossing_triangles(other, _touch_tolerance, True)}
+        return self._penetration_depth(other, crossing, tolerance)
+
+    def _penetration_depth(self, other: "MeshBody", crossing: Set[int], tolerance: float) -> float:
+        """Returns penetration_depth, given the indices of the other body's triangles that cross or touch this body's
+        surface.
+
+        Rather than checking whether every vertex of the other body is inside this body, the surface of the other body
+        is split into connected regions along the crossing triangles. The surface only passes between the inside and
+        the outside of this body through the crossing triangles, so each region is entirely inside or outside, and only
+        one vertex of each region needs to be checked, along with each vertex of the crossing triangles. The triangles
+        that only touch this body's surface are included, since e.g. a face that lies partly on a face of this body
+        could otherwise connect a region inside this body to one outside it.
+        """
+        min_point, max_point = self.bounds
+        # Only the vertices within the bounds of this body can be inside it.
+        candidates = [_point_in_bounds(vertex, min_point, max_point) for vertex in other._vertices]
+        if not any(candidates):
+            return 0.0
+
+        parents = list(range(len(other._vertices)))
+
+        def find(vertex: int) -> int:
+            while parents[vertex] != vertex:
+                parents[vertex] = parents[parents[vertex]]
+                vertex = parents[vertex]
+            return vertex
+
+        boundary = set()
+        for index, (first, second, third) in enumerate(zip(*[iter(other._triangle_vertices)] * 3)):
+            if index in crossing:
+                boundary.update((first, second, third))
+            elif candidates[first] and candidates[second] and candidates[third]:
+                parents[find(second)] = find(first)
+                parents[find(third)] = find(first)
+
+        regions: Dict[int, List[int]] = {}
+        for vertex, candidate in enumerate(candidates):
+            if candidate and vertex not in boundary:
+                regions.setdefault(find(vertex), []).append(vertex)
+
+        depth = 0.0
+        for region in regions.values():
+            # A vertex that's on this body's surface could be counted as either inside or outside, so the region is
+            # checked at a vertex that's clear of the surface. If every vertex is within tolerance of the surface,
+            # none of them are deep enough to matter.
+            for vertex in region:
+                point = other._vertices[vertex]
+                if self.surface_distance(point, tolerance) > tolerance:
+                    if self.contains(point):
+                        for inside_vertex in region:
+                            depth = max(depth, self.surface_distance(other._vertices[inside_vertex], depth))
+                    break
+
+        # The vertices of the crossing triangles are checked individually, but only if they'd be deeper than the
+        # deepest vertex so far.
+        for vertex in boundary:
+            if candidates[vertex]:
+                threshold = max(depth, tolerance)
+                distance = self.surface_distance(other._vertices[vertex], threshold)
+                if distance > threshold and self.contains(other._vertices[vertex]):
+                    depth = distance
+        return depth
+
+    def interference_depth(self, other: "MeshBody", tolerance: float = 0.0) -> float:
+        """Returns the penetration depth of the bodies in either direction, whichever is deeper."""
+        # The whole trees are needed to check which vertices are inside the other body, so the crossing triangles might
+        # as well be found with them.
+        self._tree()
+        other._tree()
+        body_crossing = set()
+        other_crossing = set()
+        for index, other_index in self.crossing_triangles(other, _touch_tolerance, True):
+            body_crossing.add(index)
+            other_crossing.add(other_index)
+        return max(self._penetration_depth(other, other_crossing, tolerance),
+                   other._penetration_depth(self, body_crossing, tolerance))
+
+
+class Interference(object):
+    """A pair of bodies that interfere with each other."""
+
+    def __init__(self, name1: str, name2: str, depth: float):
+        self.name1 = name1
+        self.name2 = name2
+        self.depth = depth
+
+    def __str__(self):
+        return "%s and %s (depth %.3f)" % (self.name1, self.name2, self.depth)
+
+
+def find_interferences(bodies: Sequence[MeshBody], tolerance: float = .1) -> List[Interference]:
+    """Finds all the pairs of bodies in different groups that interfere with each other.
+
+    :param bodies: The bodies to check.
+    :param tolerance: The distance that triangles can cross each other by without counting as an interference. This
+    allows for faces that are touching, and for the error in the mesh approximation of curved faces.
+    :return: The interfering pairs, ordered by decreasing penetration depth.
+    """
+    # Sweep along x to find the pairs of bodies with overlapping bounding boxes.
+    bodies = sorted(bodies, key=lambda body: body.bounds[0][0])
+    result = []
+    for i, body in enumerate(bodies):
+        for other in bodies[i + 1:]:
+            if other.bounds[0][0] > body.bounds[1][0]:
+                break
+            if other.group == body.group or not geometry.bounds_intersect(body.bounds, other.bounds):
+                continue
+            if body.intersects(other, tolerance):
+                result.append(Interference(body.name, other.name, body.interference_depth(other, tolerance)))
+            elif (_bounds_contain(body.bounds, other.bounds) and body.contains(other.vertices[0])) or \
+                    (_bounds_contain(other.bounds, body.bounds) and other.contains(body.vertices[0])):
+                # If no triangles cross, then one body is entirely inside the other, unless the vertex was just on the
+                # surface of the other body, and they're only touching. Either way, the inner body's bounds are within
+                # the outer body's bounds.
+                depth = body.interference_depth(other, tolerance)
+                if depth > tolerance:
+                    result.append(Interference(body.name, other.name, depth))
+    result.sort(key=lambda interference: -interference.depth)
+    return result
+
+
+def report(interferences: Sequence[Interference]) -> str:
+    """Returns a human-readable list of the given interferences."""
+    if not interferences:
+        return "No interferences found"
+    return "\n".join(["Found %d interferences:" % len(interferences)] +
+                     ["  %s" % interference for interference in interferences])
+
+
+def triangles_intersect(triangle1: Triangle, triangle2: Triangle, tolerance: float = 0.0) -> bool:
+    """Returns whether 2 triangles cross each other by more than the given tolerance.
+
+    This is the interval overlap test from Möller's "A Fast Triangle-Triangle Intersection Test". Vertices that are
+    within tolerance of the other triangle's plane are treated as being on the positive side of it, so that triangles
+    that only touch a face don't count, while a crossing that happens to pass exactly through a vertex is still only
+    counted once. Coplanar triangles are never considered to intersect.
+    """
+    return _triangles_meet(triangle1, _normal(triangle1), triangle2, _normal(triangle2), tolerance, False)
+
+
+def triangles_touch(triangle1: Triangle, triangle2: Triangle, tolerance: float = 0.0) -> bool:
+    """Returns whether 2 triangles cross or touch each other, to within the given tolerance.
+
+    Unlike triangles_intersect, this includes triangles that only touch each other at a vertex, an edge or a face.
+    Coplanar triangles are always considered to touch, as long as they're within tolerance of each other's planes.
+    """
+    return _triangles_meet(triangle1, _normal(triangle1), triangle2, _normal(triangle2), tolerance, True)
+
+
+def _triangles_meet(triangle1: Triangle, normal1: Optional[Point], triangle2: Triangle, normal2: Optional[Point],
+                    tolerance: float, touching: bool) -> bool:
+    """The implementation of triangles_intersect and triangles_touch, given the normals of the triangles."""
+    if normal1 is None or normal2 is None:
+        return False
+
+    distances1 = _plane_distances(triangle1, triangle2[0], normal2, tolerance)
+    if min(distances1) > 0 or max(distances1) < 0 or (not touching and min(distances1) == 0):
+        return False
+    distances2 = _plane_distances(triangle2, triangle1[0], normal1, tolerance)
+    if min(distances2) > 0 or max(distances2) < 0 or (not touching and min(distances2) == 0):
+        return False
+
+    line_direction = geometry.cross(normal1, normal2)
+    if geometry.length(line_direction) < 1e-9:
+        # The triangles are coplanar, since they'd have been rejected above if they were parallel and apart.
+        return touching
+    line_direction = geometry.normalize(line_direction)
+
+    min1, max1 = _line_interval(triangle1, distances1, line_direction, touching)
+    min2, max2 = _line_interval(triangle2, distances2, line_direction, touching)
+    if touching:
+        return min(max1, max2) >= max(min1, min2)
+    return min(max1, max2) > max(min1, min2)
+
+
+def closest_point_on_triangle(point: Sequence[float], triangle: Triangle) -> Point:
+    """Returns the point on the given triangle that is closest to the given point.
+
+    This is the region-based method from Ericson's "Real-Time Collision Detection".
+    """
+    a, b, c = triangle
+    ab = geometry.subtract(b, a)
+    ac = geometry.subtract(c, a)
+    ap = geometry.subtract(point, a)
+    d1 = geometry.dot(ab, ap)
+    d2 = geometry.dot(ac, ap)
+    if d1 <= 0 and d2 <= 0:
+        return a
+
+    bp = geometry.subtract(point, b)
+    d3 = geometry.dot(ab, bp)
+    d4 = geometry.dot(ac, bp)
+    if d3 >= 0 and d4 <= d3:
+        return b
+
+    vc = d1 * d4 - d3 * d2
+    if vc <= 0 <= d1 and d3 <= 0:
+        return geometry.add(a, geometry.scale(ab, d1 / (d1 - d3)))
+
+    cp = geometry.subtract(point, c)
+    d5 = geometry.dot(ab, cp)
+    d6 = geometry.dot(ac, cp)
+    if d6 >= 0 and d5 <= d6:
+        return c
+
+    vb = d5 * d2 - d1 * d6
+    if vb <= 0 <= d2 and d6 <= 0:
+        return geometry.add(a, geometry.scale(ac, d2 / (d2 - d6)))
+
+    va = d3 * d6 - d5 * d4
+    if va <= 0 <= d4 - d3 and d5 - d6 >= 0:
+        return geometry.add(b, geometry.scale(geometry.subtract(c, b), (d4 - d3) / ((d4 - d3) + (d5 - d6))))
+
+    denominator = 1 / (va + vb + vc)
+    return geometry.add(a, geometry.add(geometry.scale(ab, vb * denominator), geometry.scale(ac, vc * denominator)))
+
+
+def _normal(triangle: Triangle) -> Optional[Point]:
+    normal = geometry.cross(geometry.subtract(triangle[1], triangle[0]), geometry.subtract(triangle[2], triangle[0]))
+    if geometry.length(normal) < 1e-12:
+        return None
+    return geometry.normalize(normal)
+
+
+def _plane_distances(triangle: Triangle, plane_point: Point, plane_normal: Point, tolerance: float) -> List[float]:
+    """Returns the signed distances of the triangle's vertices from a plane, snapping those within tolerance to 0."""
+    normal_x, normal_y, normal_z = plane_normal
+    offset = geometry.dot(plane_normal, plane_point)
+    distances = [normal_x * x + normal_y * y + normal_z * z - offset for x, y, z in triangle]
+    return [0.0 if -tolerance <= distance <= tolerance else distance for distance in distances]
+
+
+def _line_interval(triangle: Triangle, distances: Sequence[float], line_direction: Point,
+                   touching: bool = False) -> Tuple[float, float]:
+    """Returns the interval along the given line direction where the triangle crosses the other triangle's plane.
+
+    :param touching: If true, the vertices in the plane are included in the interval. Otherwise, they're treated as
+    being on the positive side of the plane.
+    """
+    projections = [geometry.dot(point, line_direction) for point in triangle]
+    values = []
+    for i in range(3):
+        j = (i + 1) % 3
+        if touching:
+            if distances[i] == 0:
+                values.append(projections[i])
+            elif distances[i] * distances[j] < 0:
+                values.append(projections[i] +
+                              (projections[j] - projections[i]) * distances[i] / (distances[i] - distances[j]))
+        elif (distances[i] < 0) != (distances[j] < 0):
+            values.append(projections[i] +
+                          (projections[j] - projections[i]) * distances[i] / (distances[i] - distances[j]))
+    return min(values), max(values)
+
+
+def _point_in_bounds(point: Sequence[float], min_point: Sequence[float], max_point: Sequence[float]) -> bool:
+    return all(min_point[axis] <= point[axis] <= max_point[axis] for axis in range(3))
+
+
+def _bounds_contain(outer: Tuple[Sequence[float], Sequence[float]],
+                    inner: Tuple[Sequence[float], Sequence[float]]) -> bool:
+    return _point_in_bounds(inner[0], outer[0], outer[1]) and _point_in_bounds(inner[1], outer[0], outer[1])
+
+
+def _box_distance_squared(point: Sequence[float], min_point: Sequence[float], max_point: Sequence[float]) -> float:
+    distance = 0.0
+    for axis in range(3):
+        if point[axis] < min_point[axis]:
+            delta = min_point[axis] - point[axis]
+        elif point[axis] > max_point[axis]:
+            delta = point[axis] - max_point[axis]
+        else:
+            continue
+        distance += delta * delta
+    return distance
+
+
+def _ray_hits_box(origin: Sequence[float], direction: Sequence[float],
+                  min_point: Sequence[float], max_point: Sequence[float]) -> bool:
+    near = 0.0
+    far = math.inf
+    for axis in range(3):
+        if direction[axis] == 0:
+            if origin[axis] < min_point[axis] or origin[axis] > max_point[axis]:
+                return False
+            continue
+        t1 = (min_point[axis] - origin[axis]) / direction[axis]
+        t2 = (max_point[axis] - origin[axis]) / direction[axis]
+        near = max(near, min(t1, t2))
+        far = min(far, max(t1, t2))
+        if near > far:
+            return False
+    return True
+
+
+def _ray_hits_triangle(origin: Sequence[float], direction: Sequence[float], triangle: Triangle) -> bool:
+    """The Möller–Trumbore ray/triangle intersection test, only counting hits in front of the origin."""
+    edge1 = geometry.subtract(triangle[1], triangle[0])
+    edge2 = geometry.subtract(triangle[2], triangle[0])
+    p = geometry.cross(direction, edge2)
+    determinant = geometry.dot(edge1, p)
+    if abs(determinant) < 1e-12:
+        return False
+    inverse = 1 / determinant
+    t_vector = geometry.subtract(origin, triangle[0])
+    u = geometry.dot(t_vector, p) * inverse
+    if u < 0 or u > 1:
+        return False
+    q = geometry.cross(t_vector, edge1)
+    v = geometry.dot(direction, q) * inverse
+    if v < 0 or u + v > 1:
+        return False
+    return geometry.dot(edge2, q) * inverse > 0
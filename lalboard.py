@@ -17,11 +17,12 @@ This file contains the logic for generating all the various parts. This script i
 by the various part scripts in the "parts" directory.
 """
 
+import functools
 import inspect
 import math
 import os
 import pathlib
-from typing import Optional, Sequence, Tuple
+from typing import Dict, Optional, Sequence, Tuple
 
 import adsk.core
 import adsk.fusion
@@ -31,13 +32,456 @@ import fscad.fscad
 from fscad.fscad import *
 from fscad.fscad import Component
 
+relative_import("build_profiler.py")
+relative_import("geometry.py")
+relative_import("interference.py")
+relative_import("placement_solver.py")
+relative_import("source_hash.py")
+relative_import("disk_cache.py")
+relative_import("component_cache.py")
+relative_import("layout.py")
+relative_import("fitting.py")
+relative_import("thread_geometry.py")
+relative_import("instancing.py")
+relative_import("boolean_batching.py")
+relative_import("silhouette_cache.py")
+relative_import("name_index.py")
+relative_import("face_index.py")
+import boolean_batching
+import build_profiler
+import component_cache
+import disk_cache
+import face_index
+import fitting
+import geometry
+import instancing
+import interference
+import layout
+import name_index
+import placement_solver
+import silhouette_cache
+import source_hash
+import thread_geometry
+
 key_thickness = 1.8
 post_width = 7.3
 
 
+# Components memoized with memoize_component(shared=True), shared by all Lalboard instances in this process.
+_shared_memo = {}
+
+
+def memoize_component(persistent=False, shared=False):
+    """A decorator for memoizing the components created by a Lalboard method.
+
+    This is the same as MemoizableDesign.MemoizeComponent, but can optionally also cache the component on disk, if the
+    Lalboard instance was created with a component cache. The cache key includes the method's arguments and a hash of
+    the source of the method and everything it calls, along with the contents of any data files they reference, so any
+    changes to the design will invalidate the cached copy.
+
+    The cached component doesn't retain any primitive-specific properties (see component_cache), so persistent=True
+    should only be used for methods whose consumers don't use those.
+
+    :param persistent: If true, the component is also cached in the Lalboard instance's component cache, if it has one.
+    :param shared: If true, the component is memoized once for the whole process, rather than separately for each
+    Lalboard instance. This should only be used for methods whose results don't depend on any instance state.
+
+    If the Lalboard instance was created with instancing=True, each copy that's returned is also marked as a copy of the
+    memoized original. See create_instanced_occurrence.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def compute(self: "Lalboard", *args, **kwargs):
+            build_profiler.record_computed()
+            return func(self, *args, **kwargs)
+
+        memoized_func = MemoizableDesign.MemoizeComponent(compute)
+        memoized_func.memoized = True
+
+        @functools.wraps(func)
+        def wrapper(self: "Lalboard", *args, **kwargs):
+            cache = self._component_cache if persistent else None
+            if cache is None and not shared and not self._instancing:
+                return memoized_func(self, *args, **kwargs)
+
+            method_hash = self._method_hash(func.__name__)
+            if self.detail != "full":
+                # A draft component must never be mistaken for a full detail one, in any of the caches.
+                method_hash = "%s:%s" % (method_hash, self.detail)
+            memo_key = disk_cache.DiskCache.make_key(func.__name__, list(args), dict(kwargs), method_hash)
+            if memo_key is None:
+                return memoized_func(self, *args, **kwargs)
+
+            memo = _shared_memo if shared else self._persistent_memo
+            result = memo.get(memo_key)
+            if result is None:
+                key = cache.key(func.__name__, args, kwargs, method_hash) if cache is not None else None
+                if key is not None:
+                    result = cache.load(key)
+                if result is None:
+                    result = compute(self, *args, **kwargs)
+                    if key is not None:
+                        cache.store(key, result)
+                memo[memo_key] = result
+            copy = result.copy()
+            if self._instancing:
+                instance_key = instancing.instance_key(func.__name__, args, kwargs, method_hash)
+                if instance_key is not None:
+                    instancing.mark(copy, instance_key, result, func.__name__)
+            return copy
+        wrapper.memoized = True
+        return wrapper
+    return decorator
+
+
 # noinspection PyMethodMayBeStatic
 class Lalboard(MemoizableDesign):
 
+    def __init__(self, cache: Optional[component_cache.ComponentCache] = None, instancing=False, detail="full"):
+        """
+        :param cache: If specified, the results of any methods decorated with memoize_component(persistent=True) will
+        be cached in and loaded from this cache.
+        :param instancing: If true, the copies of memoized components are marked, so that create_instanced_occurrence
+        can create them as occurrences of a single shared component.
+        :param detail: Either "full", or "draft" for a much faster build that's only suitable for checking placements.
+
+        In draft mode, threads, fillets and the lofts of the smaller parts are replaced by cheap proxies. Only the
+        proxies themselves differ from the full detail components. A fillet or internal thread proxy is a renamed copy
+        of the component it would have been applied to, so it has that component's children, named points and named
+        faces in place of the component itself. An external thread or loft proxy is a new primitive, without any of the
+        children, named points or named faces of its source. The bounding boxes stay exact, except where noted:
+        - Fillets are left off. A fillet never extends past the faces on either side of the filleted edge, so this
+        doesn't affect any bounding boxes.
+        - Lofts are replaced by the box bounding their sections. This is exact for lofts between 2 sections, which
+        don't bulge out past their sections, but may be slightly smaller than a smooth loft through 3 or more sections.
+        The lofts of the static supports aren't replaced, since their sides are used to build the rest of the support.
+        - Internal threads are left off. External threads on a cylinder are replaced by a cylinder with the outer
+        radius of the threads.
+        """
+        super().__init__()
+        if detail not in ("full", "draft"):
+            raise ValueError("Unknown detail level: %s" % detail)
+        self._component_cache = cache
+        self._instancing = instancing
+        self.detail = detail
+        self._persistent_memo = {}
+        self._surface_point_cache = {}
+        self._support_point_cache = {}
+        self.batching_report = boolean_batching.BatchingReport()
+        self.silhouettes = silhouette_cache.SilhouetteCache()
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _source_hasher(cls) -> source_hash.SourceHasher:
+        return source_hash.SourceHasher.for_class(cls)
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _method_hash(cls, method_name: str) -> str:
+        """Returns a hash of the source of the given method and everything it calls, along with the contents of any data
+        files they reference, like left_handrest.f3d, and of the helper modules this module imports."""
+        hasher = cls._source_hasher()
+        script_dir = os.path.dirname(os.path.abspath(inspect.getfile(cls)))
+        return disk_cache.DiskCache.make_key(hasher.method_hash(method_name), {
+            name: source_hash.file_hash(os.path.join(script_dir, name))
+            for name in hasher.data_files([method_name], script_dir)}, cls._module_hashes())
+
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def _module_hashes(cls) -> Dict[str, str]:
+        """Returns the hashes of the helper modules that this module imports, e.g. geometry.py."""
+        return cls._source_hasher().module_hashes(os.path.dirname(os.path.abspath(inspect.getfile(cls))))
+
+    def surface_points(self, component: Component, spacing: float) -> Sequence[Tuple[float, float, float]]:
+        """Samples points over the surfaces of all the bodies in the given component.
+
+        :param component: The component to sample.
+        :param spacing: The maximum distance between sampled points.
+        :return: The sampled points, in world coordinates.
+        """
+        points = []
+        for body in component.bodies:
+            mesh = self._body_mesh(body)
+            points.extend(placement_solver.sample_mesh(mesh.nodeCoordinatesAsDouble, mesh.nodeIndices, spacing))
+        return points
+
+    def _body_mesh(self, body) -> adsk.fusion.TriangleMesh:
+        calculator = body.brep.meshManager.createMeshCalculator()
+        calculator.setQuality(adsk.fusion.TriangleMeshQualityOptions.NormalQualityTriangleMesh)
+        return calculator.calculate()
+
+    def find_interferences(self, components: Sequence[Component], tolerance=.1) -> Sequence[interference.Interference]:
+        """Finds all the bodies of the given components that interfere with each other.
+
+        Each component is checked against the others, but the bodies within a single component aren't checked against
+        each other. e.g. the parts of a cluster assembly are designed to fit tightly together, but shouldn't overlap
+        the other clusters or the base.
+
+        :param components: The components to check, e.g. the clusters and base of a full assembly.
+        :param tolerance: The distance that 2 bodies can overlap by without counting as an interference. See
+        interference.find_interferences.
+        :return: The interfering pairs of bodies, ordered by decreasing penetration depth.
+        """
+        bodies = []
+        for index, component in enumerate(components):
+            group = "%d_%s" % (index, component.name)
+            for body in component.bodies:
+                mesh = self._body_mesh(body)
+                bodies.append(interference.MeshBody(
+                    "%s/%s" % (component.name, body.component.name),
+                    mesh.nodeCoordinatesAsDouble, mesh.nodeIndices, group))
+        return interference.find_interferences(bodies, tolerance)
+
+    def create_instanced_occurrence(self, component: Component, scale=1.0,
+                                    registry: Optional[instancing.InstanceRegistry] = None) -> adsk.fusion.Occurrence:
+        """Creates an occurrence for the given component, like Component.create_occurrence().
+
+        If this Lalboard instance was created with instancing=True, all the copies of a memoized component with the
+        same arguments are created as occurrences of a single fusion component, each with its own transform. So the
+        number of bodies that are created only grows with the number of unique parts, rather than with the total number
+        of parts. The visible children of each component are created as child occurrences, so that they can be shared,
+        but hidden children, like the tools of a Difference, aren't created at all.
+
+        The copies can have different names, e.g. the south_key and east_key copies of cluster_key_short, but a fusion
+        occurrence is always named after its component. So the shared component, and every occurrence of it, is named
+        after the memoized method instead.
+
+        :param component: The component to create an occurrence for.
+        :param scale: The scale to create the occurrence at.
+        :param registry: The registry to record the shared components in, e.g. to print its summary afterward.
+        :return: The created occurrence.
+        """
+        if not self._instancing:
+            return component.create_occurrence(scale=scale)
+
+        registry = registry if registry is not None else instancing.InstanceRegistry()
+        design = adsk.fusion.Design.cast(app().activeProduct)
+        return self._create_instanced(design.rootComponent.occurrences, component, registry, scale)
+
+    def _create_instanced(self, occurrences: adsk.fusion.Occurrences, component: Component,
+                          registry: instancing.InstanceRegistry, scale: float) -> adsk.fusion.Occurrence:
+        info = instancing.instance_info(component)
+        if info is not None:
+            transform = instancing.relative_transform(
+                component.world_transform().asArray(), info.source.world_transform().asArray())
+            if instancing.is_rigid(transform):
+                matrix = Matrix3D.create()
+                matrix.setWithArray(instancing.scaled_transform(transform, scale))
+                existing = registry.get(info.key)
+                if existing is not None:
+                    occurrence = occurrences.addExistingComponent(existing, matrix)
+                else:
+                    occurrence = occurrences.addNewComponent(matrix)
+                    self._add_instanced_contents(occurrence.component, info.source, registry, scale)
+                    occurrence.component.name = info.name
+                    registry.add(info.key, occurrence.component)
+                registry.record_occurrence()
+                return occurrence
+
+        occurrence = occurrences.addNewComponent(Matrix3D.create())
+        self._add_instanced_contents(occurrence.component, component, registry, scale)
+        return occurrence
+
+    def _add_instanced_contents(self, fusion_component: adsk.fusion.Component, component: Component,
+                                registry: instancing.InstanceRegistry, scale: float):
+        fusion_component.name = component.name
+        scale_matrix = Matrix3D.create()
+        scale_matrix.setWithArray([
+            scale, 0, 0, 0,
+            0, scale, 0, 0,
+            0, 0, scale, 0,
+            0, 0, 0, 1])
+        brep_manager = adsk.fusion.TemporaryBRepManager.get()
+        for body in component.bodies:
+            # The bodies of a component can include the bodies of its children, which are added along with the child.
+            if body.component is not component:
+                continue
+            brep = brep_manager.copy(body.brep)
+            if scale != 1:
+                brep_manager.transform(brep, scale_matrix)
+            fusion_component.bRepBodies.add(brep)
+        for child in self._visible_children(component):
+            self._create_instanced(fusion_component.occurrences, child, registry, scale)
+
+    @staticmethod
+    def _visible_children(component: Component) -> Sequence[Component]:
+        """Returns the children of the given component whose bodies are part of the component's bodies.
+
+        e.g. all the children of a Group(children), but none of the children of a Difference, whose bodies are the
+        result of the operation instead.
+        """
+        body_components = {id(body.component) for body in component.bodies}
+        return [child for child in component.children()
+                if any(id(body.component) in body_components for body in child.bodies)]
+
+    def batched_difference(self, target: Component, *tools: Component, name=None, report_name=None) -> Component:
+        """The same as Difference(target, *tools), but with fewer boolean operations against the target.
+
+        Tools that don't overlap each other are combined into a single compound tool, which is subtracted from the
+        target with a single boolean operation, rather than one for each body of each tool. See boolean_batching.
+
+        The tools are still children of the result, so they can be found with find_children as usual, but may be
+        nested within one of the compound tools.
+
+        The number of operations that were saved is recorded in batching_report, under report_name, or the name of the
+        result or target if it isn't given.
+        """
+        plan = boolean_batching.plan_batches(
+            [((tool.min().x, tool.min().y, tool.min().z), (tool.max().x, tool.max().y, tool.max().z))
+             for tool in tools],
+            [len(tool.bodies) for tool in tools])
+        self.batching_report.record(report_name or name or target.name, plan)
+
+        batched_tools = []
+        for batch in plan.batches:
+            if len(batch) == 1:
+                batched_tools.append(tools[batch[0]])
+            else:
+                batched_tools.append(Union(*[tools[index] for index in batch], name="batched_tools"))
+        # tools without any bodies don't take part in the plan, but are still kept as children of the result
+        planned = {index for batch in plan.batches for index in batch}
+        batched_tools.extend(tool for index, tool in enumerate(tools) if index not in planned)
+        return Difference(target, *batched_tools, name=name)
+
+    def cached_silhouette(self, component: Component, plane: adsk.core.Plane, name=None) -> Component:
+        """The same as Silhouette(component, plane, name=name), but only computed once for any given geometry.
+
+        If a silhouette was already computed for a component with the same bodies in the same position, projected onto
+        the same plane, a copy of that silhouette is returned instead. See silhouette_cache.
+        """
+        key = silhouette_cache.silhouette_key(
+            self._body_geometries(component), plane.origin.asArray(), plane.normal.asArray())
+
+        silhouette = self.silhouettes.get(key)
+        if silhouette is None:
+            silhouette = Silhouette(component, plane, name=name)
+            self.silhouettes.add(key, silhouette)
+        return silhouette.copy(name=name)
+
+    @staticmethod
+    def _face_index(component: Component) -> face_index.FaceIndex:
+        """Returns the face index of the component's bodies, building it if needed.
+
+        The index is kept on the component, and is rebuilt if the component has been transformed since.
+        """
+        key = (id(component), tuple(component.world_transform().asArray()))
+        cached = getattr(component, "_lalboard_face_index", None)
+        # A copy of the component may carry over the cached index of the original, which the id doesn't match
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        def bounds(bounding_box):
+            return tuple(bounding_box.minPoint.asArray()), tuple(bounding_box.maxPoint.asArray())
+
+        index = face_index.FaceIndex([
+            (bounds(body.brep.boundingBox),
+             lambda body=body: [(bounds(face.brep.boundingBox), face) for face in body.faces])
+            for body in component.bodies])
+        setattr(component, "_lalboard_face_index", (key, index))
+        return index
+
+    @staticmethod
+    def _body_geometries(component: Component) -> Sequence[silhouette_cache.BodyGeometry]:
+        """Returns the geometry of each of the component's bodies, for identifying copies of the same bodies."""
+        return [silhouette_cache.BodyGeometry(
+            body.brep.faces.count,
+            body.brep.edges.count,
+            [vertex.geometry.asArray() for vertex in body.brep.vertices],
+            body.brep.volume,
+            body.brep.area,
+            [face.geometry.surfaceType for face in body.brep.faces]) for body in component.bodies]
+
+    def faces_in_plane(self, component: Component, axis: int, value: float) -> Sequence[Face]:
+        """Returns the faces of the component that lie in an axis-aligned plane.
+
+        This is the same as using find_faces with a finder whose face lies in the plane and covers the whole component,
+        but uses a spatial index of the faces, that's reused for later queries. See face_index.
+
+        :param component: The component to find the faces of.
+        :param axis: The axis the plane is perpendicular to. 0, 1 or 2 for x, y or z.
+        :param value: The position of the plane along that axis.
+        """
+        return self._face_index(component).faces_in_plane(axis, value)
+
+    def extreme_faces(self, component: Component, axis: int, maximum=False) -> Sequence[Face]:
+        """Returns the faces of the component that lie in the plane at its minimum or maximum extent along an axis.
+
+        e.g. extreme_faces(component, 2) returns the bottom-most faces of the component.
+        """
+        # The bounding boxes of the breps aren't always tight around curved faces, so the plane is taken from the
+        # component's exact bounds instead of from the index.
+        extent = component.max() if maximum else component.min()
+        return self.faces_in_plane(component, axis, extent.asArray()[axis])
+
+    def _threads(self, component: Component, cross_section, pitch, reverse_axis=False, name=None) -> Component:
+        """The same as Threads(...), except in draft mode. See __init__."""
+        if self.detail == "full":
+            return Threads(component, cross_section, pitch, reverse_axis=reverse_axis, name=name)
+        if not isinstance(component, Cylinder):
+            return component.copy(name=name)
+
+        # This assumes the cylinder hasn't been rotated, which is the case for the screws.
+        proxy = Cylinder(
+            component.size().z, thread_geometry.threaded_radius(component.size().x / 2, cross_section),
+            name=name or component.name)
+        proxy.place(~proxy == ~component, ~proxy == ~component, ~proxy == ~component)
+        return proxy
+
+    def _fillet(self, edges, radius, blend_corners=False, name=None) -> Component:
+        """The same as Fillet(...), except in draft mode. See __init__."""
+        edges = list(edges)
+        if not edges:
+            raise ValueError("No edges to fillet")
+        if self.detail == "full":
+            return Fillet(edges, radius, blend_corners, name=name)
+        return edges[0].component.copy(name=name)
+
+    def _loft(self, *sections, name=None) -> Component:
+        """The same as Loft(...), except in draft mode. See __init__."""
+        if self.detail == "full":
+            return Loft(*sections, name=name)
+        bounds_min = [min(section.min().asArray()[axis] for section in sections) for axis in range(3)]
+        bounds_max = [max(section.max().asArray()[axis] for section in sections) for axis in range(3)]
+        proxy = Box(*geometry.subtract(bounds_max, bounds_min), name=name)
+        proxy.place(-proxy == bounds_min[0], -proxy == bounds_min[1], -proxy == bounds_min[2])
+        return proxy
+
+    def cluster_body_surface_points(self, spacing: float) -> Sequence[Tuple[float, float, float]]:
+        """Returns the surface points of cluster_body_assembly, in its default, unplaced position.
+
+        The points are only sampled once per spacing, and are cached for any later calls.
+        """
+        key = ("cluster_body_assembly", spacing)
+        if key not in self._surface_point_cache:
+            self._surface_point_cache[key] = self.surface_points(self.cluster_body_assembly(), spacing)
+        return self._surface_point_cache[key]
+
+    def surface_point_cloud(self, component: Component, spacing: float) -> placement_solver.PointCloud:
+        """Returns a point cloud of the surface points of the given component, in its current position.
+
+        The cloud is only built once per spacing for any given geometry, and is cached for any later calls with the
+        same component, or a copy of it in the same position.
+        """
+        key = ("cloud", silhouette_cache.bodies_key(self._body_geometries(component)), spacing)
+        if key not in self._surface_point_cache:
+            self._surface_point_cache[key] = placement_solver.PointCloud(self.surface_points(component, spacing))
+        return self._surface_point_cache[key]
+
+    def thumb_base_surface_points(self, spacing: float) -> Sequence[Tuple[float, float, float]]:
+        """Returns the surface points of thumb_base, in its default, unplaced position.
+
+        The points are relative to the front upper mid point of the down key, which is the reference point for thumb
+        cluster placements. They're only sampled once per spacing, and are cached for any later calls.
+        """
+        key = ("thumb_base", spacing)
+        if key not in self._surface_point_cache:
+            body = self.thumb_base()
+            down_key = body.find_children("thumb_down_key")[0]
+            self._surface_point_cache[key] = geometry.translate_points(
+                self.surface_points(body, spacing),
+                (-down_key.mid().x, -down_key.max().y, -down_key.max().z))
+        return self._surface_point_cache[key]
+
     def small_pin(self):
         return Circle(.4, name="small_pin")
 
@@ -47,7 +491,7 @@ class Lalboard(MemoizableDesign):
         top_face.place(~top_face == ~bottom_face,
                        ~top_face == ~bottom_face,
                        ~top_face == height)
-        return Loft(bottom_face, top_face, name=name)
+        return self._loft(bottom_face, top_face, name=name)
 
     def horizontal_rotated_magnet_cutout(self, depth=1.8, name="magnet_cutout"):
         result = self.tapered_box(1.45, 1.45, 1.7, 1.7, depth, name=name).rx(90).ry(45)
@@ -223,7 +667,7 @@ class Lalboard(MemoizableDesign):
 
         return retaining_ridge
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component(persistent=True)
     def vertical_key_base(self, extra_height=0.0, pressed_key_angle=12.5, extra_optical_width=0.55,
                           fillet_back_keywell_corners=False, fillet_front_keywell_corners=False, name=None):
         post_hole_width = post_width + .3
@@ -239,7 +683,7 @@ class Lalboard(MemoizableDesign):
         if fillet_front_keywell_corners:
             filleted_edges.extend(key_well.shared_edges(key_well.front, [key_well.left, key_well.right]))
         if filleted_edges:
-            key_well = Fillet(filleted_edges, .8)
+            key_well = self._fillet(filleted_edges, .8)
 
         pt_cavity = self.make_bottom_entry_led_cavity(name="pt_cavity")
         led_cavity = self.make_bottom_entry_led_cavity(name="led_cavity")
@@ -330,7 +774,7 @@ class Lalboard(MemoizableDesign):
 
         return result
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def cluster_design(self):
         """
         The design for the individual finger clusters, including front and back extensions.
@@ -348,13 +792,13 @@ class Lalboard(MemoizableDesign):
             connector_legs_cutout,
             name="cluster")
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def cluster_silhouette(self):
         cluster = self.cluster_design()
 
         cluster_back = cluster.find_children("cluster_back")[0]
 
-        silhouette = Silhouette(
+        silhouette = self.cached_silhouette(
             cluster,
             adsk.core.Plane.create(Point3D.create(0, 0, 0), Vector3D.create(0, 0, 1)),
             name="cluster_silhouette")
@@ -455,8 +899,9 @@ class Lalboard(MemoizableDesign):
         extruded_led_cavity = ExtrudeTo(central_led_cavity.named_faces("lens_hole"), center_recess.copy(False))
         extruded_pt_cavity = ExtrudeTo(central_pt_cavity.named_faces("lens_hole"), center_recess.copy(False))
 
-        result = Difference(combined_cluster, *key_base_negatives, center_key_holes, central_magnet_cutout,
-                            center_recess, extruded_led_cavity, extruded_pt_cavity)
+        result = self.batched_difference(
+            combined_cluster, *key_base_negatives, center_key_holes, central_magnet_cutout, center_recess,
+            extruded_led_cavity, extruded_pt_cavity, report_name="base_cluster")
 
         result.add_named_point("lower_left_corner", [west_base.min().x, west_base.min().y, 0])
         result.add_named_point("lower_right_corner", [east_base.max().x, east_base.min().y, 0])
@@ -475,16 +920,10 @@ class Lalboard(MemoizableDesign):
 
         center_holes: Component = cluster.find_children("center_key_holes")[0]
 
-        pcb_silhouette = Silhouette(full_cluster, pcb_plane.get_plane())
-
-        bottom_finder = full_cluster.bounding_box.make_box()
-        bottom_finder.place(
-            ~bottom_finder == ~full_cluster,
-            ~bottom_finder == ~full_cluster,
-            +bottom_finder == -full_cluster)
+        pcb_silhouette = self.cached_silhouette(full_cluster, pcb_plane.get_plane())
 
         key_wells = Extrude(
-            Union(*[face.make_component() for face in full_cluster.find_faces(bottom_finder)]),
+            Union(*[face.make_component() for face in self.extreme_faces(full_cluster, 2)]),
             -full_cluster.size().z)
 
         front_edge_finder = full_cluster.bounding_box.make_box()
@@ -508,7 +947,7 @@ class Lalboard(MemoizableDesign):
             ~back_trim_tool == ~pcb_silhouette)
 
         center_rectangle = Box(center_holes.size().x + .4, 7, 1)
-        center_rectangle = Fillet(
+        center_rectangle = self._fillet(
             center_rectangle.shared_edges([center_rectangle.front, center_rectangle.back],
                                           [center_rectangle.left, center_rectangle.right]),
             1.6)
@@ -532,7 +971,7 @@ class Lalboard(MemoizableDesign):
             +pcb_back_connection == -pcb_back_box,
             -pcb_back_connection == -pcb_back_box)
         pcb_back_intermediate = Union(pcb_back_box, pcb_back_connection)
-        filleted_pcb_back = Fillet(
+        filleted_pcb_back = self._fillet(
             pcb_back_intermediate.shared_edges(
                 pcb_back_intermediate.find_faces([pcb_back_box.left, pcb_back_box.right]),
                 pcb_back_intermediate.find_faces(pcb_back_connection.back)),
@@ -679,7 +1118,7 @@ class Lalboard(MemoizableDesign):
             if edge.bounding_box.size().x == 0 and edge.bounding_box.size().y == 0:
                 fillet_edges.append(edge)
 
-        front = Fillet(fillet_edges, attachment.size().x/2, name="cluster_front")
+        front = self._fillet(fillet_edges, attachment.size().x/2, name="cluster_front")
 
         return cluster, front
 
@@ -726,7 +1165,7 @@ class Lalboard(MemoizableDesign):
             -nut_cutout_ceiling == -nut_cutout,
             +nut_cutout_ceiling == -nut_cutout)
 
-        base = Fillet(base.shared_edges([base.back], [base.left, base.right]), attachment.size().x/2)
+        base = self._fillet(base.shared_edges([base.back], [base.left, base.right]), attachment.size().x/2)
 
         return Union(
             Difference(Union(base, attachment, other_attachment),
@@ -769,15 +1208,10 @@ class Lalboard(MemoizableDesign):
             +attachment == -front_riser,
             +attachment == +front_riser)
 
-        attachment_top_finder = attachment.bounding_box.make_box()
-        attachment_top_finder.place(
-            ~attachment_top_finder == ~attachment,
-            ~attachment_top_finder == ~attachment,
-            -attachment_top_finder == +attachment)
         attachment_attachment = Extrude(
             Hull(
                 Union(
-                    attachment.find_faces(attachment_top_finder)[0].make_component(),
+                    self.extreme_faces(attachment, 2, maximum=True)[0].make_component(),
                     front_riser.top.make_component())),
             -attachment.size().z)
 
@@ -789,7 +1223,7 @@ class Lalboard(MemoizableDesign):
     def cluster_front_mount_clip_tall(self, front, name="cluster_front_mount_clip_tall"):
         return self.cluster_front_mount_clip(front, extra_height=2.6, name=name)
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def center_key(self):
         key_radius = 7.5
         key_rim_height = .5
@@ -811,7 +1245,7 @@ class Lalboard(MemoizableDesign):
         key_rim = Difference(key_rim, key_rim_hollow)
 
         left_post = Box(3.5, 3.5, post_length + key_rim_height, name="left_post")
-        left_post = Fillet(
+        left_post = self._fillet(
             left_post.shared_edges([left_post.front, left_post.back], [left_post.left, left_post.right]),
             .8)
         left_post.place(
@@ -872,7 +1306,7 @@ class Lalboard(MemoizableDesign):
                      -groove == -post)
 
         end_fillet_tool_negative = Union(post.copy(), pivot.copy()).bounding_box.make_box()
-        end_fillet_tool_negative = Fillet(
+        end_fillet_tool_negative = self._fillet(
             end_fillet_tool_negative.shared_edges(
                 end_fillet_tool_negative.front,
                 [end_fillet_tool_negative.left, end_fillet_tool_negative.right]),
@@ -883,7 +1317,7 @@ class Lalboard(MemoizableDesign):
 
         assembly = Difference(Union(post, pivot), magnet, groove, end_fillet_tool)
 
-        assembly = Fillet(assembly.shared_edges(
+        assembly = self._fillet(assembly.shared_edges(
             post.top,
             [post.left, post.right]), .5)
 
@@ -905,7 +1339,7 @@ class Lalboard(MemoizableDesign):
         key_dish.rx(key_angle, center=key_dish.min())
 
         dished_key = Difference(key_base, key_dish, name="dished_key")
-        dished_key = Fillet(
+        dished_key = self._fillet(
             dished_key.shared_edges([key_dish.side, key_base.back],
                                     [key_base.left, key_base.right, key_base.back]), 1, False)
         dished_key = Scale(dished_key, sx=key_width/13, center=dished_key.mid(), name="dished_key")
@@ -933,15 +1367,15 @@ class Lalboard(MemoizableDesign):
             magnet_height=5.4,
             name=name)
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def cluster_key_short(self, name="cluster_key_short"):
         return self.side_key(5, 0, name)
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def cluster_key_tall(self, name="cluster_key_tall"):
         return self.side_key(11, 10, name)
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def thumb_side_key(self, key_width, key_height, groove_height, key_displacement: float = -3, name="thumb_side_key"):
         return self.vertical_key(
             post_length=11.5,
@@ -955,7 +1389,7 @@ class Lalboard(MemoizableDesign):
             magnet_height=8.748,
             name=name)
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def inner_thumb_key(self):
         return self.vertical_key(
             post_length=12,
@@ -969,7 +1403,7 @@ class Lalboard(MemoizableDesign):
             magnet_height=8.748,
             name="inner_thumb_key")
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def outer_upper_thumb_key(self):
         return self.vertical_key(
             post_length=12,
@@ -983,7 +1417,7 @@ class Lalboard(MemoizableDesign):
             magnet_height=8.748,
             name="outer_upper_thumb_key")
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def outer_lower_thumb_key(self):
         return self.vertical_key(
             post_length=12,
@@ -997,7 +1431,7 @@ class Lalboard(MemoizableDesign):
             magnet_height=8.748,
             name="outer_lower_thumb_key")
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def thumb_mode_key(self, name=None):
         key_post = self.vertical_key_post(18, 2.68, 1, 9.05)
 
@@ -1040,10 +1474,10 @@ class Lalboard(MemoizableDesign):
         lower_extension_end_face.tz(1)
 
         lower_extension = Union(
-            Loft(end_face, lower_extension_mid_face),
-            Loft(lower_extension_mid_face, lower_extension_end_face))
+            self._loft(end_face, lower_extension_mid_face),
+            self._loft(lower_extension_mid_face, lower_extension_end_face))
 
-        mid_section = Loft(end_face, mid_section_mid, mid_section_end)
+        mid_section = self._loft(end_face, mid_section_mid, mid_section_end)
 
         horizontal_section = Box(key_post.size().x, key_post.size().z * .25, 4.3)
         horizontal_section.place(
@@ -1059,19 +1493,19 @@ class Lalboard(MemoizableDesign):
 
         end_section_end_face = end_section.back
 
-        filleted_end_section = Fillet(
+        filleted_end_section = self._fillet(
             end_section.find_edges(end_section_end_face.edges), key_thickness/2, False)
 
         result = Union(key_post, mid_section, horizontal_section, filleted_end_section, lower_extension)
 
-        result = Fillet(result.shared_edges(
+        result = self._fillet(result.shared_edges(
             [horizontal_section.front, horizontal_section.back],
             [horizontal_section.top, horizontal_section.bottom, mid_section, end_section.bottom]), 3,
             name=name or "thumb_mode_key")
 
         return result
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def thumb_cluster_insertion_tool(self, cluster):
         upper_base = cluster.find_children("upper_key_base")[0]
         upper_base_upper_base = upper_base.find_children("upper_base")[0]
@@ -1134,7 +1568,7 @@ class Lalboard(MemoizableDesign):
 
         return result
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def thumb_down_key(self):
         upper_outer_base = self._thumb_upper_outer_base()
         cluster_body_thickness = upper_outer_base.find_children("upper_base")[0].size().z
@@ -1229,7 +1663,7 @@ class Lalboard(MemoizableDesign):
 
         key_base_with_stop = Union(key_base, Difference(key_stop, key_stop_enlengthifier))
 
-        filleted_key_base = Fillet(
+        filleted_key_base = self._fillet(
             key_base_with_stop.find_edges(
                 key_base.shared_edges([key_base.back], [key_base.left, key_base.right])), 1)
 
@@ -1252,7 +1686,7 @@ class Lalboard(MemoizableDesign):
 
         return assembly
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def cluster_body_assembly(self, add_clip=False, tall_clip=False):
         cluster = self.base_cluster_design()
         cluster, front = self.cluster_front(cluster)
@@ -1329,7 +1763,7 @@ class Lalboard(MemoizableDesign):
         :return: A Group containing the 3 standoffs for the given cluster
         """
 
-        front_magnet: Box = cluster.find_children("front_magnet")[0]
+        front_magnet: Box = name_index.find(cluster, "front_magnet")[0]
         down_normal = front_magnet.bottom.get_plane().normal
         ball_magnet_radius = self.ball_magnet().size().z / 2
         down_normal.normalize()
@@ -1341,28 +1775,113 @@ class Lalboard(MemoizableDesign):
 
         rz = math.degrees(math.atan2(cluster_transform_array[4], cluster_transform_array[0]))
 
-        front_point = cluster.find_children("front_magnet")[0].named_point("center_bottom").point
+        front_point = name_index.find(cluster, "front_magnet")[0].named_point("center_bottom").point
         front_point.translateBy(ball_magnet_center_vector)
         front_standoff = self.standoff_by_ball_center(front_point, name="front_standoff")
         front_standoff.rz(rz, center=front_standoff.mid())
 
-        back_left_point = cluster.find_children("back_left_magnet")[0].named_point("center_bottom").point
+        back_left_point = name_index.find(cluster, "back_left_magnet")[0].named_point("center_bottom").point
         back_left_point.translateBy(ball_magnet_center_vector)
         back_left_standoff = self.standoff_by_ball_center(back_left_point, name="back_left_standoff")
         back_left_standoff.rz(rz, center=back_left_standoff.mid())
 
-        back_right_point = cluster.find_children("back_right_magnet")[0].named_point("center_bottom").point
+        back_right_point = name_index.find(cluster, "back_right_magnet")[0].named_point("center_bottom").point
         back_right_point.translateBy(ball_magnet_center_vector)
         back_right_standoff = self.standoff_by_ball_center(back_right_point, name="back_right_standoff")
         back_right_standoff.rz(rz, center=back_right_standoff.mid())
 
         return Group([front_standoff, back_left_standoff, back_right_standoff], name="standoffs")
 
+    def _lod_proxy(self, component: Component, lod: str, named_points: Sequence[str] = ()) -> Component:
+        """Returns a cheap stand-in for the given component, for the given level of detail.
+
+        The proxy is built in the component's own coordinate system, and then transformed into place, so that it has
+        the same world transform as the component. So the proxies of all the copies of a memoized component are the
+        same, other than their transform, and the silhouettes for the hull proxies are only computed once.
+
+        :param component: The component to create a proxy for.
+        :param lod: "hull" for a prism extruded from the convex hull of the component's silhouette on its own x/y
+        plane, or "box" for its bounding box. Both of these are in the component's own coordinate system.
+        :param named_points: The names of any named points of the component to add to the proxy.
+        :return: A single body proxy with the same name as the component, and no children.
+        """
+        transform = component.world_transform()
+        inverse = transform.copy()
+        inverse.invert()
+        local = component.copy()
+        local.transform(inverse)
+
+        if lod == "box":
+            # The union gives the proxy an identity transform of its own, like the hull proxy.
+            proxy = Union(local.bounding_box.make_box(), name=component.name)
+        elif lod == "hull":
+            silhouette = self.cached_silhouette(
+                local, adsk.core.Plane.create(Point3D.create(0, 0, local.min().z), Vector3D.create(0, 0, 1)))
+            proxy = Extrude(Hull(silhouette), local.size().z, name=component.name)
+        else:
+            raise ValueError("Unknown level of detail: %s" % lod)
+        proxy.transform(transform)
+
+        for name in named_points:
+            proxy.add_named_point(name, component.named_point(name).point)
+        return proxy
+
+    def _lod_children(self, children: Sequence[Component], lod: str, refine: Sequence[str],
+                      named_points: Sequence[str] = ()) -> Sequence[Component]:
+        """Replaces the given children of a positioned assembly with proxies, for the given level of detail.
+
+        The magnets are always kept as is, since they carry the named points that the standoffs and supports are
+        placed by.
+
+        :param children: The children of the assembly, before it's placed.
+        :param lod: "full" to keep all the children, or the type of proxy to use. See _lod_proxy.
+        :param refine: The names of any children to keep at full detail.
+        :param named_points: The names of any named points to keep on the proxies.
+        """
+        if lod == "full":
+            return children
+        return [child if child.name in refine or (child.name or "").endswith("_magnet") else
+                self._lod_proxy(child, lod, [name for name in named_points if child.named_point(name)])
+                for child in children]
+
+    def _lod_assembly(self, assembly: Component, lod: str, refine: Sequence[str],
+                      named_points: Sequence[str] = ()) -> Component:
+        """Returns a copy of a positioned, full detail assembly, with its children replaced by proxies.
+
+        This is the same as building the assembly at the given level of detail, for when the full detail assembly is
+        needed as well.
+
+        :param assembly: The full detail assembly.
+        :param lod: The type of proxy to use. See _lod_proxy.
+        :param refine: The names of any children to keep at full detail.
+        :param named_points: The names of the named points of the assembly to keep on the copy.
+        """
+        children = assembly.children()
+        result = Group([lod_child.copy() if lod_child is child else lod_child
+                        for child, lod_child in zip(children, self._lod_children(children, lod, refine))],
+                       name=assembly.name)
+        for name in named_points:
+            result.add_named_point(name, assembly.named_point(name).point)
+        return result
+
     def positioned_cluster_assembly(
             self,
             placement: 'AbsoluteFingerClusterPlacement',
             add_clip=False,
-            tall_clip=False):
+            tall_clip=False,
+            lod="full",
+            refine: Sequence[str] = ()):
+        """Builds a cluster assembly, at the given placement.
+
+        :param placement: The placement of the cluster.
+        :param add_clip: Whether to add a front mount clip.
+        :param tall_clip: Whether the front mount clip should be the tall variant.
+        :param lod: The level of detail. "full" builds everything at full detail. "hull" or "box" replace each part of
+        the cluster with a single body proxy (see _lod_proxy), which is much cheaper to create and check for
+        interferences, but is only good for looking at an assembly. The magnets and the named points of the assembly
+        are always exact, so standoffs can still be added. But a static support needs the "cluster" part to be refined.
+        :param refine: The names of the parts to keep at full detail, e.g. "cluster", "north_key" or "pcb".
+        """
         body_assembly = self.cluster_body_assembly(add_clip=add_clip, tall_clip=tall_clip)
         cluster = body_assembly.find_children("cluster", recursive=False)[0]
         pcb = body_assembly.find_children("pcb", recursive=False)[0]
@@ -1381,12 +1900,12 @@ class Lalboard(MemoizableDesign):
         north_key.rx(90)
         down_key = self.center_key()
 
-        self._align_side_key(cluster.find_children("south_base")[0], south_key)
-        self._align_side_key(cluster.find_children("east_base")[0], east_key)
-        self._align_side_key(cluster.find_children("west_base")[0], west_key)
-        self._align_side_key(cluster.find_children("north_base")[0], north_key)
+        self._align_side_key(name_index.find(cluster, "south_base")[0], south_key)
+        self._align_side_key(name_index.find(cluster, "east_base")[0], east_key)
+        self._align_side_key(name_index.find(cluster, "west_base")[0], west_key)
+        self._align_side_key(name_index.find(cluster, "north_base")[0], north_key)
 
-        center_cluster_magnet = cluster.find_children("central_magnet_cutout")[0]
+        center_cluster_magnet = name_index.find(cluster, "central_magnet_cutout")[0]
         down_key.rx(180).rz(180)
         down_key.place(
             ~down_key == ~center_cluster_magnet,
@@ -1399,22 +1918,17 @@ class Lalboard(MemoizableDesign):
             ~nickel_strip == ~center_cluster_magnet,
             +nickel_strip == +pcb)
 
-        down_key_top_finder = down_key.bounding_box.make_box()
-        down_key_top_finder.place(
-            ~down_key_top_finder == ~down_key,
-            ~down_key_top_finder == ~down_key,
-            -down_key_top_finder == +down_key)
-        down_key_top = down_key.find_faces(down_key_top_finder)[0]
+        down_key_top = self.extreme_faces(down_key, 2, maximum=True)[0]
 
         front_magnet = Box((1/8) * 25.4, (1/8) * 25.4, (1/16) * 25.4, name="front_magnet")
         back_left_magnet = Box((1/8) * 25.4, (1/8) * 25.4, (1/16) * 25.4, name="back_left_magnet")
         back_right_magnet = Box((1/8) * 25.4, (1/8) * 25.4, (1/16) * 25.4, name="back_right_magnet")
 
         if add_clip:
-            front_magnet_cutout = front_clip.find_children("attachment")[0].find_children("magnet_cutout")[0]
+            front_magnet_cutout = name_index.find(front_clip, "attachment/magnet_cutout")[0]
         else:
-            front = cluster.find_children("cluster_front")[0]
-            front_magnet_cutout = front.find_children("magnet_cutout")[0]
+            front = name_index.find(cluster, "cluster_front")[0]
+            front_magnet_cutout = name_index.find(front, "magnet_cutout")[0]
 
         front_magnet.place(
             ~front_magnet == ~front_magnet_cutout,
@@ -1426,7 +1940,7 @@ class Lalboard(MemoizableDesign):
                                          front_magnet.mid().y,
                                          front_magnet.min().z))
 
-        back_magnet_cutouts = cluster.find_children("cluster_back")[0].find_children("magnet_cutout")
+        back_magnet_cutouts = name_index.find(cluster, "cluster_back/magnet_cutout")
         if back_magnet_cutouts[0].mid().x < back_magnet_cutouts[1].mid().x:
             back_left_magnet_cutout = back_magnet_cutouts[0]
             back_right_magnet_cutout = back_magnet_cutouts[1]
@@ -1471,7 +1985,7 @@ class Lalboard(MemoizableDesign):
             cluster_group_children.append(front_clip)
 
         cluster_group_children.append(front_magnet)
-        cluster_group = Group(cluster_group_children, name="cluster")
+        cluster_group = Group(self._lod_children(cluster_group_children, lod, refine), name="cluster")
 
         cluster_group.add_named_point("down_key_top_center", down_key_top.mid())
 
@@ -1488,13 +2002,15 @@ class Lalboard(MemoizableDesign):
         ball_magnet_center_vector = normal.copy()
         ball_magnet_center_vector.scaleBy(-ball_magnet_radius)
 
+        down_key_top_center = cluster_group.named_point("down_key_top_center").point
         cluster_group = Group(
             [*cluster_group.children()],
             name="cluster_assembly")
+        cluster_group.add_named_point("down_key_top_center", down_key_top_center)
 
         return cluster_group
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def cluster_assembly(self):
         body_assembly = self.cluster_body_assembly(add_clip=True, tall_clip=True)
         cluster = body_assembly.find_children("cluster", recursive=False)[0]
@@ -1632,14 +2148,9 @@ class Lalboard(MemoizableDesign):
             back_right_support], name="cluster_assembly")
 
     def screw_thread_profile(self, pitch=1.4, angle=37.5, flat_height=.2):
-        sloped_side_height = (pitch - flat_height*2)/2
-
-        return (((0, flat_height / 2),
-                 (sloped_side_height / math.tan(math.radians(angle)), flat_height / 2 + sloped_side_height),
-                 (sloped_side_height / math.tan(math.radians(angle)), flat_height / 2 + sloped_side_height + flat_height),
-                 (0, pitch - flat_height / 2)), pitch)
+        return thread_geometry.thread_profile(pitch, angle, flat_height)
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component(persistent=True)
     def screw_design(self, screw_length, radius_adjustment=-.2, name="screw"):
         screw_nominal_radius, screw_radius_adjustment, _, _, _ = self.screw_base_parameters()
 
@@ -1668,8 +2179,8 @@ class Lalboard(MemoizableDesign):
             ~neck == ~screw,
             -neck == +screw)
 
-        screw = Threads(screw,
-                        *self.screw_thread_profile())
+        screw = self._threads(screw,
+                              *self.screw_thread_profile())
 
         return Difference(Union(screw, neck), ball, name=name)
 
@@ -1689,25 +2200,15 @@ class Lalboard(MemoizableDesign):
             z=(~flare_top_polygon == ~flare_mid_polygon) + 1)
 
         return Union(
-            Loft(flare_bottom_polygon, flare_mid_polygon),
-            Loft(flare_mid_polygon, flare_top_polygon),
+            self._loft(flare_bottom_polygon, flare_mid_polygon),
+            self._loft(flare_mid_polygon, flare_top_polygon),
             name="flare")
 
     def screw_base_parameters(self):
-        screw_nominal_radius = 3.0
-        screw_radius_adjustment = -.2
-        screw_hole_radius_adjustment = .1
-
-        screw_hole = Cylinder(10, screw_nominal_radius + screw_hole_radius_adjustment)
-        temp_threads = Threads(screw_hole, *self.screw_thread_profile())
-        base_min_radius = temp_threads.size().x/2 + .8
+        cross_section, _ = self.screw_thread_profile()
+        return thread_geometry.screw_base_parameters(cross_section)
 
-        base_clearance = .1
-
-        return (screw_nominal_radius, screw_radius_adjustment, screw_hole_radius_adjustment, base_min_radius,
-                base_clearance)
-
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component(persistent=True)
     def screw_base_design(self, screw_length, flared_base=True, name=None):
         screw_nominal_radius, _, screw_hole_radius_adjustment, base_min_radius, _ = self.screw_base_parameters()
         screw_hole = Cylinder(screw_length, screw_nominal_radius + screw_hole_radius_adjustment)
@@ -1724,19 +2225,19 @@ class Lalboard(MemoizableDesign):
 
         # Reverse the axis so the threads "start" on the top. The ensures the top is always at a consistent thread
         # position, so that the nut will tighten down to a consistent rotation.
-        return Threads(
+        return self._threads(
             Difference(base, screw_hole),
             *self.screw_thread_profile(),
             reverse_axis=True,
             name=name or "screw_base")
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component(persistent=True)
     def screw_nut_design(self, name="screw_nut"):
         nut = self.screw_base_design(3, flared_base=False, name=name)
         nut.rx(180, center=nut.mid())
         return nut
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def support_base_design(self, name="support_base"):
         _, _, _, base_min_radius, base_clearance = self.screw_base_parameters()
 
@@ -1794,8 +2295,8 @@ class Lalboard(MemoizableDesign):
             (~mid_side_cutout_top == ~mid_side_cutout_bottom) + flare.size().z)
 
         mid_side_cutout = Union(
-            Loft(mid_side_cutout_bottom, mid_side_cutout_mid),
-            Loft(mid_side_cutout_mid, mid_side_cutout_top))
+            self._loft(mid_side_cutout_bottom, mid_side_cutout_mid),
+            self._loft(mid_side_cutout_mid, mid_side_cutout_top))
 
         mid_side_cutout.place(
             ~mid_side_cutout == ~lower_body_polygon,
@@ -1810,7 +2311,7 @@ class Lalboard(MemoizableDesign):
             front_magnet, name=name)
         return assembly
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def screw_support_assembly(self, screw_length, base_length, screw_height, name=None):
         screw = self.screw_design(screw_length)
         screw.rz(360/12)
@@ -1868,27 +2369,27 @@ class Lalboard(MemoizableDesign):
         builder.line_to((0, 0))
         return Extrude(builder.build(), 100, name="down_key_void")
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def _thumb_upper_outer_base(self):
         return self.vertical_key_base(
             extra_height=4, pressed_key_angle=7, fillet_back_keywell_corners=True, name="upper_outer_base")
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def _thumb_lower_outer_base(self):
         return self.vertical_key_base(
             extra_height=4, pressed_key_angle=4.2, fillet_back_keywell_corners=True, name="lower_outer_base")
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def _thumb_inner_base(self):
         return self.vertical_key_base(
             extra_height=4, pressed_key_angle=7, fillet_back_keywell_corners=True, name="inner_key_base")
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def _thumb_upper_base(self):
         return self.vertical_key_base(
             extra_height=4, pressed_key_angle=7, name="upper_key_base")
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component(persistent=True)
     def thumb_base(self, name=None):
         down_key = self.thumb_down_key()
         down_key.ry(180)
@@ -2013,12 +2514,10 @@ class Lalboard(MemoizableDesign):
             *body_entities, lower_extension, back_extension, upper_base_upper_fillet, upper_base_lower_fillet]
 
         hull_entities_group = Group(hull_entities)
-        top_face_finder = hull_entities_group.bounding_box.make_box()
-        top_face_finder.place(z=-top_face_finder == +hull_entities_group)
 
         body = Extrude(
             Hull(Union(*[face.make_component().copy(copy_children=False)
-                         for face in hull_entities_group.find_faces(top_face_finder)])),
+                         for face in self.extreme_faces(hull_entities_group, 2, maximum=True)])),
             -key_base_upper.size().z,
             name="body")
 
@@ -2038,7 +2537,7 @@ class Lalboard(MemoizableDesign):
             ~down_key_magnet_extension == ~down_key,
             -down_key_magnet_extension == +down_key.find_children("magnet")[0],
             +down_key_magnet_extension == -body)
-        down_key_magnet_extension = Fillet(
+        down_key_magnet_extension = self._fillet(
             down_key_magnet_extension.shared_edges(
                 down_key_magnet_extension.back,
                 [down_key_magnet_extension.left, down_key_magnet_extension.right]),
@@ -2208,11 +2707,11 @@ class Lalboard(MemoizableDesign):
 
         return (nut_cutout, screw_hole), (nut_cutout_ceiling,)
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def thumb_silhouette(self):
         thumb_base = self.thumb_base()
 
-        silhouette = Hull(Silhouette(
+        silhouette = Hull(self.cached_silhouette(
             thumb_base,
             adsk.core.Plane.create(Point3D.create(0, 0, 0), Vector3D.create(0, 0, 1)),
             name="thumb_cluster_silhouette"))
@@ -2228,12 +2727,13 @@ class Lalboard(MemoizableDesign):
         down_key_magnet_extension = thumb_cluster.find_children("down_key_magnet_extension")[0]
 
         body_bottom_face = thumb_cluster.named_faces("body_bottom")[0]
-        pcb_silhouette = Silhouette(thumb_cluster.copy(copy_children=False), body_bottom_face.get_plane())
+        pcb_silhouette = self.cached_silhouette(
+            thumb_cluster.copy(copy_children=False), body_bottom_face.get_plane())
 
         pcb_silhouette = Silhouette(pcb_silhouette.faces[0].outer_edges, pcb_silhouette.get_plane())
 
         lower_cutout = thumb_cluster.bounding_box.make_box()
-        lower_cutout = Fillet(lower_cutout.shared_edges(
+        lower_cutout = self._fillet(lower_cutout.shared_edges(
             lower_cutout.back,
             lower_cutout.left), .8)
         lower_cutout.place(
@@ -2248,7 +2748,7 @@ class Lalboard(MemoizableDesign):
             side_attachment.size().x,
             side_attachment.size().y,
             1)
-        side_attachment_cutout = Fillet(
+        side_attachment_cutout = self._fillet(
             side_attachment_cutout.shared_edges(
                 side_attachment_cutout.right,
                 [side_attachment_cutout.front,
@@ -2263,7 +2763,7 @@ class Lalboard(MemoizableDesign):
             back_attachment.size().x,
             back_attachment.size().y,
             1)
-        back_attachment_cutout = Fillet(
+        back_attachment_cutout = self._fillet(
             back_attachment_cutout.shared_edges(
                 back_attachment_cutout.front,
                 [back_attachment_cutout.left,
@@ -2281,17 +2781,11 @@ class Lalboard(MemoizableDesign):
 
         pcb_silhouette.tz(-.01)
 
-        bottom_finder = thumb_cluster.bounding_box.make_box()
-        bottom_finder.place(
-            ~bottom_finder == ~thumb_cluster,
-            ~bottom_finder == ~thumb_cluster,
-            +bottom_finder == -thumb_cluster)
-
         pcb_silhouette = Difference(
             pcb_silhouette,
             ExtrudeTo(
                 Union(*[face.make_component().copy(copy_children=False)
-                        for face in thumb_cluster.find_faces(bottom_finder)]),
+                        for face in self.extreme_faces(thumb_cluster, 2)]),
                 body_bottom_face.make_component().copy(copy_children=False).faces[0]))
 
         pcb_silhouette = OffsetEdges(
@@ -2345,7 +2839,7 @@ class Lalboard(MemoizableDesign):
         :return: A Group containing the 3 standoffs for the given cluster
         """
 
-        front_magnet: Box = thumb_cluster.find_children("front_magnet")[0]
+        front_magnet: Box = name_index.find(thumb_cluster, "front_magnet")[0]
         down_normal = front_magnet.bottom.get_plane().normal
         ball_magnet_radius = self.ball_magnet().size().z / 2
         down_normal.normalize()
@@ -2357,24 +2851,33 @@ class Lalboard(MemoizableDesign):
 
         rz = math.degrees(math.atan2(cluster_transform_array[4], cluster_transform_array[0]))
 
-        front_point = thumb_cluster.find_children("front_magnet")[0].named_point("center_bottom").point
+        front_point = name_index.find(thumb_cluster, "front_magnet")[0].named_point("center_bottom").point
         front_point.translateBy(ball_magnet_center_vector)
         front_standoff = self.standoff_by_ball_center(front_point, name="front_standoff")
         front_standoff.rz(rz, center=front_standoff.mid())
 
-        side_point = thumb_cluster.find_children("side_magnet")[0].named_point("center_bottom").point
+        side_point = name_index.find(thumb_cluster, "side_magnet")[0].named_point("center_bottom").point
         side_point.translateBy(ball_magnet_center_vector)
         side_standoff = self.standoff_by_ball_center(side_point, name="side_standoff")
         side_standoff.rz(rz, center=side_standoff.mid())
 
-        back_point = thumb_cluster.find_children("back_magnet")[0].named_point("center_bottom").point
+        back_point = name_index.find(thumb_cluster, "back_magnet")[0].named_point("center_bottom").point
         back_point.translateBy(ball_magnet_center_vector)
         back_standoff = self.standoff_by_ball_center(back_point, name="back_standoff")
         back_standoff.rz(rz, center=back_standoff.mid())
 
         return Group([front_standoff, side_standoff, back_standoff], name="standoffs")
 
-    def positioned_thumb_assembly(self, placement: 'AbsoluteThumbClusterPlacement', left_hand=False):
+    def positioned_thumb_assembly(self, placement: 'AbsoluteThumbClusterPlacement', left_hand=False, lod="full",
+                                  refine: Sequence[str] = ()):
+        """Builds a thumb cluster assembly, at the given placement.
+
+        :param placement: The placement of the thumb cluster.
+        :param left_hand: Whether to build the thumb cluster for the left hand.
+        :param lod: The level of detail. See positioned_cluster_assembly. A static thumb support needs the
+        "thumb_cluster" part to be refined.
+        :param refine: The names of the parts to keep at full detail, e.g. "thumb_cluster" or "thumb_down_key".
+        """
         suffix = "left" if left_hand else "right"
         base = self.thumb_base("thumb_cluster")
 
@@ -2392,27 +2895,27 @@ class Lalboard(MemoizableDesign):
 
         outer_lower_key = self.outer_lower_thumb_key()
         outer_lower_key.rx(90)
-        self._align_side_key(base.find_children("lower_outer_base")[0], outer_lower_key)
+        self._align_side_key(name_index.find(base, "lower_outer_base")[0], outer_lower_key)
 
         outer_upper_key = self.outer_upper_thumb_key()
         outer_upper_key.rx(90)
-        self._align_side_key(base.find_children("upper_outer_base")[0], outer_upper_key)
+        self._align_side_key(name_index.find(base, "upper_outer_base")[0], outer_upper_key)
 
         inner_key = self.inner_thumb_key()
         inner_key.rx(90)
-        self._align_side_key(base.find_children("inner_key_base")[0], inner_key)
+        self._align_side_key(name_index.find(base, "inner_key_base")[0], inner_key)
 
         mode_key = self.thumb_mode_key("thumb_mode_key_" + suffix)
         mode_key.rx(90)
         if left_hand:
             mode_key.scale(-1, 1, 1)
-        self._align_side_key(base.find_children("upper_key_base")[0], mode_key)
+        self._align_side_key(name_index.find(base, "upper_key_base")[0], mode_key)
 
         insertion_tool = self.thumb_cluster_insertion_tool(base)
 
-        side_magnet_cutout = base.find_children("side_attachment")[0].find_children("magnet_cutout")[0]
-        back_magnet_cutout = base.find_children("back_attachment")[0].find_children("magnet_cutout")[0]
-        front_magnet_cutout = base.find_children("front_attachment")[0].find_children("magnet_cutout")[0]
+        side_magnet_cutout = name_index.find(base, "side_attachment/magnet_cutout")[0]
+        back_magnet_cutout = name_index.find(base, "back_attachment/magnet_cutout")[0]
+        front_magnet_cutout = name_index.find(base, "front_attachment/magnet_cutout")[0]
 
         side_magnet = Box((1/8) * 25.4, (1/8) * 25.4, (1/16) * 25.4, name="side_magnet")
         side_magnet.place(
@@ -2447,17 +2950,18 @@ class Lalboard(MemoizableDesign):
                                          front_magnet.mid().y,
                                          front_magnet.min().z))
 
-        cluster_group = Group([base,
-                               down_key,
-                               outer_lower_key,
-                               outer_upper_key,
-                               inner_key,
-                               mode_key,
-                               insertion_tool,
-                               pcb,
-                               side_magnet,
-                               back_magnet,
-                               front_magnet], name="thumb_cluster_" + suffix)
+        cluster_group = Group(self._lod_children([base,
+                                                  down_key,
+                                                  outer_lower_key,
+                                                  outer_upper_key,
+                                                  inner_key,
+                                                  mode_key,
+                                                  insertion_tool,
+                                                  pcb,
+                                                  side_magnet,
+                                                  back_magnet,
+                                                  front_magnet], lod, refine, ["front_upper_mid"]),
+                              name="thumb_cluster_" + suffix)
 
         # down_key was already part of another component, so cluster_group has a new copy of it.
         # we need to get a reference of this new copy instead
@@ -2478,9 +2982,159 @@ class Lalboard(MemoizableDesign):
 
         return cluster_group
 
-    @MemoizableDesign.MemoizeComponent
+    def layout_clusters(self, base: str, left_hand=False, z_offset=0.0,
+                        layout_file: Optional[layout.Layout] = None, lod="full", refine: Sequence[str] = (),
+                        placement_cache: Optional[layout.PlacementCache] = None
+                        ) -> Tuple[Sequence[Component], Component]:
+        """Builds the positioned finger and thumb clusters for the given hand, as described by a layout file.
+
+        Resolving the relative placements is slow, so the resolved absolute placements are cached on disk, keyed by the
+        contents of the layout file, of this file and of the modules the resolution uses. Building the clusters for an
+        unchanged layout only needs the absolute placements.
+
+        :param base: The type of base to get the layout for, e.g. "static_base".
+        :param left_hand: Whether to build the clusters for the left hand.
+        :param z_offset: An offset to add to the z coordinate of every cluster.
+        :param layout_file: The layout file to use. Defaults to configs/layout.json.
+        :param lod: The level of detail of the clusters. See positioned_cluster_assembly.
+        :param refine: The names of the parts of the clusters to keep at full detail.
+        :param placement_cache: The cache of resolved placements to use. Defaults to one in the default directory.
+        :return: A tuple of (finger clusters, thumb cluster)
+        """
+        if layout_file is None:
+            script_dir = os.path.dirname(os.path.abspath(inspect.getfile(Lalboard)))
+            layout_file = layout.Layout(os.path.join(script_dir, "configs/layout.json"))
+        hand_layout = layout_file.hand(base, left_hand)
+
+        placement_cache = placement_cache or layout.PlacementCache()
+        # The relative placements are resolved by the placement classes in this file, using these modules. They're
+        # resolved against the clusters built at this instance's detail level, so draft placements are kept separate.
+        module_hashes = self._module_hashes()
+        design_hash = disk_cache.DiskCache.make_key(
+            source_hash.file_hash(inspect.getfile(Lalboard)),
+            {name: module_hashes[name] for name in ("geometry.py", "layout.py", "placement_solver.py")},
+            self.detail)
+        cache_key = placement_cache.key(layout_file, base, left_hand, z_offset, design_hash)
+        resolved = placement_cache.load(cache_key)
+
+        finger_clusters = []
+        # Relative placements are resolved against the bounds of the previous cluster, which must be at full detail.
+        previous_cluster = None
+        finger_placements = []
+        for index, finger_layout in enumerate(hand_layout.fingers):
+            if resolved:
+                placement = _resolved_placement(AbsoluteFingerClusterPlacement(self), resolved[0][index])
+            elif finger_layout.relative:
+                placement = finger_layout.configure(
+                    RelativeFingerClusterPlacement(self), left_hand, z_offset).resolve(
+                    previous_cluster, left_hand=left_hand)
+            else:
+                placement = finger_layout.configure(AbsoluteFingerClusterPlacement(self), left_hand, z_offset)
+            finger_placements.append(placement)
+
+            next_relative = (not resolved and index + 1 < len(hand_layout.fingers) and
+                             hand_layout.fingers[index + 1].relative)
+            if next_relative and lod != "full":
+                # The proxies are derived from the full detail cluster, rather than building the cluster twice.
+                previous_cluster = self.positioned_cluster_assembly(
+                    placement, add_clip=finger_layout.add_clip, tall_clip=finger_layout.tall_clip)
+                finger_clusters.append(self._lod_assembly(previous_cluster, lod, refine, ["down_key_top_center"]))
+            else:
+                finger_clusters.append(self.positioned_cluster_assembly(
+                    placement, add_clip=finger_layout.add_clip, tall_clip=finger_layout.tall_clip, lod=lod,
+                    refine=refine))
+                previous_cluster = finger_clusters[-1]
+
+        if resolved:
+            thumb_placement = _resolved_placement(AbsoluteThumbClusterPlacement(self), resolved[1])
+        else:
+            thumb_placement = hand_layout.thumb.configure(AbsoluteThumbClusterPlacement(self), left_hand, z_offset)
+            placement_cache.store(
+                cache_key,
+                [layout.ResolvedPlacement(placement.position.asArray(), placement.rotation_matrix.asArray())
+                 for placement in finger_placements],
+                layout.ResolvedPlacement(thumb_placement.position.asArray(), thumb_placement.rotation_matrix.asArray()))
+
+        return finger_clusters, self.positioned_thumb_assembly(
+            thumb_placement, left_hand=left_hand, lod=lod, refine=refine)
+
+    def cluster_down_key_top_center(self) -> Tuple[float, float, float]:
+        """Returns the top center of the down key of cluster_body_assembly, in its default, unplaced position.
+
+        This is the reference point for finger cluster placements.
+        """
+        cluster_body = self.cluster_body_assembly()
+        down_key = self.center_key()
+        center_cluster_magnet = name_index.find(cluster_body, "central_magnet_cutout")[0]
+        down_key.rx(180).rz(180)
+        down_key.place(
+            ~down_key == ~center_cluster_magnet,
+            ~down_key == ~center_cluster_magnet,
+            -down_key == -center_cluster_magnet)
+        return down_key.mid().x, down_key.mid().y, down_key.max().z
+
+    def fit_hand(self, fingers: Sequence[fitting.Measurement], thumb: fitting.Measurement, left_hand=False,
+                 spacing=3.0) -> fitting.HandFit:
+        """Fits absolute placements for all the clusters of a hand, to measurements of the hand.
+
+        :param fingers: The measurements of the fingertips, in order.
+        :param thumb: The measurement of the thumb tip.
+        :param left_hand: Whether the measurements are for the left hand.
+        :param spacing: The spacing of the points sampled from the cluster surfaces. This is also the clearance left
+        between the clusters, since the sampled distance can be up to about 1 spacing more than the actual distance.
+        :return: The fitted placements. See fitting.HandFit.layout for converting them to a layout file entry.
+        """
+        finger_reference = self.cluster_down_key_top_center()
+        # noinspection PyProtectedMember
+        finger_support_points = AbsoluteFingerClusterPlacement(self)._get_support_points(False, False)
+        finger_shape = fitting.ClusterShape(
+            geometry.translate_points(self.cluster_body_surface_points(spacing), geometry.scale(finger_reference, -1)),
+            geometry.translate_points(finger_support_points, geometry.scale(finger_reference, -1)))
+
+        down_key = self.thumb_base().find_children("thumb_down_key")[0]
+        thumb_reference = (down_key.mid().x, down_key.max().y, down_key.max().z)
+        # The support points are calculated for the unmirrored base, and mirrored along with the surface points below.
+        # noinspection PyProtectedMember
+        thumb_support_points = AbsoluteThumbClusterPlacement(self)._get_support_points(False)
+        thumb_shape = fitting.ClusterShape(
+            self.thumb_base_surface_points(spacing),
+            geometry.translate_points(thumb_support_points, geometry.scale(thumb_reference, -1)))
+        if left_hand:
+            thumb_shape = thumb_shape.mirrored()
+
+        return fitting.fit_hand(fingers, thumb, finger_shape, thumb_shape, clearance=spacing)
+
+    @staticmethod
+    def _mirror_hand(component: Component, left_hand, center=(0, 0, 0)) -> Component:
+        """Mirrors a copy of a component built for one hand, into the equivalent component for the other hand.
+
+        Any components in the hierarchy whose name ends with the other hand's suffix (e.g. thumb_mode_key_right) are
+        renamed for this hand.
+
+        :param component: A copy of the component for the other hand. This is mirrored and renamed in place.
+        :param left_hand: Which hand the mirrored component is for.
+        :param center: The point to mirror about.
+        :return: The mirrored component.
+        """
+        from_suffix, to_suffix = ("_right", "_left") if left_hand else ("_left", "_right")
+
+        def rename(child: Component):
+            if child.name and child.name.endswith(from_suffix):
+                child.name = child.name[:-len(from_suffix)] + to_suffix
+            for grandchild in child.children():
+                rename(grandchild)
+        rename(component)
+
+        return component.scale(-1, 1, 1, center=center)
+
+    @memoize_component()
     def thumb_assembly(self, left_hand=False):
-        suffix = "left" if left_hand else "right"
+        if left_hand:
+            # The left hand assembly is an exact mirror image of the right hand assembly, so there's no need to build
+            # it separately.
+            return self._mirror_hand(self.thumb_assembly(left_hand=False), left_hand=True)
+
+        suffix = "right"
         base = self.thumb_base("thumb_cluster_" + suffix)
         down_key = base.find_children("thumb_down_key", recursive=False)[0]
 
@@ -2593,12 +3247,6 @@ class Lalboard(MemoizableDesign):
             ~back_ball_magnet == cluster_group.named_point("back_support_point"),
             ~back_ball_magnet == cluster_group.named_point("back_support_point"))
 
-        if left_hand:
-            cluster_group.scale(-1, 1, 1, center=(0, 0, 0))
-            front_support.scale(-1, 1, 1, center=(0, 0, 0))
-            side_support.scale(-1, 1, 1, center=(0, 0, 0))
-            back_support.scale(-1, 1, 1, center=(0, 0, 0))
-
         return Group([cluster_group, front_support, side_support, back_support], name="thumb_assembly_" + suffix)
 
     def place_header(self, header: Component, x: int, y: int):
@@ -2608,7 +3256,7 @@ class Lalboard(MemoizableDesign):
                      (-header == y * 2.54) + pin_size / 2,
                      ~header == 0)
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def central_pcb(self):
         base = Box(42, 67, 1.6)
 
@@ -2635,8 +3283,13 @@ class Lalboard(MemoizableDesign):
         pcb.add_named_faces("bottom", *pcb.find_faces(base.bottom))
         return pcb
 
-    @MemoizableDesign.MemoizeComponent
-    def handrest_design(self, left_hand=False):
+    @memoize_component(persistent=True, shared=True)
+    def handrest_model(self):
+        """The imported handrest model, scaled to mm and centered at the origin, with its bottom at z=0.
+
+        Importing the model is fairly slow, so this is shared by all Lalboard instances, and is cached on disk, keyed by
+        the contents of left_handrest.f3d.
+        """
         script_path = os.path.abspath(inspect.getfile(inspect.currentframe()))
         script_dir = os.path.dirname(script_path)
 
@@ -2646,6 +3299,20 @@ class Lalboard(MemoizableDesign):
         handrest_model.place(~handrest_model == 0,
                              ~handrest_model == 0,
                              -handrest_model == 0)
+        return handrest_model
+
+    @memoize_component(persistent=True)
+    def handrest_design(self, left_hand=False):
+        if not left_hand:
+            # The right handrest is the left handrest mirrored about its center. The pcb isn't mirrored, since the same
+            # pcb is used for both hands.
+            left_assembly = self.handrest_design(left_hand=True)
+            handrest = left_assembly.find_children("left_handrest", recursive=False)[0].copy(name="right_handrest")
+            handrest = self._mirror_hand(handrest, left_hand=False, center=handrest.mid())
+            pcb = left_assembly.find_children("central_pcb", recursive=False)[0].copy()
+            return Group([handrest], [pcb], name=handrest.name)
+
+        handrest_model = self.handrest_model()
 
         pcb = self.central_pcb()
 
@@ -2703,19 +3370,19 @@ class Lalboard(MemoizableDesign):
                                       (~back_left_bottom_magnet == ~handrest_model) - 37.7218,
                                       -back_left_bottom_magnet == -handrest_model)
 
-        handrest = Difference(handrest_model, pcb_slot, shorter_pcb_slot, front_left_bottom_magnet,
-                              front_right_bottom_magnet, back_right_bottom_magnet, back_left_bottom_magnet,
-                              name="left_handrest" if left_hand else "right_handrest")
-
-        if not left_hand:
-            handrest.scale(-1, 1, 1, center=handrest.mid())
+        handrest = self.batched_difference(
+            handrest_model, pcb_slot, shorter_pcb_slot, front_left_bottom_magnet, front_right_bottom_magnet,
+            back_right_bottom_magnet, back_left_bottom_magnet, name="left_handrest")
 
         assembly = Group([handrest], [pcb], name=handrest.name)
 
         return assembly
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def steel_sheet_design(self, left_hand=True):
+        if not left_hand:
+            return self._mirror_hand(self.steel_sheet_design(left_hand=True), left_hand=False)
+
         cluster_area = Rect(50, 90)
         cluster_area.place(
             ~cluster_area == 0,
@@ -2769,9 +3436,6 @@ class Lalboard(MemoizableDesign):
         group.tx(9.3)
         group.ty(18.3)
 
-        if not left_hand:
-            group.scale(-1, 1, 1, center=(0, 0, 0))
-
         hull = Hull(group, name="exposed_steel")
         return OffsetEdges(hull.faces[0], hull.faces[0].edges, 5, name="sheet_sheet")
 
@@ -2823,7 +3487,7 @@ class Lalboard(MemoizableDesign):
                             name="pcb_spacer")
         return spacer
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def steel_base(self, left_hand=True):
         total_thickness = 6
         steel_thickness = .6
@@ -2847,13 +3511,7 @@ class Lalboard(MemoizableDesign):
         extruded_sheet.place(
             z=(-extruded_sheet == -handrest) - total_thickness + bottom_thickness)
 
-        handrest_bottom_finder = Rect(handrest.size().x, handrest.size().y)
-        handrest_bottom_finder.place(
-            ~handrest_bottom_finder == ~handrest,
-            ~handrest_bottom_finder == ~handrest,
-            ~handrest_bottom_finder == -handrest)
-
-        handrest_bottom = full_handrest.find_faces(handrest_bottom_finder)[0]
+        handrest_bottom = self.faces_in_plane(full_handrest, 2, handrest.min().z)[0]
 
         front_half_tool = handrest_bottom.bounding_box.make_box()
         front_half_tool.place(
@@ -3025,10 +3683,7 @@ class Lalboard(MemoizableDesign):
 
         temp_group = Group([*supports, full_handrest])
 
-        bottom_finder = temp_group.bounding_box.make_box()
-        bottom_finder.place(z=+bottom_finder == -temp_group)
-
-        bottom_faces = Group([face.make_component() for face in temp_group.find_faces(bottom_finder)])
+        bottom_faces = Group([face.make_component() for face in self.extreme_faces(temp_group, 2)])
         base = Extrude(Hull(bottom_faces), -3)
 
         def screw_and_nut():
@@ -3069,10 +3724,11 @@ class Lalboard(MemoizableDesign):
 
         return Group([
             Union(
-                Difference(
+                self.batched_difference(
                     base,
-                    screws,
-                    *handrest_magnet_cutouts),
+                    *screws.children(),
+                    *handrest_magnet_cutouts,
+                    report_name="static_base"),
                 *screws.find_children("nut_hole_ceiling"),
                 *supports),
             handrest])
@@ -3086,59 +3742,11 @@ class Lalboard(MemoizableDesign):
         This assumes that axis is not vertical, and that target_point is not on the axis.
         """
         matrix = Matrix3D.create()
-
-        axis = adsk.core.InfiniteLine3D.create(axis_point, axis_vector)
-        result = app().measureManager.measureMinimumDistance(target_point, axis)
-        distance = result.value
-        target_axis_projection = result.positionOne
-
-        circle = Circle(distance)
-
-        matrix.setToRotateTo(
-            circle.get_plane().normal,
-            axis_vector)
-
-        circle.transform(matrix)
-        circle.place(
-            ~circle == target_axis_projection,
-            ~circle == target_axis_projection,
-            ~circle == target_axis_projection)
-
-        # the edge of the circle now corresponds to the path the target point travels as it rotates around axis
-        height_plane = adsk.core.Plane.create(
-            Point3D.create(0, 0, height),
-            Vector3D.create(0, 0, 1))
-
-        intersections = height_plane.intersectWithCurve(circle.edges[0].brep.geometry)
-        assert len(intersections) == 2
-
-        first_angle_measurement = app().measureManager.measureAngle(target_point, target_axis_projection, intersections[0])
-        second_angle_measurement = app().measureManager.measureAngle(target_point, target_axis_projection, intersections[1])
-
-        # the returned angle seems to be in [0, 180], I think.
-        if first_angle_measurement.value < second_angle_measurement.value:
-            destination = intersections[0]
-        else:
-            destination = intersections[1]
-
-        rotation_matrix = Matrix3D.create()
-        rotation_matrix.setToRotateTo(
-            target_axis_projection.vectorTo(target_point),
-            target_axis_projection.vectorTo(destination))
-
-        translation_matrix = Matrix3D.create()
-        translation_matrix.translation = target_axis_projection.asVector()
-        translation_matrix.invert()
-
-        matrix = Matrix3D.create()
-        matrix.transformBy(translation_matrix)
-        matrix.transformBy(rotation_matrix)
-        translation_matrix.invert()
-        matrix.transformBy(translation_matrix)
-
+        matrix.setWithArray(geometry.rotate_to_height_matrix(
+            axis_point.asArray(), axis_vector.asArray(), target_point.asArray(), height))
         return matrix
 
-    @MemoizableDesign.MemoizeComponent
+    @memoize_component()
     def _screw_head_cutout(self):
         screw_head = Cylinder(3.4*2, 3, name="screw_head")
         screw_head_extension = Box(
@@ -3152,13 +3760,13 @@ class Lalboard(MemoizableDesign):
 
     def static_cluster_support(self, cluster: Component, cord_slot_on_left=True):
         body_assembly = self.cluster_body_assembly()
-        cluster_front = body_assembly.find_children("cluster_front")[0]
-        cluster_back = body_assembly.find_children("cluster_back")[0]
+        cluster_front = name_index.find(body_assembly, "cluster_front")[0]
+        cluster_back = name_index.find(body_assembly, "cluster_back")[0]
 
         silhouette = self.cluster_silhouette()
 
-        magnet_cutouts = [*cluster_back.find_children("magnet_cutout")[0:2]]
-        magnet_cutouts.append(cluster_front.find_children("magnet_cutout")[0])
+        magnet_cutouts = [*name_index.find(cluster_back, "magnet_cutout")[0:2]]
+        magnet_cutouts.append(name_index.find(cluster_front, "magnet_cutout")[0])
 
         base_magnet_cutouts = []
         for magnet_cutout in magnet_cutouts:
@@ -3169,8 +3777,8 @@ class Lalboard(MemoizableDesign):
                 +base_magnet_cutout == -cluster_back)
             base_magnet_cutouts.append(base_magnet_cutout)
 
-        pcb = body_assembly.find_children("pcb")[0]
-        pcb_back = pcb.find_children("pcb_back_box")[0]
+        pcb = name_index.find(body_assembly, "pcb")[0]
+        pcb_back = name_index.find(pcb, "pcb_back_box")[0]
 
         pcb_cutout = Rect(
             pcb.size().x * 2,
@@ -3204,9 +3812,9 @@ class Lalboard(MemoizableDesign):
         inner_void_silhouette.place(
             z=~inner_void_silhouette == -pcb_cutout)
 
-        screw_hole = cluster_back.find_children("screw_hole")[0]
+        screw_hole = name_index.find(cluster_back, "screw_hole")[0]
         screw_head_cutout = self._screw_head_cutout()
-        screw_head = screw_head_cutout.find_children("screw_head")[0]
+        screw_head = name_index.find(screw_head_cutout, "screw_head")[0]
         screw_head_cutout.place(
             ~screw_head == ~screw_hole,
             ~screw_head == ~screw_hole,
@@ -3277,17 +3885,17 @@ class Lalboard(MemoizableDesign):
         cluster_transform = thumb_cluster.find_children("thumb_cluster", recursive=False)[0].world_transform()
         left_hand = self._is_matrix_mirrored(cluster_transform)
 
-        down_key_magnet_extension = thumb_base.find_children("down_key_magnet_extension")[0]
+        down_key_magnet_extension = name_index.find(thumb_base, "down_key_magnet_extension")[0]
 
-        upper_key_base = thumb_base.find_children("upper_key_base")[0]
-        upper_key_base_outer_face: Face = upper_key_base.find_children("key_well")[0].front
+        upper_key_base = name_index.find(thumb_base, "upper_key_base")[0]
+        upper_key_base_outer_face: Face = name_index.find(upper_key_base, "key_well")[0].front
 
-        side_attachment = thumb_base.find_children("side_attachment")[0]
-        side_magnet_cutout = side_attachment.find_children("magnet_cutout")[0]
-        back_attachment = thumb_base.find_children("back_attachment")[0]
-        back_magnet_cutout = back_attachment.find_children("magnet_cutout")[0]
-        front_attachment = thumb_base.find_children("front_attachment")[0]
-        front_magnet_cutout = front_attachment.find_children("magnet_cutout")[0]
+        side_attachment = name_index.find(thumb_base, "side_attachment")[0]
+        side_magnet_cutout = name_index.find(side_attachment, "magnet_cutout")[0]
+        back_attachment = name_index.find(thumb_base, "back_attachment")[0]
+        back_magnet_cutout = name_index.find(back_attachment, "magnet_cutout")[0]
+        front_attachment = name_index.find(thumb_base, "front_attachment")[0]
+        front_magnet_cutout = name_index.find(front_attachment, "magnet_cutout")[0]
         magnet_cutouts = (side_magnet_cutout, back_magnet_cutout, front_magnet_cutout)
 
         cord_slot = Box(3, thumb_cluster.size().x / 2, thumb_cluster.max().z * 10)
@@ -3303,7 +3911,7 @@ class Lalboard(MemoizableDesign):
 
         screw_head_cutouts = []
         nut_cutout: Box
-        for nut_cutout in thumb_base.find_children("nut_cutout"):
+        for nut_cutout in name_index.find(thumb_base, "nut_cutout"):
             screw_head_cutout = self._screw_head_cutout()
 
             matrix = Matrix3D.create()
@@ -3313,7 +3921,7 @@ class Lalboard(MemoizableDesign):
                 Vector3D.create(0, 0, 1))
 
             screw_head_cutout.transform(matrix)
-            screw_head = screw_head_cutout.find_children("screw_head")[0]
+            screw_head = name_index.find(screw_head_cutout, "screw_head")[0]
             screw_head_cutout.place(
                 ~screw_head == ~nut_cutout,
                 ~screw_head == ~nut_cutout,
@@ -3331,7 +3939,7 @@ class Lalboard(MemoizableDesign):
             -inner_void_extent == +down_key_magnet_extension,
             ~inner_void_extent == ~silhouette)
 
-        thumb_body = thumb_base.find_children("body")[0]
+        thumb_body = name_index.find(thumb_base, "body")[0]
 
         base_magnet_cutouts = []
         for magnet_cutout in magnet_cutouts:
@@ -3356,15 +3964,13 @@ class Lalboard(MemoizableDesign):
                 Hull(pcb_cutout_profile),
                 -pcb_cutout.size().z).side_faces), 5))
 
-        key_well_bottom_finder = thumb_base.bounding_box.make_box()
-        key_well_bottom_finder.place(z=+key_well_bottom_finder == -thumb_base)
         key_well_silhouettes = []
-        for keywell_bottom_face in thumb_base.find_faces(key_well_bottom_finder):
+        for keywell_bottom_face in self.extreme_faces(thumb_base, 2):
             key_well_silhouettes.append(OffsetEdges(keywell_bottom_face, keywell_bottom_face.edges, .4))
 
         down_key_bottom_protrusions = Group([
             down_key_magnet_extension,
-            thumb_base.find_children("down_key_slot")[0]])
+            name_index.find(thumb_base, "down_key_slot")[0]])
         down_key_bottom_protrusions_silhouette = Rect(
             down_key_bottom_protrusions.size().x + .8,
             down_key_bottom_protrusions.size().y + .4)
@@ -3434,9 +4040,17 @@ class Lalboard(MemoizableDesign):
             name="static_support")
 
 
-def run_design(design_func, message_box_on_error=False, print_runtime=True, document_name=None, context=None):
+def run_design(design_func, message_box_on_error=False, print_runtime=True, document_name=None, context=None,
+               profile=False, instancing=False, detail="full"):
     """
     Exactly the same as the standard fscad.run_design, except message_box_on_error is False by default.
+
+    :param profile: If true, a profile of the time spent in each Lalboard method and fscad operation is printed after
+    the design is run. See build_profiler.
+    :param instancing: If true, the Lalboard instance passed to design_func is created with instancing=True. This is
+    ignored if context is already a Lalboard instance. See Lalboard.create_instanced_occurrence.
+    :param detail: The detail level of the Lalboard instance passed to design_func. This is ignored if context is
+    already a Lalboard instance. See Lalboard.__init__.
     """
     if not document_name:
         frame = inspect.stack()[1]
@@ -3444,11 +4058,40 @@ def run_design(design_func, message_box_on_error=False, print_runtime=True, docu
         filename = module.__file__
         document_name = pathlib.Path(filename).stem
 
+    if profile:
+        design_func = _profiled_design(design_func)
+
     if isinstance(context, MemoizableDesign):
         fscad.fscad.run_design(design_func, message_box_on_error, print_runtime, document_name, design_args=[context])
     else:
         fscad.fscad.run_design(
-            design_func, message_box_on_error, print_runtime, document_name, design_args=[Lalboard()])
+            design_func, message_box_on_error, print_runtime, document_name,
+            design_args=[Lalboard(instancing=instancing, detail=detail)])
+
+
+def _profiled_design(design_func):
+    @functools.wraps(design_func)
+    def profiled_design_func(context: Lalboard):
+        profiler = build_profiler.BuildProfiler()
+        profiler.wrap_class(Lalboard)
+        profiler.wrap_namespace(globals(), build_profiler.fscad_primitives)
+        design_module = inspect.getmodule(design_func)
+        if design_module is not None:
+            profiler.wrap_namespace(vars(design_module), build_profiler.fscad_primitives)
+        with profiler:
+            design_func(context)
+        print(profiler.summary())
+        if context.batching_report.parts:
+            print(context.batching_report.summary())
+        print(context.silhouettes.summary())
+    return profiled_design_func
+
+
+def _resolved_placement(placement, resolved: layout.ResolvedPlacement):
+    """Sets the position and rotation of the given absolute placement from a cached, resolved placement."""
+    matrix = Matrix3D.create()
+    matrix.setWithArray(resolved.rotation_matrix)
+    return placement.set_cartesian(*resolved.position).set_rotation_matrix(matrix)
 
 
 class ClusterRotation(object):
@@ -3488,7 +4131,7 @@ class ClusterRotation(object):
         return self
 
     def _set_rotation_by_support_lengths(
-            self, lengths: Tuple[float, float, float], support_points: Tuple[Point3D, Point3D, Point3D], rz: float):
+            self, lengths: Tuple[float, float, float], support_points: Sequence[Sequence[float]], rz: float):
         """Sets the rotation of the cluster by the lengths of the 3 supports, along with a z-axis rotation.
 
         This actually over-specifies the rotation, by also specifying the height of the cluster. However, only the
@@ -3500,46 +4143,32 @@ class ClusterRotation(object):
         an unrotated state.
         :param rz: The rotation around the z-axis.
         """
-        # just a placeholder object that we can attach named points to
-        placeholder = Box(1, 1, 1)
-
-        placeholder.add_named_point("point1", support_points[0])
-
-        placeholder.add_named_point("point2", support_points[1])
-
-        placeholder.add_named_point("point3", support_points[2])
-
-        # first, translate the whole thing up, so that the first point is at the correct height
-        placeholder.place(z=~placeholder.named_point("point1") == lengths[0])
-
-        # next, rotate about an axis that runs through the first point and third points, so that the second point is
-        # at the correct height.
-        # This assumes that the second point is not colinear with the first and third points.
-        first_rotation = self._context.rotate_to_height_matrix(
-            axis_point=placeholder.named_point("point1").point,
-            axis_vector=placeholder.named_point("point1").point.vectorTo(placeholder.named_point("point3").point),
-            target_point=placeholder.named_point("point2").point,
-            height=lengths[1])
-        placeholder.transform(first_rotation)
-
-        # finally, rotate about an axis that runs through the first and second support points, so that
-        # the third support point is at the correct height
-        second_rotation = self._context.rotate_to_height_matrix(
-            axis_point=placeholder.named_point("point1").point,
-            axis_vector=placeholder.named_point("point1").point.vectorTo(
-                placeholder.named_point("point2").point),
-            target_point=placeholder.named_point("point3").point,
-            height=lengths[2])
-
         self._matrix = Matrix3D.create()
-        self._matrix.transformBy(first_rotation)
-        self._matrix.transformBy(second_rotation)
-
-        existing_rz = math.degrees(math.atan2(self._matrix.asArray()[4], self._matrix.asArray()[0]))
-
-        matrix = Matrix3D.create()
-        matrix.setToRotation(math.radians(rz - existing_rz), Vector3D.create(0, 0, 1), Point3D.create(0, 0, 0))
-        self._matrix.transformBy(matrix)
+        self._matrix.setWithArray(geometry.support_lengths_matrix(lengths, support_points, rz))
+
+    def _cached_support_points(self, key, support_points_func):
+        # The support points only depend on the design, so they're cached on the context, and shared by all the
+        # placements that use it.
+        # noinspection PyProtectedMember
+        cache = self._context._support_point_cache
+        if key not in cache:
+            cache[key] = support_points_func()
+        return cache[key]
+
+    def _support_lengths_to_euler_angles(
+            self, support_lengths: Sequence[Sequence[float]], support_points: Sequence[Sequence[float]]):
+        return [geometry.matrix_euler_angles(geometry.support_lengths_matrix(lengths[:3], support_points, lengths[3]))
+                for lengths in support_lengths]
+
+    def _euler_angles_to_support_lengths(
+            self, euler_angles: Sequence[Sequence[float]], first_length: float,
+            support_points: Sequence[Sequence[float]]):
+        result = []
+        for rx, ry, rz in euler_angles:
+            lengths = geometry.matrix_support_lengths(
+                geometry.euler_angles_matrix(rx, ry, rz), support_points, first_length)
+            result.append((*lengths, rz))
+        return result
 
     def set_rotation_matrix(self, matrix: Matrix3D):
         """Sets the rotation of the cluster directly, from the given rotation matrix.
@@ -3572,18 +4201,56 @@ class FingerClusterRotation(ClusterRotation):
 
         return self
 
+    def support_lengths_to_euler_angles(
+            self, support_lengths: Sequence[Sequence[float]], add_clip=False, tall_front_clip=False):
+        """Converts a batch of support lengths to the equivalent euler angles.
+
+        This is equivalent to calling set_rotation_by_support_lengths and then extracting the euler angles from the
+        resulting rotation, for each set of lengths. But the support points are only calculated once, and the rest is
+        plain math, so it's fast enough for sweeping through many possible poses.
+
+        :param support_lengths: A sequence of (front, back_left, back_right, rz) tuples.
+        :param add_clip: Whether the front support attaches to a front clip.
+        :param tall_front_clip: If true, the length of the front support assumes that the "tall" front clip is being
+        used.
+        :return: A list of (rx, ry, rz) euler angles, in the same order as support_lengths.
+        """
+        return self._support_lengths_to_euler_angles(
+            support_lengths, self._get_support_points(add_clip, tall_front_clip))
+
+    def euler_angles_to_support_lengths(
+            self, euler_angles: Sequence[Sequence[float]], front: float, add_clip=False, tall_front_clip=False):
+        """Converts a batch of euler angles to the equivalent support lengths.
+
+        The euler angles only determine the relative lengths of the supports, so the length of the front support must
+        be specified.
+
+        :param euler_angles: A sequence of (rx, ry, rz) tuples.
+        :param front: The length of the front support.
+        :param add_clip: Whether the front support attaches to a front clip.
+        :param tall_front_clip: If true, the length of the front support assumes that the "tall" front clip is being
+        used.
+        :return: A list of (front, back_left, back_right, rz) tuples, in the same order as euler_angles.
+        """
+        return self._euler_angles_to_support_lengths(
+            euler_angles, front, self._get_support_points(add_clip, tall_front_clip))
+
     def _get_support_points(self, add_clip=False, tall_clip=True):
+        return self._cached_support_points(
+            ("finger", add_clip, tall_clip), lambda: self._calculate_support_points(add_clip, tall_clip))
+
+    def _calculate_support_points(self, add_clip, tall_clip):
         cluster_body = self._context.cluster_body_assembly(add_clip=add_clip, tall_clip=tall_clip)
 
-        back = cluster_body.find_children("cluster_back")[0]
+        back = name_index.find(cluster_body, "cluster_back")[0]
 
         if add_clip:
-            front_clip = cluster_body.find_children("cluster_front_mount_clip")[0]
-            front_magnet_cutout = front_clip.find_children("attachment")[0].find_children("magnet_cutout")[0]
+            front_clip = name_index.find(cluster_body, "cluster_front_mount_clip")[0]
+            front_magnet_cutout = name_index.find(front_clip, "attachment/magnet_cutout")[0]
         else:
-            front_magnet_cutout = cluster_body.find_children("cluster_front")[0].find_children("magnet_cutout")[0]
+            front_magnet_cutout = name_index.find(cluster_body, "cluster_front/magnet_cutout")[0]
 
-        back_cutouts = sorted(back.find_children("magnet_cutout")[:2], key=lambda cutout: cutout.mid().x)
+        back_cutouts = sorted(name_index.find(back, "magnet_cutout")[:2], key=lambda cutout: cutout.mid().x)
         back_left_cutout = back_cutouts[0]
         back_right_cutout = back_cutouts[1]
 
@@ -3592,18 +4259,15 @@ class FingerClusterRotation(ClusterRotation):
         ball_center_offset = large_magnet.size().z + ball_magnet.size().z / 2
 
         return (
-            Point3D.create(
-                front_magnet_cutout.mid().x,
-                front_magnet_cutout.mid().y,
-                front_magnet_cutout.max().z - ball_center_offset),
-            Point3D.create(
-                back_left_cutout.mid().x,
-                back_left_cutout.mid().y,
-                back_left_cutout.max().z - ball_center_offset),
-            Point3D.create(
-                back_right_cutout.mid().x,
-                back_right_cutout.mid().y,
-                back_right_cutout.max().z - ball_center_offset))
+            (front_magnet_cutout.mid().x,
+             front_magnet_cutout.mid().y,
+             front_magnet_cutout.max().z - ball_center_offset),
+            (back_left_cutout.mid().x,
+             back_left_cutout.mid().y,
+             back_left_cutout.max().z - ball_center_offset),
+            (back_right_cutout.mid().x,
+             back_right_cutout.mid().y,
+             back_right_cutout.max().z - ball_center_offset))
 
 
 class ThumbClusterRotation(ClusterRotation):
@@ -3626,32 +4290,58 @@ class ThumbClusterRotation(ClusterRotation):
 
         return self
 
+    def support_lengths_to_euler_angles(self, support_lengths: Sequence[Sequence[float]], left_hand=False):
+        """Converts a batch of support lengths to the equivalent euler angles.
+
+        This is equivalent to calling set_rotation_by_support_lengths and then extracting the euler angles from the
+        resulting rotation, for each set of lengths. But the support points are only calculated once, and the rest is
+        plain math, so it's fast enough for sweeping through many possible poses.
+
+        :param support_lengths: A sequence of (front, side, back, rz) tuples.
+        :param left_hand: Convert the lengths for a right hand or left hand thumb
+        :return: A list of (rx, ry, rz) euler angles, in the same order as support_lengths.
+        """
+        return self._support_lengths_to_euler_angles(support_lengths, self._get_support_points(left_hand))
+
+    def euler_angles_to_support_lengths(self, euler_angles: Sequence[Sequence[float]], front: float, left_hand=False):
+        """Converts a batch of euler angles to the equivalent support lengths.
+
+        The euler angles only determine the relative lengths of the supports, so the length of the front support must
+        be specified.
+
+        :param euler_angles: A sequence of (rx, ry, rz) tuples.
+        :param front: The length of the front support.
+        :param left_hand: Convert the angles for a right hand or left hand thumb
+        :return: A list of (front, side, back, rz) tuples, in the same order as euler_angles.
+        """
+        return self._euler_angles_to_support_lengths(euler_angles, front, self._get_support_points(left_hand))
+
     def _get_support_points(self, left_hand=False):
+        return self._cached_support_points(("thumb", left_hand), lambda: self._calculate_support_points(left_hand))
+
+    def _calculate_support_points(self, left_hand):
         base = self._context.thumb_base()
         if left_hand:
             base.scale(-1, 1, 1, center=base.mid())
 
-        front_cutout = base.find_children("front_attachment")[0].find_children("magnet_cutout")[0]
-        side_cutout = base.find_children("side_attachment")[0].find_children("magnet_cutout")[0]
-        back_cutout = base.find_children("back_attachment")[0].find_children("magnet_cutout")[0]
+        front_cutout = name_index.find(base, "front_attachment/magnet_cutout")[0]
+        side_cutout = name_index.find(base, "side_attachment/magnet_cutout")[0]
+        back_cutout = name_index.find(base, "back_attachment/magnet_cutout")[0]
 
         ball_magnet = self._context.ball_magnet()
         large_magnet = self._context.large_magnet()
         ball_center_offset = large_magnet.size().z + ball_magnet.size().z / 2
 
         return (
-            Point3D.create(
-                front_cutout.mid().x,
-                front_cutout.mid().y,
-                front_cutout.max().z - ball_center_offset),
-            Point3D.create(
-                side_cutout.mid().x,
-                side_cutout.mid().y,
-                side_cutout.max().z - ball_center_offset),
-            Point3D.create(
-                back_cutout.mid().x,
-                back_cutout.mid().y,
-                back_cutout.max().z - ball_center_offset))
+            (front_cutout.mid().x,
+             front_cutout.mid().y,
+             front_cutout.max().z - ball_center_offset),
+            (side_cutout.mid().x,
+             side_cutout.mid().y,
+             side_cutout.max().z - ball_center_offset),
+            (back_cutout.mid().x,
+             back_cutout.mid().y,
+             back_cutout.max().z - ball_center_offset))
 
 
 class AbsoluteFingerClusterPlacement(FingerClusterRotation):
@@ -3725,6 +4415,9 @@ class RelativeFingerClusterPlacement(FingerClusterRotation):
     first cluster, the gap specifies an offset from the default position of x=0 or theta=0.
     """
 
+    # The spacing of the points sampled from the clusters, for the initial solve of the cylindrical position.
+    _solver_sample_spacing = 1.0
+
     def __init__(self, context):
         super().__init__(context)
         self._positioning = ("cartesian", 0, 0)
@@ -3783,7 +4476,7 @@ class RelativeFingerClusterPlacement(FingerClusterRotation):
         cluster_body = self._context.cluster_body_assembly()
 
         down_key = self._context.center_key()
-        center_cluster_magnet = cluster_body.find_children("central_magnet_cutout")[0]
+        center_cluster_magnet = name_index.find(cluster_body, "central_magnet_cutout")[0]
         down_key.rx(180).rz(180)
         down_key.place(
             ~down_key == ~center_cluster_magnet,
@@ -3891,7 +4584,7 @@ class RelativeFingerClusterPlacement(FingerClusterRotation):
         cluster_body = self._context.cluster_body_assembly()
 
         down_key = self._context.center_key()
-        center_cluster_magnet = cluster_body.find_children("central_magnet_cutout")[0]
+        center_cluster_magnet = name_index.find(cluster_body, "central_magnet_cutout")[0]
         down_key.rx(180).rz(180)
         down_key.place(
             ~down_key == ~center_cluster_magnet,
@@ -3902,58 +4595,43 @@ class RelativeFingerClusterPlacement(FingerClusterRotation):
             down_key.mid().x,
             down_key.mid().y,
             down_key.max().z))
+        untransformed_down_key_top_center = cluster_body.named_point("down_key_top_center").point.asArray()
 
         cluster_body.transform(self.rotation_matrix)
 
-        def circumferential_translation_matrix(point: Point3D, theta_delta):
-            translated_point = point.copy()
-
-            matrix = Matrix3D.create()
-            matrix.setToRotation(math.radians(theta_delta), Vector3D.create(0, 0, 1), Point3D.create(0, 0, 0))
-            translated_point.transformBy(matrix)
-
-            matrix = Matrix3D.create()
-            matrix.translation = point.vectorTo(translated_point)
-            return matrix
-
-        def place_at_radius_matrix(point: Point3D, target_radius):
-            radial_vector = Point3D.create(0, 0, 0).vectorTo(Point3D.create(point.x, point.y, 0))
-
-            radial_translation = target_radius - radial_vector.length
-
-            radial_vector.normalize()
-            radial_vector.scaleBy(radial_translation)
-            matrix = Matrix3D.create()
-            matrix.translation = radial_vector
-            return matrix
-
         if not previous_cluster:
             cluster_body.place(
                 ~cluster_body.named_point("down_key_top_center") == 0,
                 ~cluster_body.named_point("down_key_top_center") == self._positioning[1],
                 ~cluster_body.named_point("down_key_top_center") == self._positioning[2])
-        elif left_hand:
-            cluster_body.place(
-                +cluster_body == -previous_cluster,
-                ~cluster_body == ~previous_cluster,
-                ~cluster_body.named_point("down_key_top_center") == self._positioning[2])
-            cluster_body.transform(
-                place_at_radius_matrix(cluster_body.named_point("down_key_top_center").point, self._positioning[1]))
-            while cluster_body.bounding_box.raw_bounding_box.intersects(
-                    previous_cluster.bounding_box.raw_bounding_box):
-                cluster_body.transform(
-                    circumferential_translation_matrix(cluster_body.named_point("down_key_top_center").point, 5))
         else:
+            spacing = self._solver_sample_spacing
+
+            # The cluster body's points, relative to the down key point that travels along the cylinder.
+            cluster_points = placement_solver.transformed_cloud_points(
+                self._context.cluster_body_surface_points(spacing),
+                self.rotation_matrix.asArray(),
+                untransformed_down_key_top_center)
+            previous_cluster_cloud = placement_solver.PointCloud(
+                self._context.surface_points(previous_cluster, spacing))
+
+            # The sampled distance can be up to about 1 spacing more than the actual distance, so we leave 1 spacing
+            # of clearance to make sure the bodies don't actually intersect. The exact alignment below closes the
+            # remaining gap.
+            theta = placement_solver.solve_cylindrical_theta(
+                placement_solver.PointCloud(cluster_points),
+                previous_cluster_cloud,
+                radius=self._positioning[1],
+                z=self._positioning[2],
+                start_theta=geometry.cylindrical_theta(previous_cluster.mid().asArray()),
+                away_direction=-1 if left_hand else 1,
+                clearance=spacing)
+
+            target = geometry.cylindrical_to_cartesian(self._positioning[1], theta, self._positioning[2])
             cluster_body.place(
-                -cluster_body == +previous_cluster,
-                ~cluster_body == ~previous_cluster,
-                ~cluster_body.named_point("down_key_top_center") == self._positioning[2])
-            cluster_body.transform(
-                place_at_radius_matrix(cluster_body.named_point("down_key_top_center").point, self._positioning[1]))
-            while cluster_body.bounding_box.raw_bounding_box.intersects(
-                    previous_cluster.bounding_box.raw_bounding_box):
-                cluster_body.transform(
-                    circumferential_translation_matrix(cluster_body.named_point("down_key_top_center").point, -5))
+                ~cluster_body.named_point("down_key_top_center") == target[0],
+                ~cluster_body.named_point("down_key_top_center") == target[1],
+                ~cluster_body.named_point("down_key_top_center") == target[2])
 
         if previous_cluster:
             self._align_to_cylindrical(
@@ -4026,6 +4704,9 @@ class RelativeThumbClusterPlacement(ThumbClusterRotation):
     be chosen such that there is `gap` space between this cluster and the handrest.
     """
 
+    # The spacing of the points sampled from the thumb cluster and handrest, for the approximate solve.
+    _solver_sample_spacing = 1.0
+
     def __init__(self, context):
         super().__init__(context)
         self._positioning = (0, 0)
@@ -4072,26 +4753,76 @@ class RelativeThumbClusterPlacement(ThumbClusterRotation):
         body.transform(self.rotation_matrix)
 
         if left_hand:
-            body.place(-body == +handrest)
             alignment_direction = Vector3D.create(-1, 0, 0)
         else:
-            body.place(+body == -handrest)
             alignment_direction = Vector3D.create(1, 0, 0)
 
+        # The sampled distance can be up to about 1 spacing more than the actual distance, so we leave 1 spacing of
+        # clearance to make sure the bodies don't actually intersect. The exact alignment below closes the remaining
+        # gap.
+        spacing = self._solver_sample_spacing
+        handrest_cloud = self._context.surface_point_cloud(handrest, spacing)
         body.place(
-            y=~down_key.named_point("front_upper_mid") == self._positioning[0],
-            z=~down_key.named_point("front_upper_mid") == self._positioning[1])
+            ~down_key.named_point("front_upper_mid") == self._solve_x(handrest_cloud, left_hand, clearance=spacing),
+            ~down_key.named_point("front_upper_mid") == self._positioning[0],
+            ~down_key.named_point("front_upper_mid") == self._positioning[1])
 
         body.align_to(handrest, alignment_direction)
 
         if self._gap:
-            gap = self._gap
-            if not left_hand:
-                gap *= -1
-            body.tx(gap)
+            body.tx(self._gap_offset(left_hand))
 
         absolute_placement = AbsoluteThumbClusterPlacement(self._context)
         absolute_placement.set_cartesian(*down_key.named_point("front_upper_mid").point.asArray())
         absolute_placement.set_rotation_matrix(self.rotation_matrix)
 
         return absolute_placement
+
+    def solve(self, handrest_cloud: placement_solver.PointCloud, left_hand=False) -> AbsoluteThumbClusterPlacement:
+        """Approximately resolves this relative placement, using only points sampled from the surfaces.
+
+        Unlike resolve, this doesn't do any BRep operations once the thumb base's surface points have been sampled and
+        cached by the context. So the handrest's points can be sampled once, and the position can then be re-tuned
+        quickly, e.g. while adjusting the rotation interactively. The result is only accurate to within about
+        _solver_sample_spacing.
+
+        :param handrest_cloud: The points sampled from the surface of the handrest, e.g. via Lalboard.surface_points.
+        :param left_hand: True if this placement is for the left hand.
+        :return: An AbsoluteThumbClusterPlacement for the resolved position.
+        """
+        absolute_placement = AbsoluteThumbClusterPlacement(self._context)
+        absolute_placement.set_cartesian(
+            self._solve_x(handrest_cloud, left_hand) + self._gap_offset(left_hand),
+            self._positioning[0],
+            self._positioning[1])
+        absolute_placement.set_rotation_matrix(self.rotation_matrix)
+        return absolute_placement
+
+    def _solve_x(self, handrest_cloud: placement_solver.PointCloud, left_hand: bool, clearance=0.0) -> float:
+        """Finds the x coordinate of the down key's front upper mid point where the cluster touches the handrest."""
+        points = self._context.thumb_base_surface_points(self._solver_sample_spacing)
+        if left_hand:
+            points = [(-x, y, z) for x, y, z in points]
+        cluster_cloud = placement_solver.PointCloud(
+            placement_solver.transformed_cloud_points(points, self.rotation_matrix.asArray()))
+
+        # Start with the cluster's bounding box just touching the handrest's, on the side it will approach from.
+        if left_hand:
+            start_x = handrest_cloud.bounds[1][0] - cluster_cloud.bounds[0][0]
+            direction = -1
+        else:
+            start_x = handrest_cloud.bounds[0][0] - cluster_cloud.bounds[1][0]
+            direction = 1
+
+        travel = placement_solver.solve_translation(
+            cluster_cloud,
+            handrest_cloud,
+            (start_x, self._positioning[0], self._positioning[1]),
+            (direction, 0, 0),
+            clearance=clearance)
+        return start_x + travel * direction
+
+    def _gap_offset(self, left_hand: bool) -> float:
+        if left_hand:
+            return self._gap
+        return -self._gap
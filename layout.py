@@ -0,0 +1,259 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Declarative layouts of the finger and thumb clusters, for the full assemblies.
+
+A layout file is a json file with a section for each type of base, each of which has a section for each hand:
+
+    {
+      "static_base": {
+        "left": {
+          "fingers": [
+            {"relative_cylindrical": [116.53, 31.09], "gap": -8.44, "euler_angles": [13.45, -0.16, 1.46]},
+            ...
+          ],
+          "thumb": {"cartesian": [47.98, 81.74, 35.11], "euler_angles": [9.19, -2.67, 14.28]}
+        },
+        "right": {...}
+      },
+      ...
+    }
+
+The fingers are listed in order, and each relative finger placement is resolved against the previous finger cluster.
+Each cluster has exactly 1 position:
+ - "relative_cylindrical": [r, z] or "relative_cartesian": [y, z], along with an optional "gap". See
+   RelativeFingerClusterPlacement. These are only supported for the fingers.
+ - "cylindrical": [r, theta, z] or "cartesian": [x, y, z]. See AbsoluteFingerClusterPlacement. Only "cartesian" is
+   supported for the thumb.
+
+And exactly 1 rotation:
+ - "euler_angles": [rx, ry, rz]
+ - "support_lengths": [...], along with "rz". See set_rotation_by_support_lengths.
+
+Finger clusters can also specify "add_clip" and "tall_clip", which are passed to both positioned_cluster_assembly and
+set_rotation_by_support_lengths.
+
+Resolving a relative placement requires building the previous cluster and measuring against it, which is slow. So the
+resolved absolute placements are cached on disk, keyed by the contents of the layout file and whatever else the
+resolution depends on (see PlacementCache).
+
+This doesn't depend on fusion, so that it can be tested outside of fusion.
+"""
+
+import json
+import os
+from typing import List, Optional, Sequence, Tuple
+
+import disk_cache
+import source_hash
+
+default_layout_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs", "layout.json")
+default_cache_directory = os.path.join(os.path.dirname(os.path.realpath(__file__)), ".cache", "layouts")
+
+_position_sizes = {
+    "relative_cylindrical": 2,
+    "relative_cartesian": 2,
+    "cylindrical": 3,
+    "cartesian": 3,
+}
+_thumb_position_types = ("cartesian",)
+_rotation_sizes = {
+    "euler_angles": 3,
+    "support_lengths": 3,
+}
+_option_keys = ("gap", "rz", "add_clip", "tall_clip")
+
+
+class ClusterLayout(object):
+    """The placement of a single cluster in a layout file.
+
+    :param entry: The cluster's entry from the layout file.
+    :param thumb: Whether this is the thumb cluster, rather than a finger cluster.
+    """
+
+    def __init__(self, entry: dict, thumb=False):
+        self.thumb = thumb
+
+        unknown_keys = set(entry) - set(_position_sizes) - set(_rotation_sizes) - set(_option_keys)
+        if unknown_keys:
+            raise ValueError("Unknown keys in cluster layout: %s" % ", ".join(sorted(unknown_keys)))
+
+        self.position_type, self.position = _single_value(
+            entry, _thumb_position_types if thumb else tuple(_position_sizes), _position_sizes, "position")
+        self.rotation_type, self.rotation = _single_value(entry, tuple(_rotation_sizes), _rotation_sizes, "rotation")
+
+        self.gap = float(entry.get("gap", 0.0))
+        if self.gap and not self.relative:
+            raise ValueError("A gap can only be specified for a relative position")
+
+        if self.rotation_type == "support_lengths":
+            if "rz" not in entry:
+                raise ValueError("rz must be specified along with support_lengths")
+            self.rz = float(entry["rz"])
+        elif "rz" in entry:
+            raise ValueError("rz can only be specified along with support_lengths")
+        else:
+            self.rz = None
+
+        if thumb and ("add_clip" in entry or "tall_clip" in entry):
+            raise ValueError("add_clip and tall_clip are only supported for finger clusters")
+        self.add_clip = bool(entry.get("add_clip", False))
+        self.tall_clip = bool(entry.get("tall_clip", False))
+
+    @property
+    def relative(self) -> bool:
+        return self.position_type.startswith("relative_")
+
+    def configure(self, placement, left_hand=False, z_offset=0.0):
+        """Sets the position and rotation of the given placement object, according to this layout.
+
+        :param placement: A placement object of the appropriate type for this layout, i.e. an Absolute or Relative
+        FingerClusterPlacement or ThumbClusterPlacement.
+        :param left_hand: Whether the placement is for the left hand. This is only used for the support lengths of the
+        thumb cluster.
+        :param z_offset: An offset to add to the z coordinate of the position.
+        :return: The placement.
+        """
+        position = list(self.position)
+        position[-1] += z_offset
+        if self.position_type == "relative_cylindrical":
+            placement.set_cylindrical(*position, gap=self.gap)
+        elif self.position_type == "relative_cartesian":
+            placement.set_cartesian(*position, gap=self.gap)
+        elif self.position_type == "cylindrical":
+            placement.set_cylindrical(*position)
+        else:
+            placement.set_cartesian(*position)
+
+        if self.rotation_type == "euler_angles":
+            placement.set_rotation_by_euler_angles(*self.rotation)
+        elif self.thumb:
+            placement.set_rotation_by_support_lengths(*self.rotation, rz=self.rz, left_hand=left_hand)
+        else:
+            placement.set_rotation_by_support_lengths(
+                *self.rotation, rz=self.rz, add_clip=self.add_clip, tall_front_clip=self.tall_clip)
+        return placement
+
+
+class HandLayout(object):
+    """The placements of all the clusters for a single hand."""
+
+    def __init__(self, fingers: Sequence[ClusterLayout], thumb: ClusterLayout):
+        self.fingers = list(fingers)
+        self.thumb = thumb
+
+
+class Layout(object):
+    """A layout file.
+
+    :param path: The path of the layout file.
+    """
+
+    def __init__(self, path: str = default_layout_path):
+        self.path = path
+        with open(path, "r") as layout_file:
+            self._layout = json.load(layout_file)
+        self.file_hash = source_hash.file_hash(path)
+
+    def base_names(self) -> List[str]:
+        return sorted(self._layout.keys())
+
+    def hand(self, base: str, left_hand: bool) -> HandLayout:
+        """Returns the layout of the given hand, for the given type of base."""
+        if base not in self._layout:
+            raise ValueError("No layout for %s in %s" % (base, self.path))
+        hand_name = "left" if left_hand else "right"
+        if hand_name not in self._layout[base]:
+            raise ValueError("No %s hand layout for %s in %s" % (hand_name, base, self.path))
+
+        hand = self._layout[base][hand_name]
+        return HandLayout(
+            [ClusterLayout(entry) for entry in hand["fingers"]],
+            ClusterLayout(hand["thumb"], thumb=True))
+
+
+class ResolvedPlacement(object):
+    """An absolute placement: the position of the cluster's reference point, and its rotation matrix."""
+
+    def __init__(self, position: Sequence[float], rotation_matrix: Sequence[float]):
+        self.position = tuple(position)
+        self.rotation_matrix = tuple(rotation_matrix)
+
+    def to_dict(self) -> dict:
+        return {"position": list(self.position), "rotation_matrix": list(self.rotation_matrix)}
+
+    @staticmethod
+    def from_dict(data: dict) -> "ResolvedPlacement":
+        return ResolvedPlacement(data["position"], data["rotation_matrix"])
+
+
+class PlacementCache(object):
+    """An on-disk cache of the resolved absolute placements for a hand of a layout.
+
+    :param directory: The directory to store the cache in.
+    """
+
+    _placements_file = "placements.json"
+
+    def __init__(self, directory: str = default_cache_directory):
+        self._cache = disk_cache.DiskCache(directory, max_age=30 * 24 * 60 * 60)
+
+    @property
+    def stats(self) -> disk_cache.CacheStats:
+        return self._cache.stats
+
+    def key(self, layout: Layout, base: str, left_hand: bool, z_offset: float, design_hash: str) -> Optional[str]:
+        """Returns the cache key for the resolved placements of the given hand of the layout.
+
+        :param layout: The layout.
+        :param base: The type of base.
+        :param left_hand: Whether these are the placements for the left hand.
+        :param z_offset: The offset that was added to the z coordinates of the placements.
+        :param design_hash: A hash of the design code that the resolution depends on, e.g. of lalboard.py.
+        """
+        return self._cache.make_key("layout", layout.file_hash, base, left_hand, z_offset, design_hash)
+
+    def load(self, key: str) -> Optional[Tuple[List[ResolvedPlacement], ResolvedPlacement]]:
+        """Returns the cached (finger placements, thumb placement) for the given key, or None if not cached."""
+        path = self._cache.lookup(key)
+        if path is None:
+            return None
+        with open(os.path.join(path, self._placements_file), "r") as placements_file:
+            placements = json.load(placements_file)
+        return ([ResolvedPlacement.from_dict(finger) for finger in placements["fingers"]],
+                ResolvedPlacement.from_dict(placements["thumb"]))
+
+    def store(self, key: str, fingers: Sequence[ResolvedPlacement], thumb: ResolvedPlacement):
+        def write(path):
+            with open(os.path.join(path, self._placements_file), "w") as placements_file:
+                json.dump({
+                    "fingers": [finger.to_dict() for finger in fingers],
+                    "thumb": thumb.to_dict()
+                }, placements_file, indent=2)
+        self._cache.store(key, write)
+
+
+def _single_value(entry: dict, allowed_keys: Tuple[str, ...], sizes: dict, description: str):
+    """Returns the (key, value) for the one key out of the given keys that is present in the entry."""
+    keys = [key for key in sizes if key in entry]
+    if len(keys) != 1:
+        raise ValueError("Exactly 1 %s must be specified, out of: %s" % (description, ", ".join(allowed_keys)))
+    key = keys[0]
+    if key not in allowed_keys:
+        raise ValueError("%s isn't supported here. Expected one of: %s" % (key, ", ".join(allowed_keys)))
+    value = entry[key]
+    if len(value) != sizes[key]:
+        raise ValueError("%s must have %d values" % (key, sizes[key]))
+    return key, tuple(float(item) for item in value)
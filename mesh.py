@@ -0,0 +1,216 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Triangle meshes, and writing them to 3MF files.
+
+This is for parts whose meshes can be generated directly, without building BRep geometry in fusion and having fusion
+mesh it on export. See thread_mesh.
+
+This doesn't depend on fusion, so that it can be run outside of fusion.
+"""
+
+import io
+import zipfile
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+from xml.sax import saxutils
+
+import geometry
+
+Triangle = Tuple[int, int, int]
+
+_content_types = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '</Types>\n')
+
+_relationships = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/3D/3dmodel.model" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    '</Relationships>\n')
+
+_model_namespace = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
+
+
+class Mesh(object):
+    """A triangle mesh. The triangles are counter-clockwise when viewed from outside the mesh."""
+
+    def __init__(self):
+        self.vertices: List[Tuple[float, float, float]] = []
+        self.triangles: List[Triangle] = []
+
+    def add_vertex(self, point: Sequence[float]) -> int:
+        self.vertices.append((float(point[0]), float(point[1]), float(point[2])))
+        return len(self.vertices) - 1
+
+    def add_triangle(self, first: int, second: int, third: int):
+        self.triangles.append((first, second, third))
+
+    def add_quad(self, first: int, second: int, third: int, fourth: int):
+        """Adds a quad as 2 triangles. The vertices are in counter-clockwise order, as per add_triangle."""
+        self.triangles.append((first, second, third))
+        self.triangles.append((first, third, fourth))
+
+    def transform(self, matrix: Sequence[float]) -> "Mesh":
+        """Transforms the mesh in place by the given rigid transform."""
+        self.vertices = [tuple(vertex) for vertex in geometry.transform_points(matrix, self.vertices)]
+        return self
+
+    def bounds(self) -> Tuple[Sequence[float], Sequence[float]]:
+        return geometry.bounds(self.vertices)
+
+    def volume(self) -> float:
+        """Returns the volume enclosed by the mesh. This is only meaningful for a watertight mesh."""
+        volume = 0.0
+        for first, second, third in self.triangles:
+            volume += geometry.dot(
+                self.vertices[first], geometry.cross(self.vertices[second], self.vertices[third]))
+        return volume / 6
+
+    def is_watertight(self) -> bool:
+        """Returns whether every edge is shared by exactly two triangles, which traverse it in opposite directions.
+
+        i.e. whether the mesh is closed and consistently oriented.
+        """
+        edges = Counter()
+        for triangle in self.triangles:
+            for index in range(3):
+                edges[(triangle[index], triangle[(index + 1) % 3])] += 1
+        return all(count == 1 and edges.get((end, start)) == 1 for (start, end), count in edges.items())
+
+
+def _format(value: float) -> str:
+    # adding 0.0 avoids writing -0.0
+    return "%.6g" % (value + 0.0)
+
+
+def format_transform(matrix: Sequence[float]) -> str:
+    """Formats a 4x4 affine matrix as a 3MF transform attribute."""
+    # 3MF transforms are the first 3 rows of the matrix, in column-major order
+    return " ".join(_format(matrix[row * 4 + column]) for column in range(4) for row in range(3))
+
+
+def parse_transform(transform: Optional[str]) -> List[float]:
+    """Parses a 3MF transform attribute into a 4x4 affine matrix, as per geometry."""
+    if not transform:
+        return geometry.identity_matrix()
+    values = [float(value) for value in transform.split()]
+    matrix = geometry.identity_matrix()
+    for column in range(4):
+        for row in range(3):
+            matrix[row * 4 + column] = values[column * 3 + row]
+    return matrix
+
+
+class ModelWriter(object):
+    """Writes a 3MF file incrementally, so that the meshes in it never need to all be in memory at once.
+
+    The model is written directly into the zip file as it's generated. Objects must be written before the objects and
+    build items that refer to them, and all build items are written by close. The coordinates are in millimeters.
+
+    :param path: The path of the 3MF file to write.
+    """
+
+    def __init__(self, path: str):
+        self._archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        self._archive.writestr("[Content_Types].xml", _content_types)
+        self._archive.writestr("_rels/.rels", _relationships)
+        self._stream = self._archive.open("3D/3dmodel.model", "w")
+        self._model = io.TextIOWrapper(self._stream, encoding="utf-8")
+        self._model.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        self._model.write('<model unit="millimeter" xml:lang="en-US" xmlns="%s"><resources>\n' % _model_namespace)
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._closed:
+            return
+        if exc_type is None:
+            self.close(())
+        else:
+            self._model.detach()
+            self._stream.close()
+            self._archive.close()
+
+    def begin_mesh_object(self, object_id: int, name: Optional[str] = None):
+        """Starts an object with a mesh. Its vertices are written next, then begin_triangles, and its triangles."""
+        name_attribute = "" if name is None else " name=%s" % saxutils.quoteattr(name)
+        self._model.write('<object id="%d"%s type="model"><mesh><vertices>\n' % (object_id, name_attribute))
+
+    def vertex(self, x: float, y: float, z: float):
+        self._model.write('<vertex x="%s" y="%s" z="%s"/>\n' % (_format(x), _format(y), _format(z)))
+
+    def begin_triangles(self):
+        self._model.write('</vertices><triangles>\n')
+
+    def triangle(self, first: int, second: int, third: int):
+        self._model.write('<triangle v1="%d" v2="%d" v3="%d"/>\n' % (first, second, third))
+
+    def end_mesh_object(self):
+        self._model.write('</triangles></mesh></object>\n')
+
+    def mesh_object(self, object_id: int, name: Optional[str], mesh: Mesh):
+        self.begin_mesh_object(object_id, name)
+        for vertex in mesh.vertices:
+            self.vertex(*vertex)
+        self.begin_triangles()
+        for triangle in mesh.triangles:
+            self.triangle(*triangle)
+        self.end_mesh_object()
+
+    def components_object(self, object_id: int, components: Sequence[Tuple[int, Optional[Sequence[float]]]],
+                          name: Optional[str] = None):
+        """Writes an object made of other objects, each with an optional transform."""
+        name_attribute = "" if name is None else " name=%s" % saxutils.quoteattr(name)
+        self._model.write('<object id="%d"%s type="model"><components>\n' % (object_id, name_attribute))
+        for component_id, transform in components:
+            self._model.write('<component objectid="%d"%s/>\n' % (component_id, _transform_attribute(transform)))
+        self._model.write('</components></object>\n')
+
+    def close(self, build_items: Sequence[Tuple[int, Optional[Sequence[float]]]]):
+        """Writes the build items, i.e. the (object id, optional transform) of each object on the plate."""
+        self._model.write('</resources><build>\n')
+        for object_id, transform in build_items:
+            self._model.write('<item objectid="%d"%s/>\n' % (object_id, _transform_attribute(transform)))
+        self._model.write('</build></model>\n')
+        self._model.flush()
+        self._model.detach()
+        self._stream.close()
+        self._archive.close()
+        self._closed = True
+
+
+def _transform_attribute(transform: Optional[Sequence[float]]) -> str:
+    return "" if transform is None else ' transform="%s"' % format_transform(transform)
+
+
+def write_3mf(path: str, objects: Sequence[Tuple[str, Mesh]],
+              transforms: Optional[Sequence[Optional[Sequence[float]]]] = None):
+    """Writes the given meshes to a 3MF file, as separate objects. The coordinates are in millimeters.
+
+    :param path: The path of the 3MF file to write.
+    :param objects: The (name, mesh) of each object.
+    :param transforms: An optional transform to place each object with on the build plate, or None for no transform.
+    """
+    with ModelWriter(path) as writer:
+        for index, (name, mesh) in enumerate(objects):
+            writer.mesh_object(index + 1, name, mesh)
+        writer.close([(index + 1, transforms[index] if transforms else None) for index in range(len(objects))])
@@ -0,0 +1,139 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+An index of the names of the components in a component hierarchy, for fast repeated find_children-style lookups.
+
+Component.find_children walks the whole hierarchy below a component for every call, and the assembly builders make
+dozens of these calls for every cluster, often chained, e.g.
+base.find_children("side_attachment")[0].find_children("magnet_cutout")[0]. The index walks the hierarchy once, and
+then answers each lookup with a dictionary lookup and a binary search. A chained lookup can be done as a single path
+query, e.g. find(base, "side_attachment/magnet_cutout").
+
+The index is built the first time a component is queried, and is kept on the component for any later queries of it or
+of any component below it. This assumes that the names and children of the components in the hierarchy don't change
+after that, which is the case for the assemblies once they're built. Transforming the components doesn't affect the
+index.
+
+This doesn't depend on fusion, so that it can be tested outside of fusion.
+"""
+
+import bisect
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+_index_attribute = "_lalboard_name_index"
+
+
+class NameIndex(object):
+    """An index of all the components below a root component, by name.
+
+    The components are numbered in the same depth-first order that find_children returns them in, so the components
+    below any given component in the hierarchy are a contiguous range of that numbering.
+    """
+
+    def __init__(self, root):
+        self._root = root
+        self.root_id = id(root)
+        self._components: List[Any] = []
+        # The number of each component, keyed by its id
+        self._numbers: Dict[int, int] = {}
+        # The range of component numbers below each component, keyed by the id of the component
+        self._ranges: Dict[int, Tuple[int, int]] = {}
+        # The sorted component numbers of the components with each name
+        self._names: Dict[str, List[int]] = {}
+
+        # An explicit stack rather than recursion, since some of the hierarchies are fairly deep.
+        stack = [(root, iter(root.children()), 0)]
+        while stack:
+            component, children, start = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                self._ranges[id(component)] = (start, len(self._components))
+                continue
+            self._names.setdefault(child.name, []).append(len(self._components))
+            self._numbers[id(child)] = len(self._components)
+            self._components.append(child)
+            stack.append((child, iter(child.children()), len(self._components)))
+
+    def contains(self, component) -> bool:
+        """Returns whether the given component is the root of the index, or is somewhere below it."""
+        if component is self._root:
+            return True
+        number = self._numbers.get(id(component))
+        return number is not None and self._components[number] is component
+
+    def find(self, name: str, within=None, recursive: bool = True) -> Sequence[Any]:
+        """Returns the components with the given name, like within.find_children(name, recursive).
+
+        :param name: The name of the components to find.
+        :param within: The component to search below. Defaults to the root of the index.
+        :param recursive: If false, only the direct children of within are searched.
+        """
+        if within is None:
+            within = self._root
+        if not recursive:
+            return [child for child in within.children() if child.name == name]
+
+        start, end = self._ranges[id(within)]
+        numbers = self._names.get(name, [])
+        return [self._components[number] for number in
+                numbers[bisect.bisect_left(numbers, start):bisect.bisect_left(numbers, end)]]
+
+    def find_path(self, path: str, within=None, recursive: bool = True) -> Sequence[Any]:
+        """Returns the components matching the given path of names, e.g. "back_attachment/magnet_cutout".
+
+        This is the same as chaining find for each name in the path, for every match of the previous name.
+        """
+        matches = [self._root if within is None else within]
+        for name in path.split("/"):
+            matches = [match for parent in matches for match in self.find(name, parent, recursive)]
+        return matches
+
+
+def _valid_index(component) -> Optional[NameIndex]:
+    name_index = getattr(component, _index_attribute, None)
+    # A copy of an indexed component may carry over the attribute, along with an index of the original's hierarchy.
+    if name_index is None or name_index.root_id != id(component):
+        return None
+    return name_index
+
+
+def index(component) -> NameIndex:
+    """Returns a name index that covers the hierarchy below the given component, building it if needed.
+
+    If one of the component's ancestors has already been indexed, that index is reused, so that e.g. looking up
+    "magnet_cutout" within a "side_attachment" that was itself looked up in a thumb base doesn't walk the hierarchy
+    again.
+    """
+    ancestor = component
+    while ancestor is not None:
+        name_index = _valid_index(ancestor)
+        if name_index is not None and name_index.contains(component):
+            return name_index
+        ancestor = ancestor.parent
+
+    name_index = NameIndex(component)
+    setattr(component, _index_attribute, name_index)
+    return name_index
+
+
+def find(component, path: str, recursive: bool = True) -> Sequence[Any]:
+    """Finds the components below the given component that match the given path of names.
+
+    A single name is the same as component.find_children(name, recursive), and a path like
+    "front_attachment/magnet_cutout" is the same as chaining find_children for each name, for every match of the
+    previous name.
+    """
+    return index(component).find_path(path, component, recursive)
@@ -20,10 +20,21 @@ import shutil
 import tempfile
 import time
 import traceback
+from typing import List
 
 from fscad.fscad import *
 relative_import("../lalboard.py")
+relative_import("../export_manifest.py")
+relative_import("../export_scheduler.py")
+relative_import("../mesh.py")
+relative_import("../thread_geometry.py")
+relative_import("../thread_mesh.py")
+import export_manifest
+import export_scheduler
 import lalboard
+import mesh
+import thread_geometry
+import thread_mesh
 
 # List of the names of the parts to export. An empty list will export all parts.
 parts_to_export = []
@@ -32,70 +43,187 @@ export_assembly_f3ds = False
 
 export_assemblies_to_cloud = False
 
+# Whether to cache expensive components on disk between runs. See lalboard.memoize_component.
+use_component_cache = False
+
+# Whether to skip exporting parts whose inputs haven't changed since they were last exported. Parts listed in
+# parts_to_export are always exported.
+incremental_export = True
+
+# To split the export across several fusion instances, run this script in each instance with the same
+# export_shard_count and export_run_id, and a different export_shard_index. Each instance exports a share of the parts,
+# balanced by how long each part took to export the last time. Use a new export_run_id for each export, e.g. the time it
+# was started, and the same one when rerunning a shard that failed, so that it gets the same share of the parts.
+export_shard_index = 0
+export_shard_count = 1
+export_run_id = ""
+
+# Whether to profile the Lalboard methods and fscad operations used to build each part. The profile of each part is
+# written to stls/profiles, as a speedscope file (https://www.speedscope.app) and as a json call tree with call counts
+# and memo hits.
+profile_build = False
+
+# Whether to generate the meshes of the threaded screw support parts (screws, screw bases and the nut) directly, rather
+# than building their threads in fusion. See thread_mesh.
+mesh_screw_supports = False
+
 
 def run(_):
     try:
         start = time.time()
 
-        context = lalboard.Lalboard()
+        cache = None
+        if use_component_cache:
+            cache = lalboard.component_cache.ComponentCache()
+        context = lalboard.Lalboard(cache=cache)
 
         export_dir = pathlib.Path(
             pathlib.Path(os.path.dirname(__file__)).parent,
             "stls")
 
+        manifest = export_manifest.ExportManifest(str(pathlib.Path(export_dir, ".manifest.json")))
+        part_inputs = export_manifest.PartInputs(
+            lalboard.__file__,
+            options={
+                "export_assembly_f3ds": export_assembly_f3ds,
+                "export_assemblies_to_cloud": export_assemblies_to_cloud
+            },
+            fscad_hash=lalboard.component_cache.fscad_hash())
+
+        part_files = {}
+        part_modules = {}
+        jobs = []
         file: os.DirEntry
         for file in sorted(os.scandir(os.path.dirname(__file__)), key=lambda entry: entry.name):
             if file.is_dir():
-                if (file.name.startswith("_") or file.name == "__pycache__" or
-                        file.name == "scene" or file.name.endswith("pcb")):
+                if not export_scheduler.is_part_directory(file.name):
                     continue
 
-                export_sketch = False
-                export_assembly = False
-                if file.name.endswith("sketch"):
-                    export_sketch = True
-                if file.name.endswith("assembly"):
-                    export_assembly = True
-
                 if parts_to_export and file.name not in parts_to_export:
                     continue
 
-                path = pathlib.Path(file.path, file.name + ".py")
-
-                module = relative_import(str(path))
+                module = relative_import(str(_script_path(file)))
 
                 if hasattr(module, "EXPORT") and not module.EXPORT:
                     print("Skipping %s due to EXPORT=false" % file.name)
                     continue
 
-                print("Running " + file.name)
-                module.run(context)
-
-                if export_sketch:
-                    if len(root().sketches) != 1:
-                        raise Exception("Unexpected number of sketches in design")
-                    sketch: adsk.fusion.Sketch = root().sketches[0]
-                    sketch.saveAsDXF(str(pathlib.Path(export_dir, file.name + ".dxf")))
-                elif export_assembly:
-                    with tempfile.TemporaryDirectory() as temp_dir:
-                        f3d_file = export_f3d(temp_dir, file)
-                        if export_assemblies_to_cloud:
-                            export_to_fusion_cloud(file, f3d_file)
-                        if export_assembly_f3ds:
-                            shutil.copyfile(f3d_file,
-                                            str(pathlib.Path(export_dir, file.name + ".f3d")))
-                else:
-                    export_3mf(export_dir, file)
-
-                app().activeDocument.close(saveChanges=False)
+                part_files[file.name] = file
+                part_modules[file.name] = module
+                jobs.append(export_scheduler.ExportJob(file.name, manifest.seconds(file.name)))
+
+        # The shards are assigned before checking which parts are stale, so that every shard sees the same set of jobs
+        if export_shard_count > 1:
+            jobs = export_scheduler.shard_jobs(
+                jobs, export_shard_index, export_shard_count,
+                plan_path=str(pathlib.Path(export_dir, ".export_plan.json")), run_id=export_run_id)
+
+        inputs = {}
+        stale_jobs = []
+        for job in jobs:
+            inputs[job.name] = part_inputs.inputs(str(_script_path(part_files[job.name])))
+            if _is_meshed(job.name):
+                inputs[job.name]["mesh_modules"] = {
+                    os.path.basename(module.__file__): export_manifest.file_hash(module.__file__)
+                    for module in (mesh, thread_geometry, thread_mesh)}
+            if incremental_export and not parts_to_export and not manifest.is_stale(job.name, inputs[job.name]):
+                print("Skipping %s, since it hasn't changed" % job.name)
+                continue
+            stale_jobs.append(job)
+
+        def record_result(result: export_scheduler.ExportResult):
+            if result.succeeded:
+                manifest.update(result.name, inputs[result.name], result.outputs, result.seconds)
+                manifest.save()
+            else:
+                print("Failed to export %s:\n%s" % (result.name, result.error))
+
+        results = export_scheduler.run_in_process(
+            stale_jobs,
+            lambda name: export_part(context, part_files[name], part_modules[name], export_dir),
+            result_callback=record_result,
+            worker=export_shard_index)
 
         end = time.time()
+        print(export_scheduler.summary_table(results))
+        if cache:
+            print("Component cache: %s" % cache.stats)
         print("Total run time: %f" % (end-start))
+
+        failures = [result.name for result in results if not result.succeeded]
+        if failures:
+            ui().messageBox("Failed to export:\n{}".format("\n".join(failures)))
     except Exception:
         print(traceback.format_exc())
         ui().messageBox('Failed:\n{}'.format(traceback.format_exc()))
 
 
+def _script_path(file: os.DirEntry) -> pathlib.Path:
+    return pathlib.Path(file.path, file.name + ".py")
+
+
+def _is_meshed(part_name: str) -> bool:
+    return mesh_screw_supports and part_name in thread_mesh.screw_support_part_names()
+
+
+def export_part(context, file: os.DirEntry, module, export_dir) -> List[str]:
+    """Runs the given part script and exports the result.
+
+    :return: The names of the exported files, relative to export_dir.
+    """
+    if _is_meshed(file.name):
+        print("Generating the mesh of " + file.name)
+        return thread_mesh.export_screw_supports(str(export_dir), [file.name])
+
+    document_count = app().documents.count
+    try:
+        print("Running " + file.name)
+        if profile_build:
+            profile_part(context, file, module, export_dir)
+        else:
+            module.run(context)
+
+        outputs = []
+        if file.name.endswith("sketch"):
+            if len(root().sketches) != 1:
+                raise Exception("Unexpected number of sketches in design")
+            sketch: adsk.fusion.Sketch = root().sketches[0]
+            sketch.saveAsDXF(str(pathlib.Path(export_dir, file.name + ".dxf")))
+            outputs.append(file.name + ".dxf")
+        elif file.name.endswith("assembly"):
+            with tempfile.TemporaryDirectory() as temp_dir:
+                f3d_file = export_f3d(temp_dir, file)
+                if export_assemblies_to_cloud:
+                    export_to_fusion_cloud(file, f3d_file)
+                if export_assembly_f3ds:
+                    shutil.copyfile(f3d_file,
+                                    str(pathlib.Path(export_dir, file.name + ".f3d")))
+                    outputs.append(file.name + ".f3d")
+        else:
+            export_3mf(export_dir, file)
+            outputs.append(file.name + ".3mf")
+        return outputs
+    finally:
+        # Close the document the part was created in, even if it failed, so the next part starts from a clean slate.
+        while app().documents.count > document_count:
+            app().activeDocument.close(saveChanges=False)
+
+
+def profile_part(context, file: os.DirEntry, module, export_dir):
+    profiler = lalboard.build_profiler.BuildProfiler()
+    profiler.wrap_class(type(context))
+    profiler.wrap_namespace(vars(lalboard), lalboard.build_profiler.fscad_primitives)
+    profiler.wrap_namespace(vars(module), lalboard.build_profiler.fscad_primitives)
+    with profiler:
+        module.run(context)
+
+    profile_dir = pathlib.Path(export_dir, "profiles")
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    profiler.write_speedscope(str(pathlib.Path(profile_dir, file.name + ".speedscope.json")), file.name)
+    profiler.write_json(str(pathlib.Path(profile_dir, file.name + ".profile.json")))
+    print(profiler.summary())
+
+
 def export_stl(export_dir, file):
     options = design().exportManager.createSTLExportOptions(
         root(),
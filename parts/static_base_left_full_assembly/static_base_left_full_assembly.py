@@ -20,44 +20,22 @@ from fscad.fscad import *
 relative_import("../../lalboard.py")
 import lalboard
 
+# Check the parts of the assembly for interferences with each other, and print any that are found.
+check_interference = False
 
-def design(context: lalboard.Lalboard):
+# Create each of the repeated parts, e.g. the keys and cluster bodies, as occurrences of a single shared component.
+instancing = False
 
-    finger_clusters = []
-    finger_clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(116.53, 31.09, gap=-8.44)
-                .set_rotation_by_euler_angles(13.45, -.16, 1.46)
-                .resolve(None, left_hand=True),
-        add_clip=False))
-    finger_clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(121.40, 30.46)
-                .set_rotation_by_euler_angles(13.12, -2.05, 14.03)
-                .resolve(finger_clusters[-1], left_hand=True),
-        add_clip=False))
-    finger_clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(118.37, 27.73)
-                .set_rotation_by_euler_angles(12.75, -11.36, 21.95)
-                .resolve(finger_clusters[-1], left_hand=True),
-            add_clip=False))
-    finger_clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(102.03, 21.62)
-                .set_rotation_by_euler_angles(9.68, -12.95, 41.31)
-                .resolve(finger_clusters[-1], left_hand=True),
-            add_clip=False))
+# The level of detail of the clusters. "hull" or "box" build each part of a cluster as a single body proxy, which is
+# much faster when only looking at the overall assembly. The interference check is only meaningful at "full" detail.
+# See Lalboard.positioned_cluster_assembly.
+lod = "full"
 
-    thumb_cluster = context.positioned_thumb_assembly(
-        lalboard.AbsoluteThumbClusterPlacement(context)
-            .set_cartesian(47.98, 81.74, 35.11)
-            .set_rotation_by_euler_angles(9.19, -2.67, 14.28),
-        left_hand=True)
+
+def design(context: lalboard.Lalboard):
+    # The static supports are built from the cluster and thumb cluster bodies, so those are always kept at full detail.
+    finger_clusters, thumb_cluster = context.layout_clusters(
+        "static_base", left_hand=True, lod=lod, refine=["cluster", "thumb_cluster"])
 
     static_base = context.static_base(
         finger_clusters,
@@ -71,13 +49,21 @@ def design(context: lalboard.Lalboard):
         +central_pcb_spacer == +central_pcb,
         +central_pcb_spacer == -central_pcb)
 
-    Group([
+    if check_interference:
+        print(lalboard.interference.report(context.find_interferences(
+            [*finger_clusters, thumb_cluster, *static_base.children(), central_pcb_spacer])))
+
+    registry = lalboard.instancing.InstanceRegistry()
+    context.create_instanced_occurrence(Group([
         *finger_clusters,
         thumb_cluster,
         *static_base.children(),
         central_pcb,
-        central_pcb_spacer]).create_occurrence(scale=.1)
+        central_pcb_spacer]), scale=.1, registry=registry)
+    # Nothing is recorded unless the context was created with instancing=True
+    if registry.occurrence_count:
+        print(registry.summary())
 
 
 def run(context):
-    lalboard.run_design(design, context=context)
+    lalboard.run_design(design, context=context, instancing=instancing)
@@ -20,43 +20,22 @@ from fscad.fscad import *
 relative_import("../../lalboard.py")
 import lalboard
 
-def design(context: lalboard.Lalboard):
+# Check the parts of the assembly for interferences with each other, and print any that are found.
+check_interference = False
 
-    finger_clusters = []
-    finger_clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(116.70, 30.37, gap=-21.12)
-                .set_rotation_by_euler_angles(13.74, 3.31, -8.19)
-                .resolve(None, left_hand=False),
-            add_clip=False))
-    finger_clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(121.75, 31.49, gap=.36)
-                .set_rotation_by_euler_angles(10.65, 8.44, -17.92)
-                .resolve(finger_clusters[-1], left_hand=False),
-            add_clip=False))
-    finger_clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(115.28, 28.05)
-                .set_rotation_by_euler_angles(8.51, 6.45, -25.54)
-                .resolve(finger_clusters[-1], left_hand=False),
-            add_clip=False))
-    finger_clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(100.94, 21.66, gap=.33)
-                .set_rotation_by_euler_angles(10.65, 13.16, -37.05)
-                .resolve(finger_clusters[-1], left_hand=False),
-            add_clip=False))
+# Create each of the repeated parts, e.g. the keys and cluster bodies, as occurrences of a single shared component.
+instancing = False
+
+# The level of detail of the clusters. "hull" or "box" build each part of a cluster as a single body proxy, which is
+# much faster when only looking at the overall assembly. The interference check is only meaningful at "full" detail.
+# See Lalboard.positioned_cluster_assembly.
+lod = "full"
 
-    thumb_cluster = context.positioned_thumb_assembly(
-        lalboard.AbsoluteThumbClusterPlacement(context)
-            .set_cartesian(-50.35, 83.96, 36.26)
-            .set_rotation_by_euler_angles(10.39, -1.44, -7.77),
-        left_hand=False)
+
+def design(context: lalboard.Lalboard):
+    # The static supports are built from the cluster and thumb cluster bodies, so those are always kept at full detail.
+    finger_clusters, thumb_cluster = context.layout_clusters(
+        "static_base", left_hand=False, lod=lod, refine=["cluster", "thumb_cluster"])
 
     static_base = context.static_base(
         finger_clusters,
@@ -70,13 +49,21 @@ def design(context: lalboard.Lalboard):
         +central_pcb_spacer == +central_pcb,
         +central_pcb_spacer == -central_pcb)
 
-    Group([
+    if check_interference:
+        print(lalboard.interference.report(context.find_interferences(
+            [*finger_clusters, thumb_cluster, *static_base.children(), central_pcb_spacer])))
+
+    registry = lalboard.instancing.InstanceRegistry()
+    context.create_instanced_occurrence(Group([
         *finger_clusters,
         thumb_cluster,
         *static_base.children(),
         central_pcb,
-        central_pcb_spacer]).create_occurrence(scale=.1)
+        central_pcb_spacer]), scale=.1, registry=registry)
+    # Nothing is recorded unless the context was created with instancing=True
+    if registry.occurrence_count:
+        print(registry.summary())
 
 
 def run(context):
-    lalboard.run_design(design, context=context)
+    lalboard.run_design(design, context=context, instancing=instancing)
@@ -20,62 +20,46 @@ from fscad.fscad import *
 relative_import("../../lalboard.py")
 import lalboard
 
+# Check the parts of the assembly for interferences with each other, and print any that are found.
+check_interference = False
+
+# Create each of the repeated parts, e.g. the keys and cluster bodies, as occurrences of a single shared component.
+instancing = False
+
+# The level of detail of the clusters. "hull" or "box" build each part of a cluster as a single body proxy, which is
+# much faster when only looking at the overall assembly. The interference check is only meaningful at "full" detail.
+# See Lalboard.positioned_cluster_assembly.
+lod = "full"
+
 
 def design(context: lalboard.Lalboard):
     base = context.steel_base(left_hand=True)
     steel_sheet = base.find_children("steel_sheet", recursive=True)[0]
     handrest = base.find_children("left_handrest")[0]
 
-    # The coordinates below assume that the bottom of the clusters are even with the bottom of the handrest.
+    # The layout coordinates assume that the bottom of the clusters are even with the bottom of the handrest.
     # But the handrest of this base is slightly higher than the steel sheet, so this takes that into account
     z_delta = handrest.min().z - steel_sheet.max().z
     base.tz(z_delta)
 
-    clusters = []
-    clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(116.53, 31.09 + z_delta, gap=-8.44)
-                .set_rotation_by_support_lengths(20.09, 28.65, 28.70, rz=1.46)
-                #.set_rotation_by_euler_angles(13.45, -.16, 1.46)
-                .resolve(None, left_hand=True)))
-    clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(121.40, 30.46 + z_delta)
-                .set_rotation_by_support_lengths(19.55, 27.60, 28.24, rz=14.03)
-                #.set_rotation_by_euler_angles(13.12, -2.05, 14.03)
-                .resolve(clusters[-1], left_hand=True)))
-    clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(118.37, 27.73 + z_delta)
-                .set_rotation_by_support_lengths(17.01, 23.39, 26.92, rz=21.95)
-                #.set_rotation_by_euler_angles(12.75, -11.36, 21.95)
-                .resolve(clusters[-1], left_hand=True)))
-    clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(102.03, 21.62 + z_delta)
-                .set_rotation_by_support_lengths(15.07, 15.89, 19.90, rz=41.31, add_clip=True, tall_front_clip=False)
-                #.set_rotation_by_euler_angles(9.68, -12.95, 41.31)
-                .resolve(clusters[-1], left_hand=True),
-            add_clip=True,
-            tall_clip=False))
-    clusters.append(context.positioned_thumb_assembly(
-        lalboard.AbsoluteThumbClusterPlacement(context)
-            .set_cartesian(47.98, 81.74, 35.11 + z_delta)
-            .set_rotation_by_support_lengths(23.46, 27.41, 30.33, rz=14.28, left_hand=True),
-            #.set_rotation_by_euler_angles(9.19, -2.67, 14.28),
-        left_hand=True))
+    finger_clusters, thumb_cluster = context.layout_clusters("steel_base", left_hand=True, z_offset=z_delta, lod=lod)
+    clusters = [*finger_clusters, thumb_cluster]
 
     standoffs = []
     for cluster in clusters[0:4]:
         standoffs.append(context.add_standoffs(cluster))
     standoffs.append(context.add_thumb_standoffs(clusters[4]))
 
-    Group([*clusters, *standoffs, *base.children()]).tz(-z_delta).create_occurrence(scale=.1)
+    if check_interference:
+        print(lalboard.interference.report(context.find_interferences([*clusters, *standoffs, *base.children()])))
+
+    registry = lalboard.instancing.InstanceRegistry()
+    context.create_instanced_occurrence(
+        Group([*clusters, *standoffs, *base.children()]).tz(-z_delta), scale=.1, registry=registry)
+    # Nothing is recorded unless the context was created with instancing=True
+    if registry.occurrence_count:
+        print(registry.summary())
 
 
 def run(context):
-    lalboard.run_design(design, context=context)
+    lalboard.run_design(design, context=context, instancing=instancing)
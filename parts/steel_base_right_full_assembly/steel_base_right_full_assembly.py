@@ -19,63 +19,46 @@ from fscad.fscad import *
 relative_import("../../lalboard.py")
 import lalboard
 
+# Check the parts of the assembly for interferences with each other, and print any that are found.
+check_interference = False
+
+# Create each of the repeated parts, e.g. the keys and cluster bodies, as occurrences of a single shared component.
+instancing = False
+
+# The level of detail of the clusters. "hull" or "box" build each part of a cluster as a single body proxy, which is
+# much faster when only looking at the overall assembly. The interference check is only meaningful at "full" detail.
+# See Lalboard.positioned_cluster_assembly.
+lod = "full"
+
 
 def design(context: lalboard.Lalboard):
     base = context.steel_base(left_hand=False)
     steel_sheet = base.find_children("steel_sheet", recursive=True)[0]
     handrest = base.find_children("right_handrest")[0]
 
-    # The coordinates below assume that the bottom of the clusters are even with the bottom of the handrest.
+    # The layout coordinates assume that the bottom of the clusters are even with the bottom of the handrest.
     # But the handrest of this base is slightly higher than the steel sheet, so this takes that into account
     z_delta = handrest.min().z - steel_sheet.max().z
     base.tz(z_delta)
 
-    clusters = []
-    clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(116.70, 30.37 + z_delta, gap=-21.12)
-                .set_rotation_by_support_lengths(19.33, 28.60, 27.57, rz=-8.19)
-                #.set_rotation_by_euler_angles(13.74, 3.31, -8.19)
-                .resolve(None, left_hand=False)))
-    clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(121.75, 31.49 + z_delta)
-                .set_rotation_by_support_lengths(21.29, 29.35, 26.72, rz=-17.92)
-                #.set_rotation_by_euler_angles(10.65, 8.44, -17.92)
-                .resolve(clusters[-1], left_hand=False)))
-    clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(115.28, 28.05 + z_delta)
-                .set_rotation_by_support_lengths(18.31, 24.74, 22.73, rz=-25.54)
-                #.set_rotation_by_euler_angles(8.51, 6.45, -25.54)
-                .resolve(clusters[-1], left_hand=False)))
-    clusters.append(
-        context.positioned_cluster_assembly(
-            lalboard.RelativeFingerClusterPlacement(context)
-                .set_cylindrical(100.94, 21.66 + z_delta)
-                .set_rotation_by_support_lengths(14.74, 20.35, 16.28, rz=-37.05, add_clip=True, tall_front_clip=False)
-                #.set_rotation_by_euler_angles(10.65, 13.16, -37.05)
-                .resolve(clusters[-1], left_hand=False),
-            add_clip=True,
-            tall_clip=False))
-    clusters.append(
-        context.positioned_thumb_assembly(
-            lalboard.AbsoluteThumbClusterPlacement(context)
-                .set_cartesian(-50.35, 83.96, 36.26 + z_delta)
-                .set_rotation_by_support_lengths(24.60, 27.24, 31.63, rz=-7.77),
-                #.set_rotation_by_euler_angles(10.39, -1.44, -7.77),
-            left_hand=False))
+    finger_clusters, thumb_cluster = context.layout_clusters("steel_base", left_hand=False, z_offset=z_delta, lod=lod)
+    clusters = [*finger_clusters, thumb_cluster]
 
     standoffs = []
     for cluster in clusters[0:4]:
         standoffs.append(context.add_standoffs(cluster))
     standoffs.append(context.add_thumb_standoffs(clusters[4]))
 
-    Group([*clusters, *standoffs, *base.children()]).tz(-z_delta).create_occurrence(scale=.1)
+    if check_interference:
+        print(lalboard.interference.report(context.find_interferences([*clusters, *standoffs, *base.children()])))
+
+    registry = lalboard.instancing.InstanceRegistry()
+    context.create_instanced_occurrence(
+        Group([*clusters, *standoffs, *base.children()]).tz(-z_delta), scale=.1, registry=registry)
+    # Nothing is recorded unless the context was created with instancing=True
+    if registry.occurrence_count:
+        print(registry.summary())
 
 
 def run(context):
-    lalboard.run_design(design, context=context)
+    lalboard.run_design(design, context=context, instancing=instancing)
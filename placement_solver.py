@@ -0,0 +1,326 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Headless solvers for the relative placement of clusters.
+
+These work on point clouds sampled from the surfaces of the cluster geometry, instead of on the BRep bodies directly,
+so they don't need fusion at all. The clouds only need to be sampled once per design, after which the placement can be
+re-solved as many times as needed without any further BRep work.
+
+Since the solvers only look at sampled points, the result is only as accurate as the sample spacing. Callers that
+need an exact contact can use the result as a starting point for an exact refinement.
+"""
+
+import math
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import geometry
+
+Point = Tuple[float, float, float]
+
+
+def sample_mesh(node_coordinates: Sequence[float], node_indices: Sequence[int], spacing: float) -> List[Point]:
+    """Samples points over the surface of a triangle mesh.
+
+    The points are laid out in a grid over each triangle, such that no point on the surface of the mesh is further than
+    roughly `spacing` from a sampled point.
+
+    :param node_coordinates: The flattened coordinates of the nodes of the mesh, as per TriangleMesh.
+    nodeCoordinatesAsDouble
+    :param node_indices: The flattened node indices of the triangles, as per TriangleMesh.nodeIndices
+    :param spacing: The maximum distance between samples.
+    :return: A list of the sampled points
+    """
+    nodes = [(node_coordinates[i], node_coordinates[i + 1], node_coordinates[i + 2])
+             for i in range(0, len(node_coordinates), 3)]
+
+    seen = set()
+    result = []
+
+    def add_point(point):
+        key = (round(point[0] / spacing * 4), round(point[1] / spacing * 4), round(point[2] / spacing * 4))
+        if key not in seen:
+            seen.add(key)
+            result.append(point)
+
+    for i in range(0, len(node_indices), 3):
+        a = nodes[node_indices[i]]
+        b = nodes[node_indices[i + 1]]
+        c = nodes[node_indices[i + 2]]
+
+        ab = geometry.subtract(b, a)
+        ac = geometry.subtract(c, a)
+        longest_edge = max(geometry.length(ab), geometry.length(ac), geometry.length(geometry.subtract(c, b)))
+        divisions = max(1, math.ceil(longest_edge / spacing))
+
+        for i_step in range(divisions + 1):
+            u = i_step / divisions
+            for j_step in range(divisions + 1 - i_step):
+                v = j_step / divisions
+                add_point((a[0] + ab[0] * u + ac[0] * v,
+                           a[1] + ab[1] * u + ac[1] * v,
+                           a[2] + ab[2] * u + ac[2] * v))
+    return result
+
+
+class PointCloud(object):
+    """A static set of points, that supports fast minimum distance queries via a kd-tree.
+
+    Each node of the tree is a tuple of (min, max, left, right, points), where min and max are the corners of the
+    bounding box of the node's points. Leaf nodes have a list of points and no children, while internal nodes have 2
+    children and no points.
+    """
+
+    _leaf_size = 8
+
+    def __init__(self, points: Iterable[Sequence[float]]):
+        self._points = [(point[0], point[1], point[2]) for point in points]
+        if not self._points:
+            raise ValueError("A point cloud must contain at least 1 point")
+        self._root = self._build(self._points)
+
+    @property
+    def points(self) -> Sequence[Point]:
+        return self._points
+
+    @property
+    def bounds(self) -> Tuple[Point, Point]:
+        return self._root[0], self._root[1]
+
+    def _build(self, points: List[Point]):
+        min_point, max_point = geometry.bounds(points)
+        if len(points) <= self._leaf_size:
+            return min_point, max_point, None, None, points
+
+        extents = geometry.subtract(max_point, min_point)
+        axis = extents.index(max(extents))
+
+        points = sorted(points, key=lambda point: point[axis])
+        middle = len(points) // 2
+        return min_point, max_point, self._build(points[:middle]), self._build(points[middle:]), None
+
+    @staticmethod
+    def _box_distance_squared(min1, max1, min2, max2) -> float:
+        distance = 0.0
+        for axis in range(3):
+            if max1[axis] < min2[axis]:
+                delta = min2[axis] - max1[axis]
+            elif max2[axis] < min1[axis]:
+                delta = min1[axis] - max2[axis]
+            else:
+                continue
+            distance += delta * delta
+        return distance
+
+    def nearest_distance(self, point: Sequence[float], max_distance: float = math.inf) -> float:
+        """Returns the distance from the given point to the nearest point in this cloud.
+
+        :param point: The point to query.
+        :param max_distance: An upper bound on the distance. If no point in the cloud is closer than this, max_distance
+        is returned.
+        """
+        point = (point[0], point[1], point[2])
+        best = max_distance * max_distance
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if self._box_distance_squared(node[0], node[1], point, point) >= best:
+                continue
+            if node[4] is not None:
+                px, py, pz = point
+                for x, y, z in node[4]:
+                    dx = x - px
+                    dy = y - py
+                    dz = z - pz
+                    distance = dx * dx + dy * dy + dz * dz
+                    if distance < best:
+                        best = distance
+            else:
+                stack.append(node[3])
+                stack.append(node[2])
+        return math.sqrt(best)
+
+    def min_distance(self, other: "PointCloud", offset: Sequence[float] = (0, 0, 0)) -> float:
+        """Returns the minimum distance between this cloud and another cloud.
+
+        This traverses both trees at once, so that whole pairs of nodes can be skipped when their bounding boxes are
+        further apart than the best distance found so far.
+
+        :param other: The other point cloud.
+        :param offset: An offset that is added to each of the points in the other cloud before measuring.
+        """
+        ox, oy, oz = offset
+
+        def offset_bounds(node):
+            return ((node[0][0] + ox, node[0][1] + oy, node[0][2] + oz),
+                    (node[1][0] + ox, node[1][1] + oy, node[1][2] + oz))
+
+        best = math.inf
+        stack = [(self._root, other._root, offset_bounds(other._root))]
+        while stack:
+            node, other_node, (other_min, other_max) = stack.pop()
+            if self._box_distance_squared(node[0], node[1], other_min, other_max) >= best:
+                continue
+
+            if node[4] is not None and other_node[4] is not None:
+                for x, y, z in other_node[4]:
+                    x += ox
+                    y += oy
+                    z += oz
+                    for fixed_x, fixed_y, fixed_z in node[4]:
+                        dx = fixed_x - x
+                        dy = fixed_y - y
+                        dz = fixed_z - z
+                        distance = dx * dx + dy * dy + dz * dz
+                        if distance < best:
+                            best = distance
+                continue
+
+            # split whichever node is larger, and visit the closer pair of the resulting children first
+            if other_node[4] is not None or (
+                    node[4] is None and
+                    max(geometry.subtract(node[1], node[0])) >= max(geometry.subtract(other_max, other_min))):
+                pairs = [(child, other_node, (other_min, other_max)) for child in (node[2], node[3])]
+            else:
+                pairs = [(node, child, offset_bounds(child)) for child in (other_node[2], other_node[3])]
+            pairs.sort(key=lambda pair: self._box_distance_squared(pair[0][0], pair[0][1], *pair[2]), reverse=True)
+            stack.extend(pairs)
+        return math.sqrt(best)
+
+
+def solve_cylindrical_theta(
+        moving: PointCloud,
+        fixed: PointCloud,
+        radius: float,
+        z: float,
+        start_theta: float,
+        away_direction: float,
+        clearance: float = 0.0,
+        tolerance: float = .01,
+        max_travel: float = 180.0,
+        max_iterations: int = 200) -> float:
+    """Finds the cylindrical theta at which the moving points come into contact with the fixed point cloud.
+
+    The moving points are translated so that their reference point (the origin of their coordinate system) travels
+    along a circle around the z axis at the given radius and height. The points are only translated, not rotated. This
+    matches how RelativeFingerClusterPlacement positions a cluster relative to the previous one.
+
+    The moving points are first moved away from the fixed cloud in steps of 5 degrees, until their bounding boxes no
+    longer overlap. They're then moved back towards the fixed cloud by conservative advancement. Every point moves by
+    at most radius * delta_theta for a given change in theta, so moving by (distance / radius) radians can never
+    overshoot the contact position.
+
+    :param moving: The points of the cluster being placed, relative to its reference point.
+    :param fixed: The points of the cluster being placed against.
+    :param radius: The radius of the circle the reference point travels along.
+    :param z: The height of the circle the reference point travels along.
+    :param start_theta: The theta (in degrees) to start the search from. This would typically be the theta of the
+    center of the fixed cluster.
+    :param away_direction: Either 1 or -1, the direction of change in theta that moves the points away from the fixed
+    cloud.
+    :param clearance: The distance to leave between the 2 sets of points.
+    :param tolerance: The solution is accepted once the distance is within this much of the clearance.
+    :param max_travel: The maximum change in theta (in degrees) to search through, in either direction.
+    :param max_iterations: The maximum number of conservative advancement steps to take.
+    :return: The theta (in degrees) of the reference point, at the contact position.
+    """
+    if radius <= 0:
+        raise ValueError("The radius must be positive")
+
+    away_direction = math.copysign(1, away_direction)
+    moving_bounds = moving.bounds
+
+    def offset(theta):
+        return geometry.cylindrical_to_cartesian(radius, theta, z)
+
+    def offset_bounds(theta):
+        vector = offset(theta)
+        return geometry.add(moving_bounds[0], vector), geometry.add(moving_bounds[1], vector)
+
+    theta = start_theta
+    while geometry.bounds_intersect(offset_bounds(theta), fixed.bounds):
+        theta += away_direction * 5
+        if abs(theta - start_theta) > max_travel:
+            raise ValueError("Couldn't find a non-overlapping starting position")
+
+    escape_theta = theta
+    for _ in range(max_iterations):
+        distance = fixed.min_distance(moving, offset(theta))
+        remaining = distance - clearance
+        if remaining <= tolerance:
+            return theta
+        theta -= away_direction * math.degrees(remaining / radius)
+        if abs(theta - escape_theta) > max_travel:
+            raise ValueError("The moving points never come into contact with the fixed points")
+    raise ValueError("Failed to converge on a contact position after %d iterations" % max_iterations)
+
+
+def solve_translation(
+        moving: PointCloud,
+        fixed: PointCloud,
+        start: Sequence[float],
+        direction: Sequence[float],
+        clearance: float = 0.0,
+        tolerance: float = .01,
+        max_travel: float = 1000.0,
+        max_iterations: int = 200) -> float:
+    """Finds how far the moving points can travel in a straight line before coming into contact with the fixed points.
+
+    The moving points are translated so that their reference point (the origin of their coordinate system) starts at
+    the given start position and travels along the given direction. This matches how Component.align_to moves a
+    component, e.g. when RelativeThumbClusterPlacement positions a thumb cluster against the handrest.
+
+    This uses conservative advancement, like solve_cylindrical_theta. Since every point moves exactly as far as the
+    reference point, moving by the current distance between the 2 sets of points can never overshoot the contact
+    position.
+
+    :param moving: The points being moved, relative to their reference point.
+    :param fixed: The points being moved towards.
+    :param start: The starting position of the reference point. The moving points should not already overlap the
+    fixed points at this position.
+    :param direction: The direction to move in.
+    :param clearance: The distance to leave between the 2 sets of points.
+    :param tolerance: The solution is accepted once the distance is within this much of the clearance.
+    :param max_travel: The maximum distance to move before giving up.
+    :param max_iterations: The maximum number of conservative advancement steps to take.
+    :return: The distance travelled along the direction, at the contact position.
+    """
+    direction = geometry.normalize(direction)
+
+    travel = 0.0
+    for _ in range(max_iterations):
+        distance = fixed.min_distance(moving, geometry.add(start, geometry.scale(direction, travel)))
+        remaining = distance - clearance
+        if remaining <= tolerance:
+            return travel
+        travel += remaining
+        if travel > max_travel:
+            raise ValueError("The moving points never come into contact with the fixed points")
+    raise ValueError("Failed to converge on a contact position after %d iterations" % max_iterations)
+
+
+def transformed_cloud_points(
+        points: Sequence[Sequence[float]], matrix: Optional[Sequence[float]] = None,
+        reference_point: Sequence[float] = (0, 0, 0)) -> List[Point]:
+    """Transforms a set of points by a matrix, and then makes them relative to the transformed reference point.
+
+    :param points: The points to transform.
+    :param matrix: A row-major 4x4 matrix, as per Matrix3D.asArray()
+    :param reference_point: The untransformed reference point.
+    """
+    if matrix is not None:
+        points = geometry.transform_points(matrix, points)
+        reference_point = geometry.transform_point(matrix, reference_point)
+    return geometry.translate_points(points, geometry.scale(reference_point, -1))
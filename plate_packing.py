@@ -0,0 +1,456 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Packs the printed parts of a keyboard kit onto print beds, and writes each bed as a multi-object 3MF plate.
+
+The kit config (see configs/kit.json) gives the size of the bed, and how many of each part a kit needs, grouped by the
+material they're printed in. Each part is read from the 3MF file that export_parts wrote for it, so the parts are
+expected to already be in their printing orientation. The footprint of each part is the convex hull of its vertices
+projected onto the bed, which is then rotated about z to fit the smallest rectangle. The rectangles are packed with the
+MaxRects algorithm, using the best short side fit heuristic and allowing 90 degree rotations, starting a new plate
+whenever the current ones are full.
+
+The 3MF files are only ever streamed, vertex by vertex, and never fully loaded into memory. Each part is written once
+per plate, and each copy of it is a build item that refers to it, with its own transform.
+
+Run this module directly to pack the plates for a kit:
+    python plate_packing.py [kit_config] [export_dir]
+The plates are written to a "plates" directory within export_dir.
+
+This doesn't depend on fusion, so that it can be run outside of fusion.
+"""
+
+import json
+import math
+import os
+import sys
+import zipfile
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
+
+import geometry
+import mesh
+
+Point2D = Tuple[float, float]
+Rect = Tuple[float, float, float, float]
+
+# The size of a unit of each of the 3MF units, in millimeters
+_units = {"micron": .001, "millimeter": 1.0, "centimeter": 10.0, "inch": 25.4, "foot": 304.8, "meter": 1000.0}
+
+# The number of projected vertices to collect before reducing them to their convex hull
+_hull_batch_size = 10000
+
+_default_model_path = "3D/3dmodel.model"
+
+
+def convex_hull(points: Sequence[Point2D]) -> List[Point2D]:
+    """Returns the convex hull of the given points, in counter-clockwise order."""
+    points = sorted(set(points))
+    if len(points) <= 2:
+        return points
+
+    def half_hull(ordered_points):
+        hull = []
+        for point in ordered_points:
+            while len(hull) >= 2 and (
+                    (hull[-1][0] - hull[-2][0]) * (point[1] - hull[-2][1]) -
+                    (hull[-1][1] - hull[-2][1]) * (point[0] - hull[-2][0])) <= 0:
+                hull.pop()
+            hull.append(point)
+        return hull
+
+    lower = half_hull(points)
+    upper = half_hull(reversed(points))
+    return lower[:-1] + upper[:-1]
+
+
+def rotated_bounds(points: Sequence[Point2D], angle: float) -> Tuple[Point2D, Point2D]:
+    """Returns the bounds of the given points, once they've been rotated about the origin by angle, in radians."""
+    cos = math.cos(angle)
+    sin = math.sin(angle)
+    xs = [x * cos - y * sin for x, y in points]
+    ys = [x * sin + y * cos for x, y in points]
+    return (min(xs), min(ys)), (max(xs), max(ys))
+
+
+def min_area_rotation(hull: Sequence[Point2D]) -> float:
+    """Returns the rotation of the given convex hull that has the smallest bounding rectangle.
+
+    The smallest rectangle always has a side that's parallel to one of the edges of the hull, so only those rotations
+    need to be checked.
+    """
+    best_angle = 0.0
+    best_area = None
+    for start, end in zip(hull, hull[1:] + hull[:1]):
+        angle = -math.atan2(end[1] - start[1], end[0] - start[0])
+        bounds_min, bounds_max = rotated_bounds(hull, angle)
+        area = (bounds_max[0] - bounds_min[0]) * (bounds_max[1] - bounds_min[1])
+        if best_area is None or area < best_area - 1e-9:
+            best_angle = angle
+            best_area = area
+    return best_angle
+
+
+class Bed(object):
+    """The printable area of a print bed.
+
+    :param width: The size of the bed along x, in millimeters.
+    :param depth: The size of the bed along y, in millimeters.
+    :param spacing: The minimum distance between parts.
+    :param margin: The minimum distance between the parts and the edges of the bed.
+    """
+
+    def __init__(self, width: float, depth: float, spacing: float = 3.0, margin: float = 5.0):
+        self.width = width
+        self.depth = depth
+        self.spacing = spacing
+        self.margin = margin
+
+
+class Footprint(object):
+    """The outline of a part on the bed.
+
+    :param hull: The convex hull of the part's vertices, projected onto the bed.
+    :param min_z: The lowest z coordinate of the part's vertices.
+    """
+
+    def __init__(self, hull: Sequence[Point2D], min_z: float):
+        self.hull = list(hull)
+        self.min_z = min_z
+        self.angle = min_area_rotation(self.hull)
+        bounds_min, bounds_max = rotated_bounds(self.hull, self.angle)
+        self.width = bounds_max[0] - bounds_min[0]
+        self.depth = bounds_max[1] - bounds_min[1]
+
+    def transform(self, x: float, y: float, rotated: bool = False) -> List[float]:
+        """Returns the transform that places the part's footprint with its minimum corner at (x, y), on the bed.
+
+        :param rotated: If true, the part is rotated by another 90 degrees, swapping the width and depth.
+        """
+        angle = self.angle + (math.pi / 2 if rotated else 0)
+        bounds_min, _ = rotated_bounds(self.hull, angle)
+        return geometry.multiply(
+            geometry.translation_matrix((x - bounds_min[0], y - bounds_min[1], -self.min_z)),
+            geometry.rotation_matrix(angle, (0, 0, 1)))
+
+
+def _local_name(element: ElementTree.Element) -> str:
+    return element.tag.rsplit("}", 1)[-1]
+
+
+def _model_path(archive: zipfile.ZipFile) -> str:
+    try:
+        relationships = ElementTree.fromstring(archive.read("_rels/.rels"))
+    except KeyError:
+        return _default_model_path
+    for relationship in relationships:
+        if relationship.get("Type", "").endswith("/3dmodel"):
+            return relationship.get("Target").lstrip("/")
+    return _default_model_path
+
+
+def _iterparse(path: str) -> Iterator[Tuple[str, ElementTree.Element]]:
+    """Streams the start and end events of the model in the given 3MF file.
+
+    Vertices and triangles are removed from the tree once their end event has been handled, so that the tree never
+    holds more than a single vertex or triangle.
+    """
+    with zipfile.ZipFile(path) as archive:
+        with archive.open(_model_path(archive)) as stream:
+            parents = []
+            for event, element in ElementTree.iterparse(stream, events=("start", "end")):
+                if event == "start":
+                    parents.append(element)
+                    yield event, element
+                else:
+                    parents.pop()
+                    yield event, element
+                    if _local_name(element) in ("vertex", "triangle") and parents:
+                        parents[-1].remove(element)
+
+
+class PartModel(object):
+    """The structure and footprint of a part, as read from the 3MF file exported for it.
+
+    :param name: The name of the part.
+    :param path: The path of the part's 3MF file.
+    """
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.scale = 1.0
+        # The ids of the objects that have meshes, in the order they're defined
+        self.mesh_objects: List[str] = []
+        # The (object id, transform) of the components of each object that's made of other objects
+        self.components: Dict[str, List[Tuple[str, List[float]]]] = {}
+        # The (object id, transform) of each build item, with the transforms scaled to millimeters
+        self.build_items: List[Tuple[str, List[float]]] = []
+
+        self._read_structure()
+        self.footprint = self._read_footprint()
+
+    def _read_structure(self):
+        object_id = None
+        for event, element in _iterparse(self.path):
+            name = _local_name(element)
+            if event == "start":
+                if name == "model":
+                    self.scale = _units[element.get("unit", "millimeter")]
+                elif name == "object":
+                    object_id = element.get("id")
+                elif name == "mesh":
+                    self.mesh_objects.append(object_id)
+            elif name == "component":
+                self.components.setdefault(object_id, []).append(
+                    (element.get("objectid"), mesh.parse_transform(element.get("transform"))))
+            elif name == "item":
+                scale = geometry.identity_matrix()
+                scale[0] = scale[5] = scale[10] = self.scale
+                self.build_items.append(
+                    (element.get("objectid"),
+                     geometry.multiply(scale, mesh.parse_transform(element.get("transform")))))
+
+    def mesh_transforms(self) -> Dict[str, List[List[float]]]:
+        """Returns the transforms from each mesh object to the bed, one for each time it's used in the build."""
+        transforms: Dict[str, List[List[float]]] = {}
+
+        def add(object_id, transform):
+            if object_id in self.components:
+                for component_id, component_transform in self.components[object_id]:
+                    add(component_id, geometry.multiply(transform, component_transform))
+            else:
+                transforms.setdefault(object_id, []).append(transform)
+
+        for object_id, transform in self.build_items:
+            add(object_id, transform)
+        return transforms
+
+    def _read_footprint(self) -> Footprint:
+        transforms = self.mesh_transforms()
+        hull: List[Point2D] = []
+        points: List[Point2D] = []
+        min_z = None
+        object_transforms = ()
+        for event, element in _iterparse(self.path):
+            name = _local_name(element)
+            if event == "start" and name == "object":
+                object_transforms = transforms.get(element.get("id"), ())
+            elif event == "end" and name == "vertex":
+                vertex = (float(element.get("x")), float(element.get("y")), float(element.get("z")))
+                for transform in object_transforms:
+                    x, y, z = geometry.transform_point(transform, vertex)
+                    points.append((x, y))
+                    min_z = z if min_z is None else min(min_z, z)
+                if len(points) >= _hull_batch_size:
+                    hull = convex_hull(hull + points)
+                    points = []
+        hull = convex_hull(hull + points)
+        if min_z is None:
+            raise ValueError("%s has no vertices" % self.path)
+        return Footprint(hull, min_z)
+
+    def write_objects(self, writer: mesh.ModelWriter, first_id: int) -> Tuple[int, int]:
+        """Copies the objects of this part into the given plate, and adds an object for the whole part.
+
+        :param writer: The plate being written.
+        :param first_id: The first object id to use in the plate.
+        :return: A tuple of (the object id for the whole part, the next unused object id).
+        """
+        ids = {}
+        next_id = first_id
+        for object_id in self.mesh_objects + list(self.components):
+            ids[object_id] = next_id
+            next_id += 1
+
+        object_id = None
+        for event, element in _iterparse(self.path):
+            name = _local_name(element)
+            if event == "start":
+                if name == "object":
+                    object_id = element.get("id")
+                elif name == "mesh":
+                    writer.begin_mesh_object(ids[object_id])
+                elif name == "triangles":
+                    writer.begin_triangles()
+            elif name == "vertex":
+                writer.vertex(float(element.get("x")), float(element.get("y")), float(element.get("z")))
+            elif name == "triangle":
+                writer.triangle(int(element.get("v1")), int(element.get("v2")), int(element.get("v3")))
+            elif name == "mesh":
+                writer.end_mesh_object()
+
+        # Objects can only refer to objects defined before them, and the mesh objects have all been written by now.
+        for object_id, components in self.components.items():
+            writer.components_object(
+                ids[object_id], [(ids[component_id], transform) for component_id, transform in components])
+
+        part_id = next_id
+        writer.components_object(
+            part_id, [(ids[object_id], transform) for object_id, transform in self.build_items], name=self.name)
+        return part_id, next_id + 1
+
+
+class _MaxRectsBin(object):
+    """A single plate, tracking the maximal rectangles of free space that remain."""
+
+    def __init__(self, width: float, depth: float):
+        self._free: List[Rect] = [(0.0, 0.0, width, depth)]
+
+    def find(self, width: float, depth: float) -> Optional[Tuple[Tuple[float, float], float, float, bool]]:
+        """Returns the best (score, x, y, rotated) position for a rectangle, or None if it doesn't fit."""
+        best = None
+        for free_x, free_y, free_width, free_depth in self._free:
+            for rect_width, rect_depth, rotated in ((width, depth, False), (depth, width, True)):
+                if rect_width > free_width or rect_depth > free_depth:
+                    continue
+                leftover_x = free_width - rect_width
+                leftover_y = free_depth - rect_depth
+                score = (min(leftover_x, leftover_y), max(leftover_x, leftover_y))
+                if best is None or score < best[0]:
+                    best = (score, free_x, free_y, rotated)
+        return best
+
+    def place(self, x: float, y: float, width: float, depth: float):
+        free = []
+        for rect in self._free:
+            free_x, free_y, free_width, free_depth = rect
+            if (x >= free_x + free_width or x + width <= free_x or
+                    y >= free_y + free_depth or y + depth <= free_y):
+                free.append(rect)
+                continue
+            if x > free_x:
+                free.append((free_x, free_y, x - free_x, free_depth))
+            if x + width < free_x + free_width:
+                free.append((x + width, free_y, free_x + free_width - x - width, free_depth))
+            if y > free_y:
+                free.append((free_x, free_y, free_width, y - free_y))
+            if y + depth < free_y + free_depth:
+                free.append((free_x, y + depth, free_width, free_y + free_depth - y - depth))
+
+        def contains(outer: Rect, inner: Rect) -> bool:
+            return (outer[0] <= inner[0] and outer[1] <= inner[1] and
+                    outer[0] + outer[2] >= inner[0] + inner[2] and outer[1] + outer[3] >= inner[1] + inner[3])
+
+        self._free = [rect for index, rect in enumerate(free)
+                      if not any(contains(other, rect) and (other != rect or other_index < index)
+                                 for other_index, other in enumerate(free) if other_index != index)]
+
+
+class Plate(object):
+    """The parts placed on a single bed, as (part name, transform) pairs."""
+
+    def __init__(self, bed: Bed):
+        self.bed = bed
+        self.placements: List[Tuple[str, List[float]]] = []
+        self._bin = _MaxRectsBin(bed.width - 2 * bed.margin + bed.spacing, bed.depth - 2 * bed.margin + bed.spacing)
+
+    def find(self, footprint: Footprint):
+        return self._bin.find(footprint.width + self.bed.spacing, footprint.depth + self.bed.spacing)
+
+    def place(self, name: str, footprint: Footprint, x: float, y: float, rotated: bool):
+        width = footprint.width + self.bed.spacing
+        depth = footprint.depth + self.bed.spacing
+        self._bin.place(x, y, depth if rotated else width, width if rotated else depth)
+        self.placements.append(
+            (name, footprint.transform(self.bed.margin + x, self.bed.margin + y, rotated)))
+
+
+def pack_plates(footprints: Dict[str, Footprint], quantities: Dict[str, int], bed: Bed) -> List[Plate]:
+    """Packs the given number of copies of each part onto as few plates as it can.
+
+    The largest parts are placed first, each on the first plate it fits on.
+    """
+    copies = [name for name, quantity in quantities.items() for _ in range(quantity)]
+    copies.sort(key=lambda name: (-max(footprints[name].width, footprints[name].depth),
+                                  -footprints[name].width * footprints[name].depth, name))
+
+    plates: List[Plate] = []
+    for name in copies:
+        footprint = footprints[name]
+        for plate in plates:
+            position = plate.find(footprint)
+            if position is not None:
+                break
+        else:
+            plate = Plate(bed)
+            position = plate.find(footprint)
+            if position is None:
+                raise ValueError("%s doesn't fit on the bed" % name)
+            plates.append(plate)
+        _, x, y, rotated = position
+        plate.place(name, footprint, x, y, rotated)
+    return plates
+
+
+def write_plate(path: str, plate: Plate, parts: Dict[str, PartModel]):
+    """Writes a plate to a 3MF file, streaming the meshes of the parts from their own 3MF files."""
+    with mesh.ModelWriter(path) as writer:
+        part_ids = {}
+        next_id = 1
+        for name, _ in plate.placements:
+            if name not in part_ids:
+                part_ids[name], next_id = parts[name].write_objects(writer, next_id)
+        writer.close([(part_ids[name], transform) for name, transform in plate.placements])
+
+
+def load_kit(path: str) -> Tuple[Bed, Dict[str, Dict[str, int]]]:
+    """Loads a kit config.
+
+    :return: A tuple of (the bed, the quantity of each part for each group of plates).
+    """
+    with open(path, "r", encoding="utf-8") as kit_file:
+        kit = json.load(kit_file)
+    return Bed(**kit["bed"]), kit["plates"]
+
+
+def pack_kit(kit_path: str, export_dir: str, output_dir: Optional[str] = None) -> List[str]:
+    """Packs the plates for a kit, and writes them as 3MF files.
+
+    :param kit_path: The path of the kit config.
+    :param export_dir: The directory that export_parts exported the parts to.
+    :param output_dir: The directory to write the plates to. Defaults to a "plates" directory within export_dir.
+    :return: The paths of the plates that were written.
+    """
+    bed, groups = load_kit(kit_path)
+    output_dir = output_dir or os.path.join(export_dir, "plates")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Check that every part has been exported before writing any of the plates
+    parts: Dict[str, PartModel] = {}
+    for quantities in groups.values():
+        for name in quantities:
+            if name not in parts:
+                path = os.path.join(export_dir, name + ".3mf")
+                if not os.path.exists(path):
+                    raise ValueError("%s hasn't been exported to %s" % (name, path))
+                parts[name] = PartModel(name, path)
+
+    outputs = []
+    for group, quantities in groups.items():
+        plates = pack_plates({name: parts[name].footprint for name in quantities}, quantities, bed)
+        for index, plate in enumerate(plates):
+            path = os.path.join(output_dir, "%s_%d.3mf" % (group, index + 1))
+            write_plate(path, plate, parts)
+            outputs.append(path)
+    return outputs
+
+
+if __name__ == "__main__":
+    root_dir = os.path.dirname(os.path.realpath(__file__))
+    kit_config = sys.argv[1] if len(sys.argv) > 1 else os.path.join(root_dir, "configs", "kit.json")
+    parts_dir = sys.argv[2] if len(sys.argv) > 2 else os.path.join(root_dir, "stls")
+    for output in pack_kit(kit_config, parts_dir):
+        print("Wrote " + output)
@@ -0,0 +1,115 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+A cache for the planar silhouettes of components, keyed by the geometry of the component and the plane.
+
+The same silhouettes get computed repeatedly while building a design. e.g. thumb_pcb projects the thumb base onto its
+bottom face for every thumb cluster assembly that's created, even though every one of those thumb bases is a copy of
+the same memoized component, in the same position. A silhouette only depends on the geometry of the bodies being
+projected, so it can be computed once for each distinct set of bodies and plane. See Lalboard.cached_silhouette.
+
+The bodies are identified by a fingerprint of the positions of all their vertices, along with the number of faces and
+edges, the volume and area, and the surface types of the faces of each body. The vertices alone aren't enough, since
+bodies that only differ in their curved surfaces can have the same vertices, or none at all, like a sphere. Since the
+vertices are in world coordinates, a copy of a component that has been moved gets a different fingerprint.
+
+This doesn't depend on fusion, so that it can be tested outside of fusion.
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import geometry
+
+# The number of decimal places that coordinates are rounded to, before being fingerprinted.
+_precision = 4
+
+
+def _format_point(point: Sequence[float]) -> str:
+    # adding 0.0 avoids formatting -0.0 differently than 0.0
+    return ",".join("%.*f" % (_precision, round(value, _precision) + 0.0) for value in point)
+
+
+class BodyGeometry(object):
+    """The topology and geometry of a single body, as used for its fingerprint.
+
+    :param face_count: The number of faces in the body.
+    :param edge_count: The number of edges in the body.
+    :param vertices: The world coordinates of all the vertices in the body, in any order.
+    :param volume: The volume of the body.
+    :param area: The surface area of the body.
+    :param surface_types: The surface type of each face of the body, e.g. SurfaceTypes.PlaneSurfaceType, in any order.
+    """
+
+    def __init__(self, face_count: int, edge_count: int, vertices: Iterable[Sequence[float]], volume: float = 0.0,
+                 area: float = 0.0, surface_types: Iterable[int] = ()):
+        self.face_count = face_count
+        self.edge_count = edge_count
+        self.vertices = [tuple(vertex) for vertex in vertices]
+        self.volume = volume
+        self.area = area
+        self.surface_types = sorted(surface_types)
+
+    def fingerprint(self) -> str:
+        vertices = sorted(_format_point(vertex) for vertex in self.vertices)
+        return "%d:%d:%s:%s:%s" % (
+            self.face_count, self.edge_count, _format_point((self.volume, self.area)),
+            ",".join(str(surface_type) for surface_type in self.surface_types), ";".join(vertices))
+
+
+def plane_key(origin: Sequence[float], normal: Sequence[float]) -> str:
+    """Returns a key for the given plane, that's the same for any origin within the plane."""
+    normal = geometry.normalize(normal)
+    return "%s@%s" % (_format_point(normal), _format_point([geometry.dot(origin, normal)]))
+
+
+def bodies_key(bodies: Sequence[BodyGeometry]) -> str:
+    """Returns a key for the geometry of the given bodies. The order of the bodies doesn't matter."""
+    hasher = hashlib.sha256()
+    for fingerprint in sorted(body.fingerprint() for body in bodies):
+        hasher.update(fingerprint.encode("utf-8"))
+        hasher.update(b"|")
+    return hasher.hexdigest()
+
+
+def silhouette_key(bodies: Sequence[BodyGeometry], origin: Sequence[float], normal: Sequence[float]) -> str:
+    """Returns a key for the silhouette of the given bodies, projected onto the given plane.
+
+    The order of the bodies doesn't matter.
+    """
+    return "%s@%s" % (bodies_key(bodies), plane_key(origin, normal))
+
+
+class SilhouetteCache(object):
+    """Holds the silhouettes that have been computed during a single build, along with hit statistics."""
+
+    def __init__(self):
+        self._silhouettes: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        silhouette = self._silhouettes.get(key)
+        if silhouette is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return silhouette
+
+    def add(self, key: str, silhouette):
+        self._silhouettes[key] = silhouette
+
+    def summary(self) -> str:
+        return "%d silhouettes computed, %d reused" % (self.misses, self.hits)
@@ -0,0 +1,204 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Hashes of the source code of a class's methods, for detecting when cached results are out of date.
+
+The hash of a method covers the source of the method itself, plus the source of every other method of the same class
+that it calls via `self.<method>`, transitively. It also covers the module-level statements (constants, imports,
+functions, etc.) of the module containing the class, since methods often depend on those as well.
+
+This is all based on static analysis of the source, so it's conservative in some ways (a call in an unused branch
+still counts) and not in others (methods called via getattr or on other objects aren't seen). Any state that the
+methods depend on that isn't in the source, like the arguments the methods are called with or external files, needs to
+be accounted for separately. data_files() can be used to find the external files that a method references by name, and
+module_hashes() the helper modules that the class's module loads with relative_import.
+"""
+
+import ast
+import hashlib
+import inspect
+import os
+from typing import Dict, Iterable, List, Optional, Set
+
+# The extensions of any data files that the methods can depend on.
+data_file_extensions = (".f3d", ".json")
+
+
+class SourceHasher(object):
+    """Calculates source hashes for the methods of a class.
+
+    :param module_source: The source code of the module containing the class.
+    :param class_name: The name of the class.
+    """
+
+    def __init__(self, module_source: str, class_name: str):
+        module_tree = ast.parse(module_source)
+        lines = module_source.splitlines(keepends=True)
+
+        class_node = None
+        module_level_sources = []
+        # The paths of the modules loaded with relative_import("..."), in order
+        self.relative_imports: List[str] = []
+        for node in module_tree.body:
+            if isinstance(node, ast.ClassDef) and node.name == class_name:
+                class_node = node
+            elif not isinstance(node, ast.ClassDef):
+                module_level_sources.append(_source_segment(lines, node))
+                relative_import = _relative_import_path(node)
+                if relative_import is not None:
+                    self.relative_imports.append(relative_import)
+
+        if class_node is None:
+            raise ValueError("Couldn't find the source for class %s" % class_name)
+
+        self._module_level_hash = _hash_strings(module_level_sources)
+
+        self._method_sources: Dict[str, str] = {}
+        self._method_calls: Dict[str, Set[str]] = {}
+        self._method_strings: Dict[str, Set[str]] = {}
+        for node in class_node.body:
+            if isinstance(node, ast.FunctionDef):
+                self._method_sources[node.name] = "\n".join(
+                    [_source_segment(lines, decorator) for decorator in node.decorator_list] +
+                    [_source_segment(lines, node)])
+                self._method_calls[node.name] = _self_attribute_references(node)
+                self._method_strings[node.name] = {
+                    child.value for child in ast.walk(node)
+                    if isinstance(child, ast.Constant) and isinstance(child.value, str)}
+
+        self._hash_cache: Dict[str, str] = {}
+
+    @classmethod
+    def for_class(cls, design_class: type) -> "SourceHasher":
+        return cls(inspect.getsource(inspect.getmodule(design_class)), design_class.__name__)
+
+    @classmethod
+    def for_file(cls, path: str, class_name: str) -> "SourceHasher":
+        with open(path, "r", encoding="utf-8") as file:
+            return cls(file.read(), class_name)
+
+    def method_names(self) -> Set[str]:
+        return set(self._method_sources.keys())
+
+    def called_methods(self, method_name: str) -> Set[str]:
+        """Returns the names of all methods transitively called by the given method, including the method itself."""
+        if method_name not in self._method_sources:
+            raise ValueError("Unknown method: %s" % method_name)
+
+        result = set()
+        pending = [method_name]
+        while pending:
+            name = pending.pop()
+            if name in result:
+                continue
+            result.add(name)
+            pending.extend(called for called in self._method_calls[name] if called in self._method_sources)
+        return result
+
+    def string_constants(self, method_name: str) -> Set[str]:
+        """Returns all the string constants in the given method and all the methods it transitively calls.
+
+        This can be used to find any external files that the method depends on.
+        """
+        result = set()
+        for name in self.called_methods(method_name):
+            result.update(self._method_strings[name])
+        return result
+
+    def data_files(self, method_names: Iterable[str], directory: str) -> Set[str]:
+        """Returns the names of the data files in the given directory that are referenced by the given methods.
+
+        A data file is referenced by a method if its name appears as a string constant in the method or anything it
+        transitively calls.
+        """
+        result = set()
+        for method_name in method_names:
+            for constant in self.string_constants(method_name):
+                if constant.endswith(data_file_extensions) and os.path.exists(os.path.join(directory, constant)):
+                    result.add(constant)
+        return result
+
+    def module_hashes(self, directory: str) -> Dict[str, str]:
+        """Returns the hash of each module that the class's module loads with relative_import.
+
+        The methods can call into these modules freely, so a change in any of them could change the results of any
+        method.
+
+        :param directory: The directory containing the class's module, which the imports are relative to.
+        """
+        return {path: file_hash(os.path.join(directory, path)) for path in self.relative_imports}
+
+    def method_hash(self, method_name: str) -> str:
+        """Returns a hash covering the source of the given method and everything it depends on."""
+        if method_name not in self._hash_cache:
+            self._hash_cache[method_name] = _hash_strings(
+                [self._module_level_hash] +
+                [self._method_sources[name] for name in sorted(self.called_methods(method_name))])
+        return self._hash_cache[method_name]
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_segment(lines, node: ast.AST) -> str:
+    """Equivalent to ast.get_source_segment, but using the pre-split lines of the source.
+
+    ast.get_source_segment splits the entire source for each call, which is slow for large modules.
+    """
+    first_line = lines[node.lineno - 1].encode("utf-8")
+    if node.lineno == node.end_lineno:
+        return first_line[node.col_offset:node.end_col_offset].decode("utf-8")
+    last_line = lines[node.end_lineno - 1].encode("utf-8")
+    return "".join(
+        [first_line[node.col_offset:].decode("utf-8")] +
+        lines[node.lineno:node.end_lineno - 1] +
+        [last_line[:node.end_col_offset].decode("utf-8")])
+
+
+def _relative_import_path(node: ast.AST) -> Optional[str]:
+    """Returns the path of a relative_import("...") statement, or None if the node is something else."""
+    if (isinstance(node, ast.Expr) and isinstance(node.value, ast.Call) and
+            isinstance(node.value.func, ast.Name) and node.value.func.id == "relative_import" and
+            len(node.value.args) == 1 and isinstance(node.value.args[0], ast.Constant) and
+            isinstance(node.value.args[0].value, str)):
+        return node.value.args[0].value
+    return None
+
+
+def _self_attribute_references(function_node: ast.FunctionDef) -> Set[str]:
+    """Returns the names of all attributes accessed on `self` within the given function."""
+    result = set()
+    for node in ast.walk(function_node):
+        if (isinstance(node, ast.Attribute) and
+                isinstance(node.value, ast.Name) and
+                node.value.id == "self"):
+            result.add(node.attr)
+    return result
+
+
+def _hash_strings(strings) -> str:
+    digest = hashlib.sha256()
+    for string in strings:
+        encoded = string.encode("utf-8")
+        # include the length, so that the boundaries between strings are unambiguous
+        digest.update(str(len(encoded)).encode("utf-8"))
+        digest.update(b":")
+        digest.update(encoded)
+    return digest.hexdigest()
@@ -0,0 +1,109 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import benchmark
+import build_profiler
+from benchmark import BenchmarkResult
+
+
+class Design(object):
+    def __init__(self):
+        self.memo = {}
+
+    def key(self, size):
+        if size not in self.memo:
+            build_profiler.record_computed()
+            self.memo[size] = "key%d" % size
+        return self.memo[size]
+    key.memoized = True
+
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_percentile(self):
+        self.assertEqual(benchmark.percentile([3, 1, 2], .5), 2)
+        self.assertEqual(benchmark.percentile([1, 2, 3, 4], .5), 2.5)
+        self.assertAlmostEqual(benchmark.percentile(range(1, 21), .95), 19.05)
+        self.assertEqual(benchmark.percentile([7], .95), 7)
+
+    def test_run_benchmark(self):
+        design = Design()
+        setups = []
+
+        def setup():
+            setups.append(len(setups))
+            return len(setups)
+
+        result = benchmark.run_benchmark(
+            benchmark.Benchmark("keys", lambda size: [design.key(size), design.key(1)], setup),
+            repeat=4, warmup=1, profiler_setup=lambda profiler: profiler.wrap_class(Design))
+
+        self.assertEqual(result.name, "keys")
+        self.assertEqual(len(result.samples), 4)
+        self.assertEqual(setups, list(range(5)))
+        # key(1) is computed during warmup, so only the new sizes are computed during the timed runs
+        self.assertEqual(result.memo_calls, 8)
+        self.assertEqual(result.memo_hits, 4)
+        self.assertAlmostEqual(result.memo_hit_rate, .5)
+
+    def test_history(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "history.json")
+
+            history = benchmark.BenchmarkHistory(path)
+            self.assertEqual(history.runs, [])
+            results = [BenchmarkResult("fast", [.01, .012, .011], 3, 4), BenchmarkResult("slow", [1, 1.2, 1.1])]
+            history.add_run(results, label="first")
+            history.set_baseline(results)
+            history.save()
+
+            history = benchmark.BenchmarkHistory(path)
+            self.assertEqual(len(history.runs), 1)
+            self.assertEqual(history.runs[0]["label"], "first")
+            self.assertAlmostEqual(history.runs[0]["results"]["fast"]["median"], .011)
+            self.assertEqual(history.runs[0]["results"]["fast"]["memo_hit_rate"], .75)
+            self.assertEqual(sorted(history.baseline), ["fast", "slow"])
+            self.assertAlmostEqual(history.baseline["slow"].median, 1.1)
+
+    def test_regressions(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            history = benchmark.BenchmarkHistory(os.path.join(temp_dir, "history.json"))
+            history.set_baseline([
+                BenchmarkResult("tiny", [.0001]),
+                BenchmarkResult("same", [1.0]),
+                BenchmarkResult("slower", [1.0])])
+
+            results = [
+                # much slower, but still too fast to care about
+                BenchmarkResult("tiny", [.0005]),
+                BenchmarkResult("same", [1.1]),
+                BenchmarkResult("slower", [1.5]),
+                BenchmarkResult("new", [5.0])]
+            regressions = history.regressions(results, threshold=.2)
+            self.assertEqual([regression.name for regression in regressions], ["slower"])
+            self.assertAlmostEqual(regressions[0].ratio, 1.5)
+            self.assertEqual(str(regressions[0]), "slower: median 1.0000s -> 1.5000s (50% slower)")
+
+            lines = benchmark.report(results, history).splitlines()
+            self.assertEqual(len(lines), 5)
+            self.assertTrue(lines[3].startswith("slower"))
+            self.assertTrue(lines[3].endswith("+50%"))
+            self.assertTrue(lines[4].endswith("-"))
@@ -0,0 +1,72 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import boolean_batching
+
+
+def box(x, y, z, size=1.0):
+    return (x, y, z), (x + size, y + size, z + size)
+
+
+class BooleanBatchingTest(unittest.TestCase):
+
+    def test_bounds_overlap(self):
+        self.assertTrue(boolean_batching.bounds_overlap(box(0, 0, 0), box(.5, .5, .5)))
+        self.assertFalse(boolean_batching.bounds_overlap(box(0, 0, 0), box(2, 0, 0)))
+        self.assertFalse(boolean_batching.bounds_overlap(box(0, 0, 0), box(0, 0, 1.5)))
+        self.assertTrue(boolean_batching.bounds_overlap(box(0, 0, 0), box(0, 0, 1.5), margin=.6))
+
+    def test_plan_batches(self):
+        # a large slot, a smaller slot within it, and 4 disjoint magnets
+        tools = [box(0, 0, 0, 10), box(2, 2, 0, 5), box(20, 0, 0), box(-20, 0, 0), box(20, 20, 0), box(-20, 20, 0)]
+        plan = boolean_batching.plan_batches(tools, [1, 1, 1, 1, 2, 1])
+
+        self.assertEqual(len(plan.batches), 2)
+        self.assertEqual(sorted(plan.batches[0]), [0, 2, 3, 4, 5])
+        self.assertEqual(plan.batches[1], [1])
+        self.assertEqual(plan.unbatched_calls, 7)
+        self.assertEqual(plan.batched_calls, 2)
+        self.assertEqual(plan.removed_calls, 5)
+
+    def test_plan_batches_order(self):
+        # overlapping tools can't be batched, and are ordered from the largest to the smallest
+        tools = [box(0, 0, 0, 1), box(0, 0, 0, 3), box(0, 0, 0, 2)]
+        plan = boolean_batching.plan_batches(tools, [1, 2, 1])
+        self.assertEqual(plan.batches, [[1], [2], [0]])
+        self.assertEqual(plan.removed_calls, 0)
+
+    def test_plan_batches_without_bodies(self):
+        plan = boolean_batching.plan_batches([box(0, 0, 0), box(5, 0, 0), box(10, 0, 0)], [1, 0, 1])
+        self.assertEqual(plan.batches, [[0, 2]])
+        self.assertEqual(plan.removed_calls, 1)
+
+    def test_report(self):
+        report = boolean_batching.BatchingReport()
+        disjoint = boolean_batching.plan_batches([box(0, 0, 0), box(5, 0, 0), box(10, 0, 0)], [1, 1, 1])
+        overlapping = boolean_batching.plan_batches([box(0, 0, 0), box(0, 0, 0)], [1, 1])
+        report.record("handrest", disjoint)
+        report.record("handrest", disjoint)
+        report.record("static_base", overlapping)
+
+        self.assertEqual(report.parts, {"handrest": (6, 2), "static_base": (2, 2)})
+        self.assertEqual(report.removed_calls, 4)
+        lines = report.summary().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[1].split(), ["6", "2", "4", "handrest"])
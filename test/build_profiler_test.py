@@ -0,0 +1,109 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import build_profiler
+
+
+def Difference(*components):
+    return "Difference(%s)" % ", ".join(components)
+
+
+def memoized(func):
+    def wrapper(self, *args):
+        if args not in self.memo:
+            build_profiler.record_computed()
+            self.memo[args] = func(self, *args)
+        return self.memo[args]
+    wrapper.memoized = True
+    return wrapper
+
+
+class Design(object):
+    def __init__(self):
+        self.memo = {}
+
+    @memoized
+    def key(self, size):
+        return Difference("box%d" % size, "hole")
+
+    def cluster(self):
+        return [self.key(1), self.key(1), self.key(2)]
+
+
+class BuildProfilerTest(unittest.TestCase):
+
+    def profile(self):
+        profiler = build_profiler.BuildProfiler()
+        profiler.wrap_class(Design)
+        profiler.wrap_namespace(globals(), ("Difference", "Missing"))
+        with profiler:
+            result = Design().cluster()
+        self.assertEqual(result, ["Difference(box1, hole)", "Difference(box1, hole)", "Difference(box2, hole)"])
+        return profiler
+
+    def test_call_tree(self):
+        profiler = self.profile()
+
+        cluster = profiler.root.children["Design.cluster"]
+        self.assertEqual(cluster.count, 1)
+        key = cluster.children["Design.key"]
+        self.assertEqual(key.count, 3)
+        self.assertEqual(key.memo_hits, 1)
+        difference = key.children["Difference"]
+        self.assertEqual(difference.count, 2)
+        self.assertEqual(difference.memo_hits, 0)
+
+        self.assertGreaterEqual(profiler.root.seconds, cluster.seconds)
+        self.assertGreaterEqual(cluster.seconds, key.seconds)
+        self.assertGreaterEqual(key.seconds, difference.seconds)
+
+    def test_wrappers_are_removed(self):
+        original_key = Design.__dict__["key"]
+        self.profile()
+        self.assertIs(Design.__dict__["key"], original_key)
+        self.assertIs(globals()["Difference"], Difference)
+        self.assertNotIn("Missing", globals())
+
+        # no profiler is active, so this should be a no-op
+        build_profiler.record_computed()
+
+    def test_speedscope(self):
+        profiler = self.profile()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "design.speedscope.json")
+            profiler.write_speedscope(path, "design")
+            with open(path, "r") as profile_file:
+                profile = json.load(profile_file)
+
+        frame_names = [frame["name"] for frame in profile["shared"]["frames"]]
+        samples = profile["profiles"][0]["samples"]
+        stacks = [[frame_names[index] for index in sample] for sample in samples]
+        self.assertIn(["Design.cluster", "Design.key", "Difference"], stacks)
+        self.assertEqual(len(samples), len(profile["profiles"][0]["weights"]))
+        self.assertAlmostEqual(sum(profile["profiles"][0]["weights"]), profiler.root.seconds)
+
+    def test_summary(self):
+        lines = self.profile().summary().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].endswith("Design.cluster"))
+        self.assertTrue(lines[3].endswith("Design.cluster > Design.key > Difference"))
+        self.assertEqual(lines[2].split()[2:4], ["3", "1"])
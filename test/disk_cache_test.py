@@ -0,0 +1,168 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import disk_cache
+import source_hash
+
+
+def write_file(name, size):
+    def write(path):
+        with open(os.path.join(path, name), "wb") as file:
+            file.write(b"x" * size)
+    return write
+
+
+class DiskCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.temp_dir.name, "cache")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_make_key(self):
+        key = disk_cache.DiskCache.make_key("screw_design", [11], {"name": "screw_11"})
+        self.assertEqual(key, disk_cache.DiskCache.make_key("screw_design", [11], {"name": "screw_11"}))
+        self.assertNotEqual(key, disk_cache.DiskCache.make_key("screw_design", [7], {"name": "screw_11"}))
+        self.assertIsNone(disk_cache.DiskCache.make_key("screw_design", [object()], {}))
+
+    def test_store_and_lookup(self):
+        cache = disk_cache.DiskCache(self.directory)
+        key = cache.make_key("test")
+
+        self.assertIsNone(cache.lookup(key))
+        cache.store(key, write_file("data", 10))
+
+        path = cache.lookup(key)
+        self.assertIsNotNone(path)
+        self.assertEqual(os.path.getsize(os.path.join(path, "data")), 10)
+
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 1)
+        self.assertEqual(cache.stats.stores, 1)
+
+    def test_failed_store(self):
+        cache = disk_cache.DiskCache(self.directory)
+        key = cache.make_key("test")
+
+        def fail(_):
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            cache.store(key, fail)
+        self.assertIsNone(cache.lookup(key))
+
+    def test_evict_by_size(self):
+        cache = disk_cache.DiskCache(self.directory, max_size=250)
+        keys = [cache.make_key("test", i) for i in range(3)]
+
+        cache.store(keys[0], write_file("data", 100))
+        cache.store(keys[1], write_file("data", 100))
+
+        # make sure the first entry is the most recently used
+        time.sleep(.01)
+        cache.lookup(keys[0])
+
+        cache.store(keys[2], write_file("data", 100))
+
+        self.assertIsNotNone(cache.lookup(keys[0]))
+        self.assertIsNone(cache.lookup(keys[1]))
+        self.assertIsNotNone(cache.lookup(keys[2]))
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_evict_by_age(self):
+        cache = disk_cache.DiskCache(self.directory, max_age=60)
+        old_key = cache.make_key("old")
+        new_key = cache.make_key("new")
+
+        path = cache.store(old_key, write_file("data", 10))
+        old_time = time.time() - 120
+        os.utime(os.path.join(path, ".complete"), (old_time, old_time))
+
+        cache.store(new_key, write_file("data", 10))
+
+        self.assertIsNone(cache.lookup(old_key))
+        self.assertIsNotNone(cache.lookup(new_key))
+
+
+class SourceHashTest(unittest.TestCase):
+
+    def test_called_methods(self):
+        hasher = source_hash.SourceHasher.for_class(DesignForHashing)
+        self.assertEqual(hasher.called_methods("a"), {"a", "b"})
+        self.assertEqual(hasher.called_methods("c"), {"c"})
+
+    def test_method_hash(self):
+        hasher = source_hash.SourceHasher.for_class(DesignForHashing)
+        self.assertNotEqual(hasher.method_hash("a"), hasher.method_hash("b"))
+        self.assertEqual(hasher.method_hash("a"), source_hash.SourceHasher.for_class(DesignForHashing).method_hash("a"))
+
+    def test_data_files(self):
+        hasher = source_hash.SourceHasher.for_class(DesignForHashing)
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(hasher.data_files(["d"], directory), set())
+
+            with open(os.path.join(directory, "model.f3d"), "wb") as file:
+                file.write(b"model")
+            self.assertEqual(hasher.data_files(["d"], directory), {"model.f3d"})
+
+            os.mkdir(os.path.join(directory, "configs"))
+            with open(os.path.join(directory, "configs", "layout.json"), "w") as file:
+                file.write("{}")
+            self.assertEqual(hasher.data_files(["d"], directory), {"model.f3d", "configs/layout.json"})
+            self.assertEqual(hasher.data_files(["a", "c"], directory), set())
+
+    def test_module_hashes(self):
+        source = (
+            'relative_import("helper.py")\n'
+            'relative_import(name)\n'
+            'import helper\n'
+            'class Design(object):\n'
+            '    def a(self):\n'
+            '        return helper.value\n')
+        hasher = source_hash.SourceHasher(source, "Design")
+        self.assertEqual(hasher.relative_imports, ["helper.py"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, "helper.py"), "w") as file:
+                file.write("value = 1\n")
+            hashes = hasher.module_hashes(directory)
+            self.assertEqual(list(hashes), ["helper.py"])
+
+            with open(os.path.join(directory, "helper.py"), "w") as file:
+                file.write("value = 2\n")
+            self.assertNotEqual(hasher.module_hashes(directory), hashes)
+
+
+class DesignForHashing(object):
+    def a(self):
+        return self.b() + self.value
+
+    def b(self):
+        return 1
+
+    def c(self):
+        return 2
+
+    def d(self):
+        return self.c(), "model.f3d", "model.step", "configs/layout.json"
@@ -0,0 +1,133 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import export_manifest
+
+lalboard_source = textwrap.dedent("""
+    import os
+
+    relative_import("helper.py")
+
+    key_thickness = 1.8
+
+    class Lalboard(object):
+        def screw_design(self, length):
+            return self.ball_magnet()
+
+        def ball_magnet(self):
+            return 1
+
+        def handrest_design(self):
+            return os.path.join(os.path.dirname(__file__), "left_handrest.f3d")
+
+    class RelativeFingerClusterPlacement(object):
+        pass
+    """)
+
+
+class ExportManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.lalboard_path = self.write("lalboard.py", lalboard_source)
+        self.write("left_handrest.f3d", "handrest")
+        self.write("helper.py", "value = 1\n")
+        self.screw_path = self.write("screw.py", "def design(context):\n    context.screw_design(7)\n")
+        self.handrest_path = self.write("handrest.py", "def design(context):\n    context.handrest_design()\n")
+        self.assembly_path = self.write(
+            "assembly.py", "def design(context):\n    lalboard.RelativeFingerClusterPlacement(context)\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, contents):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "w") as file:
+            file.write(contents)
+        return path
+
+    def test_inputs(self):
+        part_inputs = export_manifest.PartInputs(self.lalboard_path)
+
+        screw_inputs = part_inputs.inputs(self.screw_path)
+        self.assertEqual(set(screw_inputs["methods"].keys()), {"screw_design"})
+        self.assertEqual(screw_inputs["files"], {})
+        self.assertNotIn("lalboard", screw_inputs)
+
+        handrest_inputs = part_inputs.inputs(self.handrest_path)
+        self.assertEqual(set(handrest_inputs["files"].keys()), {"left_handrest.f3d"})
+
+        self.assertIn("lalboard", part_inputs.inputs(self.assembly_path))
+
+    def test_method_change(self):
+        screw_inputs = export_manifest.PartInputs(self.lalboard_path).inputs(self.screw_path)
+        handrest_inputs = export_manifest.PartInputs(self.lalboard_path).inputs(self.handrest_path)
+
+        # change a method that screw_design calls indirectly
+        self.write("lalboard.py", lalboard_source.replace("return 1", "return 2"))
+
+        part_inputs = export_manifest.PartInputs(self.lalboard_path)
+        self.assertNotEqual(screw_inputs, part_inputs.inputs(self.screw_path))
+        self.assertEqual(handrest_inputs, part_inputs.inputs(self.handrest_path))
+
+    def test_data_file_change(self):
+        handrest_inputs = export_manifest.PartInputs(self.lalboard_path).inputs(self.handrest_path)
+        self.write("left_handrest.f3d", "new handrest")
+        self.assertNotEqual(
+            handrest_inputs, export_manifest.PartInputs(self.lalboard_path).inputs(self.handrest_path))
+
+    def test_module_change(self):
+        screw_inputs = export_manifest.PartInputs(self.lalboard_path).inputs(self.screw_path)
+        self.assertEqual(set(screw_inputs["modules"].keys()), {"helper.py"})
+        self.assertNotIn("fscad", screw_inputs)
+
+        self.write("helper.py", "value = 2\n")
+        self.assertNotEqual(screw_inputs, export_manifest.PartInputs(self.lalboard_path).inputs(self.screw_path))
+
+    def test_fscad_change(self):
+        screw_inputs = export_manifest.PartInputs(self.lalboard_path, fscad_hash="a").inputs(self.screw_path)
+        self.assertEqual(screw_inputs["fscad"], "a")
+        self.assertNotEqual(
+            screw_inputs, export_manifest.PartInputs(self.lalboard_path, fscad_hash="b").inputs(self.screw_path))
+
+    def test_staleness(self):
+        manifest_path = os.path.join(self.temp_dir.name, ".manifest.json")
+        inputs = export_manifest.PartInputs(self.lalboard_path).inputs(self.screw_path)
+
+        manifest = export_manifest.ExportManifest(manifest_path)
+        self.assertTrue(manifest.is_stale("screw", inputs))
+
+        self.write("screw.3mf", "")
+        manifest.update("screw", inputs, ["screw.3mf"])
+        manifest.save()
+
+        manifest = export_manifest.ExportManifest(manifest_path)
+        self.assertFalse(manifest.is_stale("screw", inputs))
+        self.assertTrue(manifest.is_stale("screw", dict(inputs, script="changed")))
+
+        os.remove(os.path.join(self.temp_dir.name, "screw.3mf"))
+        self.assertTrue(manifest.is_stale("screw", inputs))
+
+    def test_corrupt_manifest(self):
+        manifest_path = self.write(".manifest.json", "{not json")
+        inputs = export_manifest.PartInputs(self.lalboard_path).inputs(self.screw_path)
+        self.assertTrue(export_manifest.ExportManifest(manifest_path).is_stale("screw", inputs))
@@ -0,0 +1,175 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import export_scheduler
+from export_scheduler import ExportJob
+
+
+def export_to_temp_dir(name):
+    """A picklable export function for run_in_processes, that exports through LocalExportManager."""
+    if name == "broken":
+        raise ValueError("Couldn't export broken")
+    export_manager = export_scheduler.LocalExportManager()
+    output_dir = os.environ["EXPORT_SCHEDULER_TEST_DIR"]
+    export_manager.execute(export_manager.createC3MFExportOptions(name, os.path.join(output_dir, name + ".3mf")))
+    return [name + ".3mf"]
+
+
+class ExportSchedulerTest(unittest.TestCase):
+
+    def test_schedule_balances_load(self):
+        jobs = [ExportJob("a", 10), ExportJob("b", 8), ExportJob("c", 6), ExportJob("d", 5), ExportJob("e", 3)]
+        assignments = export_scheduler.schedule(jobs, 2)
+
+        self.assertEqual(sorted(job.name for worker_jobs in assignments for job in worker_jobs), list("abcde"))
+        loads = sorted(sum(job.estimate for job in worker_jobs) for worker_jobs in assignments)
+        self.assertEqual(loads, [15, 17])
+
+        # the longest jobs run first
+        for worker_jobs in assignments:
+            estimates = [job.estimate for job in worker_jobs]
+            self.assertEqual(estimates, sorted(estimates, reverse=True))
+
+    def test_schedule_unknown_estimates(self):
+        jobs = [ExportJob("a"), ExportJob("b", 1)]
+        assignments = export_scheduler.schedule(jobs, 1)
+        self.assertEqual([job.name for job in assignments[0]], ["a", "b"])
+
+    def test_shard_jobs(self):
+        jobs = [ExportJob(name, estimate) for name, estimate in zip("abcdefg", (7, 1, 5, 3, 2, 6, 4))]
+        shards = [export_scheduler.shard_jobs(jobs, index, 3) for index in range(3)]
+        self.assertEqual(sorted(job.name for shard in shards for job in shard), list("abcdefg"))
+
+        with self.assertRaises(ValueError):
+            export_scheduler.shard_jobs(jobs, 3, 3)
+
+    def test_shard_plan_is_reused(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            plan_path = os.path.join(temp_dir, "plan.json")
+
+            jobs = [ExportJob("a", 10), ExportJob("b", 1), ExportJob("c", 1)]
+            first_shard = export_scheduler.shard_jobs(jobs, 0, 2, plan_path=plan_path, run_id="1")
+            self.assertEqual([job.name for job in first_shard], ["a"])
+
+            # The estimates have changed since the plan was made, but the other shard should still get the same split
+            jobs = [ExportJob("a", 1), ExportJob("b", 10), ExportJob("c", 1)]
+            second_shard = export_scheduler.shard_jobs(jobs, 1, 2, plan_path=plan_path, run_id="1")
+            self.assertEqual(sorted(job.name for job in second_shard), ["b", "c"])
+
+            # As should a shard that's rerun within the same run
+            first_shard = export_scheduler.shard_jobs(jobs, 0, 2, plan_path=plan_path, run_id="1")
+            self.assertEqual([job.name for job in first_shard], ["a"])
+
+            # The next run gets a new plan from the current estimates
+            first_shard = export_scheduler.shard_jobs(jobs, 0, 2, plan_path=plan_path, run_id="2")
+            self.assertEqual([job.name for job in first_shard], ["b"])
+            second_shard = export_scheduler.shard_jobs(jobs, 1, 2, plan_path=plan_path, run_id="2")
+            self.assertEqual(sorted(job.name for job in second_shard), ["a", "c"])
+
+            # A different set of jobs within the same run can't be sharded consistently
+            jobs.append(ExportJob("d", 1))
+            with self.assertRaises(ValueError):
+                export_scheduler.shard_jobs(jobs, 1, 2, plan_path=plan_path, run_id="2")
+            with self.assertRaises(ValueError):
+                export_scheduler.shard_jobs(jobs, 1, 2, plan_path=plan_path)
+            self.assertFalse(os.path.exists(plan_path + ".lock"))
+
+    def test_plan_lock(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            plan_path = os.path.join(temp_dir, "plan.json")
+            jobs = [ExportJob("a", 10), ExportJob("b", 1)]
+
+            # Another process is reading or writing the plan
+            shards = []
+            # noinspection PyProtectedMember
+            with export_scheduler._file_lock(plan_path):
+                thread = threading.Thread(target=lambda: shards.append(
+                    export_scheduler.shard_jobs(jobs, 0, 2, plan_path=plan_path, run_id="1")))
+                thread.start()
+                time.sleep(.2)
+                self.assertFalse(shards)
+            thread.join()
+            self.assertEqual([job.name for job in shards[0]], ["a"])
+
+            # A lock left behind by a process that crashed is ignored once it's old enough
+            with open(plan_path + ".lock", "w"):
+                pass
+            os.utime(plan_path + ".lock", (time.time() - 3600, time.time() - 3600))
+            self.assertEqual(
+                [job.name for job in export_scheduler.shard_jobs(jobs, 1, 2, plan_path=plan_path, run_id="1")], ["b"])
+            self.assertFalse(os.path.exists(plan_path + ".lock"))
+
+    def test_failures_are_isolated(self):
+        callback_results = []
+        results = export_scheduler.run_in_process(
+            [ExportJob("first"), ExportJob("broken"), ExportJob("last")],
+            lambda name: [name + ".3mf"] if name != "broken" else 1 / 0,
+            result_callback=callback_results.append)
+
+        self.assertEqual([result.name for result in results], ["first", "broken", "last"])
+        self.assertEqual([result.succeeded for result in results], [True, False, True])
+        self.assertEqual(results[0].outputs, ["first.3mf"])
+        self.assertIn("ZeroDivisionError", results[1].error)
+        self.assertEqual(callback_results, results)
+
+    # The real adsk is a package, unlike the headless stand-in from fake_adsk
+    @unittest.skipIf(hasattr(sys.modules.get("adsk"), "__path__"),
+                     "Worker processes can't be started from within fusion")
+    def test_run_in_processes(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            os.environ["EXPORT_SCHEDULER_TEST_DIR"] = temp_dir
+            try:
+                jobs = [ExportJob(name, estimate) for name, estimate in (("a", 3), ("b", 2), ("c", 1), ("broken", 1))]
+                callback_results = []
+                results = export_scheduler.run_in_processes(
+                    jobs, export_to_temp_dir, 2, result_callback=callback_results.append)
+            finally:
+                del os.environ["EXPORT_SCHEDULER_TEST_DIR"]
+
+            self.assertEqual(sorted(result.name for result in results), ["a", "b", "broken", "c"])
+            self.assertEqual(len(callback_results), 4)
+            self.assertEqual({result.worker for result in results}, {0, 1})
+            for result in results:
+                if result.name == "broken":
+                    self.assertFalse(result.succeeded)
+                    self.assertIn("Couldn't export broken", result.error)
+                else:
+                    self.assertTrue(result.succeeded)
+                    with open(os.path.join(temp_dir, result.name + ".3mf"), "r") as exported:
+                        self.assertEqual(exported.read(), result.name)
+
+    def test_summary_table(self):
+        results = [
+            export_scheduler.ExportResult("fast", 0, 1.5, outputs=["fast.3mf"]),
+            export_scheduler.ExportResult("slow", 1, 12.25, outputs=["slow.3mf"]),
+            export_scheduler.ExportResult("broken", 0, 0.5, error="Traceback...\nValueError: oops\n")]
+        lines = export_scheduler.summary_table(results).splitlines()
+
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[1].startswith("slow"))
+        self.assertIn("12.25", lines[1])
+        self.assertIn("FAILED: ValueError: oops", lines[3])
+        self.assertEqual(lines[4], "2 parts exported, 1 failed, 14.25s total export time")
+
+        self.assertEqual(export_scheduler.summary_table([]), "No parts were exported")
@@ -0,0 +1,92 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import boolean_batching
+import face_index
+
+
+def box_faces(bounds_min, bounds_max):
+    """Returns the (bounds, name) of each of the 6 faces of a box."""
+    faces = []
+    for axis in range(3):
+        for side, value in (("min", bounds_min[axis]), ("max", bounds_max[axis])):
+            face_min = list(bounds_min)
+            face_max = list(bounds_max)
+            face_min[axis] = face_max[axis] = value
+            faces.append(((tuple(face_min), tuple(face_max)), "%s%d_%s" % (side, axis, bounds_min)))
+    return faces
+
+
+class FaceIndexTest(unittest.TestCase):
+
+    def test_tree_query(self):
+        generator = random.Random(4)
+        items = []
+        for index in range(200):
+            bounds_min = [generator.uniform(0, 100) for _ in range(3)]
+            bounds_max = [value + generator.uniform(0, 10) for value in bounds_min]
+            items.append(((tuple(bounds_min), tuple(bounds_max)), index))
+        tree = face_index.AABBTree(items)
+
+        for _ in range(20):
+            query_min = [generator.uniform(0, 100) for _ in range(3)]
+            query = (tuple(query_min), tuple(value + 20 for value in query_min))
+            self.assertEqual(
+                tree.query(query),
+                [item for bounds, item in items if boolean_batching.bounds_overlap(bounds, query)])
+
+        self.assertEqual(face_index.AABBTree([]).query(((0, 0, 0), (1, 1, 1))), [])
+
+    def test_faces_in_plane(self):
+        index = face_index.FaceIndex([
+            (((0, 0, 0), (10, 10, 2)), lambda: box_faces((0, 0, 0), (10, 10, 2))),
+            (((1, 1, 2), (5, 5, 5)), lambda: box_faces((1, 1, 2), (5, 5, 5)))])
+
+        self.assertEqual(index.faces_in_plane(2, 2), ["max2_(0, 0, 0)", "min2_(1, 1, 2)"])
+        self.assertEqual(index.faces_in_plane(0, 1), ["min0_(1, 1, 2)"])
+        self.assertEqual(index.faces_in_plane(2, 3), [])
+        self.assertEqual(index.extreme_faces(2), ["min2_(0, 0, 0)"])
+        self.assertEqual(index.extreme_faces(2, maximum=True), ["max2_(1, 1, 2)"])
+        self.assertEqual(index.extreme_faces(0, maximum=True), ["max0_(0, 0, 0)"])
+
+    def test_lazy_trees(self):
+        loaded = []
+
+        def loader(name, bounds_min, bounds_max):
+            def load():
+                loaded.append(name)
+                return box_faces(bounds_min, bounds_max)
+            return load
+
+        index = face_index.FaceIndex([
+            (((0, 0, 0), (1, 1, 1)), loader("first", (0, 0, 0), (1, 1, 1))),
+            (((0, 0, 5), (1, 1, 6)), loader("second", (0, 0, 5), (1, 1, 6)))])
+        self.assertEqual(loaded, [])
+
+        index.extreme_faces(2)
+        self.assertEqual(loaded, ["first"])
+        index.faces_in_plane(2, 1)
+        self.assertEqual(loaded, ["first"])
+        index.extreme_faces(2, maximum=True)
+        self.assertEqual(loaded, ["first", "second"])
+
+        self.assertIsNone(face_index.FaceIndex([]).bounds)
+        self.assertEqual(face_index.FaceIndex([]).extreme_faces(2), [])
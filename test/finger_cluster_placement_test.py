@@ -353,6 +353,47 @@ class FingerClusterPlacementTest(FscadTestCase):
             cluster.find_children("center_key")[0].create_occurrence(scale=.1)
 
 
+class FingerClusterRotationTest(unittest.TestCase):
+
+    # These are the same rotations used in test_absolute_cartesian_and_euler_placement and
+    # test_absolute_cylindrical_and_support_lengths_placement, rounded to 2 decimal places.
+    rotations = [
+        ((13.45, -.16, 1.46), (23.36, 28.55, 28.60, 1.46)),
+        ((13.12, -2.05, 14.03), (22.84, 27.49, 28.13, 14.03)),
+        ((12.75, -11.36, 21.95), (20.49, 23.33, 26.86, 21.95)),
+        ((9.68, -12.95, 41.31), (15.47, 15.81, 19.83, 41.31))]
+
+    def test_support_lengths_match_euler_angles(self):
+        for euler_angles, support_lengths in self.rotations:
+            euler_matrix = (lalboard.AbsoluteFingerClusterPlacement(context)
+                            .set_rotation_by_euler_angles(*euler_angles)
+                            .rotation_matrix)
+            support_matrix = (lalboard.AbsoluteFingerClusterPlacement(context)
+                              .set_rotation_by_support_lengths(*support_lengths)
+                              .rotation_matrix)
+
+            # only the rotation part of the matrices are expected to match. The support length matrix also has a
+            # translation component, which is ignored when positioning the cluster.
+            for index in (0, 1, 2, 4, 5, 6, 8, 9, 10):
+                self.assertAlmostEqual(euler_matrix.asArray()[index], support_matrix.asArray()[index], delta=.01)
+
+    def test_batch_conversion(self):
+        rotation = lalboard.FingerClusterRotation(context)
+
+        all_euler_angles = rotation.support_lengths_to_euler_angles(
+            [support_lengths for _, support_lengths in self.rotations])
+        for (expected_euler_angles, _), euler_angles in zip(self.rotations, all_euler_angles):
+            for expected_angle, angle in zip(expected_euler_angles, euler_angles):
+                self.assertAlmostEqual(expected_angle, angle, delta=.1)
+
+        # The front length is fixed for the whole batch, so each rotation is checked with its own front length
+        for index, (_, expected_support_lengths) in enumerate(self.rotations):
+            all_support_lengths = rotation.euler_angles_to_support_lengths(
+                [euler_angles for euler_angles, _ in self.rotations], front=expected_support_lengths[0])
+            for expected_length, length in zip(expected_support_lengths, all_support_lengths[index]):
+                self.assertAlmostEqual(expected_length, length, delta=.1)
+
+
 def run(context):
     import sys
     test_suite = unittest.defaultTestLoader.loadTestsFromModule(sys.modules[__name__],
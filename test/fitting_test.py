@@ -0,0 +1,128 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import fitting
+import geometry
+import placement_solver
+
+
+def box_points(min_point, max_point, spacing):
+    """Returns points on a grid over the surface of the given box."""
+    counts = [max(1, int(math.ceil((max_point[axis] - min_point[axis]) / spacing))) for axis in range(3)]
+    points = []
+    for i in range(counts[0] + 1):
+        for j in range(counts[1] + 1):
+            for k in range(counts[2] + 1):
+                if 0 < i < counts[0] and 0 < j < counts[1] and 0 < k < counts[2]:
+                    continue
+                points.append(tuple(
+                    min_point[axis] + (max_point[axis] - min_point[axis]) * index / counts[axis]
+                    for axis, index in enumerate((i, j, k))))
+    return points
+
+
+# A box-shaped stand-in for a cluster, with the reference point at the top center.
+cluster_shape = fitting.ClusterShape(
+    box_points((-10, -10, -20), (10, 10, 0), 2),
+    ((0, 8, -20), (-8, -8, -20), (8, -8, -20)))
+
+
+class FittingTest(unittest.TestCase):
+
+    def test_nelder_mead(self):
+        best, value = fitting.nelder_mead(
+            lambda point: (point[0] - 3) ** 2 + 2 * (point[1] + 1) ** 2 + 1, (0, 0), (1, 1), tolerance=1e-12)
+        self.assertAlmostEqual(best[0], 3, places=4)
+        self.assertAlmostEqual(best[1], -1, places=4)
+        self.assertAlmostEqual(value, 1, places=8)
+
+    def test_fit_cluster_matches_measurement(self):
+        measurement = fitting.Measurement((10, 100, 40), (-.2, 1, .3))
+        fit = fitting.fit_cluster(measurement, cluster_shape)
+
+        for actual, expected in zip(fit.position, measurement.position):
+            self.assertAlmostEqual(actual, expected, places=2)
+        self.assertLess(fit.direction_error, .01)
+
+        matrix = fitting.pose_matrix(fit.position, fit.euler_angles)
+        forward = geometry.transform_vector(matrix, (0, 1, 0))
+        for actual, expected in zip(forward, measurement.direction):
+            self.assertAlmostEqual(actual, expected, places=3)
+        # the cluster's left-right axis should be level
+        self.assertAlmostEqual(geometry.transform_vector(matrix, (1, 0, 0))[2], 0, places=3)
+
+    def test_support_lengths(self):
+        measurement = fitting.Measurement((0, 100, 40), (0, 1, .2))
+        fit = fitting.fit_cluster(measurement, cluster_shape)
+
+        matrix = fitting.pose_matrix(fit.position, fit.euler_angles)
+        for support_point, support_length in zip(cluster_shape.support_points, fit.support_lengths):
+            self.assertAlmostEqual(geometry.transform_point(matrix, support_point)[2], support_length, places=6)
+
+        # The support lengths should reproduce the fitted rotation.
+        support_matrix = geometry.support_lengths_matrix(
+            fit.support_lengths, cluster_shape.support_points, fit.euler_angles[2])
+        for actual, expected in zip(geometry.matrix_euler_angles(support_matrix), fit.euler_angles):
+            self.assertAlmostEqual(actual, expected, places=4)
+
+        # The cluster is pitched up, so the front support should be longer than the back supports.
+        self.assertGreater(fit.support_lengths[0], fit.support_lengths[1])
+        self.assertAlmostEqual(fit.support_lengths[1], fit.support_lengths[2], places=3)
+
+    def test_fit_cluster_avoids_obstacles(self):
+        obstacle_points = box_points((-30, 80, 0), (-5, 120, 40), 2)
+        obstacle = placement_solver.PointCloud(obstacle_points)
+        measurement = fitting.Measurement((0, 100, 40), (0, 1, 0))
+
+        fit = fitting.fit_cluster(measurement, cluster_shape, [obstacle_points], clearance=2.0)
+
+        points = geometry.transform_points(fitting.pose_matrix(fit.position, fit.euler_angles), cluster_shape.points)
+        min_distance = min(obstacle.nearest_distance(point) for point in points)
+        self.assertGreater(min_distance, 1.8)
+        # it should move away from the obstacle by about the amount it originally overlapped, and no further
+        self.assertGreater(fit.position[0], 5)
+        self.assertLess(fit.position[0], 10)
+
+    def test_fit_hand(self):
+        fingers = [fitting.Measurement((x, 100 + x / 4, 40), (0, 1, .1)) for x in (-30, -10, 10, 30)]
+        thumb = fitting.Measurement((-50, 60, 30), (-.5, 1, 0))
+
+        start = time.perf_counter()
+        hand_fit = fitting.fit_hand(fingers, thumb, cluster_shape, cluster_shape.mirrored(), clearance=2.0)
+        self.assertLess(time.perf_counter() - start, 30)
+
+        self.assertEqual(len(hand_fit.fingers), 4)
+        # adjacent measurements are exactly the cluster width apart, so the fitted clusters have to spread out
+        for first, second in zip(hand_fit.fingers, hand_fit.fingers[1:]):
+            self.assertGreater(second.position[0] - first.position[0], 21.5)
+
+        hand_layout = hand_fit.layout()
+        self.assertEqual(len(hand_layout["fingers"]), 4)
+        self.assertEqual(set(hand_layout["thumb"]), {"cartesian", "euler_angles"})
+
+        hand_layout = hand_fit.layout(use_support_lengths=True)
+        self.assertEqual(set(hand_layout["fingers"][0]), {"cartesian", "support_lengths", "rz"})
+
+    def test_mirrored(self):
+        mirrored = cluster_shape.mirrored()
+        self.assertEqual(mirrored.support_points[1], (8, -8, -20))
+        self.assertEqual(mirrored.radius, cluster_shape.radius)
@@ -0,0 +1,118 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import geometry
+
+
+class GeometryTest(unittest.TestCase):
+
+    def assertVectorAlmostEqual(self, actual, expected, places=7):
+        self.assertEqual(len(actual), len(expected))
+        for actual_value, expected_value in zip(actual, expected):
+            self.assertAlmostEqual(actual_value, expected_value, places=places)
+
+    def test_rotation_matrix(self):
+        matrix = geometry.rotation_matrix(math.radians(90), (0, 0, 1))
+        self.assertVectorAlmostEqual(geometry.transform_point(matrix, (1, 0, 0)), (0, 1, 0))
+
+        matrix = geometry.rotation_matrix(math.radians(90), (0, 0, 1), (1, 1, 0))
+        self.assertVectorAlmostEqual(geometry.transform_point(matrix, (2, 1, 5)), (1, 2, 5))
+        self.assertVectorAlmostEqual(geometry.transform_point(matrix, (1, 1, 3)), (1, 1, 3))
+
+    def test_multiply(self):
+        rotation = geometry.rotation_matrix(math.radians(30), (1, 2, 3))
+        translation = geometry.translation_matrix((1, 2, 3))
+
+        point = (4, 5, 6)
+        self.assertVectorAlmostEqual(
+            geometry.transform_point(geometry.multiply(translation, rotation), point),
+            geometry.transform_point(translation, geometry.transform_point(rotation, point)))
+
+    def test_invert(self):
+        matrix = geometry.multiply(
+            geometry.translation_matrix((1, -2, 3)), geometry.rotation_matrix(math.radians(30), (1, 2, 3), (4, 5, 6)))
+        matrix[0] *= 2
+        self.assertVectorAlmostEqual(geometry.multiply(geometry.invert(matrix), matrix), geometry.identity_matrix())
+        self.assertVectorAlmostEqual(geometry.multiply(matrix, geometry.invert(matrix)), geometry.identity_matrix())
+
+        with self.assertRaises(ValueError):
+            geometry.invert([0.0] * 16)
+
+    def test_cylindrical(self):
+        point = geometry.cylindrical_to_cartesian(10, 30, 5)
+        self.assertVectorAlmostEqual(point, (5, 10 * math.cos(math.radians(30)), 5))
+        self.assertAlmostEqual(geometry.cylindrical_theta(point), 30)
+
+    def test_rotate_to_height(self):
+        axis_point = (0, 0, 0)
+        axis_vector = (1, 0, 0)
+        target_point = (0, 10, 0)
+
+        matrix = geometry.rotate_to_height_matrix(axis_point, axis_vector, target_point, 5)
+        self.assertVectorAlmostEqual(
+            geometry.transform_point(matrix, target_point), (0, 10 * math.cos(math.radians(30)), 5))
+
+        # the smaller of the 2 rotations should be used
+        matrix = geometry.rotate_to_height_matrix(axis_point, axis_vector, (0, -10, 0), 5)
+        self.assertVectorAlmostEqual(
+            geometry.transform_point(matrix, (0, -10, 0)), (0, -10 * math.cos(math.radians(30)), 5))
+
+    def test_rotate_to_height_oblique_axis(self):
+        axis_point = (3, -2, 7)
+        axis_vector = (1, 2, .5)
+        target_point = (10, 4, 9)
+
+        matrix = geometry.rotate_to_height_matrix(axis_point, axis_vector, target_point, 6)
+        rotated_point = geometry.transform_point(matrix, target_point)
+        self.assertAlmostEqual(rotated_point[2], 6)
+
+        # points on the axis are unaffected
+        other_axis_point = geometry.add(axis_point, geometry.scale(axis_vector, 4))
+        self.assertVectorAlmostEqual(geometry.transform_point(matrix, other_axis_point), other_axis_point)
+
+        # the rotated point stays the same distance from the axis
+        self.assertAlmostEqual(
+            geometry.length(geometry.subtract(rotated_point, axis_point)),
+            geometry.length(geometry.subtract(target_point, axis_point)))
+
+    def test_rotate_to_unreachable_height(self):
+        with self.assertRaises(ValueError):
+            geometry.rotate_to_height_matrix((0, 0, 0), (1, 0, 0), (0, 10, 0), 11)
+
+    def test_euler_angles_round_trip(self):
+        for angles in ((13.45, -.16, 1.46), (9.68, -12.95, 41.31), (-10, 80, -170)):
+            self.assertVectorAlmostEqual(
+                geometry.matrix_euler_angles(geometry.euler_angles_matrix(*angles)), angles)
+
+    def test_support_lengths(self):
+        support_points = ((0, 20, 1), (-15, -5, 2), (15, -5, 2))
+        lengths = (23.36, 28.55, 28.60)
+
+        matrix = geometry.support_lengths_matrix(lengths, support_points, 14.03)
+
+        height_offset = (0, 0, lengths[0] - support_points[0][2])
+        for point, expected_length in zip(support_points, lengths):
+            self.assertAlmostEqual(
+                geometry.transform_point(matrix, geometry.add(point, height_offset))[2], expected_length)
+
+        self.assertAlmostEqual(geometry.matrix_euler_angles(matrix)[2], 14.03)
+
+        self.assertVectorAlmostEqual(geometry.matrix_support_lengths(matrix, support_points, lengths[0]), lengths)
@@ -0,0 +1,433 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for running lalboard's placement logic outside of fusion, via fake_adsk and fake_fscad.
+
+These are meant to be run with plain python, rather than from within fusion via tests.py.
+"""
+
+import json
+import math
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import fake_fscad
+fake_fscad.install()
+
+from fscad.fscad import Box, Group, Intersection
+
+import geometry
+import lalboard
+import layout
+import placement_solver
+import silhouette_cache
+from fake_adsk import InfiniteLine3D, Matrix3D, Point3D, Vector3D
+
+
+def box_surface_points(min_point, max_point, spacing=1.0):
+    """Returns a grid of points over the surface of an axis-aligned box."""
+    def steps(axis):
+        count = math.ceil((max_point[axis] - min_point[axis]) / spacing)
+        return [min_point[axis] + (max_point[axis] - min_point[axis]) * i / count for i in range(count + 1)]
+
+    points = set()
+    for x in steps(0):
+        for y in steps(1):
+            for z in steps(2):
+                if x in (min_point[0], max_point[0]) or y in (min_point[1], max_point[1]) or \
+                        z in (min_point[2], max_point[2]):
+                    points.add((x, y, z))
+    return sorted(points)
+
+
+class FakeAdskTest(unittest.TestCase):
+
+    def assertPointEqual(self, actual, expected):
+        for actual_value, expected_value in zip(actual.asArray(), expected):
+            self.assertAlmostEqual(actual_value, expected_value)
+
+    def test_transform_by_order(self):
+        rotation = Matrix3D.create()
+        rotation.setToRotation(math.radians(90), Vector3D.create(0, 0, 1), Point3D.create(0, 0, 0))
+        translation = Matrix3D.create()
+        translation.translation = Vector3D.create(1, 0, 0)
+
+        matrix = Matrix3D.create()
+        matrix.transformBy(translation)
+        matrix.transformBy(rotation)
+
+        point = Point3D.create(0, 0, 0)
+        point.transformBy(matrix)
+        self.assertPointEqual(point, (0, 1, 0))
+
+    def test_invert(self):
+        matrix = Matrix3D.create()
+        matrix.setWithArray(geometry.multiply(
+            geometry.rotation_matrix(.7, (1, 2, 3), (4, 5, 6)), geometry.translation_matrix((1, -2, 3))))
+        inverse = matrix.copy()
+        self.assertTrue(inverse.invert())
+        inverse.transformBy(matrix)
+        self.assertTrue(inverse.isEqualTo(Matrix3D.create()))
+
+    def test_align_coordinate_systems(self):
+        matrix = Matrix3D.create()
+        matrix.setToAlignCoordinateSystems(
+            Point3D.create(1, 1, 1), Vector3D.create(1, 0, 0), Vector3D.create(0, 1, 0), Vector3D.create(0, 0, 1),
+            Point3D.create(0, 0, 5), Vector3D.create(0, 1, 0), Vector3D.create(-1, 0, 0), Vector3D.create(0, 0, 1))
+        point = Point3D.create(2, 1, 1)
+        point.transformBy(matrix)
+        self.assertPointEqual(point, (0, 1, 5))
+
+        origin, x_axis, _, _ = matrix.getAsCoordinateSystem()
+        self.assertPointEqual(x_axis, (0, 1, 0))
+
+    def test_line_intersection(self):
+        line1 = InfiniteLine3D.create(Point3D.create(0, 0, 0), Vector3D.create(1, 1, 0))
+        line2 = InfiniteLine3D.create(Point3D.create(2, 0, 0), Vector3D.create(0, 1, 0))
+        intersection = line1.intersectWithCurve(line2)
+        self.assertEqual(len(intersection), 1)
+        self.assertPointEqual(intersection[0], (2, 2, 0))
+
+        skew = InfiniteLine3D.create(Point3D.create(2, 0, 1), Vector3D.create(0, 1, 0))
+        self.assertEqual(line1.intersectWithCurve(skew), [])
+
+
+class HeadlessLalboardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.context = lalboard.Lalboard()
+
+    def test_absolute_finger_cluster_placement(self):
+        placement = lalboard.AbsoluteFingerClusterPlacement(self.context)
+        placement.set_cylindrical(60, -30, 20).set_rotation_by_euler_angles(10, 5, -20)
+
+        for actual, expected in zip(placement.position.asArray(), geometry.cylindrical_to_cartesian(60, -30, 20)):
+            self.assertAlmostEqual(actual, expected)
+        for actual, expected in zip(geometry.matrix_euler_angles(placement.rotation_matrix.asArray()), (10, 5, -20)):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_support_lengths(self):
+        # The support points depend on the full cluster design, which can't be built without fusion. So they're
+        # provided directly here instead.
+        support_points = ((0, 10, 0), (-10, -5, 0), (10, -5, 0))
+        # noinspection PyProtectedMember
+        self.context._support_point_cache[("finger", False, False)] = support_points
+
+        placement = lalboard.AbsoluteFingerClusterPlacement(self.context)
+        placement.set_rotation_by_support_lengths(10, 12, 12, 15)
+
+        expected = geometry.support_lengths_matrix((10, 12, 12), support_points, 15)
+        for actual, expected in zip(placement.rotation_matrix.asArray(), expected):
+            self.assertAlmostEqual(actual, expected)
+
+        # The back supports are longer, so the cluster should be tilted forward
+        rx, ry, rz = geometry.matrix_euler_angles(placement.rotation_matrix.asArray())
+        self.assertLess(rx, 0)
+        self.assertAlmostEqual(ry, 0)
+        self.assertAlmostEqual(rz, 15)
+
+    def test_relative_thumb_cluster_solve(self):
+        # As with the support points, the thumb base and handrest can't be built without fusion, so they're
+        # approximated with boxes. The thumb base's points are relative to the front upper mid point of its down key.
+        # noinspection PyProtectedMember
+        self.context._surface_point_cache[("thumb_base", 1.0)] = box_surface_points((-5, -10, -5), (5, 0, 5))
+        handrest_cloud = placement_solver.PointCloud(box_surface_points((20, 0, 0), (60, 100, 40)))
+
+        for left_hand, expected_x in ((False, 15), (True, 65)):
+            for gap in (0, 2):
+                placement = lalboard.RelativeThumbClusterPlacement(self.context)
+                placement.set_cartesian(50, 20, gap=gap).set_rotation_by_euler_angles(0, 0, 0)
+
+                position = placement.solve(handrest_cloud, left_hand=left_hand).position
+                gap_offset = gap if left_hand else -gap
+                self.assertAlmostEqual(position.x, expected_x + gap_offset, delta=.05)
+                self.assertAlmostEqual(position.y, 50)
+                self.assertAlmostEqual(position.z, 20)
+
+    def test_layout_clusters(self):
+        context = lalboard.Lalboard(instancing=True)
+        draft_context = lalboard.Lalboard(detail="draft")
+
+        # Building the clusters themselves requires fusion, so they're replaced by boxes at the placement positions.
+        def positioned_box(placement, **_):
+            cluster = Box(1, 1, 1, name="cluster")
+            cluster.place(~cluster == placement.position.x, ~cluster == placement.position.y,
+                          ~cluster == placement.position.z)
+            return cluster
+        for layout_context in (context, draft_context):
+            layout_context.positioned_cluster_assembly = positioned_box
+            layout_context.positioned_thumb_assembly = positioned_box
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            layout_path = os.path.join(temp_dir, "layout.json")
+            with open(layout_path, "w") as layout_file:
+                json.dump({"static_base": {"right": {
+                    "fingers": [
+                        {"cartesian": [10, 20, 30], "euler_angles": [0, 0, 0]},
+                        {"cylindrical": [50, 0, 40], "euler_angles": [5, 0, 10]}],
+                    "thumb": {"cartesian": [-20, 10, 15], "euler_angles": [0, 0, 0]}}}}, layout_file)
+            layout_file = layout.Layout(layout_path)
+            placement_cache = layout.PlacementCache(os.path.join(temp_dir, "cache"))
+
+            # The second build uses the cached placements
+            for _ in range(2):
+                fingers, thumb = context.layout_clusters(
+                    "static_base", z_offset=1, layout_file=layout_file, placement_cache=placement_cache)
+                self.assertEqual(len(fingers), 2)
+                for actual, expected in zip(fingers[0].mid().asArray(), (10, 20, 31)):
+                    self.assertAlmostEqual(actual, expected)
+                for actual, expected in zip(fingers[1].mid().asArray(), geometry.cylindrical_to_cartesian(50, 0, 41)):
+                    self.assertAlmostEqual(actual, expected)
+                for actual, expected in zip(thumb.mid().asArray(), (-20, 10, 16)):
+                    self.assertAlmostEqual(actual, expected)
+            self.assertEqual(placement_cache.stats.hits, 1)
+
+            # Placements resolved against draft clusters are cached separately
+            draft_context.layout_clusters(
+                "static_base", z_offset=1, layout_file=layout_file, placement_cache=placement_cache)
+            self.assertEqual(placement_cache.stats.hits, 1)
+
+    def test_layout_clusters_lod(self):
+        context = lalboard.Lalboard()
+        built = []
+
+        def positioned_cluster(placement, lod="full", **_):
+            built.append(lod)
+            cluster = Group([Box(1, 1, 1, name="cluster"), Box(1, 1, 1, name="front_magnet")], name="cluster_assembly")
+            cluster.add_named_point("down_key_top_center", cluster.mid())
+            return cluster.translate(*placement.position.asArray())
+        context.positioned_cluster_assembly = positioned_cluster
+        context.positioned_thumb_assembly = lambda placement, **_: Box(1, 1, 1, name="thumb_cluster")
+
+        previous_clusters = []
+
+        def resolve(_, previous_cluster, **__):
+            previous_clusters.append(previous_cluster)
+            return lalboard.AbsoluteFingerClusterPlacement(context).set_cartesian(50, 0, 0)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            layout_path = os.path.join(temp_dir, "layout.json")
+            with open(layout_path, "w") as layout_file:
+                json.dump({"static_base": {"right": {
+                    "fingers": [
+                        {"cartesian": [10, 20, 30], "euler_angles": [0, 0, 0]},
+                        {"relative_cartesian": [0, 0], "euler_angles": [0, 0, 0]},
+                        {"cartesian": [-10, 20, 30], "euler_angles": [0, 0, 0]}],
+                    "thumb": {"cartesian": [-20, 10, 15], "euler_angles": [0, 0, 0]}}}}, layout_file)
+
+            with mock.patch.object(lalboard.RelativeFingerClusterPlacement, "resolve", resolve):
+                fingers, _ = context.layout_clusters(
+                    "static_base", layout_file=layout.Layout(layout_path), lod="box",
+                    placement_cache=layout.PlacementCache(os.path.join(temp_dir, "cache")))
+
+        # Only the cluster that the relative placement is resolved against is built at full detail, and only once.
+        self.assertEqual(built, ["full", "box", "box"])
+        self.assertEqual(len(previous_clusters), 1)
+        self.assertIsInstance(previous_clusters[0].children()[0], Box)
+        # The proxies of the first cluster are derived from the full detail cluster
+        self.assertEqual([child.name for child in fingers[0].children()], ["cluster", "front_magnet"])
+        self.assertNotIsInstance(fingers[0].children()[0], Box)
+        self.assertIsInstance(fingers[0].children()[1], Box)
+        for actual, expected in zip(fingers[0].named_point("down_key_top_center").point.asArray(), (10.5, 20.5, 30.5)):
+            self.assertAlmostEqual(actual, expected)
+
+    def test_surface_point_cloud(self):
+        # Sampling the surfaces requires fusion's mesh calculator, so the sampled points are provided directly.
+        sampled = []
+
+        def surface_points(component, spacing):
+            sampled.append((component.name, spacing))
+            return box_surface_points(component.min().asArray(), component.max().asArray(), spacing)
+        self.context.surface_points = surface_points
+        self.context._body_geometries = lambda component: [silhouette_cache.BodyGeometry(
+            0, 0, [component.min().asArray(), component.max().asArray()])]
+
+        handrest = Box(10, 20, 5, name="handrest")
+        cloud = self.context.surface_point_cloud(handrest, 1.0)
+        self.assertIs(self.context.surface_point_cloud(handrest.copy(), 1.0), cloud)
+        self.assertEqual(sampled, [("handrest", 1.0)])
+
+        self.context.surface_point_cloud(handrest, 2.0)
+        self.context.surface_point_cloud(handrest.tx(5), 1.0)
+        self.assertEqual(len(sampled), 3)
+
+    def test_rotate_to_height_matrix(self):
+        matrix = self.context.rotate_to_height_matrix(
+            Point3D.create(0, 0, 0), Vector3D.create(1, 0, 0), Point3D.create(0, 10, 0), 5)
+        point = Point3D.create(0, 10, 0)
+        point.transformBy(matrix)
+        self.assertAlmostEqual(point.z, 5)
+        self.assertAlmostEqual(point.y, math.sqrt(75))
+
+    def test_standoff_by_ball_center(self):
+        previous_height = 0
+        for z in (5, 10, 15, 20, 25, 30):
+            point = Point3D.create(1, 2, z)
+            standoff = self.context.standoff_by_ball_center(point)
+
+            ball = standoff.find_children("ball_magnet")[0]
+            for actual, expected in zip(ball.mid().asArray(), point.asArray()):
+                self.assertAlmostEqual(actual, expected)
+
+            # The standoff should get taller as the point gets higher, and always sit on the ground
+            standoff_height = standoff.find_children("screw_base")[0].size().z
+            self.assertGreaterEqual(standoff_height, previous_height)
+            previous_height = standoff_height
+            self.assertAlmostEqual(standoff.find_children("support_base")[0].min().z, 0)
+
+            # And the screw should reach down into the standoff
+            self.assertLess(
+                standoff.find_children("screw")[0].min().z,
+                standoff.find_children("screw_base")[0].max().z)
+
+    def test_instancing(self):
+        context = lalboard.Lalboard(instancing=True)
+        screw = context.screw_design(7, name="screw_a")
+        screw.rx(90).tz(5)
+        other_screw = context.screw_design(7, name="screw_b")
+
+        # Copies that only differ by name share an instance key, and their transform is relative to the original
+        info = lalboard.instancing.instance_info(screw)
+        self.assertEqual(info.key, lalboard.instancing.instance_info(other_screw).key)
+        self.assertNotEqual(info.key, lalboard.instancing.instance_info(context.screw_design(13)).key)
+        transform = lalboard.instancing.relative_transform(
+            screw.world_transform().asArray(), info.source.world_transform().asArray())
+        self.assertTrue(lalboard.instancing.is_rigid(transform))
+        self.assertAlmostEqual(transform[11], 5)
+
+        # Mirrored copies can't be instanced
+        mirrored = context.screw_design(7).scale(-1, 1, 1)
+        info = lalboard.instancing.instance_info(mirrored)
+        self.assertFalse(lalboard.instancing.is_rigid(lalboard.instancing.relative_transform(
+            mirrored.world_transform().asArray(), info.source.world_transform().asArray())))
+
+        self.assertIsNone(lalboard.instancing.instance_info(self.context.screw_design(7)))
+
+    def test_visible_children(self):
+        intersection = Intersection(Box(10, 10, 10, name="first"), Box(5, 5, 20, name="second"), name="intersection")
+        other = Box(2, 2, 2, name="other")
+        hidden = Box(3, 3, 3, name="hidden")
+        group = Group([intersection, other], [hidden])
+
+        self.assertEqual(lalboard.Lalboard._visible_children(group), [intersection, other])
+        # the bodies of an operation are its own, rather than its children's
+        self.assertEqual(lalboard.Lalboard._visible_children(intersection), [])
+
+    def test_mirror_hand(self):
+        key = Box(1, 2, 3, name="thumb_mode_key_right")
+        key.place(-key == 5, -key == 0, -key == 0)
+        assembly = Group([key, Box(1, 1, 1, name="right_post")], name="thumb_assembly_right")
+
+        mirrored = lalboard.Lalboard._mirror_hand(assembly.copy(), left_hand=True)
+        self.assertEqual(mirrored.name, "thumb_assembly_left")
+        self.assertEqual(len(mirrored.find_children("thumb_mode_key_left")), 1)
+        self.assertEqual(len(mirrored.find_children("right_post")), 1)
+        self.assertAlmostEqual(mirrored.find_children("thumb_mode_key_left")[0].min().x, -6)
+        self.assertAlmostEqual(mirrored.find_children("thumb_mode_key_left")[0].max().x, -5)
+
+        # mirroring back gives the original component
+        restored = lalboard.Lalboard._mirror_hand(mirrored.copy(), left_hand=False)
+        self.assertEqual(restored.name, "thumb_assembly_right")
+        self.assertAlmostEqual(restored.find_children("thumb_mode_key_right")[0].min().x, 5)
+
+    def test_batched_difference(self):
+        target = Box(100, 100, 10, name="target")
+        tools = []
+        for x in (10, 30, 50):
+            tool = Box(5, 5, 5, name="magnet")
+            tool.place(-tool == x, -tool == 10, -tool == 0)
+            tools.append(tool)
+        slot = Box(60, 5, 5, name="slot")
+        slot.place(-slot == 0, -slot == 12, -slot == 0)
+
+        result = self.context.batched_difference(target, *tools, slot, name="part")
+        self.assertEqual(result.name, "part")
+        self.assertEqual(len(result.find_children("magnet")), 3)
+        self.assertEqual(len(result.find_children("slot")), 1)
+        self.assertEqual(len(result.find_children("batched_tools")), 1)
+        self.assertEqual(self.context.batching_report.parts["part"], (4, 2))
+
+    def test_draft_detail(self):
+        draft_context = lalboard.Lalboard(detail="draft")
+
+        # the draft proxies have the same bounding boxes as the full detail components
+        for full, draft in (
+                (self.context.screw_design(7), draft_context.screw_design(7)),
+                (self.context.tapered_box(1.45, 1.45, 1.7, 1.7, 1.8, name="magnet_cutout"),
+                 draft_context.tapered_box(1.45, 1.45, 1.7, 1.7, 1.8, name="magnet_cutout")),
+                (self.context.screw_base_flare(), draft_context.screw_base_flare())):
+            self.assertEqual(full.name, draft.name)
+            for full_value, draft_value in zip(full.bounds(), draft.bounds()):
+                for full_coordinate, draft_coordinate in zip(full_value, draft_value):
+                    self.assertAlmostEqual(full_coordinate, draft_coordinate)
+
+        # a draft fillet is a renamed copy of the filleted component
+        box = Box(1, 2, 3, name="box")
+        box.add_named_point("corner", box.max())
+        fillet = draft_context._fillet(box.edges, .1, name="fillet")
+        self.assertEqual(fillet.name, "fillet")
+        self.assertIsNotNone(fillet.named_point("corner"))
+        with self.assertRaises(ValueError):
+            draft_context._fillet([], .1)
+
+        with self.assertRaises(ValueError):
+            lalboard.Lalboard(detail="preview")
+
+    def test_lod_proxy(self):
+        key = Box(2, 4, 6, name="north_key")
+        key.rx(90).rz(30).translate(10, 20, 30)
+        key.add_named_point("tip", key.max())
+
+        proxy = self.context._lod_proxy(key, "box", ["tip"])
+        self.assertEqual(proxy.name, "north_key")
+        # the proxy has the same world transform and bounds as the component it replaces
+        for proxy_value, key_value in zip(proxy.world_transform().asArray(), key.world_transform().asArray()):
+            self.assertAlmostEqual(proxy_value, key_value)
+        for proxy_value, key_value in zip(proxy.bounds(), key.bounds()):
+            for proxy_coordinate, key_coordinate in zip(proxy_value, key_value):
+                self.assertAlmostEqual(proxy_coordinate, key_coordinate)
+        self.assertAlmostEqual(proxy.named_point("tip").point.z, key.max().z)
+
+        with self.assertRaises(ValueError):
+            self.context._lod_proxy(key, "sphere")
+
+    def test_lod_children(self):
+        children = [Box(1, 1, 1, name="cluster"), Box(1, 1, 1, name="pcb"), Box(1, 1, 1, name="front_magnet")]
+        self.assertIs(self.context._lod_children(children, "full", ()), children)
+
+        proxies = self.context._lod_children(children, "box", ["pcb"])
+        self.assertEqual([child.name for child in proxies], ["cluster", "pcb", "front_magnet"])
+        self.assertIsNot(proxies[0], children[0])
+        self.assertIs(proxies[1], children[1])
+        self.assertIs(proxies[2], children[2])
+
+    def test_extreme_faces(self):
+        lower = Box(10, 10, 2, name="lower")
+        upper = Box(4, 4, 3, name="upper")
+        upper.place(-upper == 1, -upper == 1, -upper == +lower)
+        group = Group([lower, upper])
+
+        self.assertEqual(self.context.extreme_faces(group, 2), [lower.bottom])
+        self.assertEqual(self.context.extreme_faces(group, 2, maximum=True), [upper.top])
+        self.assertEqual(self.context.faces_in_plane(group, 2, 2), [lower.top, upper.bottom])
+
+        # the index is rebuilt once the component has moved
+        group.tz(5)
+        self.assertEqual(self.context.faces_in_plane(group, 2, 2), [])
+        self.assertEqual(self.context.faces_in_plane(group, 2, 7), [lower.top, upper.bottom])
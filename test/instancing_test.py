@@ -0,0 +1,98 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import geometry
+import instancing
+
+
+class InstancingTest(unittest.TestCase):
+
+    def assertMatrixEqual(self, actual, expected):
+        for actual_value, expected_value in zip(actual, expected):
+            self.assertAlmostEqual(actual_value, expected_value)
+
+    def test_instance_key(self):
+        key = instancing.instance_key("cluster_key_short", [], {"name": "south_key"}, "hash")
+        self.assertEqual(key, instancing.instance_key("cluster_key_short", [], {"name": "east_key"}, "hash"))
+        self.assertEqual(key, instancing.instance_key("cluster_key_short", [], {}, "hash"))
+        self.assertNotEqual(key, instancing.instance_key("cluster_key_short", [], {"name": "east_key"}, "hash2"))
+        self.assertNotEqual(key, instancing.instance_key("cluster_key_tall", [], {}, "hash"))
+        self.assertNotEqual(
+            instancing.instance_key("screw_design", [7], {}, "hash"),
+            instancing.instance_key("screw_design", [13], {}, "hash"))
+
+    def test_mark(self):
+        class Component(object):
+            pass
+
+        source = Component()
+        component = Component()
+        self.assertIsNone(instancing.instance_info(component))
+        instancing.mark(component, "key", source, "cluster_key_short")
+        self.assertEqual(instancing.instance_info(component).key, "key")
+        self.assertIs(instancing.instance_info(component).source, source)
+        self.assertEqual(instancing.instance_info(component).name, "cluster_key_short")
+
+    def test_relative_transform(self):
+        source_world = geometry.multiply(
+            geometry.translation_matrix((1, 2, 3)), geometry.rotation_matrix(.3, (1, 1, 0)))
+        transform = geometry.multiply(
+            geometry.rotation_matrix(1.2, (0, 0, 1), (5, 0, 0)), geometry.translation_matrix((0, 0, 10)))
+        world = geometry.multiply(transform, source_world)
+
+        self.assertMatrixEqual(instancing.relative_transform(world, source_world), transform)
+        self.assertTrue(instancing.is_rigid(instancing.relative_transform(world, source_world)))
+
+    def test_is_rigid(self):
+        self.assertTrue(instancing.is_rigid(geometry.identity_matrix()))
+        self.assertTrue(instancing.is_rigid(geometry.rotation_matrix(math.radians(37), (1, 2, 3), (4, 5, 6))))
+        self.assertTrue(instancing.is_rigid(geometry.euler_angles_matrix(10, 20, 30)))
+
+        mirror = geometry.identity_matrix()
+        mirror[0] = -1
+        self.assertFalse(instancing.is_rigid(mirror))
+
+        scale = geometry.identity_matrix()
+        scale[0] = scale[5] = scale[10] = .1
+        self.assertFalse(instancing.is_rigid(scale))
+
+    def test_scaled_transform(self):
+        transform = geometry.multiply(
+            geometry.translation_matrix((10, 20, 30)), geometry.rotation_matrix(.5, (0, 1, 1)))
+        scale = geometry.identity_matrix()
+        scale[0] = scale[5] = scale[10] = .1
+
+        # transforming a scaled point by the scaled transform is the same as scaling the transformed point
+        point = (3, -4, 5)
+        self.assertMatrixEqual(
+            geometry.transform_point(
+                instancing.scaled_transform(transform, .1), geometry.transform_point(scale, point)),
+            geometry.transform_point(scale, geometry.transform_point(transform, point)))
+
+    def test_registry(self):
+        registry = instancing.InstanceRegistry()
+        self.assertIsNone(registry.get("key"))
+        registry.add("key", "component")
+        registry.record_occurrence()
+        registry.record_occurrence()
+        self.assertEqual(registry.get("key"), "component")
+        self.assertEqual(registry.unique_count, 1)
+        self.assertEqual(registry.summary(), "2 instanced occurrences of 1 unique components")
@@ -0,0 +1,166 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import interference
+
+
+def box_body(name, min_point, max_point, group=None, divisions=1):
+    """Returns a MeshBody for an axis-aligned box, with each face split into divisions x divisions squares."""
+    nodes = []
+    indices = []
+
+    def add_face(origin, u, v):
+        start = len(nodes) // 3
+        for i in range(divisions + 1):
+            for j in range(divisions + 1):
+                nodes.extend(origin[axis] + u[axis] * i / divisions + v[axis] * j / divisions for axis in range(3))
+        for i in range(divisions):
+            for j in range(divisions):
+                a = start + i * (divisions + 1) + j
+                b = a + divisions + 1
+                indices.extend((a, b, b + 1, a, b + 1, a + 1))
+
+    size = [max_point[axis] - min_point[axis] for axis in range(3)]
+    x = (size[0], 0, 0)
+    y = (0, size[1], 0)
+    z = (0, 0, size[2])
+    add_face(min_point, y, x)
+    add_face((min_point[0], min_point[1], max_point[2]), x, y)
+    add_face(min_point, x, z)
+    add_face((min_point[0], max_point[1], min_point[2]), z, x)
+    add_face(min_point, z, y)
+    add_face((max_point[0], min_point[1], min_point[2]), y, z)
+    return interference.MeshBody(name, nodes, indices, group)
+
+
+class InterferenceTest(unittest.TestCase):
+
+    def test_triangles_intersect(self):
+        triangle = ((0, 0, 0), (10, 0, 0), (0, 10, 0))
+        self.assertTrue(interference.triangles_intersect(triangle, ((2, 2, -1), (2, 2, 1), (4, 4, 1))))
+        self.assertFalse(interference.triangles_intersect(triangle, ((20, 2, -1), (20, 2, 1), (24, 4, 1))))
+        # coplanar and touching triangles don't count
+        self.assertFalse(interference.triangles_intersect(triangle, ((1, 1, 0), (2, 1, 0), (1, 2, 0))))
+        self.assertFalse(interference.triangles_intersect(triangle, ((2, 2, 0), (2, 2, 1), (4, 4, 1))))
+        # and neither do triangles that cross by less than the tolerance
+        self.assertFalse(interference.triangles_intersect(triangle, ((2, 2, -.05), (2, 2, 1), (4, 4, 1)), .1))
+
+    def test_triangles_touch(self):
+        triangle = ((0, 0, 0), (10, 0, 0), (0, 10, 0))
+        self.assertTrue(interference.triangles_touch(triangle, ((2, 2, -1), (2, 2, 1), (4, 4, 1))))
+        # unlike triangles_intersect, coplanar and touching triangles count
+        self.assertTrue(interference.triangles_touch(triangle, ((1, 1, 0), (2, 1, 0), (1, 2, 0))))
+        self.assertTrue(interference.triangles_touch(triangle, ((2, 2, 0), (2, 2, 1), (4, 4, 1))))
+        self.assertTrue(interference.triangles_touch(triangle, ((2, 2, .05), (2, 2, 1), (4, 4, 1)), .1))
+        self.assertFalse(interference.triangles_touch(triangle, ((2, 2, .5), (2, 2, 1), (4, 4, 1)), .1))
+        self.assertFalse(interference.triangles_touch(triangle, ((20, 2, -1), (20, 2, 1), (24, 4, 1))))
+
+    def test_closest_point_on_triangle(self):
+        triangle = ((0, 0, 0), (10, 0, 0), (0, 10, 0))
+        self.assertEqual(interference.closest_point_on_triangle((2, 2, 5), triangle), (2, 2, 0))
+        self.assertEqual(interference.closest_point_on_triangle((-5, -5, 0), triangle), (0, 0, 0))
+        self.assertEqual(interference.closest_point_on_triangle((5, -3, 1), triangle), (5, 0, 0))
+
+    def test_contains(self):
+        body = box_body("box", (0, 0, 0), (10, 10, 10), divisions=3)
+        self.assertTrue(body.contains((5, 5, 5)))
+        self.assertTrue(body.contains((.1, 9.9, .1)))
+        self.assertFalse(body.contains((15, 5, 5)))
+        self.assertFalse(body.contains((5, -1, 5)))
+        self.assertAlmostEqual(body.surface_distance((5, 5, 3)), 3)
+
+    def test_overlapping_boxes(self):
+        interferences = interference.find_interferences([
+            box_body("a", (0, 0, 0), (10, 10, 10)),
+            box_body("b", (8, 2, 2), (18, 8, 8))])
+        self.assertEqual(len(interferences), 1)
+        self.assertEqual({interferences[0].name1, interferences[0].name2}, {"a", "b"})
+        self.assertAlmostEqual(interferences[0].depth, 2)
+
+    def test_overlapping_divided_boxes(self):
+        # The boxes share their top and bottom planes, so their faces there overlap without crossing. The vertices in
+        # the middle of b's left face are still the deepest.
+        interferences = interference.find_interferences([
+            box_body("a", (0, 0, 0), (10, 10, 10), divisions=5),
+            box_body("b", (9, 0, 0), (19, 10, 10), divisions=5)])
+        self.assertEqual(len(interferences), 1)
+        self.assertAlmostEqual(interferences[0].depth, 1)
+
+    def test_touching_boxes(self):
+        self.assertEqual(interference.find_interferences([
+            box_body("a", (0, 0, 0), (10, 10, 10)),
+            box_body("b", (10, 2, 2), (18, 8, 8)),
+            box_body("c", (0, 0, 10), (10, 10, 20))]), [])
+
+        # only the triangles near the shared face are checked, but there are still some on either side of it
+        self.assertEqual(interference.find_interferences([
+            box_body("a", (0, 0, 0), (10, 10, 10), divisions=20),
+            box_body("b", (2, 2, 10), (8, 8, 12), divisions=20)]), [])
+        self.assertEqual(len(interference.find_interferences([
+            box_body("a", (0, 0, 0), (10, 10, 10), divisions=20),
+            box_body("b", (2, 2, 9.5), (8, 8, 12), divisions=20)])), 1)
+
+    def test_contained_box(self):
+        interferences = interference.find_interferences([
+            box_body("wall", (0, 0, 0), (10, 10, 10)),
+            box_body("magnet", (4, 4, 4), (6, 6, 6))])
+        self.assertEqual(len(interferences), 1)
+        self.assertEqual({interferences[0].name1, interferences[0].name2}, {"wall", "magnet"})
+        self.assertAlmostEqual(interferences[0].depth, 4)
+
+        # a box sitting against the inside of a cutout doesn't count
+        self.assertEqual(interference.find_interferences([
+            box_body("cutout_side", (0, 0, 0), (4, 10, 10)),
+            box_body("magnet", (4, 4, 4), (6, 6, 6))]), [])
+
+    def test_same_group(self):
+        self.assertEqual(interference.find_interferences([
+            box_body("a", (0, 0, 0), (10, 10, 10), group="cluster"),
+            box_body("b", (8, 2, 2), (18, 8, 8), group="cluster")]), [])
+
+    def test_crossing_bars(self):
+        interferences = interference.find_interferences([
+            box_body("a", (-10, -1, -1), (10, 1, 1)),
+            box_body("b", (-1, -10, -.5), (1, 10, .5))])
+        self.assertEqual(len(interferences), 1)
+        self.assertAlmostEqual(interferences[0].depth, 0)
+
+    def test_ordered_by_depth(self):
+        interferences = interference.find_interferences([
+            box_body("a", (0, 0, 0), (10, 10, 10)),
+            box_body("b", (9, 2, 2), (18, 8, 8)),
+            box_body("c", (-3, 2, 2), (1, 8, 8)),
+            box_body("d", (50, 50, 50), (60, 60, 60))])
+        self.assertEqual([(item.name1, item.name2) for item in interferences], [("c", "a"), ("a", "b")])
+        self.assertAlmostEqual(interferences[0].depth, 1)
+        self.assertAlmostEqual(interferences[1].depth, 1)
+
+    def test_many_bodies(self):
+        bodies = [box_body("box_%d_%d" % (i, j), (i * 10, j * 10, 0), (i * 10 + 10, j * 10 + 10, 10), divisions=8)
+                  for i in range(5) for j in range(5)]
+        bodies.append(box_body("overlapping", (5, 5, 5), (15, 15, 15), divisions=8))
+
+        start = time.perf_counter()
+        interferences = interference.find_interferences(bodies)
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(sorted(name for item in interferences for name in (item.name1, item.name2)
+                                if name != "overlapping"),
+                         ["box_0_0", "box_0_1", "box_1_0", "box_1_1"])
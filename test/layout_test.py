@@ -0,0 +1,127 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import layout
+
+
+class RecordingPlacement(object):
+    """Records the setters that are called on it, in place of an actual placement object."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return record
+
+
+class LayoutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_layout(self, contents):
+        path = os.path.join(self.temp_dir.name, "layout.json")
+        with open(path, "w") as layout_file:
+            json.dump(contents, layout_file)
+        return layout.Layout(path)
+
+    def test_default_layout(self):
+        default_layout = layout.Layout()
+        self.assertEqual(default_layout.base_names(), ["static_base", "steel_base"])
+        for base in default_layout.base_names():
+            for left_hand in (True, False):
+                hand = default_layout.hand(base, left_hand)
+                self.assertEqual(len(hand.fingers), 4)
+                self.assertTrue(all(finger.relative for finger in hand.fingers))
+                self.assertFalse(hand.thumb.relative)
+
+    def test_configure_relative_finger(self):
+        finger = layout.ClusterLayout(
+            {"relative_cylindrical": [116.53, 31.09], "gap": -8.44, "euler_angles": [13.45, -.16, 1.46]})
+        placement = finger.configure(RecordingPlacement(), left_hand=True, z_offset=2)
+        self.assertEqual(placement.calls, [
+            ("set_cylindrical", (116.53, 33.09), {"gap": -8.44}),
+            ("set_rotation_by_euler_angles", (13.45, -.16, 1.46), {})])
+
+    def test_configure_support_lengths(self):
+        finger = layout.ClusterLayout({
+            "cartesian": [1, 2, 3], "support_lengths": [15, 16, 20], "rz": 41, "add_clip": True, "tall_clip": False})
+        self.assertEqual(finger.configure(RecordingPlacement()).calls, [
+            ("set_cartesian", (1, 2, 3), {}),
+            ("set_rotation_by_support_lengths", (15, 16, 20), {"rz": 41, "add_clip": True, "tall_front_clip": False})])
+
+        thumb = layout.ClusterLayout({"cartesian": [1, 2, 3], "support_lengths": [23, 27, 30], "rz": 14}, thumb=True)
+        self.assertEqual(thumb.configure(RecordingPlacement(), left_hand=True).calls, [
+            ("set_cartesian", (1, 2, 3), {}),
+            ("set_rotation_by_support_lengths", (23, 27, 30), {"rz": 14, "left_hand": True})])
+
+    def test_invalid_entries(self):
+        invalid_entries = [
+            ({"euler_angles": [1, 2, 3]}, False),
+            ({"cartesian": [1, 2, 3], "cylindrical": [1, 2, 3], "euler_angles": [1, 2, 3]}, False),
+            ({"cartesian": [1, 2], "euler_angles": [1, 2, 3]}, False),
+            ({"cartesian": [1, 2, 3], "support_lengths": [1, 2, 3]}, False),
+            ({"cartesian": [1, 2, 3], "euler_angles": [1, 2, 3], "gap": 1}, False),
+            ({"cartesian": [1, 2, 3], "euler_angles": [1, 2, 3], "colour": "red"}, False),
+            ({"relative_cartesian": [1, 2], "euler_angles": [1, 2, 3]}, True),
+            ({"cartesian": [1, 2, 3], "euler_angles": [1, 2, 3], "add_clip": True}, True),
+        ]
+        for entry, thumb in invalid_entries:
+            with self.assertRaises(ValueError, msg=str(entry)):
+                layout.ClusterLayout(entry, thumb=thumb)
+
+    def test_missing_hand(self):
+        hand_layout = self.write_layout({"static_base": {"left": {
+            "fingers": [], "thumb": {"cartesian": [1, 2, 3], "euler_angles": [1, 2, 3]}}}})
+        self.assertEqual(hand_layout.hand("static_base", left_hand=True).fingers, [])
+        with self.assertRaises(ValueError):
+            hand_layout.hand("static_base", left_hand=False)
+        with self.assertRaises(ValueError):
+            hand_layout.hand("steel_base", left_hand=True)
+
+    def test_placement_cache(self):
+        cache = layout.PlacementCache(os.path.join(self.temp_dir.name, "cache"))
+        contents = {"static_base": {}}
+        layout_file = self.write_layout(contents)
+        key = cache.key(layout_file, "static_base", True, 0.0, "design")
+        self.assertIsNone(cache.load(key))
+
+        fingers = [layout.ResolvedPlacement((1, 2, 3), range(16)), layout.ResolvedPlacement((4, 5, 6), range(16))]
+        thumb = layout.ResolvedPlacement((7, 8, 9), range(16))
+        cache.store(key, fingers, thumb)
+
+        cached_fingers, cached_thumb = cache.load(key)
+        self.assertEqual([finger.position for finger in cached_fingers], [(1, 2, 3), (4, 5, 6)])
+        self.assertEqual(cached_thumb.rotation_matrix, tuple(range(16)))
+
+        # Any change to the inputs should result in a different key
+        self.assertNotEqual(key, cache.key(layout_file, "static_base", False, 0.0, "design"))
+        self.assertNotEqual(key, cache.key(layout_file, "static_base", True, 1.0, "design"))
+        self.assertNotEqual(key, cache.key(layout_file, "static_base", True, 0.0, "changed design"))
+        contents["static_base"]["left"] = {}
+        self.assertNotEqual(key, cache.key(self.write_layout(contents), "static_base", True, 0.0, "design"))
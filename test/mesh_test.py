@@ -0,0 +1,92 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import geometry
+import mesh
+
+_namespace = {"m": mesh._model_namespace}
+
+
+def cube(size):
+    result = mesh.Mesh()
+    for z in (0, size):
+        for y in (0, size):
+            for x in (0, size):
+                result.add_vertex((x, y, z))
+    result.add_quad(0, 2, 3, 1)
+    result.add_quad(4, 5, 7, 6)
+    result.add_quad(0, 1, 5, 4)
+    result.add_quad(2, 6, 7, 3)
+    result.add_quad(0, 4, 6, 2)
+    result.add_quad(1, 3, 7, 5)
+    return result
+
+
+class MeshTest(unittest.TestCase):
+
+    def test_watertight(self):
+        closed = cube(2)
+        self.assertTrue(closed.is_watertight())
+        self.assertAlmostEqual(closed.volume(), 8)
+
+        open_mesh = cube(2)
+        open_mesh.triangles.pop()
+        self.assertFalse(open_mesh.is_watertight())
+
+        flipped = cube(2)
+        first, second, third = flipped.triangles[0]
+        flipped.triangles[0] = (first, third, second)
+        self.assertFalse(flipped.is_watertight())
+
+    def test_transform(self):
+        moved = cube(1).transform(geometry.translation_matrix((1, 2, 3)))
+        self.assertEqual(moved.bounds(), ((1, 2, 3), (2, 3, 4)))
+        self.assertAlmostEqual(moved.volume(), 1)
+
+    def test_write_3mf(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "cubes.3mf")
+            mesh.write_3mf(path, [("small", cube(1)), ("large", cube(3))],
+                           [None, geometry.translation_matrix((10, 0, 0))])
+
+            with zipfile.ZipFile(path) as archive:
+                self.assertIn("[Content_Types].xml", archive.namelist())
+                self.assertIn("_rels/.rels", archive.namelist())
+                model = ElementTree.fromstring(archive.read("3D/3dmodel.model"))
+
+        self.assertEqual(model.get("unit"), "millimeter")
+        objects = model.findall("m:resources/m:object", _namespace)
+        self.assertEqual([item.get("name") for item in objects], ["small", "large"])
+        self.assertEqual(len(objects[1].findall("m:mesh/m:vertices/m:vertex", _namespace)), 8)
+        self.assertEqual(len(objects[1].findall("m:mesh/m:triangles/m:triangle", _namespace)), 12)
+
+        items = model.findall("m:build/m:item", _namespace)
+        self.assertIsNone(items[0].get("transform"))
+        self.assertEqual(items[1].get("transform"), "1 0 0 0 1 0 0 0 1 10 0 0")
+
+    def test_parse_transform(self):
+        matrix = geometry.multiply(geometry.translation_matrix((1, 2, 3)), geometry.rotation_matrix(.5, (0, 0, 1)))
+        parsed = mesh.parse_transform(mesh.format_transform(matrix))
+        for value, expected in zip(parsed, matrix):
+            self.assertAlmostEqual(value, expected, places=5)
+        self.assertEqual(mesh.parse_transform(None), geometry.identity_matrix())
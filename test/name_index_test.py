@@ -0,0 +1,98 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import copy
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import name_index
+
+
+class Component(object):
+    def __init__(self, name, *children):
+        self.name = name
+        self.parent = None
+        self._children = list(children)
+        for child in children:
+            child.parent = self
+
+    def children(self):
+        return list(self._children)
+
+    def find_children(self, name, recursive=True):
+        result = []
+        for child in self.children():
+            if child.name == name:
+                result.append(child)
+            if recursive:
+                result.extend(child.find_children(name, recursive))
+        return result
+
+
+def thumb_base():
+    return Component(
+        "thumb_cluster",
+        Component("body"),
+        Component("side_attachment", Component("magnet_cutout"), Component("negatives", Component("magnet_cutout"))),
+        Component("back_attachment", Component("magnet_cutout")),
+        Component("magnet_cutout"),
+        Component("front_attachment", Component("magnet_cutout")))
+
+
+class NameIndexTest(unittest.TestCase):
+
+    def test_find(self):
+        base = thumb_base()
+        index = name_index.NameIndex(base)
+        for name in ("magnet_cutout", "body", "side_attachment", "nonexistent"):
+            self.assertEqual(index.find(name), base.find_children(name))
+            self.assertEqual(index.find(name, recursive=False), base.find_children(name, recursive=False))
+
+        side_attachment = base.find_children("side_attachment")[0]
+        self.assertEqual(index.find("magnet_cutout", side_attachment), side_attachment.find_children("magnet_cutout"))
+        self.assertEqual(len(index.find("magnet_cutout", side_attachment)), 2)
+        self.assertEqual(index.find("magnet_cutout", base.find_children("body")[0]), [])
+
+    def test_find_path(self):
+        base = thumb_base()
+        for attachment in ("side_attachment", "back_attachment", "front_attachment"):
+            self.assertEqual(
+                name_index.find(base, attachment + "/magnet_cutout"),
+                base.find_children(attachment)[0].find_children("magnet_cutout"))
+        self.assertEqual(
+            name_index.find(base, "side_attachment/negatives/magnet_cutout"),
+            base.find_children("negatives")[0].find_children("magnet_cutout"))
+        self.assertEqual(name_index.find(base, "body/magnet_cutout"), [])
+
+    def test_index_reuse(self):
+        base = thumb_base()
+        index = name_index.index(base)
+        self.assertIs(name_index.index(base), index)
+
+        side_attachment = name_index.find(base, "side_attachment")[0]
+        self.assertIs(name_index.index(side_attachment), index)
+        self.assertEqual(
+            name_index.find(side_attachment, "magnet_cutout"), side_attachment.find_children("magnet_cutout"))
+
+    def test_copied_index(self):
+        base = thumb_base()
+        name_index.index(base)
+
+        base_copy = copy.deepcopy(base)
+        base_copy._children.pop()
+        self.assertEqual(name_index.find(base_copy, "magnet_cutout"), base_copy.find_children("magnet_cutout"))
+        self.assertEqual(len(name_index.find(base_copy, "magnet_cutout")), 4)
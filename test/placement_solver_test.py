@@ -0,0 +1,162 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import geometry
+import placement_solver
+
+
+def box_mesh(min_point, max_point):
+    """Returns the (node_coordinates, node_indices) of a triangle mesh for an axis-aligned box."""
+    corners = []
+    for x in (min_point[0], max_point[0]):
+        for y in (min_point[1], max_point[1]):
+            for z in (min_point[2], max_point[2]):
+                corners.extend((x, y, z))
+
+    # corner index = x_bit * 4 + y_bit * 2 + z_bit
+    faces = [
+        (0, 1, 3, 2), (4, 6, 7, 5),
+        (0, 4, 5, 1), (2, 3, 7, 6),
+        (0, 2, 6, 4), (1, 5, 7, 3)]
+    indices = []
+    for a, b, c, d in faces:
+        indices.extend((a, b, c, a, c, d))
+    return corners, indices
+
+
+def box_points(min_point, max_point, spacing):
+    return placement_solver.sample_mesh(*box_mesh(min_point, max_point), spacing)
+
+
+class PlacementSolverTest(unittest.TestCase):
+
+    def test_sample_mesh_spacing(self):
+        points = box_points((0, 0, 0), (10, 10, 10), 1)
+        cloud = placement_solver.PointCloud(points)
+
+        for actual, expected in zip(cloud.bounds[0] + cloud.bounds[1], (0, 0, 0, 10, 10, 10)):
+            self.assertAlmostEqual(actual, expected)
+
+        # any point on the surface should be within a spacing of a sampled point
+        test_random = random.Random(0)
+        for _ in range(100):
+            surface_point = [test_random.uniform(0, 10), test_random.uniform(0, 10), 10]
+            self.assertLess(cloud.nearest_distance(surface_point), 1)
+
+    def test_nearest_distance_matches_brute_force(self):
+        test_random = random.Random(1)
+        points = [(test_random.uniform(-10, 10), test_random.uniform(-10, 10), test_random.uniform(-10, 10))
+                  for _ in range(500)]
+        cloud = placement_solver.PointCloud(points)
+
+        for _ in range(50):
+            query = (test_random.uniform(-20, 20), test_random.uniform(-20, 20), test_random.uniform(-20, 20))
+            expected = min(geometry.length(geometry.subtract(query, point)) for point in points)
+            self.assertAlmostEqual(cloud.nearest_distance(query), expected)
+
+    def test_min_distance_matches_brute_force(self):
+        test_random = random.Random(2)
+        points1 = [(test_random.uniform(-10, 10), test_random.uniform(-10, 10), test_random.uniform(-10, 10))
+                   for _ in range(300)]
+        points2 = [(test_random.uniform(-10, 10), test_random.uniform(-10, 10), test_random.uniform(-10, 10))
+                   for _ in range(300)]
+        offset = (15, 3, -2)
+
+        expected = min(
+            geometry.length(geometry.subtract(point1, geometry.add(point2, offset)))
+            for point1 in points1 for point2 in points2)
+        self.assertAlmostEqual(
+            placement_solver.PointCloud(points1).min_distance(placement_solver.PointCloud(points2), offset), expected)
+
+    def test_min_distance_with_offset(self):
+        cloud = placement_solver.PointCloud(box_points((0, 0, 0), (10, 10, 10), 1))
+        other = placement_solver.PointCloud(box_points((0, 0, 0), (5, 5, 5), 1))
+
+        self.assertAlmostEqual(cloud.min_distance(other, (13, 0, 0)), 3)
+        self.assertAlmostEqual(cloud.min_distance(other, (-5, -5, 13)), 3)
+
+    def test_solve_cylindrical_theta(self):
+        fixed = placement_solver.PointCloud(box_points((-5, 95, -5), (5, 105, 5), .25))
+        moving = placement_solver.PointCloud(box_points((-5, -5, -5), (5, 5, 5), .25))
+
+        # The boxes touch when the moving box's reference point is at x=10.
+        expected_theta = math.degrees(math.asin(10 / 100))
+
+        # The sampled distance is only accurate to about the sample spacing, so leave that much clearance to avoid
+        # overshooting into the fixed box.
+        theta = placement_solver.solve_cylindrical_theta(
+            moving, fixed, radius=100, z=0, start_theta=0, away_direction=1, clearance=.25)
+        self.assertGreaterEqual(theta, expected_theta)
+        self.assertLess(theta, expected_theta + .3)
+
+        theta = placement_solver.solve_cylindrical_theta(
+            moving, fixed, radius=100, z=0, start_theta=0, away_direction=-1, clearance=.25)
+        self.assertLessEqual(theta, -expected_theta)
+        self.assertGreater(theta, -expected_theta - .3)
+
+    def test_solve_cylindrical_theta_with_clearance(self):
+        fixed = placement_solver.PointCloud(box_points((-5, 95, -5), (5, 105, 5), .25))
+        moving = placement_solver.PointCloud(box_points((-5, -5, -5), (5, 5, 5), .25))
+
+        theta = placement_solver.solve_cylindrical_theta(
+            moving, fixed, radius=100, z=0, start_theta=0, away_direction=1, clearance=2)
+
+        distance = fixed.min_distance(moving, geometry.cylindrical_to_cartesian(100, theta, 0))
+        self.assertGreaterEqual(distance, 2)
+        self.assertLess(distance, 2.5)
+
+    def test_solve_cylindrical_theta_no_contact(self):
+        fixed = placement_solver.PointCloud(box_points((-5, 95, -5), (5, 105, 5), 1))
+        moving = placement_solver.PointCloud(box_points((-5, -5, -5), (5, 5, 5), 1))
+
+        with self.assertRaises(ValueError):
+            placement_solver.solve_cylindrical_theta(
+                moving, fixed, radius=100, z=50, start_theta=0, away_direction=1, max_travel=90)
+
+    def test_solve_translation(self):
+        fixed = placement_solver.PointCloud(box_points((20, -5, -5), (30, 5, 5), .25))
+        moving = placement_solver.PointCloud(box_points((-5, -5, -5), (5, 5, 5), .25))
+
+        # The boxes touch when the moving box's reference point is at x=15.
+        travel = placement_solver.solve_translation(moving, fixed, (0, 2, 1), (1, 0, 0), clearance=.25)
+        self.assertLessEqual(travel, 15)
+        self.assertGreater(travel, 14.7)
+
+        travel = placement_solver.solve_translation(moving, fixed, (50, 2, 1), (-2, 0, 0), clearance=.25)
+        self.assertLessEqual(travel, 15)
+        self.assertGreater(travel, 14.7)
+
+    def test_solve_translation_with_clearance(self):
+        fixed = placement_solver.PointCloud(box_points((20, -5, -5), (30, 5, 5), .25))
+        moving = placement_solver.PointCloud(box_points((-5, -5, -5), (5, 5, 5), .25))
+
+        travel = placement_solver.solve_translation(moving, fixed, (0, 0, 0), (1, 0, 0), clearance=2)
+        distance = fixed.min_distance(moving, (travel, 0, 0))
+        self.assertGreaterEqual(distance, 2)
+        self.assertLess(distance, 2.5)
+
+    def test_solve_translation_no_contact(self):
+        fixed = placement_solver.PointCloud(box_points((20, -5, -5), (30, 5, 5), 1))
+        moving = placement_solver.PointCloud(box_points((-5, -5, -5), (5, 5, 5), 1))
+
+        with self.assertRaises(ValueError):
+            placement_solver.solve_translation(moving, fixed, (0, 0, 20), (1, 0, 0), max_travel=100)
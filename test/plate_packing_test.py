@@ -0,0 +1,184 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import ast
+import json
+import math
+import os
+import sys
+import tempfile
+import unittest
+import zipfile
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import export_scheduler
+import geometry
+import mesh
+import plate_packing
+
+_namespace = {"m": mesh._model_namespace}
+
+
+def box(width, depth, height):
+    result = mesh.Mesh()
+    for z in (0, height):
+        for y in (0, depth):
+            for x in (0, width):
+                result.add_vertex((x, y, z))
+    result.add_quad(0, 2, 3, 1)
+    result.add_quad(4, 5, 7, 6)
+    result.add_quad(0, 1, 5, 4)
+    result.add_quad(2, 6, 7, 3)
+    result.add_quad(0, 4, 6, 2)
+    result.add_quad(1, 3, 7, 5)
+    return result
+
+
+def hull_bounds(hull):
+    return geometry.bounds((x, y, 0) for x, y in hull)
+
+
+def placed_bounds(footprint, transform):
+    return geometry.bounds(geometry.transform_point(transform, (x, y, 0)) for x, y in footprint.hull)
+
+
+class PlatePackingTest(unittest.TestCase):
+
+    def test_convex_hull(self):
+        points = [(0, 0), (2, 0), (1, 1), (2, 2), (0, 2), (1, 0), (.5, 1.5)]
+        self.assertEqual(plate_packing.convex_hull(points), [(0, 0), (2, 0), (2, 2), (0, 2)])
+
+    def test_min_area_rotation(self):
+        rectangle = [(0, 0), (4, 0), (4, 1), (0, 1)]
+        rotated = [tuple(geometry.transform_point(geometry.rotation_matrix(.3, (0, 0, 1)), (x, y, 0))[:2])
+                   for x, y in rectangle]
+        footprint = plate_packing.Footprint(plate_packing.convex_hull(rotated), -2)
+        self.assertAlmostEqual(footprint.width * footprint.depth, 4)
+        self.assertAlmostEqual(max(footprint.width, footprint.depth), 4)
+
+        transform = footprint.transform(10, 20)
+        bounds_min, bounds_max = placed_bounds(footprint, transform)
+        self.assertAlmostEqual(bounds_min[0], 10)
+        self.assertAlmostEqual(bounds_min[1], 20)
+        self.assertAlmostEqual(bounds_max[0] - bounds_min[0], footprint.width)
+        self.assertAlmostEqual(geometry.transform_point(transform, (0, 0, -2))[2], 0)
+
+        bounds_min, bounds_max = placed_bounds(footprint, footprint.transform(0, 0, rotated=True))
+        self.assertAlmostEqual(bounds_max[0] - bounds_min[0], footprint.depth)
+
+    def test_pack_plates(self):
+        bed = plate_packing.Bed(100, 80, spacing=2, margin=3)
+        footprints = {
+            "large": plate_packing.Footprint([(0, 0), (60, 0), (60, 40), (0, 40)], 0),
+            "small": plate_packing.Footprint([(0, 0), (15, 0), (15, 10), (0, 10)], 0)}
+        plates = plate_packing.pack_plates(footprints, {"large": 3, "small": 10}, bed)
+
+        # only 2 of the large parts fit on each plate, when they're rotated
+        self.assertEqual(len(plates), 2)
+        self.assertEqual(sorted(name for plate in plates for name, _ in plate.placements),
+                         ["large"] * 3 + ["small"] * 10)
+        for plate in plates:
+            rects = [placed_bounds(footprints[name], transform) for name, transform in plate.placements]
+            for index, (bounds_min, bounds_max) in enumerate(rects):
+                self.assertGreaterEqual(bounds_min[0], bed.margin - 1e-6)
+                self.assertGreaterEqual(bounds_min[1], bed.margin - 1e-6)
+                self.assertLessEqual(bounds_max[0], bed.width - bed.margin + 1e-6)
+                self.assertLessEqual(bounds_max[1], bed.depth - bed.margin + 1e-6)
+                for other_min, other_max in rects[index + 1:]:
+                    self.assertTrue(
+                        any(bounds_max[axis] + bed.spacing <= other_min[axis] + 1e-6 or
+                            other_max[axis] + bed.spacing <= bounds_min[axis] + 1e-6 for axis in range(2)))
+
+        with self.assertRaises(ValueError):
+            plate_packing.pack_plates(
+                {"huge": plate_packing.Footprint([(0, 0), (200, 0), (200, 10), (0, 10)], 0)}, {"huge": 1}, bed)
+
+    def test_pack_kit(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # A part standing on its end, and scaled from centimeters, to check that it's laid into place on the bed
+            mesh.write_3mf(os.path.join(temp_dir, "block.3mf"), [("block", box(4, 2, 1))],
+                           [geometry.translation_matrix((5, 5, 5))])
+            with zipfile.ZipFile(os.path.join(temp_dir, "block.3mf")) as archive:
+                files = {name: archive.read(name) for name in archive.namelist()}
+            files["3D/3dmodel.model"] = files["3D/3dmodel.model"].replace(b'"millimeter"', b'"centimeter"')
+            with zipfile.ZipFile(os.path.join(temp_dir, "block.3mf"), "w") as archive:
+                for name, data in files.items():
+                    archive.writestr(name, data)
+            mesh.write_3mf(os.path.join(temp_dir, "pin.3mf"), [("pin", box(3, 3, 10))])
+
+            kit_path = os.path.join(temp_dir, "kit.json")
+            with open(kit_path, "w") as kit_file:
+                json.dump({"bed": {"width": 100, "depth": 100, "spacing": 2, "margin": 2},
+                           "plates": {"pla": {"block": 3, "pin": 5}, "petg": {"pin": 2}, "tpu": {"block": 9}}},
+                          kit_file)
+
+            outputs = plate_packing.pack_kit(kit_path, temp_dir)
+            self.assertEqual([os.path.basename(output) for output in outputs],
+                             ["pla_1.3mf", "petg_1.3mf", "tpu_1.3mf", "tpu_2.3mf"])
+
+            with zipfile.ZipFile(outputs[0]) as archive:
+                model = ElementTree.fromstring(archive.read("3D/3dmodel.model"))
+            objects = model.findall("m:resources/m:object", _namespace)
+            self.assertEqual([item.get("name") for item in objects], [None, "block", None, "pin"])
+            self.assertEqual(len(objects[0].findall("m:mesh/m:vertices/m:vertex", _namespace)), 8)
+            self.assertEqual(len(objects[0].findall("m:mesh/m:triangles/m:triangle", _namespace)), 12)
+            items = model.findall("m:build/m:item", _namespace)
+            self.assertEqual([item.get("objectid") for item in items].count("2"), 3)
+
+            plate = plate_packing.PartModel("pla_1", outputs[0])
+            bounds_min, bounds_max = hull_bounds(plate.footprint.hull)
+            self.assertGreaterEqual(min(bounds_min[:2]), 2 - 1e-3)
+            self.assertLessEqual(max(bounds_max[:2]), 98 + 1e-3)
+            self.assertAlmostEqual(plate.footprint.min_z, 0, places=3)
+
+            block = plate_packing.PartModel("block", os.path.join(temp_dir, "block.3mf"))
+            self.assertAlmostEqual(block.footprint.width * block.footprint.depth, 800)
+            self.assertAlmostEqual(block.footprint.min_z, 50)
+
+    def test_missing_part(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mesh.write_3mf(os.path.join(temp_dir, "pin.3mf"), [("pin", box(3, 3, 10))])
+            kit_path = os.path.join(temp_dir, "kit.json")
+            with open(kit_path, "w") as kit_file:
+                json.dump({"bed": {"width": 100, "depth": 100},
+                           "plates": {"pla": {"pin": 5}, "petg": {"missing": 1}}}, kit_file)
+
+            with self.assertRaises(ValueError):
+                plate_packing.pack_kit(kit_path, temp_dir)
+            # None of the plates are written if any of the parts are missing
+            self.assertFalse(os.path.exists(os.path.join(temp_dir, "plates", "pla_1.3mf")))
+
+    def test_kit_parts_are_exported(self):
+        root_dir = os.path.join(os.path.dirname(__file__), "..")
+        _, groups = plate_packing.load_kit(os.path.join(root_dir, "configs", "kit.json"))
+        for quantities in groups.values():
+            for name in quantities:
+                part_dir = os.path.join(root_dir, "parts", name)
+                self.assertTrue(os.path.isdir(part_dir), name)
+                self.assertTrue(export_scheduler.is_part_directory(name), name)
+                # Sketches and assemblies are exported as dxf and f3d files, rather than 3mf
+                self.assertFalse(name.endswith("sketch") or name.endswith("assembly"), name)
+
+                with open(os.path.join(part_dir, name + ".py"), "r", encoding="utf-8") as script:
+                    tree = ast.parse(script.read())
+                for statement in tree.body:
+                    if isinstance(statement, ast.Assign) and any(
+                            isinstance(target, ast.Name) and target.id == "EXPORT" for target in statement.targets):
+                        self.assertTrue(ast.literal_eval(statement.value), name)
+
+
+if __name__ == "__main__":
+    unittest.main()
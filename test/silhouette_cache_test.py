@@ -0,0 +1,74 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import silhouette_cache
+from silhouette_cache import BodyGeometry
+
+
+def box_body(x=0.0, size=1.0):
+    vertices = [(x + dx * size, dy * size, dz * size) for dx in (0, 1) for dy in (0, 1) for dz in (0, 1)]
+    return BodyGeometry(6, 12, vertices)
+
+
+class SilhouetteCacheTest(unittest.TestCase):
+
+    def test_silhouette_key(self):
+        key = silhouette_cache.silhouette_key([box_body(), box_body(5)], (0, 0, 0), (0, 0, 1))
+
+        # the order of the bodies and their vertices doesn't matter
+        reordered = BodyGeometry(6, 12, reversed(box_body(5).vertices))
+        self.assertEqual(key, silhouette_cache.silhouette_key([reordered, box_body()], (0, 0, 0), (0, 0, 1)))
+
+        # nor does tiny numerical noise
+        noisy = BodyGeometry(6, 12, [(x + 1e-7, y - 1e-7, z) for x, y, z in box_body().vertices])
+        self.assertEqual(key, silhouette_cache.silhouette_key([noisy, box_body(5)], (0, 0, 0), (0, 0, 1)))
+
+        self.assertNotEqual(key, silhouette_cache.silhouette_key([box_body(), box_body(6)], (0, 0, 0), (0, 0, 1)))
+        self.assertNotEqual(key, silhouette_cache.silhouette_key([box_body()], (0, 0, 0), (0, 0, 1)))
+        self.assertNotEqual(
+            key, silhouette_cache.silhouette_key([BodyGeometry(7, 12, box_body().vertices), box_body(5)],
+                                                 (0, 0, 0), (0, 0, 1)))
+
+    def test_curved_bodies(self):
+        # Spheres and tori have no vertices, and the same number of faces and edges
+        sphere = BodyGeometry(1, 0, [], volume=4.18879, area=12.56637, surface_types=[4])
+        larger_sphere = BodyGeometry(1, 0, [], volume=33.51032, area=50.26548, surface_types=[4])
+        torus = BodyGeometry(1, 0, [], volume=4.18879, area=12.56637, surface_types=[5])
+        keys = {silhouette_cache.silhouette_key([body], (0, 0, 0), (0, 0, 1))
+                for body in (sphere, larger_sphere, torus)}
+        self.assertEqual(len(keys), 3)
+
+    def test_plane_key(self):
+        self.assertEqual(silhouette_cache.plane_key((0, 0, 1), (0, 0, 1)),
+                         silhouette_cache.plane_key((5, -3, 1), (0, 0, 2)))
+        self.assertNotEqual(silhouette_cache.plane_key((0, 0, 1), (0, 0, 1)),
+                            silhouette_cache.plane_key((0, 0, 2), (0, 0, 1)))
+        self.assertNotEqual(silhouette_cache.plane_key((0, 0, 0), (0, 0, 1)),
+                            silhouette_cache.plane_key((0, 0, 0), (0, 1, 0)))
+        self.assertEqual(silhouette_cache.plane_key((0, 0, -1e-9), (0, 0, 1)),
+                         silhouette_cache.plane_key((0, 0, 0), (0, 0, 1)))
+
+    def test_cache(self):
+        cache = silhouette_cache.SilhouetteCache()
+        self.assertIsNone(cache.get("key"))
+        cache.add("key", "silhouette")
+        self.assertEqual(cache.get("key"), "silhouette")
+        self.assertEqual(cache.get("key"), "silhouette")
+        self.assertEqual(cache.summary(), "1 silhouettes computed, 2 reused")
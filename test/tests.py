@@ -20,6 +20,25 @@ import unittest
 test_modules = [
     "finger_cluster_placement_test",
     "thumb_cluster_placement_test",
+    "placement_solver_test",
+    "geometry_test",
+    "disk_cache_test",
+    "export_manifest_test",
+    "export_scheduler_test",
+    "build_profiler_test",
+    "benchmark_test",
+    "interference_test",
+    "layout_test",
+    "fitting_test",
+    "thread_geometry_test",
+    "instancing_test",
+    "boolean_batching_test",
+    "silhouette_cache_test",
+    "name_index_test",
+    "face_index_test",
+    "mesh_test",
+    "thread_mesh_test",
+    "plate_packing_test",
 ]
 
 
@@ -0,0 +1,69 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# When run within fusion, this is a no-op, and the parity test below builds actual threads. Outside of fusion, the
+# parity test is skipped.
+import fake_fscad
+fake_fscad.install()
+
+from fscad.fscad import Cylinder, Threads
+
+import thread_geometry
+
+# The headless Threads sizes its result with the same formula as thread_geometry.threaded_radius, so comparing against
+# it would be meaningless.
+headless = Threads.__module__ == fake_fscad.__name__
+
+
+class ThreadGeometryTest(unittest.TestCase):
+
+    def test_thread_profile(self):
+        cross_section, pitch = thread_geometry.thread_profile()
+        self.assertEqual(pitch, 1.4)
+        expected = ((0, .1), (.6516127, .6), (.6516127, .8), (0, 1.3))
+        self.assertEqual(len(cross_section), len(expected))
+        for point, expected_point in zip(cross_section, expected):
+            self.assertAlmostEqual(point[0], expected_point[0], places=6)
+            self.assertAlmostEqual(point[1], expected_point[1], places=6)
+
+    def test_threaded_radius(self):
+        cross_section, _ = thread_geometry.thread_profile()
+        self.assertAlmostEqual(thread_geometry.thread_depth(cross_section), .6516127, places=6)
+        self.assertAlmostEqual(thread_geometry.threaded_radius(3.1, cross_section), 3.7516127, places=6)
+
+        cross_section, _ = thread_geometry.thread_profile(pitch=2, angle=45, flat_height=.5)
+        self.assertAlmostEqual(thread_geometry.threaded_radius(5, cross_section), 5.5, places=6)
+
+    @unittest.skipIf(headless, "Only meaningful within fusion, where Threads builds actual threads")
+    def test_threads_parity(self):
+        for radius in (2.8, 3.1, 5):
+            for profile in (thread_geometry.thread_profile(), thread_geometry.thread_profile(2, 45, .5)):
+                threads = Threads(Cylinder(10, radius), *profile)
+                self.assertAlmostEqual(
+                    threads.size().x / 2, thread_geometry.threaded_radius(radius, profile[0]), delta=.001)
+
+    def test_screw_base_parameters(self):
+        cross_section, _ = thread_geometry.thread_profile()
+        screw_nominal_radius, screw_radius_adjustment, screw_hole_radius_adjustment, base_min_radius, _ = \
+            thread_geometry.screw_base_parameters(cross_section)
+        self.assertAlmostEqual(
+            base_min_radius,
+            thread_geometry.threaded_radius(screw_nominal_radius + screw_hole_radius_adjustment, cross_section) + .8)
+        self.assertLess(screw_radius_adjustment, 0)
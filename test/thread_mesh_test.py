@@ -0,0 +1,89 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import math
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import thread_geometry
+import thread_mesh
+
+
+class ThreadMeshTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cross_section, self.pitch = thread_geometry.thread_profile()
+        self.depth = thread_geometry.thread_depth(self.cross_section)
+
+    def test_thread_offset(self):
+        self.assertAlmostEqual(thread_mesh.thread_offset(self.cross_section, self.pitch, 0), 0)
+        self.assertAlmostEqual(thread_mesh.thread_offset(self.cross_section, self.pitch, .7), self.depth)
+        self.assertAlmostEqual(thread_mesh.thread_offset(self.cross_section, self.pitch, .35), self.depth / 2)
+        # the offset repeats every pitch, including for negative positions
+        for position in (.2, .65, 1.1):
+            for turns in (-2, 1, 3):
+                self.assertAlmostEqual(
+                    thread_mesh.thread_offset(self.cross_section, self.pitch, position + turns * self.pitch),
+                    thread_mesh.thread_offset(self.cross_section, self.pitch, position))
+
+    def test_parts_are_watertight(self):
+        for name in thread_mesh.screw_support_part_names():
+            part = thread_mesh.screw_support_mesh(name, self.cross_section, self.pitch, segments=24,
+                                                  samples_per_pitch=8)
+            self.assertTrue(part.is_watertight(), name)
+            self.assertGreater(part.volume(), 0, name)
+
+    def test_screw_dimensions(self):
+        screw_nominal_radius, screw_radius_adjustment, _, _, _ = \
+            thread_geometry.screw_base_parameters(self.cross_section)
+        radius = screw_nominal_radius + screw_radius_adjustment
+        screw = thread_mesh.screw_mesh(7, radius, self.cross_section, self.pitch)
+
+        bounds_min, bounds_max = screw.bounds()
+        self.assertAlmostEqual(bounds_max[0], thread_geometry.threaded_radius(radius, self.cross_section), places=3)
+        self.assertAlmostEqual(bounds_min[2], 0)
+        self.assertAlmostEqual(bounds_max[2], 8.5)
+        # the threads add volume to the core cylinder, but less than a cylinder of the threaded radius
+        self.assertGreater(screw.volume(), math.pi * radius ** 2 * 7)
+        self.assertLess(screw.volume(), math.pi * (radius + self.depth) ** 2 * 8.5)
+
+    def test_screw_base_dimensions(self):
+        _, _, _, base_min_radius, _ = thread_geometry.screw_base_parameters(self.cross_section)
+        for flared_base in (True, False):
+            base = thread_mesh.screw_base_mesh(6, 3.1, base_min_radius, self.cross_section, self.pitch,
+                                               flared_base=flared_base)
+            bounds_min, bounds_max = base.bounds()
+            apothem = base_min_radius + (.5 if flared_base else 0)
+            self.assertAlmostEqual(bounds_max[1], apothem)
+            self.assertAlmostEqual(bounds_max[0], apothem / math.cos(math.pi / 6))
+            self.assertAlmostEqual(bounds_min[2], 0)
+            self.assertAlmostEqual(bounds_max[2], 6)
+
+        nut = thread_mesh.screw_support_mesh("screw_nut", self.cross_section, self.pitch)
+        bounds_min, bounds_max = nut.bounds()
+        self.assertAlmostEqual(bounds_min[2], 0)
+        self.assertAlmostEqual(bounds_max[2], 3)
+
+        with self.assertRaises(ValueError):
+            thread_mesh.screw_support_mesh("screw_3", self.cross_section, self.pitch)
+
+    def test_export(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            outputs = thread_mesh.export_screw_supports(temp_dir, ["screw_nut", "screw_7"])
+            self.assertEqual(outputs, ["screw_nut.3mf", "screw_7.3mf"])
+            self.assertEqual(sorted(os.listdir(temp_dir)), ["screw_7.3mf", "screw_nut.3mf"])
@@ -0,0 +1,79 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Analytic dimensions of the threads used for the screw supports.
+
+The thread cross-section is in the format used by fscad's Threads: a list of (x, y) points, where x is the distance
+outward from the cylindrical face being threaded, and y is the distance along the axis, within a single pitch. Since
+the threads only extend outward by the maximum x of the cross-section, the dimensions of a threaded cylinder can be
+calculated directly, rather than by building the threads and measuring them.
+
+This doesn't depend on fusion, so that it can be tested outside of fusion.
+"""
+
+import math
+from typing import Sequence, Tuple
+
+Profile = Tuple[Tuple[Tuple[float, float], ...], float]
+
+
+def thread_profile(pitch: float = 1.4, angle: float = 37.5, flat_height: float = .2) -> Profile:
+    """Returns the cross-section and pitch of a trapezoidal thread.
+
+    :param pitch: The distance along the axis between adjacent threads.
+    :param angle: The angle between the sloped sides of the thread and the axis, in degrees.
+    :param flat_height: The height of the flat parts at the root and crest of the thread.
+    :return: A tuple of (cross-section, pitch), as per the arguments of fscad's Threads.
+    """
+    sloped_side_height = (pitch - flat_height * 2) / 2
+    depth = sloped_side_height / math.tan(math.radians(angle))
+
+    return (((0, flat_height / 2),
+             (depth, flat_height / 2 + sloped_side_height),
+             (depth, flat_height / 2 + sloped_side_height + flat_height),
+             (0, pitch - flat_height / 2)), pitch)
+
+
+def thread_depth(cross_section: Sequence[Sequence[float]]) -> float:
+    """Returns how far the threads with the given cross-section extend out from the threaded face."""
+    return max(point[0] for point in cross_section)
+
+
+def threaded_radius(radius: float, cross_section: Sequence[Sequence[float]]) -> float:
+    """Returns the outer radius of a cylinder of the given radius, once it has been threaded.
+
+    This is half of the size of the threaded cylinder, i.e. Threads(Cylinder(height, radius), ...).size().x / 2
+    """
+    return radius + thread_depth(cross_section)
+
+
+def screw_base_parameters(cross_section: Sequence[Sequence[float]]) -> Tuple[float, float, float, float, float]:
+    """Returns the dimensions shared by the screws, screw bases and nuts of the screw supports.
+
+    :param cross_section: The cross-section of the threads.
+    :return: A tuple of (screw nominal radius, screw radius adjustment, screw hole radius adjustment, base minimum
+        radius, base clearance).
+    """
+    screw_nominal_radius = 3.0
+    screw_radius_adjustment = -.2
+    screw_hole_radius_adjustment = .1
+
+    # This is the same as the size of a threaded Cylinder of the screw hole's radius, without having to build one.
+    base_min_radius = threaded_radius(screw_nominal_radius + screw_hole_radius_adjustment, cross_section) + .8
+
+    base_clearance = .1
+
+    return (screw_nominal_radius, screw_radius_adjustment, screw_hole_radius_adjustment, base_min_radius,
+            base_clearance)
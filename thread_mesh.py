@@ -0,0 +1,269 @@
+# Copyright 2021 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# https://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Generates meshes of the threaded screw support parts directly, without building BRep threads in fusion.
+
+Threads is the most expensive operation in building the screws, screw bases and nuts, and fusion then has to mesh the
+threads again on export. But every one of these parts is a solid of revolution whose radius only depends on the angle
+and height: the thread cross-section (see thread_geometry) gives how far the threaded face extends outward at each
+position along a single pitch, and a helix is just that position advancing with the angle. So each part is generated
+as a stack of rings of vertices, which is watertight by construction.
+
+The rings are at constant heights, so the edges of the thread flats are approximated to within a fraction of the
+pitch, as set by samples_per_pitch. The screw base hexagons are exact, since their corners fall on ring vertices.
+
+The dimensions match screw_design, screw_base_design and screw_nut_design in lalboard.py. Run this module directly to
+write the meshes of the screw support parts to 3MF files:
+    python thread_mesh.py [export_dir]
+
+This doesn't depend on fusion, so that it can be run outside of fusion.
+"""
+
+import math
+import os
+import sys
+from typing import Callable, List, Sequence, Tuple
+
+import geometry
+import mesh
+import thread_geometry
+
+# The number of vertices in each ring. This must be a multiple of 6, so that the corners of the hexagons are exact.
+default_segments = 96
+
+# The number of rings for each pitch of the threads
+default_samples_per_pitch = 40
+
+# The radius of Lalboard.ball_magnet, which sits in the top of each screw
+ball_magnet_radius = 2.5
+
+# The lengths of the exported screw support parts, by part name
+screw_lengths = {"screw_7": 7, "screw_11": 11}
+screw_base_lengths = {"screw_base_4": 4, "screw_base_6": 6, "screw_base_8": 8, "screw_base_14": 14, "screw_base_20": 20}
+
+Ring = List[Tuple[float, float, float]]
+
+
+def thread_offset(cross_section: Sequence[Sequence[float]], pitch: float, position: float) -> float:
+    """Returns how far the threads extend out from the threaded face, at the given position along the axis.
+
+    :param cross_section: The thread cross-section, as per thread_geometry.thread_profile.
+    :param pitch: The pitch of the threads.
+    :param position: The position along the axis, relative to the start of the threads.
+    """
+    position %= pitch
+    points = sorted(cross_section, key=lambda point: point[1])
+    # wrap the cross-section around, so that every position is between 2 points
+    points = [(points[-1][0], points[-1][1] - pitch)] + points + [(points[0][0], points[0][1] + pitch)]
+    for start, end in zip(points, points[1:]):
+        if start[1] <= position <= end[1]:
+            if end[1] == start[1]:
+                return max(start[0], end[0])
+            return start[0] + (end[0] - start[0]) * (position - start[1]) / (end[1] - start[1])
+    return 0.0
+
+
+def _angles(segments: int) -> List[float]:
+    return [math.pi * 2 * index / segments for index in range(segments)]
+
+
+def _ring(z: float, radius: Callable[[float], float], segments: int) -> Ring:
+    return [(radius(angle) * math.cos(angle), radius(angle) * math.sin(angle), z) for angle in _angles(segments)]
+
+
+def _circle(z: float, radius: float, segments: int) -> Ring:
+    return _ring(z, lambda _: radius, segments)
+
+
+def _hexagon(z: float, apothem: float, segments: int) -> Ring:
+    """A hexagon with a corner on the x axis, like a RegularPolygon(6, apothem, is_outer_radius=False)."""
+    sector = math.pi / 3
+    return _ring(z, lambda angle: apothem / math.cos(angle % sector - sector / 2), segments)
+
+
+def _threaded_rings(length: float, radius: float, cross_section, pitch: float, segments: int,
+                    samples_per_pitch: int, reverse_axis=False) -> List[Ring]:
+    """Returns the rings of a threaded face, from the bottom to the top.
+
+    The threads are right-handed. reverse_axis starts the threads at the top rather than the bottom, like Threads'
+    reverse_axis.
+    """
+    count = max(1, int(math.ceil(length / pitch * samples_per_pitch)))
+    rings = []
+    for index in range(count + 1):
+        z = length * index / count
+        if reverse_axis:
+            rings.append(_ring(z, lambda angle: radius + thread_offset(
+                cross_section, pitch, length - z + angle / (math.pi * 2) * pitch), segments))
+        else:
+            rings.append(_ring(z, lambda angle: radius + thread_offset(
+                cross_section, pitch, z - angle / (math.pi * 2) * pitch), segments))
+    return rings
+
+
+def _add_rings(result: mesh.Mesh, rings: Sequence[Ring]) -> List[List[int]]:
+    return [[result.add_vertex(point) for point in ring] for ring in rings]
+
+
+def _add_side(result: mesh.Mesh, rings: Sequence[List[int]], inward=False):
+    """Adds the faces between each pair of consecutive rings, facing outward from the axis, or inward."""
+    for lower, upper in zip(rings, rings[1:]):
+        count = len(lower)
+        for index in range(count):
+            following = (index + 1) % count
+            if inward:
+                result.add_quad(lower[index], upper[index], upper[following], lower[following])
+            else:
+                result.add_quad(lower[index], lower[following], upper[following], upper[index])
+
+
+def _add_cap(result: mesh.Mesh, ring: List[int], center: Sequence[float], top: bool):
+    center_index = result.add_vertex(center)
+    count = len(ring)
+    for index in range(count):
+        following = (index + 1) % count
+        if top:
+            result.add_triangle(center_index, ring[index], ring[following])
+        else:
+            result.add_triangle(center_index, ring[following], ring[index])
+
+
+def _add_annulus(result: mesh.Mesh, outer: List[int], inner: List[int], top: bool):
+    count = len(outer)
+    for index in range(count):
+        following = (index + 1) % count
+        if top:
+            result.add_quad(outer[index], outer[following], inner[following], inner[index])
+        else:
+            result.add_quad(outer[index], inner[index], inner[following], outer[following])
+
+
+def screw_mesh(length: float, radius: float, cross_section, pitch: float, ball_radius: float = ball_magnet_radius,
+               segments: int = default_segments, samples_per_pitch: int = default_samples_per_pitch) -> mesh.Mesh:
+    """Returns the mesh of a screw, as per Lalboard.screw_design.
+
+    This is a threaded rod, topped by a tapered neck with a spherical seat for the ball magnet.
+
+    :param length: The length of the threaded part of the screw.
+    :param radius: The radius of the screw, before it's threaded.
+    """
+    neck_height = 1.5
+    # The ball sits 1/8 of its diameter down into the neck
+    ball_depth = ball_radius / 4
+    seat_radius = min(radius, math.sqrt(ball_radius ** 2 - (ball_radius - ball_depth) ** 2))
+    neck_top = length + neck_height
+    ball_center = neck_top - ball_depth + ball_radius
+
+    rings = _threaded_rings(length, radius, cross_section, pitch, segments, samples_per_pitch)
+    rings.append(_circle(length, radius, segments))
+    rings.append(_circle(neck_top, seat_radius + .45, segments))
+    seat_steps = max(2, segments // 8)
+    for step in range(seat_steps, 0, -1):
+        seat_ring_radius = seat_radius * step / seat_steps
+        rings.append(_circle(ball_center - math.sqrt(ball_radius ** 2 - seat_ring_radius ** 2), seat_ring_radius,
+                             segments))
+
+    result = mesh.Mesh()
+    indices = _add_rings(result, rings)
+    _add_cap(result, indices[0], (0, 0, 0), top=False)
+    _add_side(result, indices)
+    _add_cap(result, indices[-1], (0, 0, ball_center - ball_radius), top=True)
+    return result
+
+
+def screw_base_mesh(length: float, hole_radius: float, base_min_radius: float, cross_section, pitch: float,
+                    flared_base=True, segments: int = default_segments,
+                    samples_per_pitch: int = default_samples_per_pitch) -> mesh.Mesh:
+    """Returns the mesh of a screw base, as per Lalboard.screw_base_design.
+
+    This is a hexagonal prism with a threaded hole through its axis, and optionally a flare around the bottom.
+
+    :param length: The length of the screw base.
+    :param hole_radius: The radius of the hole, before it's threaded.
+    :param base_min_radius: The apothem of the hexagon.
+    """
+    if flared_base:
+        outer_rings = [
+            _hexagon(0, base_min_radius + .5, segments),
+            _hexagon(1, base_min_radius + .5, segments),
+            _hexagon(2, base_min_radius, segments),
+            _hexagon(length, base_min_radius, segments)]
+    else:
+        outer_rings = [_hexagon(0, base_min_radius, segments), _hexagon(length, base_min_radius, segments)]
+    inner_rings = _threaded_rings(
+        length, hole_radius, cross_section, pitch, segments, samples_per_pitch, reverse_axis=True)
+
+    result = mesh.Mesh()
+    outer = _add_rings(result, outer_rings)
+    inner = _add_rings(result, inner_rings)
+    _add_annulus(result, outer[0], inner[0], top=False)
+    _add_side(result, outer)
+    _add_side(result, inner, inward=True)
+    _add_annulus(result, outer[-1], inner[-1], top=True)
+    return result
+
+
+def screw_nut_mesh(hole_radius: float, base_min_radius: float, cross_section, pitch: float,
+                   segments: int = default_segments, samples_per_pitch: int = default_samples_per_pitch) -> mesh.Mesh:
+    """Returns the mesh of a nut, as per Lalboard.screw_nut_design."""
+    length = 3
+    nut = screw_base_mesh(length, hole_radius, base_min_radius, cross_section, pitch, flared_base=False,
+                          segments=segments, samples_per_pitch=samples_per_pitch)
+    return nut.transform(geometry.rotation_matrix(math.pi, (1, 0, 0), (0, 0, length / 2)))
+
+
+def screw_support_part_names() -> List[str]:
+    return [*screw_lengths, *screw_base_lengths, "screw_nut"]
+
+
+def screw_support_mesh(part_name: str, cross_section, pitch: float, segments: int = default_segments,
+                       samples_per_pitch: int = default_samples_per_pitch) -> mesh.Mesh:
+    """Returns the mesh of one of the exported screw support parts, e.g. "screw_7" or "screw_nut"."""
+    screw_nominal_radius, screw_radius_adjustment, screw_hole_radius_adjustment, base_min_radius, _ = \
+        thread_geometry.screw_base_parameters(cross_section)
+    hole_radius = screw_nominal_radius + screw_hole_radius_adjustment
+
+    if part_name in screw_lengths:
+        return screw_mesh(screw_lengths[part_name], screw_nominal_radius + screw_radius_adjustment, cross_section,
+                          pitch, segments=segments, samples_per_pitch=samples_per_pitch)
+    if part_name in screw_base_lengths:
+        return screw_base_mesh(screw_base_lengths[part_name], hole_radius, base_min_radius, cross_section, pitch,
+                               segments=segments, samples_per_pitch=samples_per_pitch)
+    if part_name == "screw_nut":
+        return screw_nut_mesh(hole_radius, base_min_radius, cross_section, pitch,
+                              segments=segments, samples_per_pitch=samples_per_pitch)
+    raise ValueError("Not a screw support part: %s" % part_name)
+
+
+def export_screw_supports(export_dir: str, part_names: Sequence[str] = ()) -> List[str]:
+    """Writes a 3MF file for each of the screw support parts, using the default thread profile.
+
+    :param export_dir: The directory to write the files to.
+    :param part_names: The names of the parts to write. An empty list writes all of them.
+    :return: The names of the written files, relative to export_dir.
+    """
+    outputs = []
+    for name in part_names or screw_support_part_names():
+        mesh.write_3mf(os.path.join(export_dir, name + ".3mf"),
+                       [(name, screw_support_mesh(name, *thread_geometry.thread_profile()))])
+        outputs.append(name + ".3mf")
+    return outputs
+
+
+if __name__ == "__main__":
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.realpath(__file__)), "stls")
+    os.makedirs(target_dir, exist_ok=True)
+    for output in export_screw_supports(target_dir):
+        print("Wrote " + os.path.join(target_dir, output))